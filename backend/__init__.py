@@ -0,0 +1,75 @@
+"""
+Aurora EchoTales - Backend
+==========================
+Pacote principal do backend: configuração, logging, recursos e modelos.
+
+Só ``config`` é importado junto com o pacote; os demais nomes são
+resolvidos no primeiro acesso (PEP 562), para que ``import backend``
+não carregue NumPy, psutil e afins antes de serem necessários. As
+bibliotecas de IA (torch, transformers, diffusers, whisper, TTS,
+llama.cpp) só são importadas pelos loaders, quando o estágio carrega
+o modelo.
+"""
+
+import importlib
+
+from backend import config
+
+__version__ = "0.1.0-alpha"
+
+_LAZY = {
+    "AuroraLogger": "backend.utils.logger",
+    "get_logger": "backend.utils.logger",
+    "ResourceManager": "backend.utils.resource_manager",
+    "ResourceSnapshot": "backend.utils.resource_manager",
+    "get_resource_manager": "backend.utils.resource_manager",
+    "ModelManager": "backend.core.model_manager",
+    "get_model_manager": "backend.core.model_manager",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+def initialize_backend():
+    """
+    Inicializa diretórios, logger e monitor de recursos.
+
+    Returns:
+        tuple: (logger, resource_manager)
+    """
+    from backend.utils.logger import get_logger
+    from backend.utils.resource_manager import get_resource_manager
+
+    config.ensure_directories()
+    logger = get_logger()
+    rm = get_resource_manager()
+
+    logger.log_section("INICIALIZAÇÃO DO BACKEND")
+    snapshot = rm.get_snapshot()
+    logger.info("🎮 GPU disponível: %s", "sim" if snapshot.gpu_available else "não")
+    logger.log_resource_usage(snapshot.vram_used_gb, snapshot.cpu_percent, snapshot.ram_used_gb)
+    logger.info("✅ Backend inicializado")
+    return logger, rm
+
+
+__all__ = [
+    "initialize_backend",
+    "AuroraLogger",
+    "get_logger",
+    "ResourceManager",
+    "ResourceSnapshot",
+    "get_resource_manager",
+    "ModelManager",
+    "get_model_manager",
+]
@@ -0,0 +1,5 @@
+"""
+API REST/WebSocket - Aurora EchoTales
+======================================
+Schemas e rotas consumidos pelo frontend (``frontend/src/services/api.ts``).
+"""
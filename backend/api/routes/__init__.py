@@ -0,0 +1,19 @@
+"""
+Rotas da API - Aurora EchoTales
+================================
+Cada módulo expõe um ``router`` incluído em ``backend.main``.
+"""
+
+
+def close_stream(stream, iterator):
+    """
+    Cancela um stream de geração (história ou narração) ao fim da rota.
+
+    Com o cliente desconectado, um ``next(iterator)`` pode ainda estar
+    rodando no threadpool: fechar o gerador nesse momento levanta
+    ``ValueError: generator already executing``. O cancelamento basta para
+    esse ``next`` retornar; o gerador só é fechado aqui se estiver parado.
+    """
+    stream.close()
+    if not iterator.gi_running:
+        iterator.close()
@@ -0,0 +1,153 @@
+"""
+Rotas de Áudio - Aurora EchoTales
+=================================
+``POST /api/analyze-audio``: transcrição e emoção de uma gravação.
+
+O corpo é lido em blocos à medida que chega e decodificado no caminho
+(``StreamingAudioDecoder``), sem guardar o arquivo inteiro: aceita
+``multipart/form-data`` com o campo ``audio`` (como o frontend envia) ou
+o áudio cru com ``Content-Type: audio/*``.
+"""
+
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+
+from backend import config
+from backend.models.audio_analyzer import get_audio_analyzer
+
+router = APIRouter()
+
+UPLOAD_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {"schema": {
+                "type": "object",
+                "properties": {"audio": {"type": "string", "format": "binary"}},
+                "required": ["audio"],
+            }},
+            "audio/*": {"schema": {"type": "string", "format": "binary"}},
+        },
+    },
+}
+
+
+@router.post("/api/analyze-audio", openapi_extra=UPLOAD_SCHEMA)
+async def analyze_audio(request: Request):
+    """Analisa a gravação enviada pelo ``useAudioRecorder``."""
+    from backend.utils.audio_stream import (
+        AudioDecodeError,
+        MultipartAudioReader,
+        StreamingAudioDecoder,
+    )
+
+    content_type = request.headers.get("content-type", "")
+    decoder = StreamingAudioDecoder()
+    try:
+        reader = (MultipartAudioReader(content_type, decoder)
+                  if content_type.startswith("multipart/form-data") else decoder)
+        waited = 0.0
+        received = time.perf_counter()
+        async for chunk in request.stream():
+            waited += time.perf_counter() - received
+            if chunk:
+                await run_in_threadpool(reader.feed, chunk)
+            received = time.perf_counter()
+        decoder.timings.upload = waited
+        decoded = await run_in_threadpool(reader.finish)
+        result = await run_in_threadpool(get_audio_analyzer().analyze_decoded, decoded)
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Áudio inválido: {e}")
+    finally:
+        # Cliente desconectado (ClientDisconnect) ou qualquer outra falha: sem ffmpeg órfão
+        decoder.abort()
+    return {"success": True, "data": result}
+
+
+@router.get("/api/metrics/live-audio")
+async def live_audio_metrics():
+    """Sessões ao vivo ativas, recusadas e áudio descartado por falta de vazão."""
+    from backend.models.live_analysis import get_live_analysis
+
+    return {"success": True, "data": get_live_analysis().get_stats()}
+
+
+async def _live_updates(websocket: WebSocket, session, wake: asyncio.Event, stopping: asyncio.Event):
+    """Roda uma passada a cada ``LIVE_HOP_S`` de áudio novo e envia o resultado."""
+    while True:
+        await wake.wait()
+        wake.clear()
+        if stopping.is_set():
+            return
+        for message in await run_in_threadpool(session.step):
+            await websocket.send_json(message)
+
+
+@router.websocket("/ws/analyze-audio")
+async def analyze_audio_ws(websocket: WebSocket):
+    """
+    Análise enquanto o usuário fala.
+
+    Protocolo:
+        cliente → {"type": "start", "sample_rate": 48000, "encoding": "pcm_f32le"|"pcm_s16le"}
+                → blocos binários de PCM mono (repetido)
+                → {"type": "stop"}
+        servidor → {"type": "ready", "session_id", "hop_s"}
+                 → {"type": "partial", "text", "transcript", "aggregated_emotion"}
+                 → {"type": "segment", "start", "end", "text", "emotion", "transcript",
+                    "aggregated_emotion"}
+                 → {"type": "final", "data": {...AudioUploadResponse}} ou {"type": "error", "error"}
+    Sem vaga (``LIVE_MAX_SESSIONS``) a conexão fecha com o código 1013.
+    """
+    from backend.models.live_analysis import LiveSessionLimitError, get_live_analysis
+
+    await websocket.accept()
+    try:
+        message = await websocket.receive_json()
+        try:
+            session = get_live_analysis().open(int(message.get("sample_rate", config.STT_SAMPLE_RATE)),
+                                               message.get("encoding", "pcm_f32le"))
+        except LiveSessionLimitError as e:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close(code=1013)
+            return
+        except (TypeError, ValueError) as e:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close(code=1003)
+            return
+
+        wake, stopping = asyncio.Event(), asyncio.Event()
+        updates = asyncio.create_task(_live_updates(websocket, session, wake, stopping))
+        try:
+            await websocket.send_json({"type": "ready", "session_id": session.session_id,
+                                       "hop_s": config.LIVE_HOP_S})
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                if message.get("bytes"):
+                    session.feed(message["bytes"])
+                    if session.ready:
+                        wake.set()
+                elif message.get("text") and json.loads(message["text"]).get("type") == "stop":
+                    break
+            # A passada em andamento termina; só a última janela fica para depois do stop
+            stopping.set()
+            wake.set()
+            await updates
+            result = await run_in_threadpool(session.finish)
+            await websocket.send_json({"type": "final", "data": result})
+        except (RuntimeError, ValueError) as e:
+            await websocket.send_json({"type": "error", "error": str(e)})
+        finally:
+            stopping.set()
+            wake.set()
+            updates.cancel()
+            session.close()
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,27 @@
+"""
+Rotas de Emoção - Aurora EchoTales
+==================================
+``POST /api/analyze-text`` (micro-batching) e métricas do analisador.
+"""
+
+from fastapi import APIRouter, HTTPException
+
+from backend.api.schemas import TextEmotionRequest
+from backend.core.emotion_analyzer import get_text_emotion_analyzer
+
+router = APIRouter()
+
+
+@router.post("/api/analyze-text")
+async def analyze_text(request: TextEmotionRequest):
+    """Emoção agregada de um texto."""
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Texto vazio")
+    emotion = await get_text_emotion_analyzer().analyze_async(request.text)
+    return {"success": True, "data": emotion}
+
+
+@router.get("/api/metrics/text-emotion")
+async def text_emotion_metrics():
+    """Vazão, tamanho médio de lote e tempo em fila."""
+    return {"success": True, "data": get_text_emotion_analyzer().get_stats()}
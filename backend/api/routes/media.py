@@ -0,0 +1,117 @@
+"""
+Rotas de Mídia - Aurora EchoTales
+=================================
+Entrega dos áudios gerados (narração, música, experiências) guardados no
+``AudioStore``:
+
+    GET|HEAD /api/media/{id}?format=auto|wav|opus|mp3
+    GET      /api/media/{id}/info
+    GET      /api/metrics/media          (codificações, taxa de compressão)
+
+Respostas com ``Accept-Ranges``/``Range`` (206, 416, ``If-Range``) para o
+player buscar trechos sem baixar tudo, ``ETag`` forte (SHA-256 do arquivo)
+e requisições condicionais (``If-None-Match``/``If-Modified-Since`` → 304).
+Com ``format=auto`` (padrão) vai a versão comprimida, ou o WAV enquanto a
+codificação não termina.
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from backend import config
+from backend.utils.audio_store import get_audio_store, media_type
+
+router = APIRouter()
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Comparação fraca do ``If-None-Match`` (RFC 9110 §13.1.2)."""
+    if header.strip() == "*":
+        return True
+    tags = (t.strip().removeprefix("W/") for t in header.split(","))
+    return etag.removeprefix("W/") in tags
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def file_response(request: Request, path: Path, media: str, etag: str,
+                  cache_control: str = "no-cache", headers: dict = None) -> Response:
+    """
+    ``FileResponse`` (que já trata ``Range`` e ``If-Range``) com ETag
+    próprio e resposta 304 para requisições condicionais.
+    """
+    stat = path.stat()
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes",
+               "Last-Modified": formatdate(stat.st_mtime, usegmt=True), **(headers or {})}
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media, headers=headers, stat_result=stat)
+
+
+def stored_audio_response(audio_id: str, content: bytes, headers: dict,
+                          delivery: str = "wav") -> Response:
+    """
+    Registra um WAV gerado no ``AudioStore`` (a versão comprimida sai em
+    segundo plano) e responde com o próprio WAV ou, com ``delivery="url"``,
+    com o endereço em ``/api/media``. Chamar fora do event loop.
+    """
+    store = get_audio_store()
+    asset = store.put(audio_id, content)
+    url = store.url(audio_id)
+    headers = {**headers, "X-Audio-Id": audio_id, "X-Audio-URL": url}
+    if delivery == "url":
+        return JSONResponse({"success": True, "data": {
+            "audio_id": audio_id,
+            "url": url,
+            "wav_url": f"{url}?format=wav",
+            "duration": asset.duration,
+            "sample_rate": asset.sample_rate,
+            "meta": headers,
+        }})
+    return Response(content=content, media_type="audio/wav", headers=headers)
+
+
+@router.api_route("/api/media/{asset_id}", methods=["GET", "HEAD"])
+async def get_media(asset_id: str, request: Request,
+                    format: Literal["auto", "wav", "opus", "mp3"] = "auto"):
+    """Áudio armazenado, com suporte a Range e cache condicional."""
+    store = get_audio_store()
+    variant = await run_in_threadpool(store.resolve, asset_id, format,
+                                      config.AUDIO_ENCODE_WAIT_S)
+    if variant is None:
+        raise HTTPException(status_code=404, detail="Áudio não encontrado")
+    # Uma variante explícita nunca muda; "auto" pode passar de WAV a comprimido
+    cache_control = "no-cache" if format == "auto" else "public, max-age=31536000, immutable"
+    return file_response(request, store.path(variant), media_type(variant.format), variant.etag,
+                         cache_control, {"X-Audio-Format": variant.format})
+
+
+@router.get("/api/media/{asset_id}/info")
+async def get_media_info(asset_id: str):
+    """Variantes disponíveis, tamanhos e duração."""
+    asset = await run_in_threadpool(get_audio_store().get, asset_id)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Áudio não encontrado")
+    return {"success": True, "data": asset.to_dict()}
+
+
+@router.get("/api/metrics/media")
+async def media_metrics():
+    """Codificações feitas, pendentes e taxa de compressão."""
+    return {"success": True, "data": get_audio_store().get_stats()}
@@ -0,0 +1,65 @@
+"""
+Rotas de Métricas - Aurora EchoTales
+====================================
+Recursos amostrados em segundo plano (nenhuma rota consulta o sistema):
+
+    GET /metrics                   formato de texto do Prometheus
+    GET /api/metrics/resources     histórico em JSON + picos por span
+    GET /api/metrics/workers       fila, jobs e reinícios do pool de workers
+    GET /api/metrics/logging       fila de logs e registros descartados
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+
+from backend import config
+from backend.core import worker_pool
+from backend.utils.logger import get_logger
+from backend.utils.resource_sampler import get_resource_sampler
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Últimos valores e picos por span (e o pool de workers, se ativo) para o Prometheus."""
+    text = get_resource_sampler().prometheus()
+    if worker_pool._worker_pool is not None:
+        text += worker_pool._worker_pool.prometheus()
+    return PlainTextResponse(text, media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/api/metrics/resources")
+async def resource_history(seconds: Optional[float] = Query(None, gt=0)):
+    """Amostras (opcionalmente das últimas ``seconds``), spans recentes e picos."""
+    sampler = get_resource_sampler()
+    latest = sampler.latest()
+    return {
+        "success": True,
+        "data": {
+            "interval_s": sampler.interval_s,
+            "running": sampler.running,
+            "latest": latest.to_dict() if latest is not None else None,
+            "history": sampler.history(seconds),
+            "spans": sampler.span_stats(),
+            "recent_spans": sampler.recent_spans(),
+        },
+    }
+
+
+@router.get("/api/metrics/workers")
+async def worker_metrics():
+    """Estado de cada worker do pool (vazio com o pool desligado)."""
+    pool = worker_pool._worker_pool
+    data = pool.get_stats() if pool is not None else {"running": False, "stages": {}}
+    return {"success": True, "data": {"enabled": config.WORKER_POOL_ENABLED, **data}}
+
+
+@router.get("/api/metrics/logging")
+async def logging_metrics():
+    """Registros enfileirados, pendentes e descartados (fila cheia) do logger."""
+    return {"success": True, "data": get_logger().get_stats()}
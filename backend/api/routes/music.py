@@ -0,0 +1,95 @@
+"""
+Rotas de Música - Aurora EchoTales
+==================================
+``POST /api/generate-music``: trilha WAV com a duração pedida
+(``mode="fast"`` para o scheduler de poucos passos) e
+``GET /api/metrics/music``: lotes, cache de prompts, perfil de memória
+e acertos da biblioteca de stems.
+
+Sem ``prompt`` livre nem ``seed``, a trilha sai da biblioteca de stems
+(milissegundos) quando a célula estilo/humor/tempo foi pré-renderizada.
+
+Respostas são guardadas no cache de artefatos; sem ``seed``, a mesma
+combinação de parâmetros devolve a mesma trilha. A trilha também vai
+para o ``AudioStore`` (MP3 em segundo plano, servido em ``X-Audio-URL``
+com ``Range``); ``delivery="url"`` devolve só esse endereço.
+"""
+
+import uuid
+
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+
+from backend import config
+from backend.api.routes.media import stored_audio_response
+from backend.api.schemas import MusicRequest
+from backend.models.music_generator import get_music_generator, music_model_id
+from backend.models.stem_library import get_stem_library
+from backend.utils.artifact_cache import get_artifact_cache, make_cache_key
+from backend.utils.audio_utils import encode_wav
+
+router = APIRouter()
+
+
+def _model_id(request: MusicRequest) -> dict:
+    """Tudo que, além da requisição, altera o áudio (inclusive o stem da biblioteca, se usado)."""
+    model = music_model_id()
+    if config.MUSIC_STEM_LIBRARY_ENABLED:
+        params = request.params
+        entry = get_stem_library().entry_for(params.style, params.mood, params.tempo,
+                                             prompt=request.prompt, seed=request.seed)
+        model["stem"] = entry.fingerprint if entry is not None else None
+    return model
+
+
+def _generate(request: MusicRequest):
+    params = request.params
+    result = get_music_generator().generate(
+        style=params.style,
+        mood=params.mood,
+        tempo=params.tempo,
+        intensity=params.intensity,
+        duration=request.duration,
+        loop=request.loop,
+        seed=request.seed,
+        mode=request.mode,
+        prompt=request.prompt,
+    )
+    headers = {
+        "X-Audio-Duration": f"{result.duration:.3f}",
+        "X-Generation-Time": f"{result.generation_time + result.conversion_time:.3f}",
+        "X-Conversion-Time": f"{result.conversion_time:.3f}",
+        "X-Windows": str(result.windows),
+        "X-Scheduler-Mode": result.mode,
+        "X-Music-Source": result.source,
+    }
+    return encode_wav(result.audio, result.sample_rate), headers
+
+
+@router.post("/api/generate-music")
+async def generate_music(request: MusicRequest):
+    """Gera música a partir de estilo, humor e tempo."""
+    if not config.ARTIFACT_CACHE_ENABLED:
+        content, headers = await run_in_threadpool(_generate, request)
+        return await run_in_threadpool(stored_audio_response, uuid.uuid4().hex, content,
+                                       headers, request.delivery)
+
+    key = make_cache_key(
+        "generate-music",
+        params={**request.params.model_dump(), "duration": request.duration, "loop": request.loop,
+                "mode": request.mode or config.MUSIC_SCHEDULER_MODE},
+        text=request.prompt,
+        seed=request.seed,
+        model=_model_id(request),
+    )
+    artifact = await run_in_threadpool(
+        get_artifact_cache().get_or_create, key, lambda: _generate(request), "generate-music")
+    return await run_in_threadpool(stored_audio_response, key, artifact.data,
+                                   {**artifact.meta, "X-Cache": artifact.status.upper()},
+                                   request.delivery)
+
+
+@router.get("/api/metrics/music")
+async def music_metrics():
+    """Faixas por lote, passadas da UNet, acertos do cache de embeddings e perfil de memória."""
+    return {"success": True, "data": await run_in_threadpool(get_music_generator().get_stats)}
@@ -0,0 +1,77 @@
+"""
+Rotas do Pipeline - Aurora EchoTales
+====================================
+Experiência completa (história + narração + trilha mixadas) em uma
+requisição, executada pelo orquestrador de estágios.
+
+    POST /api/create-experience
+    GET  /api/pipeline/runs/{run_id}/trace   (``?format=chrome`` para chrome://tracing)
+    GET  /api/pipeline/runs/{run_id}/audio   (WAV; versão Opus em ``media_url``)
+"""
+
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from backend.api.routes.media import file_response
+from backend.api.schemas import ExperienceRequest
+from backend.core.pipeline import PipelineError, get_orchestrator
+from backend.models.experience import get_experience_pipeline
+from backend.utils.audio_store import get_audio_store
+
+router = APIRouter()
+
+
+@router.post("/api/create-experience")
+async def create_experience(request: ExperienceRequest):
+    """Gera história, narração e trilha, sobrepondo os estágios independentes."""
+    pipeline = get_experience_pipeline()
+    try:
+        result = await run_in_threadpool(
+            pipeline.run,
+            user_prompt=request.user_prompt,
+            emotions=request.emotions,
+            story_params=request.params.model_dump(),
+            music_style=request.music_style,
+            language=request.language,
+        )
+    except PipelineError as e:
+        raise HTTPException(status_code=500, detail={
+            "stage": e.stage, "error": str(e.error), "run_id": e.trace.run_id,
+        })
+    store = get_audio_store()
+    await run_in_threadpool(store.put, result.run_id, result.audio_path.read_bytes())
+
+    return {
+        "success": True,
+        "data": {
+            "run_id": result.run_id,
+            "story_id": result.story_id,
+            "text": result.text,
+            "emotion": result.emotion,
+            "audio_url": f"/api/pipeline/runs/{result.run_id}/audio",
+            "media_url": store.url(result.run_id),
+            "duration": result.audio_seconds,
+            "trace": result.trace.summary(),
+        },
+    }
+
+
+@router.get("/api/pipeline/runs/{run_id}/trace")
+async def get_run_trace(run_id: str, format: str = "json"):
+    """Linha do tempo dos estágios de uma execução recente."""
+    trace = get_orchestrator().get_trace(run_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    if format == "chrome":
+        return trace.to_chrome_trace()
+    return {"success": True, "data": trace.to_dict()}
+
+
+@router.get("/api/pipeline/runs/{run_id}/audio")
+async def get_run_audio(run_id: str, request: Request):
+    """Áudio mixado de uma experiência (WAV, com Range e ETag)."""
+    path = get_experience_pipeline().output_dir / f"{run_id}.wav"
+    if not run_id.isalnum() or not path.exists():
+        raise HTTPException(status_code=404, detail="Áudio não encontrado")
+    stat = path.stat()
+    return file_response(request, path, "audio/wav", f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"')
@@ -0,0 +1,316 @@
+"""
+Rotas de Histórias - Aurora EchoTales
+=====================================
+Geração (``POST /api/generate-story``), continuação interativa
+(``POST /api/stories/{id}/continue``) e consulta das histórias salvas
+(``GET /api/stories``: galeria paginada com filtros e busca).
+
+``POST /api/stories/{id}/render`` gera o áudio (narração + trilha) por
+parágrafo: depois de uma continuação, só os parágrafos novos passam
+pelos modelos e o arquivo final é remontado a partir dos segmentos.
+
+Variantes em streaming entregam o texto enquanto o modelo gera:
+    - SSE: ``POST /api/generate-story/stream`` e
+      ``POST /api/stories/{id}/continue/stream`` (eventos ``start``,
+      ``token``, ``end`` ou ``error``)
+    - ``WS /ws/generate-story``: mesmas mensagens em JSON; o cliente
+      pode enviar ``{"type": "cancel"}`` a qualquer momento
+Desconectar ou cancelar interrompe a decodificação e libera o modelo.
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from backend import config
+from backend.api.routes import close_stream
+from backend.api.schemas import ContinueStoryRequest, StoryRenderRequest, StoryRequest
+from backend.models.story_generator import get_story_generator
+from backend.models.story_render import get_story_renderer
+from backend.utils.artifact_cache import get_artifact_cache, make_cache_key
+
+router = APIRouter()
+
+
+def _cache_key(request: StoryRequest) -> str:
+    return make_cache_key("generate-story", params=request.params, text=request.user_prompt,
+                          model={**config.MODEL_CONFIGS["story"],
+                                 "emotions": request.emotions,
+                                 "max_tokens": config.STORY_MAX_TOKENS})
+
+
+def _generate(request: StoryRequest):
+    params = request.params
+    result = get_story_generator().create(
+        user_prompt=request.user_prompt,
+        emotions=request.emotions,
+        temperature=params.temperature,
+        creativity=params.creativity,
+        emotion_influence=params.emotion_influence,
+    )
+    return result.text.encode("utf-8"), {"story_id": result.story_id,
+                                         "generation_time": result.generation_time}
+
+
+@router.post("/api/generate-story")
+async def generate_story(request: StoryRequest):
+    """Gera o começo de uma história adaptada à emoção do ouvinte."""
+    generator = get_story_generator()
+    emotion_adapted = bool(request.emotions) and request.params.emotion_influence > 0
+
+    if config.ARTIFACT_CACHE_ENABLED:
+        artifact = await run_in_threadpool(get_artifact_cache().get_or_create, _cache_key(request),
+                                           lambda: _generate(request), "generate-story")
+        text = artifact.data.decode("utf-8")
+        story_id = artifact.meta["story_id"]
+        if artifact.hit:
+            # Mesmo texto, história nova: o estado KV é reconstruído na 1ª continuação
+            story_id = generator.adopt(text, request.user_prompt, request.emotions,
+                                       request.params.emotion_influence).story_id
+        generation_time = artifact.meta["generation_time"] if not artifact.hit else 0.0
+    else:
+        data, meta = await run_in_threadpool(_generate, request)
+        text, story_id, generation_time = data.decode("utf-8"), meta["story_id"], meta["generation_time"]
+
+    return {"success": True, "data": {
+        "story_id": story_id,
+        "text": text,
+        "story": text,
+        "emotion_adapted": emotion_adapted,
+        "generation_time": generation_time,
+    }}
+
+
+@router.post("/api/stories/{story_id}/continue")
+async def continue_story(story_id: str, request: ContinueStoryRequest):
+    """Continua a história a partir da fala do usuário."""
+    if not request.user_input.strip():
+        raise HTTPException(status_code=400, detail="Entrada vazia")
+    try:
+        result = await run_in_threadpool(
+            get_story_generator().continue_story, story_id, request.user_input,
+            request.emotion_context)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="História não encontrada")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "story_id": story_id,
+        "continuation": result.text,
+        "prompt_tokens": result.prompt_tokens,
+        "prompt_tokens_saved": result.prompt_tokens_saved,
+        "state_source": result.state_source,
+        "summarized": result.summarized,
+        "generation_time": result.generation_time,
+    }
+
+
+def _open_create_stream(request: StoryRequest):
+    params = request.params
+    return get_story_generator().stream_create(
+        user_prompt=request.user_prompt,
+        emotions=request.emotions,
+        temperature=params.temperature,
+        creativity=params.creativity,
+        emotion_influence=params.emotion_influence,
+    )
+
+
+def _open_continue_stream(story_id: str, request: ContinueStoryRequest):
+    if not request.user_input.strip():
+        raise HTTPException(status_code=400, detail="Entrada vazia")
+    try:
+        return get_story_generator().stream_continue(story_id, request.user_input,
+                                                     request.emotion_context)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="História não encontrada")
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(stream, cache_request: StoryRequest = None) -> StreamingResponse:
+    """Transmite um ``StoryStream``; histórias completas entram no cache de artefatos."""
+    iterator = iter(stream)
+
+    async def body():
+        try:
+            yield _sse("start", {"story_id": stream.story_id})
+            while True:
+                piece = await run_in_threadpool(next, iterator, None)
+                if piece is None:
+                    break
+                yield _sse("token", {"text": piece})
+        except (RuntimeError, ValueError) as e:
+            yield _sse("error", {"error": str(e)})
+            return
+        finally:
+            close_stream(stream, iterator)
+
+        result = stream.result
+        if cache_request is not None and config.ARTIFACT_CACHE_ENABLED and not result.cancelled:
+            meta = {"story_id": result.story_id, "generation_time": result.generation_time}
+            await run_in_threadpool(get_artifact_cache().put, _cache_key(cache_request),
+                                    result.text.encode("utf-8"), meta, "generate-story")
+        yield _sse("end", result.to_dict())
+
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"})
+
+
+@router.post("/api/generate-story/stream")
+async def generate_story_stream(request: StoryRequest):
+    """``/api/generate-story`` em Server-Sent Events."""
+    if config.ARTIFACT_CACHE_ENABLED:
+        cached = await run_in_threadpool(get_artifact_cache().get, _cache_key(request))
+        if cached is not None:
+            text = cached.data.decode("utf-8")
+            story_id = get_story_generator().adopt(text, request.user_prompt, request.emotions,
+                                                   request.params.emotion_influence).story_id
+
+            async def replay():
+                yield _sse("start", {"story_id": story_id})
+                yield _sse("token", {"text": text})
+                yield _sse("end", {"story_id": story_id, "text": text, "cached": True})
+
+            return StreamingResponse(replay(), media_type="text/event-stream",
+                                     headers={"Cache-Control": "no-store"})
+
+    return _sse_response(_open_create_stream(request), cache_request=request)
+
+
+@router.post("/api/stories/{story_id}/continue/stream")
+async def continue_story_stream(story_id: str, request: ContinueStoryRequest):
+    """Continuação em Server-Sent Events."""
+    return _sse_response(_open_continue_stream(story_id, request))
+
+
+async def _watch_cancel(websocket: WebSocket, stream):
+    """Cancela o stream quando o cliente pede ou desconecta."""
+    try:
+        while True:
+            message = await websocket.receive_json()
+            if message.get("type") == "cancel":
+                break
+    except (WebSocketDisconnect, RuntimeError, ValueError):
+        pass
+    stream.close()
+
+
+@router.websocket("/ws/generate-story")
+async def generate_story_ws(websocket: WebSocket):
+    """
+    Protocolo:
+        cliente → {"action": "create", ...StoryRequest}
+                  ou {"action": "continue", "story_id": ..., ...ContinueStoryRequest}
+                → {"type": "cancel"} (opcional, a qualquer momento)
+        servidor → {"type": "start", "story_id"}
+                 → {"type": "token", "text"} (repetido)
+                 → {"type": "end", "metrics": {...}} ou {"type": "error", "error"}
+    """
+    await websocket.accept()
+    try:
+        message = await websocket.receive_json()
+        try:
+            if message.get("action") == "continue":
+                stream = _open_continue_stream(message.get("story_id", ""),
+                                               ContinueStoryRequest(**message))
+            else:
+                stream = _open_create_stream(StoryRequest(**message))
+        except HTTPException as e:
+            await websocket.send_json({"type": "error", "error": e.detail})
+            await websocket.close()
+            return
+        except ValidationError as e:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close()
+            return
+
+        iterator = iter(stream)
+        watcher = asyncio.create_task(_watch_cancel(websocket, stream))
+        try:
+            await websocket.send_json({"type": "start", "story_id": stream.story_id})
+            while True:
+                piece = await run_in_threadpool(next, iterator, None)
+                if piece is None:
+                    break
+                await websocket.send_json({"type": "token", "text": piece})
+            await websocket.send_json({"type": "end", "metrics": stream.result.to_dict()})
+        except (RuntimeError, ValueError) as e:
+            await websocket.send_json({"type": "error", "error": str(e)})
+        finally:
+            watcher.cancel()
+            close_stream(stream, iterator)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/api/stories")
+async def list_stories(cursor: Optional[str] = None,
+                       limit: int = Query(config.STORY_PAGE_SIZE, ge=1, le=config.STORY_PAGE_MAX),
+                       emotion: Optional[str] = None, date_from: Optional[str] = None,
+                       date_to: Optional[str] = None, q: Optional[str] = None):
+    """
+    Galeria paginada por cursor: resumos (sem o texto completo), mais
+    recentes primeiro. ``next_cursor`` é ``None`` na última página.
+    """
+    try:
+        page = await run_in_threadpool(
+            get_story_generator().list, cursor=cursor, limit=limit,
+            emotion=None if emotion == "all" else emotion,
+            date_from=date_from, date_to=date_to, q=q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "data": page.to_dict()}
+
+
+@router.get("/api/stories/{story_id}")
+async def get_story(story_id: str):
+    session = await run_in_threadpool(get_story_generator().get, story_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="História não encontrada")
+    return session.to_dict()
+
+
+@router.delete("/api/stories/{story_id}")
+async def delete_story(story_id: str):
+    if not await run_in_threadpool(get_story_generator().delete, story_id):
+        raise HTTPException(status_code=404, detail="História não encontrada")
+    return {"success": True}
+
+
+@router.post("/api/stories/{story_id}/render")
+async def render_story(story_id: str, request: StoryRenderRequest = StoryRenderRequest()):
+    """Áudio da história; só parágrafos novos ou alterados são renderizados."""
+    try:
+        result = await run_in_threadpool(get_story_renderer().render, story_id,
+                                         language=request.language,
+                                         music_style=request.music_style,
+                                         voice=request.voice_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="História não encontrada")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "data": result.to_dict()}
+
+
+@router.get("/api/stories/{story_id}/render")
+async def get_story_render(story_id: str):
+    """Última renderização da história (segmentos e URL do áudio)."""
+    manifest = await run_in_threadpool(get_story_renderer().manifest, story_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="História ainda não renderizada")
+    return {"success": True, "data": manifest}
+
+
+@router.get("/api/metrics/story")
+async def story_metrics():
+    """Tokens de prompt reaproveitados e uso do cache de estados KV."""
+    return {**get_story_generator().get_stats(), "render": get_story_renderer().get_stats()}
@@ -0,0 +1,215 @@
+"""
+Rotas de Narração - Aurora EchoTales
+====================================
+``POST /api/synthesize-speech`` (inteiro ou em streaming HTTP chunked) e
+``WS /ws/synthesize-speech`` (blocos PCM binários + métricas finais).
+
+Narrações completas vão para o cache de artefatos; um acerto é servido
+inteiro mesmo quando o cliente pediu streaming.
+
+Toda narração também é registrada no ``AudioStore`` (header
+``X-Audio-URL``), que gera a versão Opus em segundo plano — ou, no
+streaming, bloco a bloco durante a síntese. Com ``delivery="url"`` a
+resposta é só o JSON com esse endereço, servido com ``Range``/``ETag``.
+
+``POST /api/voices`` recebe um áudio de referência (``multipart`` com o
+campo ``audio`` ou ``audio/*`` cru), calcula os latentes da voz uma vez
+e devolve o ``voice_id`` para ``params.voice_id``; ``GET /api/voices``
+lista as vozes e o cache de latentes.
+"""
+
+import uuid
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from backend import config
+from backend.api.routes import close_stream
+from backend.api.routes.media import stored_audio_response
+from backend.api.routes.audio import UPLOAD_SCHEMA
+from backend.api.schemas import TTSRequest
+from backend.models.speaker_latents import get_voice_library
+from backend.models.tts_narrator import get_tts_narrator
+from backend.utils.artifact_cache import get_artifact_cache, make_cache_key
+from backend.utils.audio_store import get_audio_store
+from backend.utils.audio_utils import encode_wav, float_to_pcm16, wav_stream_header
+
+router = APIRouter()
+
+
+def _open_stream(request: TTSRequest):
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Texto vazio")
+    params = request.params
+    if params.voice_id and not get_voice_library().exists(params.voice_id):
+        raise HTTPException(status_code=404, detail="Voz não encontrada")
+    return get_tts_narrator().stream(
+        request.text,
+        style=params.style,
+        speed=params.speed,
+        language=params.language,
+        voice=params.voice_id,
+    )
+
+
+def _cache_key(request: TTSRequest) -> str:
+    model = {
+        **config.MODEL_CONFIGS["tts"],
+        "max_sentence_chars": config.TTS_MAX_SENTENCE_CHARS,
+        "crossfade_ms": config.TTS_STREAM_CROSSFADE_MS,
+    }
+    return make_cache_key("synthesize-speech", params=request.params, text=request.text,
+                          model=model)
+
+
+def _metric_headers(m) -> dict:
+    return {
+        "X-Audio-Duration": f"{m.audio_seconds:.3f}",
+        "X-Generation-Time": f"{m.wall_seconds:.3f}",
+        "X-Real-Time-Factor": f"{m.real_time_factor:.3f}",
+        "X-First-Chunk-Latency": f"{m.first_chunk_latency_s or 0:.3f}",
+    }
+
+
+def _synthesize(request: TTSRequest):
+    stream = _open_stream(request)
+    chunks = list(stream)
+    audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    return encode_wav(audio, stream.sample_rate), _metric_headers(stream.metrics)
+
+
+@router.post("/api/synthesize-speech")
+async def synthesize_speech(request: TTSRequest):
+    """Sintetiza a narração; com ``stream=true`` envia frase a frase."""
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Texto vazio")
+    if request.params.voice_id and not get_voice_library().exists(request.params.voice_id):
+        raise HTTPException(status_code=404, detail="Voz não encontrada")
+    cache = get_artifact_cache() if config.ARTIFACT_CACHE_ENABLED else None
+    key = _cache_key(request) if cache else uuid.uuid4().hex
+
+    if not request.stream or request.delivery == "url":
+        if cache is None:
+            content, headers = await run_in_threadpool(_synthesize, request)
+            return await run_in_threadpool(stored_audio_response, key, content, headers,
+                                           request.delivery)
+        artifact = await run_in_threadpool(
+            cache.get_or_create, key, lambda: _synthesize(request), "synthesize-speech")
+        return await run_in_threadpool(stored_audio_response, key, artifact.data,
+                                       {**artifact.meta, "X-Cache": artifact.status.upper()},
+                                       request.delivery)
+
+    if cache is not None:
+        cached = await run_in_threadpool(cache.get, key)
+        if cached is not None:
+            return await run_in_threadpool(stored_audio_response, key, cached.data,
+                                           {**cached.meta, "X-Cache": "HIT"}, request.delivery)
+
+    stream = _open_stream(request)
+    await run_in_threadpool(stream.start)
+    iterator = iter(stream)
+    encoder = get_audio_store().incremental(key, stream.sample_rate)
+
+    async def body():
+        chunks, complete = [], False
+        try:
+            yield wav_stream_header(stream.sample_rate)
+            while True:
+                chunk = await run_in_threadpool(next, iterator, None)
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+                encoder.write(chunk)  # codificado em paralelo ao envio
+                yield float_to_pcm16(chunk)
+            complete = not stream.metrics.cancelled
+        finally:
+            close_stream(stream, iterator)
+            if not complete:
+                encoder.abort()
+
+        # Só narrações completas (cliente não desconectou) são publicadas e entram no cache
+        await run_in_threadpool(encoder.finish)
+        if cache is not None:
+            audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+            await run_in_threadpool(cache.put, key, encode_wav(audio, stream.sample_rate),
+                                    _metric_headers(stream.metrics), "synthesize-speech")
+
+    return StreamingResponse(
+        body(),
+        media_type="audio/wav",
+        headers={"X-Sentences": str(len(stream.sentences)), "Cache-Control": "no-store",
+                 "X-Cache": "MISS" if cache is not None else "BYPASS",
+                 "X-Audio-Id": key, "X-Audio-URL": get_audio_store().url(key)},
+    )
+
+
+@router.websocket("/ws/synthesize-speech")
+async def synthesize_speech_ws(websocket: WebSocket):
+    """
+    Protocolo:
+        cliente → {"text": ..., "params": {...}}
+        servidor → {"type": "start", "sample_rate", "sentences"}
+                 → blocos binários PCM 16 bits mono
+                 → {"type": "end", "metrics": {...}}
+    """
+    await websocket.accept()
+    try:
+        request = TTSRequest(**await websocket.receive_json())
+        try:
+            stream = _open_stream(request)
+        except HTTPException as e:
+            await websocket.send_json({"type": "error", "error": e.detail})
+            await websocket.close()
+            return
+
+        await run_in_threadpool(stream.start)
+        iterator = iter(stream)
+        try:
+            await websocket.send_json({
+                "type": "start",
+                "sample_rate": stream.sample_rate,
+                "sentences": len(stream.sentences),
+            })
+            while True:
+                chunk = await run_in_threadpool(next, iterator, None)
+                if chunk is None:
+                    break
+                await websocket.send_bytes(float_to_pcm16(chunk))
+        finally:
+            close_stream(stream, iterator)
+
+        await websocket.send_json({"type": "end", "metrics": stream.metrics.to_dict()})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.post("/api/voices", openapi_extra=UPLOAD_SCHEMA)
+async def upload_voice(request: Request):
+    """Registra uma voz de referência; o mesmo áudio devolve o mesmo ``voice_id``."""
+    from backend.utils.audio_stream import MultipartAudioReader, StreamingAudioDecoder
+
+    content_type = request.headers.get("content-type", "")
+    decoder = StreamingAudioDecoder()
+    try:
+        reader = (MultipartAudioReader(content_type, decoder)
+                  if content_type.startswith("multipart/form-data") else decoder)
+        async for chunk in request.stream():
+            if chunk:
+                await run_in_threadpool(reader.feed, chunk)
+        decoded = await run_in_threadpool(reader.finish)
+        data = await run_in_threadpool(get_tts_narrator().register_voice, decoded.audio,
+                                       decoded.sample_rate)
+    except ValueError as e:  # AudioDecodeError ou áudio vazio
+        raise HTTPException(status_code=400, detail=f"Áudio de referência inválido: {e}")
+    finally:
+        decoder.abort()
+    return {"success": True, "data": data}
+
+
+@router.get("/api/voices")
+async def list_voices():
+    """Vozes registradas e acertos do cache de latentes."""
+    return {"success": True, "data": await run_in_threadpool(get_tts_narrator().voice_stats)}
@@ -0,0 +1,79 @@
+"""
+Schemas da API - Aurora EchoTales
+=================================
+Modelos Pydantic espelhando ``frontend/src/types/index.ts``.
+"""
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class StoryParams(BaseModel):
+    temperature: float = Field(0.7, ge=0.0, le=2.0)
+    creativity: float = Field(0.5, ge=0.0, le=1.0)
+    emotion_influence: float = Field(0.5, ge=0.0, le=1.0)
+
+
+class StoryRequest(BaseModel):
+    emotions: Optional[dict] = None
+    user_prompt: Optional[str] = None
+    params: StoryParams = Field(default_factory=StoryParams)
+
+
+class ContinueStoryRequest(BaseModel):
+    user_input: str
+    emotion_context: Optional[dict] = None
+
+
+class StoryRenderRequest(BaseModel):
+    music_style: Literal["ambient", "orchestral", "piano", "electronic", "acoustic", "cinematic"] = "ambient"
+    language: Literal["EN", "PT", "ES", "FR"] = "PT"
+    voice_id: Optional[str] = Field(None, pattern=r"^[0-9a-f]{16}$")
+
+
+class TTSParams(BaseModel):
+    style: Literal["neutral", "calm", "joyful", "sad", "angry", "fearful", "excited"] = "neutral"
+    speed: float = Field(1.0, gt=0.25, le=4.0)
+    language: Literal["EN", "PT", "ES", "FR"] = "PT"
+    # Voz enviada em POST /api/voices (None: speaker padrão)
+    voice_id: Optional[str] = Field(None, pattern=r"^[0-9a-f]{16}$")
+
+
+class TTSRequest(BaseModel):
+    text: str
+    params: TTSParams = Field(default_factory=TTSParams)
+    stream: bool = False
+    # "wav": áudio no corpo; "url": JSON com o endereço em /api/media (Range, Opus/MP3)
+    delivery: Literal["wav", "url"] = "wav"
+
+
+class MusicParams(BaseModel):
+    style: Literal["ambient", "orchestral", "piano", "electronic", "acoustic", "cinematic"] = "ambient"
+    mood: Literal["calm", "joyful", "melancholic", "tense", "energetic", "neutral"] = "neutral"
+    tempo: Literal["slow", "medium", "fast"] = "medium"
+    intensity: float = Field(0.5, ge=0.0, le=1.0)
+
+
+class MusicRequest(BaseModel):
+    params: MusicParams = Field(default_factory=MusicParams)
+    duration: float = Field(30.0, gt=0)
+    loop: bool = True
+    seed: Optional[int] = None
+    delivery: Literal["wav", "url"] = "wav"
+    # None: MUSIC_SCHEDULER_MODE; "fast" troca qualidade por bem menos passos
+    mode: Optional[Literal["quality", "fast"]] = None
+    # Prompt livre do Riffusion no lugar de estilo/humor/tempo (sempre gerado ao vivo)
+    prompt: Optional[str] = Field(None, min_length=1, max_length=300)
+
+
+class TextEmotionRequest(BaseModel):
+    text: str
+
+
+class ExperienceRequest(BaseModel):
+    emotions: Optional[dict] = None
+    user_prompt: Optional[str] = None
+    params: StoryParams = Field(default_factory=StoryParams)
+    music_style: Literal["ambient", "orchestral", "piano", "electronic", "acoustic", "cinematic"] = "ambient"
+    language: Literal["EN", "PT", "ES", "FR"] = "PT"
@@ -0,0 +1,430 @@
+"""
+Configurações do Backend - Aurora EchoTales
+============================================
+Caminhos, limites de recursos e parâmetros dos modelos.
+
+Todos os valores podem ser sobrescritos por variáveis de ambiente
+com o prefixo ``AURORA_`` (ex.: ``AURORA_VRAM_LIMIT_GB=6``).
+"""
+
+import os
+from pathlib import Path
+
+
+def _env_float(name: str, default: float) -> float:
+    """Lê um float de variável de ambiente com fallback."""
+    value = os.getenv(f"AURORA_{name}")
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lê um inteiro de variável de ambiente com fallback."""
+    value = os.getenv(f"AURORA_{name}")
+    return int(value) if value else default
+
+
+def _env_str(name: str, default: str) -> str:
+    """Lê uma string de variável de ambiente com fallback."""
+    return os.getenv(f"AURORA_{name}", default)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Lê um booleano de variável de ambiente com fallback."""
+    value = os.getenv(f"AURORA_{name}")
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# ============================================================
+# 📁 Caminhos
+# ============================================================
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = Path(_env_str("CACHE_DIR", str(PROJECT_ROOT / "cache")))
+OUTPUT_DIR = Path(_env_str("OUTPUT_DIR", str(PROJECT_ROOT / "output")))
+LOGS_DIR = Path(_env_str("LOGS_DIR", str(PROJECT_ROOT / "logs")))
+MODELS_DIR = Path(_env_str("MODELS_DIR", str(PROJECT_ROOT / "models")))
+
+
+# ============================================================
+# 🎮 Limites de Recursos
+# ============================================================
+
+# Limite rígido de VRAM (GPU de referência: RTX 4060 8GB)
+VRAM_LIMIT_GB = _env_float("VRAM_LIMIT_GB", 7.0)
+
+# Fração do limite a partir da qual emitimos aviso
+VRAM_WARNING_RATIO = _env_float("VRAM_WARNING_RATIO", 0.9)
+
+# Amostragem de recursos em segundo plano (GET /metrics e /api/metrics/resources)
+RESOURCE_SAMPLER_ENABLED = _env_bool("RESOURCE_SAMPLER_ENABLED", True)
+RESOURCE_SAMPLE_INTERVAL_S = _env_float("RESOURCE_SAMPLE_INTERVAL_S", 0.5)
+RESOURCE_HISTORY_SIZE = _env_int("RESOURCE_HISTORY_SIZE", 7200)  # 1h a 0.5s
+
+# Orçamento de tempo para ``import backend.main`` (verificado nos testes;
+# ver ``python -m backend.utils.import_profile``)
+STARTUP_IMPORT_BUDGET_S = _env_float("STARTUP_IMPORT_BUDGET_S", 3.0)
+
+# Orçamento para manter modelos residentes (aquecidos) entre requisições
+RESIDENCY_VRAM_BUDGET_GB = _env_float("RESIDENCY_VRAM_BUDGET_GB", 6.0)
+RESIDENCY_RAM_BUDGET_GB = _env_float("RESIDENCY_RAM_BUDGET_GB", 8.0)
+
+# Pré-carregar o modelo do próximo estágio enquanto o atual executa
+ENABLE_PREFETCH = _env_bool("ENABLE_PREFETCH", True)
+
+# Dispositivo preferido ("cuda" ou "cpu"); "auto" detecta em tempo de execução
+DEVICE = _env_str("DEVICE", "auto")
+
+
+# ============================================================
+# 🤖 Modelos
+# ============================================================
+
+MODEL_CONFIGS = {
+    "story": {
+        "name": "Llama-3.1-8B-Instruct-Q4_K_M",
+        "path": str(MODELS_DIR / "Llama-3.1-8B-Instruct-Q4_K_M.gguf"),
+        "n_gpu_layers": 40,
+        "n_ctx": 2048,
+        "vram_gb": 4.9,
+        "ram_gb": 1.0,
+    },
+    "stt": {
+        "name": "whisper-small",
+        "size": "small",
+        "vram_gb": 1.6,
+        "ram_gb": 1.0,
+    },
+    # Cabeça linear sobre o encoder do Whisper (ver core/audio_emotion.py)
+    "audio_emotion": {
+        "name": "whisper-encoder-emotion-head",
+        "vram_gb": 0.0,
+        "ram_gb": 0.01,
+    },
+    "text_emotion": {
+        "name": "j-hartmann/emotion-english-distilroberta-base",
+        "vram_gb": 0.5,
+        "ram_gb": 0.4,
+    },
+    "music": {
+        "name": "riffusion/riffusion-model-v1",
+        "num_inference_steps": 20,
+        "height": 512,
+        "width": 512,
+        "vram_gb": 3.0,
+        "ram_gb": 1.5,
+    },
+    "tts": {
+        "name": "tts_models/multilingual/multi-dataset/xtts_v2",
+        "speaker": "Brenda Stern",
+        "language": "pt",
+        "vram_gb": 2.0,
+        "ram_gb": 1.5,
+    },
+}
+
+# Estágios seguintes de cada estágio do pipeline (usado no prefetch)
+PIPELINE_NEXT_STAGES = {
+    "stt": ["audio_emotion", "story"],
+    "audio_emotion": ["story"],
+    "text_emotion": ["story"],
+    "story": ["tts", "music"],
+    "tts": ["music"],
+    "music": [],
+}
+
+
+# Orquestrador: recursos compartilhados entre estágios e execuções.
+# A GPU é medida em GB de VRAM (cada estágio reserva o do seu modelo). O
+# padrão comporta história + música ao mesmo tempo (o par que a experiência
+# sobrepõe; 7.9 GB numa GPU de 8 GB); em GPUs menores, reduza para serializar.
+PIPELINE_GPU_CAPACITY_GB = _env_float(
+    "PIPELINE_GPU_CAPACITY_GB",
+    max(RESIDENCY_VRAM_BUDGET_GB, MODEL_CONFIGS["story"]["vram_gb"] + MODEL_CONFIGS["music"]["vram_gb"]),
+)
+PIPELINE_CPU_SLOTS = _env_int("PIPELINE_CPU_SLOTS", max(2, (os.cpu_count() or 4) // 2))
+PIPELINE_MAX_WORKERS = _env_int("PIPELINE_MAX_WORKERS", 8)
+PIPELINE_TRACE_HISTORY = 20
+
+# Experiência completa: trilha gerada em paralelo à história, em loop sob a narração
+EXPERIENCE_MUSIC_DURATION_S = _env_float("EXPERIENCE_MUSIC_DURATION_S", 30.0)
+EXPERIENCE_MUSIC_GAIN_DB = _env_float("EXPERIENCE_MUSIC_GAIN_DB", -14.0)
+
+# Renderização incremental: um segmento (narração + deixa musical) por parágrafo,
+# reaproveitado enquanto o texto do parágrafo não mudar
+STORY_SEGMENT_DIR = CACHE_DIR / "story_segments"
+STORY_SEGMENT_CACHE_MAX_MB = _env_float("STORY_SEGMENT_CACHE_MAX_MB", 2048.0)  # LRU dos segmentos
+STORY_SEGMENT_GAP_S = _env_float("STORY_SEGMENT_GAP_S", 0.6)  # trilha em fade entre parágrafos
+STORY_SEGMENT_FADE_MS = _env_float("STORY_SEGMENT_FADE_MS", 15.0)  # emendas sem clique
+
+
+# ============================================================
+# 🔊 Áudio
+# ============================================================
+
+SAMPLE_RATE = _env_int("SAMPLE_RATE", 24000)
+STT_SAMPLE_RATE = 16000
+AUDIO_CHANNELS = 1
+
+# Mixagem narração + trilha em blocos de tamanho fixo (memória constante)
+MIX_BLOCK_FRAMES = _env_int("MIX_BLOCK_FRAMES", 65536)
+MIX_DUCK_DB = _env_float("MIX_DUCK_DB", -6.0)  # atenuação extra da trilha sob a voz (0: desliga)
+MIX_DUCK_THRESHOLD_DB = _env_float("MIX_DUCK_THRESHOLD_DB", -40.0)  # nível da voz que aciona
+MIX_DUCK_ATTACK_MS = 30.0
+MIX_DUCK_RELEASE_MS = 400.0
+MIX_TARGET_DBFS = _env_float("MIX_TARGET_DBFS", -18.0)  # RMS da normalização de loudness
+MIX_PEAK_CEILING_DB = -1.0
+
+# Narração em streaming (frase a frase)
+TTS_SAMPLE_RATE = 24000
+TTS_MAX_SENTENCE_CHARS = _env_int("TTS_MAX_SENTENCE_CHARS", 240)
+TTS_STREAM_CROSSFADE_MS = _env_int("TTS_STREAM_CROSSFADE_MS", 40)
+TTS_STREAM_QUEUE_SIZE = _env_int("TTS_STREAM_QUEUE_SIZE", 4)
+
+# Vozes de referência (POST /api/voices ou TTS_SPEAKER_WAV, no lugar do
+# speaker embutido): latentes de condicionamento do XTTS calculados uma
+# vez por áudio, em LRU na memória e em disco pelo hash do áudio
+TTS_SPEAKER_WAV = _env_str("TTS_SPEAKER_WAV", "")
+TTS_VOICES_DIR = CACHE_DIR / "voices"
+TTS_VOICE_MAX_S = _env_float("TTS_VOICE_MAX_S", 30.0)
+TTS_SPEAKER_LATENTS_DIR = CACHE_DIR / "speaker_latents"
+TTS_SPEAKER_CACHE_SIZE = _env_int("TTS_SPEAKER_CACHE_SIZE", 32)
+
+# Transcrição (STT): "faster-whisper" (CTranslate2) ou "openai-whisper"
+STT_BACKEND = _env_str("STT_BACKEND", "faster-whisper")
+STT_DEVICE = _env_str("STT_DEVICE", "cpu")
+STT_COMPUTE_TYPE = _env_str("STT_COMPUTE_TYPE", "int8")
+STT_BATCH_SIZE = _env_int("STT_BATCH_SIZE", 8)
+STT_LANGUAGE = _env_str("STT_LANGUAGE", "pt")
+
+# Emoção acústica a partir da mesma passada do encoder do Whisper
+AUDIO_EMOTION_ENABLED = _env_bool("AUDIO_EMOTION_ENABLED", True)
+AUDIO_EMOTION_HEAD_PATH = MODELS_DIR / f"audio_emotion_head_{MODEL_CONFIGS['stt']['size']}.npz"
+AUDIO_EMOTION_WEIGHT = _env_float("AUDIO_EMOTION_WEIGHT", 0.4)  # peso na fusão com o texto
+# Sem a cabeça (ou com uma de outro encoder) a emoção acústica fica desligada e
+# volta a ser tentada após este intervalo (treino: python -m backend.core.audio_emotion train)
+AUDIO_EMOTION_RETRY_S = _env_float("AUDIO_EMOTION_RETRY_S", 60.0)
+AUDIO_ANALYSIS_MEASURE_MEMORY = _env_bool("AUDIO_ANALYSIS_MEASURE_MEMORY", True)
+
+# Detecção de voz (VAD) antes da transcrição
+VAD_FRAME_MS = 30
+VAD_THRESHOLD_DB = _env_float("VAD_THRESHOLD_DB", 12.0)
+VAD_MIN_SPEECH_MS = 150
+VAD_MIN_SILENCE_MS = 400
+VAD_PADDING_MS = 150
+VAD_MAX_SEGMENT_S = 28.0
+
+# Análise ao vivo (WebSocket): janela deslizante sobre o microfone
+LIVE_MAX_SESSIONS = _env_int("LIVE_MAX_SESSIONS", 4)
+LIVE_HOP_S = _env_float("LIVE_HOP_S", 1.0)            # novo áudio entre passadas
+LIVE_MAX_WINDOW_S = _env_float("LIVE_MAX_WINDOW_S", 10.0)  # fala contínua é fechada aqui
+LIVE_MAX_BUFFER_S = _env_float("LIVE_MAX_BUFFER_S", 20.0)  # teto de memória por conexão
+LIVE_CONTEXT_S = 0.5                                   # silêncio mantido para o VAD
+LIVE_PARTIALS = _env_bool("LIVE_PARTIALS", True)
+
+# História (llama.cpp): tokens gerados por turno
+STORY_MAX_TOKENS = _env_int("STORY_MAX_TOKENS", 400)
+STORY_CONTINUE_MAX_TOKENS = _env_int("STORY_CONTINUE_MAX_TOKENS", 250)
+
+# Streaming: tokens acumulados são enviados juntos, até este limite
+STORY_STREAM_GROUP_TOKENS = _env_int("STORY_STREAM_GROUP_TOKENS", 4)
+
+# Snapshots do estado KV por história (continuação só avalia o turno novo)
+STORY_STATE_MEMORY_MB = _env_float("STORY_STATE_MEMORY_MB", 512.0)
+STORY_STATE_DISK_MB = _env_float("STORY_STATE_DISK_MB", 4096.0)
+STORY_STATE_DIR = CACHE_DIR / "kv_states"
+
+# Janela deslizante: ao lotar o contexto, turnos antigos viram um resumo
+STORY_KEEP_TURNS = _env_int("STORY_KEEP_TURNS", 4)
+STORY_SUMMARY_MAX_TOKENS = _env_int("STORY_SUMMARY_MAX_TOKENS", 160)
+
+# Histórias persistidas em SQLite; escritas agrupadas em segundo plano
+STORY_DB_PATH = Path(_env_str("STORY_DB_PATH", str(CACHE_DIR / "stories.db")))
+STORY_DB_BATCH_SIZE = _env_int("STORY_DB_BATCH_SIZE", 64)
+STORY_DB_FLUSH_S = _env_float("STORY_DB_FLUSH_S", 0.05)
+# Lote que falha é refeito (com espera crescente) antes de ser descartado
+STORY_DB_WRITE_RETRIES = _env_int("STORY_DB_WRITE_RETRIES", 3)
+
+# Sessões mantidas em memória (turnos em andamento sem reler do banco)
+STORY_LIVE_SESSIONS = _env_int("STORY_LIVE_SESSIONS", 32)
+
+# Galeria: tamanho padrão e máximo da página, caracteres da prévia
+STORY_PAGE_SIZE = _env_int("STORY_PAGE_SIZE", 24)
+STORY_PAGE_MAX = _env_int("STORY_PAGE_MAX", 100)
+STORY_PREVIEW_CHARS = _env_int("STORY_PREVIEW_CHARS", 240)
+
+# Emoção de texto: micro-batching de requisições concorrentes
+TEXT_EMOTION_MAX_BATCH = _env_int("TEXT_EMOTION_MAX_BATCH", 32)
+TEXT_EMOTION_MAX_WAIT_MS = _env_float("TEXT_EMOTION_MAX_WAIT_MS", 5.0)
+TEXT_EMOTION_MAX_TOKENS = 512
+TEXT_EMOTION_BUCKETS = (16, 32, 64, 128, 256, 512)
+
+# Música: janelas de espectrograma sobrepostas (1 coluna = 10 ms)
+MUSIC_TILE_OVERLAP_FRAMES = _env_int("MUSIC_TILE_OVERLAP_FRAMES", 64)
+MUSIC_GRIFFIN_LIM_ITERS = _env_int("MUSIC_GRIFFIN_LIM_ITERS", 32)
+MUSIC_MAX_DURATION_S = _env_float("MUSIC_MAX_DURATION_S", 120.0)
+
+# Amostrador do Riffusion: "quality" usa o scheduler do modelo com
+# num_inference_steps; "fast" troca por DPM-Solver++ com bem menos passos
+MUSIC_SCHEDULER_MODE = _env_str("MUSIC_SCHEDULER_MODE", "quality")
+MUSIC_FAST_STEPS = _env_int("MUSIC_FAST_STEPS", 8)
+MUSIC_GUIDANCE_SCALE = _env_float("MUSIC_GUIDANCE_SCALE", 7.0)
+MUSIC_PROMPT_CACHE_SIZE = _env_int("MUSIC_PROMPT_CACHE_SIZE", 64)
+
+# Pedidos concorrentes entram no mesmo laço de denoising
+MUSIC_MAX_BATCH_TRACKS = _env_int("MUSIC_MAX_BATCH_TRACKS", 4)
+MUSIC_BATCH_WAIT_MS = _env_float("MUSIC_BATCH_WAIT_MS", 20.0)
+
+# Perfis de memória, escolhidos pela VRAM livre dentro de VRAM_LIMIT_GB
+# (o primeiro cujo mínimo cabe). batch_size = janelas por passada da UNet.
+MUSIC_MEMORY_PROFILES = [
+    {"name": "full", "min_free_gb": 4.0, "batch_size": 4,
+     "vae_slicing": False, "attention_slicing": False},
+    {"name": "balanced", "min_free_gb": 2.0, "batch_size": 2,
+     "vae_slicing": True, "attention_slicing": False},
+    {"name": "low", "min_free_gb": 0.0, "batch_size": 1,
+     "vae_slicing": True, "attention_slicing": True},
+]
+MUSIC_CPU_BATCH_SIZE = _env_int("MUSIC_CPU_BATCH_SIZE", 2)
+
+# Biblioteca de stems: um loop pré-renderizado por célula estilo/humor/tempo
+# (python -m backend.models.stem_library build). Pedidos sem prompt livre
+# nem seed são servidos dela; o resto (e células ausentes) gera ao vivo.
+MUSIC_STEM_LIBRARY_ENABLED = _env_bool("MUSIC_STEM_LIBRARY_ENABLED", True)
+MUSIC_STEM_DIR = CACHE_DIR / "stems"
+MUSIC_STEM_DURATION_S = _env_float("MUSIC_STEM_DURATION_S", 10.0)
+MUSIC_STEM_SEED = _env_int("MUSIC_STEM_SEED", 1234)
+
+# Corte do passa-baixa na intensidade 0 e 1 (interpolado em escala log)
+MUSIC_STEM_LOWPASS_HZ = (800.0, 16000.0)
+
+# Fade-out de faixas sem loop servidas da biblioteca
+MUSIC_STEM_FADE_S = _env_float("MUSIC_STEM_FADE_S", 1.0)
+
+
+# ============================================================
+# 🗃️ Cache de Artefatos
+# ============================================================
+
+# Saídas (história, narração, música) indexadas pelo hash da requisição
+ARTIFACT_CACHE_ENABLED = _env_bool("ARTIFACT_CACHE_ENABLED", True)
+ARTIFACT_CACHE_DIR = CACHE_DIR / "artifacts"
+ARTIFACT_CACHE_MAX_MB = _env_float("ARTIFACT_CACHE_MAX_MB", 1024.0)
+
+# Incrementar invalida todas as entradas (mudança de formato ou pipeline)
+ARTIFACT_CACHE_VERSION = 1
+
+# ============================================================
+# 🗜️ Entrega de Áudio
+# ============================================================
+
+# Áudios gerados em WAV + versão comprimida (GET /api/media/{id}, com Range e ETag)
+AUDIO_STORE_DIR = OUTPUT_DIR / "audio"
+AUDIO_ENCODE_WORKERS = _env_int("AUDIO_ENCODE_WORKERS", 1)
+
+# "opus" (OGG) ou "mp3"; taxas que o Opus não aceita (ex.: 44,1 kHz) usam MP3
+AUDIO_COMPRESSED_FORMAT = _env_str("AUDIO_COMPRESSED_FORMAT", "opus")
+
+# Nível de compressão do libsndfile (0 = maior taxa de bits, 1 = menor).
+# Opus 0.85 ≈ 40 kbps (voz); MP3 0.5 ≈ 40 kbps mono
+AUDIO_COMPRESSION_LEVEL = {"opus": 0.85, "mp3": 0.5}
+
+# ``format=auto`` espera até este tempo por uma codificação em andamento
+AUDIO_ENCODE_WAIT_S = _env_float("AUDIO_ENCODE_WAIT_S", 2.0)
+
+
+# ============================================================
+# 🧊 Snapshots de Modelos
+# ============================================================
+
+# Pesos pré-convertidos e mapeados em memória (python -m backend.core.snapshots)
+SNAPSHOTS_ENABLED = _env_bool("SNAPSHOTS_ENABLED", True)
+SNAPSHOT_DIR = CACHE_DIR / "snapshots"
+
+# Verificação ao carregar: "quick" (tamanhos e cabeçalho), "full" (SHA-256) ou "none"
+SNAPSHOT_VERIFY = _env_str("SNAPSHOT_VERIFY", "quick")
+
+# dtype gravado por modelo; em CPU, pesos float16 são convertidos para float32
+SNAPSHOT_DTYPES = {
+    "text_emotion": "float32",
+    "stt": "float16",
+    "audio_emotion": "float32",
+    "music": "float16",
+    "tts": "float32",
+}
+
+# Incrementar invalida todos os snapshots (mudança de layout)
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+# ============================================================
+# 🧵 Pool de Workers
+# ============================================================
+
+# Cada estágio pesado em processos próprios; a API só despacha jobs
+WORKER_POOL_ENABLED = _env_bool("WORKER_POOL_ENABLED", False)
+
+# Processos por estágio (story = LLM, analysis = STT + emoção)
+WORKER_COUNTS = {
+    "story": _env_int("WORKERS_STORY", 1),
+    "tts": _env_int("WORKERS_TTS", 1),
+    "music": _env_int("WORKERS_MUSIC", 1),
+    "analysis": _env_int("WORKERS_ANALYSIS", 1),
+}
+
+# Modelos substitutos (backend.models.stubs) nos workers: pool inteiro em CPU
+WORKER_STUBS = _env_bool("WORKER_STUBS", False)
+
+# "spawn" evita herdar threads e contexto CUDA do processo da API
+WORKER_START_METHOD = _env_str("WORKER_START_METHOD", "spawn")
+WORKER_READY_TIMEOUT_S = _env_float("WORKER_READY_TIMEOUT_S", 120.0)
+
+# Batimento de cada worker; sem sinal por este tempo, o processo é reiniciado
+WORKER_HEARTBEAT_S = 1.0
+WORKER_HEARTBEAT_TIMEOUT_S = _env_float("WORKER_HEARTBEAT_TIMEOUT_S", 30.0)
+WORKER_HEALTH_INTERVAL_S = _env_float("WORKER_HEALTH_INTERVAL_S", 2.0)
+
+# Arrays a partir deste tamanho passam por memória compartilhada, não pelo pipe
+WORKER_SHM_MIN_BYTES = _env_int("WORKER_SHM_MIN_BYTES", 64 * 1024)
+
+
+# ============================================================
+# 📝 Logs
+# ============================================================
+
+# Registros vão para uma fila; uma thread grava no console e em
+# logs/<nome>.jsonl (uma linha JSON por registro, com rotação)
+LOG_LEVEL = _env_str("LOG_LEVEL", "INFO")
+LOG_CONSOLE = _env_bool("LOG_CONSOLE", True)
+LOG_QUEUE_SIZE = _env_int("LOG_QUEUE_SIZE", 10000)  # fila cheia: registro descartado (e contado)
+LOG_FILE_MAX_MB = _env_float("LOG_FILE_MAX_MB", 20.0)
+LOG_FILE_BACKUPS = _env_int("LOG_FILE_BACKUPS", 5)
+
+
+def ensure_directories():
+    """Cria os diretórios de cache, saída e logs, se necessário."""
+    for directory in (CACHE_DIR, OUTPUT_DIR, LOGS_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+
+
+def print_config_summary():
+    """Imprime um resumo das configurações ativas."""
+    print("\n" + "=" * 60)
+    print("⚙️  CONFIGURAÇÕES - AURORA ECHOTALES")
+    print("=" * 60)
+    print(f"📁 Cache:   {CACHE_DIR}")
+    print(f"📁 Output:  {OUTPUT_DIR}")
+    print(f"📁 Logs:    {LOGS_DIR}")
+    print(f"📁 Modelos: {MODELS_DIR}")
+    print(f"\n🎮 Limite de VRAM:     {VRAM_LIMIT_GB:.1f} GB")
+    print(f"🔥 Orçamento VRAM:     {RESIDENCY_VRAM_BUDGET_GB:.1f} GB")
+    print(f"💾 Orçamento RAM:      {RESIDENCY_RAM_BUDGET_GB:.1f} GB")
+    print(f"⏩ Prefetch:           {'ativo' if ENABLE_PREFETCH else 'desativado'}")
+    print(f"🖥️  Dispositivo:        {DEVICE}")
+    print(f"🗃️  Cache de artefatos: "
+          f"{f'{ARTIFACT_CACHE_MAX_MB:.0f} MB' if ARTIFACT_CACHE_ENABLED else 'desativado'}")
+    print("\n🤖 Modelos:")
+    for stage, cfg in MODEL_CONFIGS.items():
+        print(f"   • {stage:<14} {cfg['name']} (~{cfg['vram_gb']:.1f} GB VRAM)")
+    print("=" * 60 + "\n")
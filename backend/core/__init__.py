@@ -0,0 +1,34 @@
+"""
+Núcleo do Backend - Aurora EchoTales
+=====================================
+Gerenciamento de modelos e orquestração do pipeline.
+
+Os nomes são resolvidos no primeiro acesso (ver ``backend/__init__.py``).
+"""
+
+import importlib
+
+_LAZY = {
+    "TextEmotionAnalyzer": "backend.core.emotion_analyzer",
+    "aggregate_emotion": "backend.core.emotion_analyzer",
+    "get_text_emotion_analyzer": "backend.core.emotion_analyzer",
+    "ModelManager": "backend.core.model_manager",
+    "ResidencyStats": "backend.core.model_manager",
+    "get_model_manager": "backend.core.model_manager",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+__all__ = list(_LAZY)
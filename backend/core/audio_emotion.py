@@ -0,0 +1,198 @@
+"""
+Audio Emotion - Aurora EchoTales
+================================
+Cabeça de emoção acústica sobre os embeddings do encoder do Whisper.
+
+Em vez de carregar um segundo modelo de áudio (wav2vec2 ~1.2GB) e
+passar o mesmo áudio por ele, a transcrição devolve a média e o desvio
+dos quadros do encoder por segmento e uma regressão logística
+multinomial (alguns KB) estima as emoções a partir deles.
+
+Os pesos ficam em ``config.AUDIO_EMOTION_HEAD_PATH`` (``.npz``) e são
+específicos do tamanho do Whisper usado; ``AudioEmotionHead.fit``
+treina a cabeça a partir de embeddings rotulados. Os pesos não
+acompanham o repositório: são gerados a partir de gravações rotuladas,
+uma pasta por emoção (``<dataset>/joy/*.wav``, ``<dataset>/sadness/...``)::
+
+    python -m backend.core.audio_emotion train caminho/do/dataset
+    python -m backend.core.audio_emotion status
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend import config
+from backend.core.emotion_analyzer import EMOTIONS
+from backend.utils.file_utils import atomic_write
+
+if TYPE_CHECKING:
+    from backend.models.speech_to_text import SpeechTranscriber
+
+AUDIO_SUFFIXES = {".wav", ".flac", ".ogg", ".mp3", ".m4a", ".webm"}
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = logits - logits.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+@dataclass
+class AudioEmotionHead:
+    """Regressão logística sobre embeddings padronizados."""
+
+    weights: np.ndarray  # (dim, rótulos)
+    bias: np.ndarray
+    mean: np.ndarray
+    scale: np.ndarray
+    labels: Sequence[str] = tuple(EMOTIONS)
+    encoder: str = config.MODEL_CONFIGS["stt"]["name"]
+
+    @property
+    def dim(self) -> int:
+        return self.weights.shape[0]
+
+    def predict(self, embeddings: np.ndarray) -> List[Dict[str, float]]:
+        """Probabilidades por rótulo para cada embedding (linha)."""
+        x = np.asarray(embeddings, dtype=np.float32)
+        if x.ndim != 2 or x.shape[1] != self.dim:
+            raise ValueError(f"Embeddings com forma {x.shape}; a cabeça espera (n, {self.dim}) "
+                             f"do encoder {self.encoder}")
+        probs = _softmax(((x - self.mean) / self.scale) @ self.weights + self.bias)
+        return [dict(zip(self.labels, map(float, row))) for row in probs]
+
+    @classmethod
+    def fit(cls, embeddings: np.ndarray, targets: Sequence[str],
+            labels: Sequence[str] = tuple(EMOTIONS), epochs: int = 300,
+            lr: float = 0.5, l2: float = 1e-3, **kwargs) -> "AudioEmotionHead":
+        """Treina por gradiente descendente em lote completo."""
+        x = np.asarray(embeddings, dtype=np.float32)
+        mean = x.mean(axis=0)
+        scale = x.std(axis=0) + 1e-6
+        x = (x - mean) / scale
+        index = {label: i for i, label in enumerate(labels)}
+        y = np.zeros((len(x), len(labels)), dtype=np.float32)
+        y[np.arange(len(x)), [index[t] for t in targets]] = 1.0
+
+        weights = np.zeros((x.shape[1], len(labels)), dtype=np.float32)
+        bias = np.zeros(len(labels), dtype=np.float32)
+        for _ in range(epochs):
+            grad = (_softmax(x @ weights + bias) - y) / len(x)
+            weights -= lr * (x.T @ grad + l2 * weights)
+            bias -= lr * grad.sum(axis=0)
+        return cls(weights, bias, mean, scale, tuple(labels), **kwargs)
+
+    def save(self, path: Path):
+        atomic_write(path, lambda f: np.savez(
+            f, weights=self.weights, bias=self.bias, mean=self.mean, scale=self.scale,
+            labels=np.array(self.labels), encoder=np.array(self.encoder)))
+
+    @classmethod
+    def load(cls, path: Path) -> "AudioEmotionHead":
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"], data["mean"], data["scale"],
+                       tuple(str(label) for label in data["labels"]), str(data["encoder"]))
+
+
+def load_audio_emotion_head(path: Path = config.AUDIO_EMOTION_HEAD_PATH) -> AudioEmotionHead:
+    """Loader para o ``ModelManager`` (usa o snapshot se for a cabeça configurada)."""
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Pesos da cabeça de emoção acústica não encontrados: {path}")
+    if Path(path) == config.AUDIO_EMOTION_HEAD_PATH:
+        from backend.core.snapshots import restore_snapshot
+
+        head = restore_snapshot("audio_emotion")
+        if head is not None:
+            return head
+    return AudioEmotionHead.load(path)
+
+
+def embed_dataset(root: Path, transcriber: Optional["SpeechTranscriber"] = None
+                  ) -> Tuple[np.ndarray, List[str]]:
+    """
+    Embeddings do encoder para ``<root>/<emoção>/<áudio>``, um por segmento
+    de fala, rotulados pelo nome da pasta.
+    """
+    from backend.models.speech_to_text import get_speech_transcriber
+    from backend.utils.audio_utils import decode_audio_bytes, resample
+
+    root = Path(root)
+    folders = sorted(p for p in root.iterdir() if p.is_dir()) if root.is_dir() else []
+    unknown = [p.name for p in folders if p.name not in EMOTIONS]
+    if unknown:
+        raise ValueError(f"Pastas sem emoção conhecida: {', '.join(unknown)} "
+                         f"(use {', '.join(EMOTIONS)})")
+    transcriber = transcriber or get_speech_transcriber()
+    embeddings, targets = [], []
+    for folder in folders:
+        for path in sorted(p for p in folder.iterdir() if p.suffix.lower() in AUDIO_SUFFIXES):
+            audio, sr = decode_audio_bytes(path.read_bytes())
+            result = transcriber.transcribe(resample(audio, sr, config.STT_SAMPLE_RATE),
+                                            with_embeddings=True)
+            if result.embeddings is None:
+                raise ValueError(f"O backend {result.backend} não expõe a saída do encoder")
+            embeddings.append(result.embeddings)
+            targets.extend([folder.name] * len(result.embeddings))
+    if not embeddings:
+        raise ValueError(f"Nenhum áudio rotulado em {root}")
+    return np.concatenate(embeddings), targets
+
+
+def train_head(embeddings: np.ndarray, targets: Sequence[str], holdout: float = 0.2,
+               seed: int = 0, **kwargs) -> Tuple[AudioEmotionHead, Optional[float]]:
+    """
+    Treina a cabeça e mede a acurácia numa fração separada (``None`` se
+    não houver amostras para isso); a cabeça final usa todas as amostras.
+    """
+    targets = list(targets)
+    order = np.random.default_rng(seed).permutation(len(targets))
+    n_test = int(len(targets) * holdout)
+    accuracy = None
+    if n_test:
+        test, train = order[:n_test], order[n_test:]
+        head = AudioEmotionHead.fit(embeddings[train], [targets[i] for i in train], **kwargs)
+        predicted = [max(p, key=p.get) for p in head.predict(embeddings[test])]
+        accuracy = float(np.mean([p == targets[i] for p, i in zip(predicted, test)]))
+    return AudioEmotionHead.fit(embeddings, targets, **kwargs), accuracy
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cabeça de emoção acústica (encoder do Whisper)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Mostra se há pesos para o Whisper configurado")
+    train = sub.add_parser("train", help="Treina e exporta a cabeça a partir de <dataset>/<emoção>/*")
+    train.add_argument("dataset", type=Path)
+    train.add_argument("--out", type=Path, default=config.AUDIO_EMOTION_HEAD_PATH)
+    train.add_argument("--epochs", type=int, default=300)
+    train.add_argument("--holdout", type=float, default=0.2, help="Fração para medir acurácia")
+    args = parser.parse_args(argv)
+
+    path = config.AUDIO_EMOTION_HEAD_PATH
+    if args.command == "status":
+        if not path.exists():
+            print(f"❌ Sem pesos em {path}: a emoção acústica fica desativada "
+                  f"(python -m backend.core.audio_emotion train <dataset>)")
+            return 1
+        head = AudioEmotionHead.load(path)
+        print(f"✅ {path} | encoder {head.encoder} | dim {head.dim} | {', '.join(head.labels)}")
+        return 0
+
+    try:
+        embeddings, targets = embed_dataset(args.dataset)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    head, accuracy = train_head(embeddings, targets, holdout=args.holdout, epochs=args.epochs)
+    head.save(args.out)
+    counts = ", ".join(f"{label}: {targets.count(label)}" for label in sorted(set(targets)))
+    score = f" | acurácia {accuracy:.0%} na validação" if accuracy is not None else ""
+    print(f"🎭 Cabeça salva em {args.out}: {len(targets)} segmentos ({counts}){score}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Emotion Analyzer - Aurora EchoTales
+===================================
+Análise de emoção em texto (DistilRoBERTa) com micro-batching.
+
+Requisições concorrentes (parágrafos da história, turnos de continuação)
+são acumuladas por alguns milissegundos, agrupadas em faixas de
+comprimento (padding dinâmico apenas até o maior texto da faixa) e
+classificadas em uma única passada por faixa. Cada chamador recebe o seu
+``AggregatedEmotion`` (mesmo formato de ``frontend/src/types``).
+
+Uso:
+    analyzer = get_text_emotion_analyzer()
+    emotion = analyzer.analyze("I am so happy today!")
+    emotion["dominant_emotion"]   # "joy"
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend import config
+from backend.core.model_manager import ModelManager, get_model_manager
+from backend.utils.logger import get_logger
+from backend.utils.micro_batcher import BatchItem, MicroBatcher
+
+EMOTIONS = ["joy", "sadness", "anger", "fear", "surprise", "disgust", "neutral"]
+
+
+def aggregate_emotion(scores: Dict[str, float]) -> dict:
+    """
+    Converte scores por rótulo em ``AggregatedEmotion``.
+
+    ``intensity`` mede o quanto o texto é emotivo (1 - neutral) e
+    ``confidence`` é a probabilidade da emoção dominante.
+    """
+    emotion_scores = {e: float(scores.get(e, 0.0)) for e in EMOTIONS}
+    dominant = max(emotion_scores, key=emotion_scores.get)
+    return {
+        "dominant_emotion": dominant,
+        "intensity": 1.0 - emotion_scores["neutral"],
+        "confidence": emotion_scores[dominant],
+        "emotion_scores": emotion_scores,
+    }
+
+
+class TransformersEmotionClassifier:
+    """DistilRoBERTa de emoções com tokenização e forward separados."""
+
+    def __init__(self, model_name: str = config.MODEL_CONFIGS["text_emotion"]["name"],
+                 use_snapshot: bool = True):
+        import torch
+
+        self.torch = torch
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        restored = None
+        if use_snapshot and model_name == config.MODEL_CONFIGS["text_emotion"]["name"]:
+            from backend.core.snapshots import restore_snapshot
+
+            restored = restore_snapshot("text_emotion", device=self.device)
+        if restored is not None:
+            self.tokenizer, self.model = restored
+        else:
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.model = AutoModelForSequenceClassification.from_pretrained(model_name).to(self.device)
+        self.model.eval()
+        self.labels = [self.model.config.id2label[i] for i in range(self.model.config.num_labels)]
+
+    def encode(self, texts: Sequence[str]) -> List[List[int]]:
+        """Tokeniza sem padding (o padding é feito por faixa)."""
+        return self.tokenizer(list(texts), truncation=True,
+                              max_length=config.TEXT_EMOTION_MAX_TOKENS)["input_ids"]
+
+    def forward(self, batch_ids: List[List[int]]) -> List[Dict[str, float]]:
+        """Uma passada para o lote, com padding até o maior da faixa."""
+        padded = self.tokenizer.pad({"input_ids": batch_ids}, padding="longest",
+                                    return_tensors="pt")
+        padded = {k: v.to(self.device) for k, v in padded.items()}
+        with self.torch.inference_mode():
+            logits = self.model(**padded).logits
+        probs = self.torch.softmax(logits.float(), dim=-1).cpu().numpy()
+        return [dict(zip(self.labels, row.tolist())) for row in probs]
+
+
+def load_text_emotion() -> TransformersEmotionClassifier:
+    return TransformersEmotionClassifier()
+
+
+class BatchingStats:
+    """Vazão, tamanho de lote e tempo em fila (janela deslizante)."""
+
+    def __init__(self, window: int = 1024):
+        self.requests = 0
+        self.batches = 0
+        self.forward_passes = 0
+        self.padded_tokens = 0
+        self.real_tokens = 0
+        self._queue_times = deque(maxlen=window)
+        self._completions = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_batch(self, queue_times: List[float], forward_passes: int,
+                     real_tokens: int, padded_tokens: int):
+        now = time.perf_counter()
+        with self._lock:
+            self.requests += len(queue_times)
+            self.batches += 1
+            self.forward_passes += forward_passes
+            self.real_tokens += real_tokens
+            self.padded_tokens += padded_tokens
+            self._queue_times.extend(queue_times)
+            self._completions.extend([now] * len(queue_times))
+            self._batch_sizes.append(len(queue_times))
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            queue_ms = np.array(self._queue_times) * 1000.0
+            span = (self._completions[-1] - self._completions[0]) if len(self._completions) > 1 else 0.0
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "forward_passes": self.forward_passes,
+                "mean_batch_size": float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+                "throughput_per_s": (len(self._completions) - 1) / span if span > 0 else 0.0,
+                "queue_time_ms_mean": float(queue_ms.mean()) if len(queue_ms) else 0.0,
+                "queue_time_ms_p95": float(np.percentile(queue_ms, 95)) if len(queue_ms) else 0.0,
+                "padding_efficiency": self.real_tokens / self.padded_tokens if self.padded_tokens else 1.0,
+            }
+
+
+class TextEmotionAnalyzer:
+    """Front de micro-batching para o classificador de emoções de texto."""
+
+    model_name = "text_emotion"
+
+    def __init__(self, model_manager: Optional[ModelManager] = None, loader=None,
+                 max_batch_size: int = config.TEXT_EMOTION_MAX_BATCH,
+                 max_wait_ms: float = config.TEXT_EMOTION_MAX_WAIT_MS,
+                 buckets: Sequence[int] = config.TEXT_EMOTION_BUCKETS):
+        self.mm = model_manager or get_model_manager()
+        self.logger = get_logger()
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.buckets = tuple(sorted(buckets))
+        self.stats = BatchingStats()
+        self._batcher = MicroBatcher(self._process, "text-emotion", max_batch_size,
+                                     self.max_wait_s)
+
+        if not self.mm.is_registered(self.model_name):
+            cfg = config.MODEL_CONFIGS["text_emotion"]
+            self.mm.register(self.model_name, loader or load_text_emotion,
+                             vram_gb=cfg["vram_gb"], ram_gb=cfg["ram_gb"])
+
+    # ------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------
+
+    def submit(self, text: str) -> Future:
+        """Enfileira um texto; o Future resolve para ``AggregatedEmotion``."""
+        return self._batcher.submit(text)
+
+    def analyze(self, text: str, timeout: Optional[float] = None) -> dict:
+        """Classifica um texto (bloqueante)."""
+        return self.submit(text).result(timeout=timeout)
+
+    def analyze_many(self, texts: Sequence[str]) -> List[dict]:
+        """Classifica vários textos; todos entram no mesmo ciclo de batching."""
+        futures = [self.submit(t) for t in texts]
+        return [f.result() for f in futures]
+
+    async def analyze_async(self, text: str) -> dict:
+        """Versão assíncrona para rotas FastAPI."""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def get_stats(self) -> dict:
+        data = self.stats.to_dict()
+        data.update({"max_batch_size": self.max_batch_size,
+                     "max_wait_ms": self.max_wait_s * 1000.0,
+                     "queue_depth": self._batcher.qsize()})
+        return data
+
+    def shutdown(self):
+        """Encerra o worker após esvaziar a fila."""
+        self._batcher.shutdown()
+
+    # ------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------
+
+    def _bucket_of(self, length: int) -> int:
+        for bound in self.buckets:
+            if length <= bound:
+                return bound
+        return self.buckets[-1]
+
+    def _process(self, batch: List[BatchItem]):
+        started = time.perf_counter()
+        queue_times = [started - r.enqueued_at for r in batch]
+
+        with self.mm.load(self.model_name, prefetch_next=False) as classifier:
+            encoded = classifier.encode([r.payload for r in batch])
+
+            # Ordena por comprimento e separa em faixas: padding só até o maior da faixa
+            order = sorted(range(len(batch)), key=lambda i: len(encoded[i]))
+            groups: Dict[int, List[int]] = {}
+            for i in order:
+                groups.setdefault(self._bucket_of(len(encoded[i])), []).append(i)
+
+            real_tokens = padded_tokens = 0
+            for indices in groups.values():
+                ids = [encoded[i] for i in indices]
+                real_tokens += sum(len(x) for x in ids)
+                padded_tokens += max(len(x) for x in ids) * len(ids)
+                for i, scores in zip(indices, classifier.forward(ids)):
+                    batch[i].future.set_result(aggregate_emotion(scores))
+
+        self.stats.record_batch(queue_times, len(groups), real_tokens, padded_tokens)
+
+
+_text_emotion_analyzer: Optional[TextEmotionAnalyzer] = None
+_text_emotion_analyzer_lock = threading.Lock()
+
+
+def get_text_emotion_analyzer() -> TextEmotionAnalyzer:
+    """Retorna o analisador de emoção de texto global."""
+    global _text_emotion_analyzer
+    if _text_emotion_analyzer is None:
+        with _text_emotion_analyzer_lock:
+            if _text_emotion_analyzer is None:
+                _text_emotion_analyzer = TextEmotionAnalyzer()
+    return _text_emotion_analyzer
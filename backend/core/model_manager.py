@@ -0,0 +1,382 @@
+"""
+Model Manager - Aurora EchoTales
+================================
+Gerenciador de residência de modelos com orçamento de VRAM/RAM.
+
+Em vez de "carregar → usar → descarregar" a cada requisição, os modelos
+permanecem aquecidos enquanto couberem no orçamento configurado. Quando
+o orçamento estoura, os modelos menos usados recentemente (LRU) e que não
+estão em uso são descarregados. Ao entrar em um estágio, o modelo do
+próximo estágio do pipeline é pré-carregado em segundo plano.
+
+Uso:
+    manager = get_model_manager()
+    manager.register("story", load_llama, vram_gb=4.9, ram_gb=1.0)
+
+    with manager.load("story") as llm:
+        story = llm(prompt)        # "tts" e "music" já estão carregando
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+from backend import config
+from backend.utils.logger import get_logger, record_stage
+from backend.utils.resource_manager import ResourceManager, cuda_available, get_resource_manager
+from backend.utils.resource_sampler import get_resource_sampler
+
+
+@dataclass
+class ModelSpec:
+    """Como carregar um modelo e quanto ele ocupa."""
+
+    name: str
+    loader: Callable[[], Any]
+    vram_gb: float = 0.0
+    ram_gb: float = 0.0
+    unloader: Optional[Callable[[Any], None]] = None
+
+
+@dataclass
+class ResidentModel:
+    """Modelo atualmente carregado."""
+
+    spec: ModelSpec
+    model: Any
+    load_time: float
+    last_used: float
+    in_use: int = 0
+    uses: int = 0
+    prefetched: bool = False
+
+
+@dataclass
+class ResidencyStats:
+    """Contadores para ajuste do orçamento."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    prefetches: int = 0
+    prefetch_hits: int = 0
+    prefetch_skipped: int = 0
+    load_time_s: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["hit_ratio"] = self.hit_ratio
+        return data
+
+
+class ModelManager:
+    """Mantém modelos residentes dentro de um orçamento de VRAM/RAM."""
+
+    def __init__(self,
+                 vram_budget_gb: float = config.RESIDENCY_VRAM_BUDGET_GB,
+                 ram_budget_gb: float = config.RESIDENCY_RAM_BUDGET_GB,
+                 resource_manager: Optional[ResourceManager] = None,
+                 next_stages: Optional[Dict[str, List[str]]] = None,
+                 enable_prefetch: bool = config.ENABLE_PREFETCH):
+        self.vram_budget_gb = vram_budget_gb
+        self.ram_budget_gb = ram_budget_gb
+        self.rm = resource_manager or get_resource_manager()
+        self.next_stages = config.PIPELINE_NEXT_STAGES if next_stages is None else next_stages
+        self.enable_prefetch = enable_prefetch
+        self.stats = ResidencyStats()
+        self.logger = get_logger()
+
+        self._specs: Dict[str, ModelSpec] = {}
+        self._resident: "OrderedDict[str, ResidentModel]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.RLock()
+        self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+
+    # ------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------
+
+    def register(self, name: str, loader: Callable[[], Any], vram_gb: float = 0.0,
+                 ram_gb: float = 0.0, unloader: Optional[Callable[[Any], None]] = None):
+        """Registra a fábrica de um modelo e sua ocupação estimada."""
+        with self._lock:
+            self._specs[name] = ModelSpec(name, loader, vram_gb, ram_gb, unloader)
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._specs
+
+    # ------------------------------------------------------------
+    # Aquisição
+    # ------------------------------------------------------------
+
+    def acquire(self, name: str) -> Any:
+        """Retorna o modelo carregado e o marca como em uso (não-evictável)."""
+        return self._ensure_resident(name, pin=True)
+
+    def release(self, name: str):
+        """Libera o modelo adquirido; ele continua residente."""
+        with self._lock:
+            entry = self._resident.get(name)
+            if entry is not None and entry.in_use > 0:
+                entry.in_use -= 1
+                entry.last_used = time.time()
+
+    @contextmanager
+    def load(self, name: str, prefetch_next: Optional[bool] = None):
+        """
+        Context manager de uso de um modelo.
+
+        Args:
+            name: Estágio/modelo registrado.
+            prefetch_next: Pré-carrega os próximos estágios enquanto este
+                executa (padrão: ``config.ENABLE_PREFETCH``).
+        """
+        model = self.acquire(name)
+        try:
+            if self.enable_prefetch if prefetch_next is None else prefetch_next:
+                for next_name in self.next_stages.get(name, []):
+                    if next_name in self._specs:
+                        self.prefetch(next_name)
+            with get_resource_sampler().span(name):
+                yield model
+        finally:
+            self.release(name)
+
+    def prefetch(self, name: str) -> Future:
+        """Agenda o carregamento do modelo em segundo plano."""
+        return self._prefetcher.submit(self._prefetch_task, name)
+
+    def _prefetch_task(self, name: str):
+        try:
+            return self._ensure_resident(name, pin=False)
+        except Exception as e:
+            self.logger.warning("⚠️ Prefetch de '%s' falhou: %s", name, e)
+            return None
+
+    def _ensure_resident(self, name: str, pin: bool) -> Any:
+        if name not in self._specs:
+            raise KeyError(f"Modelo não registrado: {name}")
+        spec = self._specs[name]
+
+        while True:
+            with self._lock:
+                entry = self._resident.get(name)
+                if entry is not None:
+                    self._resident.move_to_end(name)
+                    entry.last_used = time.time()
+                    if pin:
+                        entry.in_use += 1
+                        self.stats.hits += 1
+                        if entry.prefetched and entry.uses == 0:
+                            self.stats.prefetch_hits += 1
+                        entry.uses += 1
+                    return entry.model
+
+                pending = self._pending.get(name)
+                if pending is None:
+                    if not pin and not self._fits_after_eviction(spec):
+                        self.stats.prefetch_skipped += 1
+                        return None
+                    if pin:
+                        self.stats.misses += 1
+                    future = Future()
+                    self._pending[name] = future
+                    self._make_room(spec)
+                    break
+
+            # Outro thread (ex.: prefetch) já está carregando: aguardar e tentar de novo
+            pending.result()
+
+        start = time.perf_counter()
+        try:
+            model = spec.loader()
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(name, None)
+            future.set_exception(e)
+            raise
+        load_time = time.perf_counter() - start
+
+        with self._lock:
+            now = time.time()
+            self._resident[name] = ResidentModel(
+                spec=spec,
+                model=model,
+                load_time=load_time,
+                last_used=now,
+                in_use=1 if pin else 0,
+                uses=1 if pin else 0,
+                prefetched=not pin,
+            )
+            self._pending.pop(name, None)
+            self.stats.load_time_s += load_time
+            if not pin:
+                self.stats.prefetches += 1
+
+        future.set_result(model)
+        origin = "prefetch" if not pin else "sob demanda"
+        self.logger.info("🤖 Modelo '%s' carregado (%s) em %.2fs", name, origin, load_time,
+                         model=name, stage="load", duration_s=load_time)
+        record_stage(f"load.{name}", load_time)
+        return model
+
+    # ------------------------------------------------------------
+    # Orçamento e evicção
+    # ------------------------------------------------------------
+
+    def _usage(self, pinned_only: bool = False) -> tuple:
+        """Soma (vram_gb, ram_gb) dos modelos residentes e em carregamento."""
+        vram = ram = 0.0
+        for entry in self._resident.values():
+            if pinned_only and entry.in_use == 0:
+                continue
+            vram += entry.spec.vram_gb
+            ram += entry.spec.ram_gb
+        for pending_name in self._pending:
+            pending_spec = self._specs[pending_name]
+            vram += pending_spec.vram_gb
+            ram += pending_spec.ram_gb
+        return vram, ram
+
+    def _exceeds_budget(self, vram: float, ram: float) -> bool:
+        return vram > self.vram_budget_gb or ram > self.ram_budget_gb
+
+    def _fits_after_eviction(self, spec: ModelSpec) -> bool:
+        vram, ram = self._usage(pinned_only=True)
+        return not self._exceeds_budget(vram + spec.vram_gb, ram + spec.ram_gb)
+
+    def _make_room(self, spec: ModelSpec):
+        """Descarrega modelos LRU até que ``spec`` caiba no orçamento."""
+        evicted = False
+        while True:
+            vram, ram = self._usage()
+            # _usage já inclui ``spec`` (registrado em _pending)
+            if not self._exceeds_budget(vram, ram):
+                break
+            if not self._evict_lru(exclude=spec.name):
+                self.logger.warning("⚠️ Orçamento excedido ao carregar '%s' (%.2fGB VRAM / "
+                                    "%.2fGB RAM): modelos restantes estão em uso",
+                                    spec.name, vram, ram)
+                break
+            evicted = True
+
+        # Com GPU, confirma a VRAM real (estimativas podem estar desatualizadas)
+        if cuda_available():
+            while not self.rm.check_vram_limit(spec.vram_gb, limit_gb=self.vram_budget_gb):
+                if not self._evict_lru(exclude=spec.name):
+                    break
+                evicted = True
+                self.rm.clear_memory()
+
+        if evicted:
+            self.rm.clear_memory()
+
+    def _evict_lru(self, exclude: Optional[str] = None) -> bool:
+        """Descarrega o modelo ocioso menos usado recentemente."""
+        for name, entry in self._resident.items():
+            if entry.in_use == 0 and name != exclude:
+                self._unload_entry(name)
+                self.stats.evictions += 1
+                self.logger.info("♻️ Modelo '%s' descarregado (LRU)", name, model=name)
+                return True
+        return False
+
+    def _unload_entry(self, name: str):
+        entry = self._resident.pop(name)
+        if entry.spec.unloader is not None:
+            try:
+                entry.spec.unloader(entry.model)
+            except Exception as e:
+                self.logger.warning("⚠️ Erro ao descarregar '%s': %s", name, e)
+        entry.model = None
+
+    def unload(self, name: str) -> bool:
+        """Descarrega explicitamente um modelo ocioso."""
+        with self._lock:
+            entry = self._resident.get(name)
+            if entry is None or entry.in_use > 0:
+                return False
+            self._unload_entry(name)
+        self.rm.clear_memory()
+        return True
+
+    def unload_all(self):
+        """Descarrega todos os modelos ociosos."""
+        with self._lock:
+            for name in [n for n, e in self._resident.items() if e.in_use == 0]:
+                self._unload_entry(name)
+        self.rm.clear_memory()
+
+    # ------------------------------------------------------------
+    # Introspecção
+    # ------------------------------------------------------------
+
+    def is_resident(self, name: str) -> bool:
+        with self._lock:
+            return name in self._resident
+
+    def resident_models(self) -> List[str]:
+        """Nomes dos modelos residentes, do menos para o mais recente."""
+        with self._lock:
+            return list(self._resident.keys())
+
+    def wait_for_prefetch(self, timeout: Optional[float] = None):
+        """Aguarda os prefetches agendados até o momento."""
+        self._prefetcher.submit(lambda: None).result(timeout=timeout)
+
+    def get_stats(self) -> dict:
+        """Contadores de residência e uso estimado do orçamento."""
+        with self._lock:
+            vram, ram = self._usage()
+            data = self.stats.to_dict()
+            data.update({
+                "resident": list(self._resident.keys()),
+                "vram_used_gb": vram,
+                "ram_used_gb": ram,
+                "vram_budget_gb": self.vram_budget_gb,
+                "ram_budget_gb": self.ram_budget_gb,
+            })
+            return data
+
+    def print_stats(self):
+        """Imprime os contadores de residência."""
+        stats = self.get_stats()
+        print("\n" + "=" * 60)
+        print("🤖 RESIDÊNCIA DE MODELOS")
+        print("=" * 60)
+        print(f"✅ Hits: {stats['hits']} | ❌ Misses: {stats['misses']} "
+              f"| 🎯 Hit ratio: {stats['hit_ratio']:.1%}")
+        print(f"♻️  Evicções: {stats['evictions']} | ⏩ Prefetches: {stats['prefetches']} "
+              f"(úteis: {stats['prefetch_hits']}, ignorados: {stats['prefetch_skipped']})")
+        print(f"🎮 VRAM: {stats['vram_used_gb']:.2f}/{stats['vram_budget_gb']:.2f} GB "
+              f"| 💾 RAM: {stats['ram_used_gb']:.2f}/{stats['ram_budget_gb']:.2f} GB")
+        print(f"📦 Residentes: {', '.join(stats['resident']) or '-'}")
+        print("=" * 60 + "\n")
+
+    def shutdown(self):
+        """Encerra o prefetcher e descarrega tudo."""
+        self._prefetcher.shutdown(wait=True)
+        self.unload_all()
+
+
+_model_manager: Optional[ModelManager] = None
+_model_manager_lock = threading.Lock()
+
+
+def get_model_manager() -> ModelManager:
+    """Retorna a instância global do ModelManager."""
+    global _model_manager
+    if _model_manager is None:
+        with _model_manager_lock:
+            if _model_manager is None:
+                _model_manager = ModelManager()
+    return _model_manager
@@ -0,0 +1,383 @@
+"""
+Pipeline Orchestrator - Aurora EchoTales
+========================================
+Execução de estágios como um grafo de dependências (DAG).
+
+Cada estágio declara de quais outros depende e qual recurso ocupa:
+``gpu`` (capacidade em GB de VRAM; cada estágio reserva o que o seu
+modelo ocupa) ou ``cpu`` (vagas). Estágios independentes rodam em
+paralelo sempre que o recurso permite, por exemplo a música a partir da
+emoção detectada enquanto a história ainda é escrita, ou a mixagem de
+uma execução na CPU enquanto a GPU atende a próxima. Os recursos são
+compartilhados entre execuções simultâneas.
+
+Toda execução gera um ``PipelineTrace``: quando cada estágio entrou na
+fila, começou e terminou, quanto esperou pelo recurso e o caminho
+crítico. O trace pode ser exportado no formato do Chrome/Perfetto.
+
+Uso:
+    orchestrator = get_orchestrator()
+    run = orchestrator.run([
+        Stage("emotion", analyze, resource="cpu"),
+        Stage("story", write, deps=["emotion"], resource="gpu", cost=4.9),
+        Stage("music", compose, deps=["emotion"], resource="gpu", cost=3.0),
+    ], inputs={"text": "..."})
+    run.results["story"], run.trace.summary()
+"""
+
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from backend import config
+from backend.utils.logger import get_logger, record_stage
+from backend.utils.resource_sampler import get_resource_sampler
+
+
+class PipelineError(RuntimeError):
+    """Falha de um estágio; carrega o trace parcial da execução."""
+
+    def __init__(self, stage: str, error: BaseException, trace: "PipelineTrace"):
+        super().__init__(f"Estágio '{stage}' falhou: {error}")
+        self.stage = stage
+        self.error = error
+        self.trace = trace
+
+
+class ResourcePool:
+    """
+    Semáforo com peso e prioridade.
+
+    ``acquire(cost)`` bloqueia até haver ``cost`` unidades livres. Os
+    pedidos são atendidos em ordem de prioridade (maior primeiro) e, no
+    empate, de chegada; um pedido maior que a capacidade roda sozinho.
+    """
+
+    def __init__(self, name: str, capacity: float):
+        self.name = name
+        self.capacity = capacity
+        self.in_use = 0.0
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, cost: float, priority: float = 0.0) -> float:
+        """Reserva ``cost`` unidades; retorna o valor efetivamente reservado."""
+        cost = min(cost, self.capacity)
+        ticket = (-priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            while self._waiters[0] != ticket or self.in_use + cost > self.capacity:
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self.in_use += cost
+            self._cond.notify_all()
+        return cost
+
+    def release(self, cost: float):
+        with self._cond:
+            self.in_use -= cost
+            self._cond.notify_all()
+
+
+@dataclass
+class Stage:
+    """
+    Um nó do pipeline.
+
+    ``fn`` recebe o contexto da execução (entradas + resultados dos
+    estágios concluídos, por nome) e retorna o resultado do estágio.
+    ``estimate_s`` orienta a prioridade: estágios no caminho mais longo
+    até o fim passam à frente na disputa por um recurso.
+    """
+
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    deps: Sequence[str] = ()
+    resource: str = "cpu"
+    cost: float = 1.0
+    estimate_s: float = 1.0
+
+
+@dataclass
+class StageSpan:
+    """Intervalos de um estágio (segundos desde o início da execução)."""
+
+    stage: str
+    resource: str
+    cost: float
+    deps: List[str]
+    queued: float
+    started: Optional[float] = None
+    ended: Optional[float] = None
+    status: str = "pending"
+    error: Optional[str] = None
+    thread: str = ""
+
+    @property
+    def wait_s(self) -> float:
+        return (self.started - self.queued) if self.started is not None else 0.0
+
+    @property
+    def run_s(self) -> float:
+        if self.started is None or self.ended is None:
+            return 0.0
+        return self.ended - self.started
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.update({"wait_s": self.wait_s, "run_s": self.run_s})
+        return data
+
+
+@dataclass
+class PipelineTrace:
+    """Linha do tempo de uma execução."""
+
+    run_id: str
+    name: str
+    started_at: float = field(default_factory=time.time)
+    wall_s: float = 0.0
+    spans: Dict[str, StageSpan] = field(default_factory=dict)
+
+    def critical_path(self) -> List[str]:
+        """Cadeia de dependências que determinou o fim da execução."""
+        done = [s for s in self.spans.values() if s.ended is not None]
+        if not done:
+            return []
+        path = [max(done, key=lambda s: s.ended)]
+        while True:
+            deps = [self.spans[d] for d in path[-1].deps
+                    if d in self.spans and self.spans[d].ended is not None]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda s: s.ended))
+        return [s.stage for s in reversed(path)]
+
+    def summary(self) -> dict:
+        """Para onde foi o tempo: ocupação por recurso, espera e paralelismo."""
+        busy: Dict[str, float] = {}
+        for span in self.spans.values():
+            busy[span.resource] = busy.get(span.resource, 0.0) + span.run_s
+        stage_time = sum(s.run_s for s in self.spans.values())
+        return {
+            "run_id": self.run_id,
+            "wall_s": self.wall_s,
+            "stage_time_s": stage_time,
+            "parallelism": stage_time / self.wall_s if self.wall_s else 0.0,
+            "wait_s": sum(s.wait_s for s in self.spans.values()),
+            "busy_s": busy,
+            "critical_path": self.critical_path(),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "summary": self.summary(),
+            "stages": [s.to_dict() for s in sorted(self.spans.values(), key=lambda s: s.queued)],
+        }
+
+    def to_chrome_trace(self) -> dict:
+        """Formato ``traceEvents`` (chrome://tracing, ui.perfetto.dev)."""
+        events = []
+        for span in self.spans.values():
+            if span.started is None:
+                continue
+            if span.wait_s > 0:
+                events.append({"name": f"{span.stage} (fila)", "cat": "wait", "ph": "X",
+                               "ts": span.queued * 1e6, "dur": span.wait_s * 1e6,
+                               "pid": self.name, "tid": f"{span.resource} fila"})
+            events.append({"name": span.stage, "cat": span.resource, "ph": "X",
+                           "ts": span.started * 1e6, "dur": span.run_s * 1e6,
+                           "pid": self.name, "tid": f"{span.resource}:{span.thread}",
+                           "args": {"status": span.status, "cost": span.cost}})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "metadata": {"run_id": self.run_id}}
+
+    def render(self, width: int = 60) -> str:
+        """Gráfico de Gantt em texto (``.`` fila, ``#`` execução)."""
+        scale = width / self.wall_s if self.wall_s else 0.0
+        lines = []
+        for span in sorted(self.spans.values(), key=lambda s: s.queued):
+            row = [" "] * width
+            end = span.ended if span.ended is not None else self.wall_s
+            start = span.started if span.started is not None else end
+            for i in range(int(span.queued * scale), min(int(start * scale), width)):
+                row[i] = "."
+            for i in range(int(start * scale), min(max(int(end * scale), int(start * scale) + 1), width)):
+                row[i] = "#"
+            lines.append(f"{span.stage:<12} {span.resource:<4} |{''.join(row)}| "
+                         f"{span.run_s:6.2f}s (+{span.wait_s:.2f}s fila)")
+        return "\n".join(lines)
+
+
+@dataclass
+class PipelineRun:
+    results: Dict[str, Any]
+    trace: PipelineTrace
+
+
+def _longest_paths(stages: Dict[str, Stage]) -> Dict[str, float]:
+    """Soma das estimativas do estágio até o fim do grafo (prioridade)."""
+    children: Dict[str, List[str]] = {name: [] for name in stages}
+    for stage in stages.values():
+        for dep in stage.deps:
+            children[dep].append(stage.name)
+
+    memo: Dict[str, float] = {}
+    visiting = set()
+
+    def visit(name: str) -> float:
+        if name in memo:
+            return memo[name]
+        if name in visiting:
+            raise ValueError(f"Ciclo no pipeline envolvendo '{name}'")
+        visiting.add(name)
+        memo[name] = stages[name].estimate_s + max((visit(c) for c in children[name]), default=0.0)
+        visiting.discard(name)
+        return memo[name]
+
+    for name in stages:
+        visit(name)
+    return memo
+
+
+class Orchestrator:
+    """Executa pipelines sobre pools de recursos compartilhados."""
+
+    def __init__(self, gpu_capacity: float = config.PIPELINE_GPU_CAPACITY_GB,
+                 cpu_slots: int = config.PIPELINE_CPU_SLOTS,
+                 max_workers: int = config.PIPELINE_MAX_WORKERS,
+                 history: int = config.PIPELINE_TRACE_HISTORY):
+        self.pools = {"gpu": ResourcePool("gpu", gpu_capacity),
+                      "cpu": ResourcePool("cpu", cpu_slots)}
+        self.logger = get_logger()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+        self._traces: "deque[PipelineTrace]" = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def run(self, stages: Sequence[Stage], inputs: Optional[Dict[str, Any]] = None,
+            name: str = "pipeline", run_id: Optional[str] = None) -> PipelineRun:
+        """Executa o grafo e bloqueia até o fim; falhas viram ``PipelineError``."""
+        graph = {s.name: s for s in stages}
+        if len(graph) != len(stages):
+            raise ValueError("Nomes de estágios repetidos")
+        for stage in stages:
+            missing = [d for d in stage.deps if d not in graph]
+            if missing:
+                raise ValueError(f"Estágio '{stage.name}' depende de {missing}, inexistente(s)")
+            if stage.resource not in self.pools:
+                raise ValueError(f"Recurso desconhecido: {stage.resource}")
+        priority = _longest_paths(graph)
+
+        trace = PipelineTrace(run_id=run_id or uuid.uuid4().hex, name=name)
+        context: Dict[str, Any] = dict(inputs or {})
+        t0 = time.perf_counter()
+        submitted: Dict[Future, str] = {}
+        done: set = set()
+        failure: Optional[tuple] = None
+
+        def ready() -> List[Stage]:
+            queued = set(submitted.values()) | done
+            return sorted((s for s in stages if s.name not in queued
+                           and all(d in done for d in s.deps)),
+                          key=lambda s: -priority[s.name])
+
+        while True:
+            if failure is None:
+                for stage in ready():
+                    trace.spans[stage.name] = StageSpan(
+                        stage.name, stage.resource, stage.cost, list(stage.deps),
+                        queued=time.perf_counter() - t0)
+                    # Contexto de log (request_id, estágios) segue para a thread do estágio
+                    future = self._executor.submit(contextvars.copy_context().run, self._execute,
+                                                   stage, dict(context), trace.spans[stage.name],
+                                                   priority[stage.name], t0, name)
+                    submitted[future] = stage.name
+            if not submitted:
+                break
+
+            finished, _ = wait(list(submitted), return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage_name = submitted.pop(future)
+                try:
+                    context[stage_name] = future.result()
+                    done.add(stage_name)
+                except Exception as e:
+                    if failure is None:
+                        failure = (stage_name, e)
+
+        trace.wall_s = time.perf_counter() - t0
+        for stage in stages:
+            if stage.name not in trace.spans:
+                trace.spans[stage.name] = StageSpan(stage.name, stage.resource, stage.cost,
+                                                    list(stage.deps), queued=trace.wall_s,
+                                                    status="skipped")
+        with self._lock:
+            self._traces.append(trace)
+
+        summary = trace.summary()
+        self.logger.info(
+            "🧭 Pipeline '%s' %s: %.2fs (estágios somam %.2fs, paralelismo %.2fx) | crítico: %s",
+            name, trace.run_id[:8], trace.wall_s, summary["stage_time_s"], summary["parallelism"],
+            " → ".join(summary["critical_path"]),
+            pipeline=name, run_id=trace.run_id, duration_s=trace.wall_s,
+        )
+        if failure is not None:
+            raise PipelineError(failure[0], failure[1], trace)
+        return PipelineRun(results={s.name: context[s.name] for s in stages}, trace=trace)
+
+    def _execute(self, stage: Stage, context: Dict[str, Any], span: StageSpan,
+                 priority: float, t0: float, span_prefix: str) -> Any:
+        pool = self.pools[stage.resource]
+        reserved = pool.acquire(stage.cost, priority)
+        span.started = time.perf_counter() - t0
+        span.thread = threading.current_thread().name
+        span.status = "running"
+        try:
+            with get_resource_sampler().span(f"{span_prefix}.{stage.name}"):
+                result = stage.fn(context)
+            span.status = "done"
+            return result
+        except BaseException as e:
+            span.status = "failed"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.ended = time.perf_counter() - t0
+            pool.release(reserved)
+            record_stage(f"pipeline.{stage.name}", span.ended - span.started)
+
+    def get_trace(self, run_id: str) -> Optional[PipelineTrace]:
+        with self._lock:
+            return next((t for t in self._traces if t.run_id == run_id), None)
+
+    def recent_traces(self) -> List[PipelineTrace]:
+        with self._lock:
+            return list(self._traces)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_orchestrator: Optional[Orchestrator] = None
+_orchestrator_lock = threading.Lock()
+
+
+def get_orchestrator() -> Orchestrator:
+    """Retorna o orquestrador global (recursos compartilhados entre execuções)."""
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = Orchestrator()
+    return _orchestrator
@@ -0,0 +1,357 @@
+"""
+Estágios Remotos - Aurora EchoTales
+===================================
+Os dois lados de cada estágio do pool de workers (``worker_pool``).
+
+No worker: ``StoryStage``, ``NarrationStage``, ``MusicStage`` e
+``AnalysisStage`` envolvem as classes locais; métodos geradores viram
+jobs em streaming e recebem o ``cancel`` do pool.
+
+Na API: ``RemoteStoryGenerator``, ``RemoteTTSNarrator``,
+``RemoteMusicGenerator`` e ``RemoteAudioAnalyzer`` têm a mesma interface
+que as rotas e o pipeline já usam, e despacham para os workers.
+
+Histórias: o ``story_id`` é escolhido na API e as continuações vão para
+o worker que criou a história (onde estão a sessão viva e o estado KV);
+leituras (galeria, detalhe) vão direto ao ``StoryStore``, que os
+workers gravam no mesmo banco SQLite.
+"""
+
+import threading
+import uuid
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from backend import config
+from backend.models.audio_analyzer import AudioAnalyzer
+from backend.models.tts_narrator import StreamMetrics, split_sentences
+
+# ============================================================
+# Lado do worker
+# ============================================================
+
+
+class StoryStage:
+    """``StoryGenerator`` do worker; cada escrita é confirmada no banco antes da resposta."""
+
+    def __init__(self, stub: bool = False):
+        from backend.models.story_generator import StoryGenerator
+        from backend.models.stubs import StubLlama
+        from backend.utils.story_store import StoryStore
+
+        self.store = StoryStore(path=config.STORY_DB_PATH)
+        self.generator = StoryGenerator(loader=StubLlama if stub else None, store=self.store)
+
+    def _flushed(self, value):
+        self.store.flush(timeout=10)
+        return value
+
+    def create(self, **kwargs):
+        return self._flushed(self.generator.create(**kwargs))
+
+    def continue_story(self, story_id: str, user_input: str, **kwargs):
+        return self._flushed(self.generator.continue_story(story_id, user_input, **kwargs))
+
+    def adopt(self, text: str, **kwargs):
+        return self._flushed(self.generator.adopt(text, **kwargs))
+
+    def delete(self, story_id: str) -> bool:
+        return self._flushed(self.generator.delete(story_id))
+
+    def stream_create(self, cancel: threading.Event, **kwargs):
+        return (yield from self._drive(self.generator.stream_create(**kwargs), cancel))
+
+    def stream_continue(self, story_id: str, user_input: str, cancel: threading.Event, **kwargs):
+        stream = self.generator.stream_continue(story_id, user_input, **kwargs)
+        return (yield from self._drive(stream, cancel))
+
+    def _drive(self, stream, cancel: threading.Event):
+        for piece in stream:
+            if cancel.is_set():
+                # O turno para no próximo token; drena até o fim para ter o resultado
+                stream.close()
+                continue
+            yield piece
+        return self._flushed(stream.result)
+
+
+class NarrationStage:
+    """``TTSNarrator`` do worker."""
+
+    def __init__(self, stub: bool = False):
+        from backend.models.stubs import StubTTS
+        from backend.models.tts_narrator import TTSNarrator
+
+        self.narrator = TTSNarrator(loader=StubTTS if stub else None)
+
+    def synthesize(self, text: str, **kwargs) -> tuple:
+        return self.narrator.synthesize(text, **kwargs)
+
+    def stream(self, text: str, cancel: threading.Event, **kwargs):
+        """Cabeçalho ``{sample_rate, sentences}``, depois os blocos; devolve as métricas."""
+        stream = self.narrator.stream(text, **kwargs).start()
+        yield {"sample_rate": stream.sample_rate, "sentences": len(stream.sentences)}
+        blocks = iter(stream)
+        try:
+            for block in blocks:
+                yield block
+                # Só entre blocos: fechar o stream com o consumidor esperando o travaria
+                if cancel.is_set():
+                    break
+        finally:
+            blocks.close()
+        return stream.metrics
+
+    def register_voice(self, samples: np.ndarray, sample_rate: int) -> dict:
+        return self.narrator.register_voice(samples, sample_rate)
+
+    def voice_stats(self) -> dict:
+        return self.narrator.voice_stats()
+
+
+class MusicStage:
+    """``MusicGenerator`` do worker."""
+
+    def __init__(self, stub: bool = False):
+        from backend.models.music_generator import MusicGenerator
+        from backend.models.stubs import make_stub_riffusion_loader
+
+        self.generator = MusicGenerator(loader=make_stub_riffusion_loader() if stub else None)
+
+    def generate(self, **kwargs):
+        return self.generator.generate(**kwargs)
+
+    def get_stats(self) -> dict:
+        return self.generator.get_stats()
+
+
+class AnalysisStage:
+    """``AudioAnalyzer`` do worker (Whisper + emoção do texto transcrito)."""
+
+    def __init__(self, stub: bool = False):
+        if stub:
+            from backend.core.emotion_analyzer import TextEmotionAnalyzer
+            from backend.models.speech_to_text import SpeechTranscriber
+            from backend.models.stubs import StubEmotionClassifier, StubSTTBackend
+
+            self.analyzer = AudioAnalyzer(SpeechTranscriber(loader=StubSTTBackend),
+                                          TextEmotionAnalyzer(loader=StubEmotionClassifier),
+                                          audio_emotion=False)
+        else:
+            self.analyzer = AudioAnalyzer()
+
+    def analyze(self, audio: np.ndarray, speech=None) -> dict:
+        return self.analyzer.analyze(audio, speech=speech)
+
+
+# ============================================================
+# Lado da API
+# ============================================================
+
+
+class RemoteStoryStream:
+    """Equivalente remoto do ``StoryStream``."""
+
+    def __init__(self, job, story_id: str):
+        self.job = job
+        self.story_id = story_id
+        self.result = None
+
+    def start(self) -> "RemoteStoryStream":
+        return self
+
+    def __iter__(self) -> Iterator[str]:
+        for piece in self.job:
+            yield piece
+        self.result = self.job.value
+
+    def close(self):
+        self.job.cancel()
+
+    def wait(self, timeout: Optional[float] = None):
+        self.job.wait(timeout)
+
+
+class RemoteStoryGenerator:
+    """Histórias nos workers ``story``; consultas direto no ``StoryStore``."""
+
+    stage = "story"
+
+    def __init__(self, pool, owners: int = 4096):
+        from backend.utils.story_store import get_story_store
+
+        self.pool = pool
+        self.store = get_story_store()
+        self._owners: Dict[str, int] = {}
+        self._max_owners = owners
+        self._lock = threading.Lock()
+
+    def _worker(self, story_id: str) -> int:
+        with self._lock:
+            owner = self._owners.get(story_id)
+        if owner is None:
+            owner = self.pool.affinity(story_id, self.pool.workers(self.stage))
+        return owner
+
+    def _own(self, story_id: str, job):
+        with self._lock:
+            self._owners[story_id] = job.worker
+            while len(self._owners) > self._max_owners:
+                self._owners.pop(next(iter(self._owners)))
+        return job
+
+    def _submit(self, method: str, story_id: str, *args, **kwargs):
+        return self.pool.submit(self.stage, method, *args, worker=self._worker(story_id),
+                                **kwargs)
+
+    def create(self, **kwargs):
+        story_id = kwargs.pop("story_id", None) or uuid.uuid4().hex
+        job = self.pool.submit(self.stage, "create", story_id=story_id, **kwargs)
+        return self._own(story_id, job).result()
+
+    def stream_create(self, **kwargs) -> RemoteStoryStream:
+        story_id = kwargs.pop("story_id", None) or uuid.uuid4().hex
+        job = self.pool.submit(self.stage, "stream_create", story_id=story_id, **kwargs)
+        return RemoteStoryStream(self._own(story_id, job), story_id)
+
+    def adopt(self, text: str, user_prompt: Optional[str] = None,
+              emotions: Optional[dict] = None, emotion_influence: float = 0.5):
+        story_id = uuid.uuid4().hex
+        job = self.pool.submit(self.stage, "adopt", text, user_prompt=user_prompt,
+                               emotions=emotions, emotion_influence=emotion_influence,
+                               story_id=story_id)
+        return self._own(story_id, job).result()
+
+    def continue_story(self, story_id: str, user_input: str,
+                       emotion_context: Optional[dict] = None, temperature: float = 0.7):
+        return self._submit("continue_story", story_id, story_id, user_input,
+                            emotion_context=emotion_context, temperature=temperature).result()
+
+    def stream_continue(self, story_id: str, user_input: str,
+                        emotion_context: Optional[dict] = None,
+                        temperature: float = 0.7) -> RemoteStoryStream:
+        # Checado aqui para a rota responder 404 antes de abrir o stream
+        if not self.store.exists(story_id):
+            raise KeyError(story_id)
+        job = self._submit("stream_continue", story_id, story_id, user_input,
+                           emotion_context=emotion_context, temperature=temperature)
+        return RemoteStoryStream(job, story_id)
+
+    def get(self, story_id: str):
+        from backend.models.story_generator import StorySession
+
+        record = self.store.get(story_id)
+        return StorySession.from_record(record) if record is not None else None
+
+    def delete(self, story_id: str) -> bool:
+        found = self._submit("delete", story_id, story_id).result()
+        with self._lock:
+            self._owners.pop(story_id, None)
+        return found
+
+    def list(self, **filters):
+        return self.store.list(**filters)
+
+    def get_stats(self) -> dict:
+        return {"store": self.store.get_stats(),
+                "workers": self.pool.get_stats()["stages"].get(self.stage)}
+
+
+class RemoteNarrationStream:
+    """Equivalente remoto do ``NarrationStream``."""
+
+    def __init__(self, job, sentences: List[str]):
+        self.job = job
+        self.sentences = sentences
+        self.sample_rate: Optional[int] = None
+        self.metrics = StreamMetrics()
+        self._blocks = iter(job)
+
+    def start(self) -> "RemoteNarrationStream":
+        """Aguarda o cabeçalho do worker (modelo carregado, sample rate conhecido)."""
+        if self.sample_rate is None:
+            header = next(self._blocks, None)
+            if header is None:
+                raise RuntimeError("Narração encerrada antes de começar")
+            self.sample_rate = header["sample_rate"]
+        return self
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        self.start()
+        try:
+            yield from self._blocks
+        except GeneratorExit:
+            self.metrics.cancelled = True
+            raise
+        self.metrics = self.job.value
+
+    def close(self):
+        self.job.cancel()
+
+
+class RemoteTTSNarrator:
+    """Narração nos workers ``tts``."""
+
+    stage = "tts"
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def synthesize(self, text: str, **kwargs) -> tuple:
+        return self.pool.call(self.stage, "synthesize", text, **kwargs)
+
+    def stream(self, text: str, **kwargs) -> RemoteNarrationStream:
+        job = self.pool.submit(self.stage, "stream", text, **kwargs)
+        return RemoteNarrationStream(job, split_sentences(text))
+
+    def register_voice(self, samples: np.ndarray, sample_rate: int) -> dict:
+        return self.pool.call(self.stage, "register_voice", samples, sample_rate)
+
+    def voice_stats(self) -> dict:
+        return self.pool.call(self.stage, "voice_stats")
+
+
+class RemoteMusicGenerator:
+    """Música nos workers ``music``; stems da biblioteca saem direto da API."""
+
+    stage = "music"
+
+    def __init__(self, pool):
+        from backend.models.stem_library import get_stem_library
+
+        self.pool = pool
+        self.library = get_stem_library() if config.MUSIC_STEM_LIBRARY_ENABLED else None
+
+    def generate(self, **kwargs):
+        served = self.library.serve(**kwargs) if self.library is not None else None
+        return served or self.pool.call(self.stage, "generate", **kwargs)
+
+    def get_stats(self) -> dict:
+        return self.pool.call(self.stage, "get_stats")
+
+
+class RemoteAudioAnalyzer:
+    """
+    Análise de voz nos workers ``analysis``; a decodificação do upload
+    continua na API e só o PCM 16 kHz atravessa (por memória compartilhada).
+    """
+
+    stage = "analysis"
+
+    analyze_bytes = AudioAnalyzer.analyze_bytes
+    analyze_decoded = AudioAnalyzer.analyze_decoded
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def analyze(self, audio: np.ndarray, speech=None) -> dict:
+        return self.pool.call(self.stage, "analyze", audio, speech=speech)
+
+
+REMOTE_CLIENTS = {
+    "story": RemoteStoryGenerator,
+    "tts": RemoteTTSNarrator,
+    "music": RemoteMusicGenerator,
+    "analysis": RemoteAudioAnalyzer,
+}
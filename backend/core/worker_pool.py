@@ -0,0 +1,683 @@
+"""
+Worker Pool - Aurora EchoTales
+==============================
+Estágios pesados (LLM, TTS, música, STT + emoção) em processos próprios.
+
+Com ``WORKER_POOL_ENABLED`` o processo da API não carrega modelos: os
+``get_*()`` de cada estágio devolvem um cliente (``remote_stages``) que
+despacha jobs para os workers do estágio. Cada worker é um processo com
+o seu ``ModelManager`` e executa um job por vez; a quantidade por
+estágio vem de ``WORKER_COUNTS``.
+
+Transporte:
+    - jobs: uma fila por worker (profundidade observável por worker)
+    - resultados: um pipe por worker, lido por uma thread coletora
+    - arrays grandes (áudio, espectrogramas): memória compartilhada; só
+      o descritor ``SharedArray`` passa pelo pipe, e quem recebe copia
+      o bloco uma vez e o libera
+    - jobs geradores (streaming) enviam um ``chunk`` por item e o valor
+      de retorno no ``done``; ``WorkerJob.cancel`` sinaliza o worker
+
+Saúde: cada worker atualiza um batimento em memória compartilhada. Um
+processo morto ou sem batimento por ``WORKER_HEARTBEAT_TIMEOUT_S`` é
+reiniciado; os jobs que estavam com ele falham com ``WorkerCrashedError``.
+Falhas seguidas na inicialização esperam cada vez mais antes de tentar.
+
+Uso:
+    pool = WorkerPool({"tts": 2}, stub=True).start()
+    audio, sample_rate, metrics = pool.submit("tts", "synthesize", "Era uma vez").result()
+"""
+
+import importlib
+import inspect
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, fields, is_dataclass, replace
+from multiprocessing import connection
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend import config
+from backend.utils.logger import get_logger
+
+# Classe de cada estágio, instanciada dentro do worker
+STAGE_FACTORIES = {
+    "story": "backend.core.remote_stages:StoryStage",
+    "tts": "backend.core.remote_stages:NarrationStage",
+    "music": "backend.core.remote_stages:MusicStage",
+    "analysis": "backend.core.remote_stages:AnalysisStage",
+}
+
+_WORKER_ENV = "AURORA_WORKER_STAGE"
+
+
+class WorkerCrashedError(RuntimeError):
+    """O worker que executava o job morreu ou parou de responder."""
+
+
+class JobCancelledError(RuntimeError):
+    """Job cancelado antes de começar."""
+
+
+def in_worker() -> bool:
+    """True dentro de um processo do pool."""
+    return bool(os.environ.get(_WORKER_ENV))
+
+
+# ============================================================
+# Memória compartilhada
+# ============================================================
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Descritor de um array publicado em memória compartilhada."""
+
+    name: str
+    shape: tuple
+    dtype: str
+
+    @classmethod
+    def publish(cls, array: np.ndarray) -> "SharedArray":
+        from multiprocessing import shared_memory
+
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+        descriptor = cls(shm.name, tuple(array.shape), array.dtype.str)
+        shm.close()
+        return descriptor
+
+    def take(self) -> np.ndarray:
+        """Copia o bloco para a memória deste processo e o libera."""
+        from multiprocessing import shared_memory
+
+        shm = shared_memory.SharedMemory(name=self.name)
+        try:
+            array = np.ndarray(self.shape, np.dtype(self.dtype), buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+        return array
+
+
+def share(obj: Any, min_bytes: Optional[int] = None) -> Any:
+    """Troca arrays numéricos grandes (em tuplas, listas, dicts e dataclasses) por ``SharedArray``."""
+    if min_bytes is None:
+        min_bytes = config.WORKER_SHM_MIN_BYTES
+    if isinstance(obj, np.ndarray):
+        if obj.nbytes >= min_bytes and obj.dtype.kind in "biufc":
+            return SharedArray.publish(obj)
+        return obj
+    if isinstance(obj, (list, tuple)) and not hasattr(obj, "_fields"):
+        return type(obj)(share(item, min_bytes) for item in obj)
+    if isinstance(obj, dict):
+        return {key: share(value, min_bytes) for key, value in obj.items()}
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return replace(obj, **{f.name: share(getattr(obj, f.name), min_bytes)
+                               for f in fields(obj) if f.init})
+    return obj
+
+
+def unshare(obj: Any) -> Any:
+    """Inverso de ``share``: materializa os ``SharedArray``."""
+    if isinstance(obj, SharedArray):
+        return obj.take()
+    if isinstance(obj, (list, tuple)) and not hasattr(obj, "_fields"):
+        return type(obj)(unshare(item) for item in obj)
+    if isinstance(obj, dict):
+        return {key: unshare(value) for key, value in obj.items()}
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return replace(obj, **{f.name: unshare(getattr(obj, f.name))
+                               for f in fields(obj) if f.init})
+    return obj
+
+
+def _portable(error: BaseException) -> BaseException:
+    """A exceção original se atravessa o pipe; senão, um ``RuntimeError`` equivalente."""
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+# ============================================================
+# Processo worker
+# ============================================================
+
+def _resolve(path: str):
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _worker_main(stage: str, index: int, factory: str, stub: bool, overrides: dict,
+                 jobs, control, results, heartbeat):
+    """Laço do processo worker: constrói o estágio e executa um job por vez."""
+    os.environ[_WORKER_ENV] = stage
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    config.WORKER_POOL_ENABLED = False
+
+    stop = threading.Event()
+    cancels: Dict[int, threading.Event] = {}
+    cancels_lock = threading.Lock()
+
+    def cancel_event(job_id: int) -> threading.Event:
+        with cancels_lock:
+            return cancels.setdefault(job_id, threading.Event())
+
+    def beat():
+        while not stop.is_set():
+            heartbeat.value = time.time()
+            stop.wait(config.WORKER_HEARTBEAT_S)
+
+    def watch_control():
+        while True:
+            job_id = control.get()
+            if job_id is None:
+                return
+            cancel_event(job_id).set()
+
+    threading.Thread(target=beat, name="heartbeat", daemon=True).start()
+    threading.Thread(target=watch_control, name="control", daemon=True).start()
+    logger = get_logger()
+    try:
+        service = _resolve(factory)(stub=stub)
+    except BaseException as e:
+        logger.error("❌ Worker %s#%s: falha ao iniciar: %s", stage, index, e)
+        results.send(("failed", None, _portable(e)))
+        return
+    results.send(("ready", None, os.getpid()))
+    logger.info("🧵 Worker %s#%s pronto (pid %s)", stage, index, os.getpid())
+
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            job_id, method, args, kwargs = job
+            cancel = cancel_event(job_id)
+            try:
+                if cancel.is_set():
+                    raise JobCancelledError("Job cancelado antes de começar")
+                if method.startswith("_"):
+                    raise AttributeError(f"Método privado: {method}")
+                results.send(("started", job_id, None))
+                handler = getattr(service, method)
+                args, kwargs = unshare(args), unshare(kwargs)
+                if "cancel" in inspect.signature(handler).parameters:
+                    kwargs["cancel"] = cancel
+                output = handler(*args, **kwargs)
+                if inspect.isgenerator(output):
+                    output = _drain(output, job_id, results)
+                results.send(("done", job_id, share(output)))
+            except Exception as e:
+                results.send(("error", job_id, _portable(e)))
+            finally:
+                with cancels_lock:
+                    cancels.pop(job_id, None)
+    except (KeyboardInterrupt, EOFError, BrokenPipeError):
+        pass
+    finally:
+        stop.set()
+
+
+def _drain(generator, job_id: int, results):
+    """Envia cada item do gerador e devolve o seu valor de retorno."""
+    while True:
+        try:
+            item = next(generator)
+        except StopIteration as done:
+            return done.value
+        results.send(("chunk", job_id, share(item)))
+
+
+# ============================================================
+# Lado da API
+# ============================================================
+
+class WorkerJob:
+    """
+    Job despachado. ``result()`` devolve o valor final; iterar entrega os
+    itens de um job em streaming (o valor final fica em ``value``).
+    """
+
+    _END = object()
+
+    def __init__(self, pool: "WorkerPool", job_id: int, stage: str, method: str, worker: int):
+        self.pool = pool
+        self.job_id = job_id
+        self.stage = stage
+        self.method = method
+        self.worker = worker
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.submitted_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self._events: "queue.Queue" = queue.Queue()
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def _deliver(self, kind: str, payload: Any):
+        if kind == "chunk":
+            self._events.put(payload)
+            return
+        if kind == "done":
+            self.value = payload
+        else:
+            self.error = payload
+        self._done.set()
+        self._events.put(self._END)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Job {self.stage}.{self.method} sem resposta em {timeout}s")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def __iter__(self):
+        try:
+            while True:
+                item = self._events.get()
+                if item is self._END:
+                    break
+                yield item
+        except GeneratorExit:
+            self.cancel()
+            raise
+        if self.error is not None:
+            raise self.error
+
+    def cancel(self):
+        """Pede ao worker que interrompa o job (sem efeito se já terminou)."""
+        if not self.done:
+            self.pool._cancel(self)
+
+
+@dataclass
+class WorkerStats:
+    completed: int = 0
+    failed: int = 0
+    restarts: int = 0
+    busy_s: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class _Worker:
+    """Processo de um estágio e seus canais."""
+
+    def __init__(self, stage: str, index: int):
+        self.stage = stage
+        self.index = index
+        self.process = None
+        self.jobs = None
+        self.control = None
+        self.results = None
+        self.heartbeat = None
+        self.pid: Optional[int] = None
+        self.ready = threading.Event()
+        self.inflight: Dict[int, WorkerJob] = {}
+        self.running: Optional[WorkerJob] = None
+        self.stats = WorkerStats()
+        self.started_at = 0.0
+        self.failures = 0
+        self.retry_at = 0.0
+
+    @property
+    def label(self) -> str:
+        return f"{self.stage}#{self.index}"
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def to_dict(self) -> dict:
+        now = time.time()
+        return {
+            "worker": self.index,
+            "pid": self.pid,
+            "alive": self.alive(),
+            "ready": self.ready.is_set(),
+            "queue_depth": len(self.inflight),
+            "running": self.running.method if self.running else None,
+            "heartbeat_age_s": now - self.heartbeat.value if self.heartbeat is not None else None,
+            "uptime_s": now - self.started_at if self.started_at else 0.0,
+            **self.stats.to_dict(),
+        }
+
+
+class WorkerPool:
+    """Processos por estágio, despacho para o menos ocupado e reinício em falhas."""
+
+    def __init__(self, counts: Optional[Dict[str, int]] = None, stub: bool = config.WORKER_STUBS,
+                 start_method: str = config.WORKER_START_METHOD,
+                 heartbeat_timeout_s: float = config.WORKER_HEARTBEAT_TIMEOUT_S,
+                 health_interval_s: float = config.WORKER_HEALTH_INTERVAL_S,
+                 config_overrides: Optional[dict] = None):
+        counts = dict(config.WORKER_COUNTS if counts is None else counts)
+        unknown = set(counts) - set(STAGE_FACTORIES)
+        if unknown:
+            raise ValueError(f"Estágios desconhecidos: {', '.join(sorted(unknown))} "
+                             f"(opções: {', '.join(STAGE_FACTORIES)})")
+        self.stub = stub
+        self.heartbeat_timeout_s = heartbeat_timeout_s
+        self.health_interval_s = health_interval_s
+        self.config_overrides = dict(config_overrides or {})
+        self.logger = get_logger()
+        self._ctx = multiprocessing.get_context(start_method)
+        self._workers: Dict[str, List[_Worker]] = {
+            stage: [_Worker(stage, i) for i in range(n)] for stage, n in counts.items() if n > 0}
+        self._jobs: Dict[int, WorkerJob] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._health_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.started = False
+
+    @property
+    def stages(self) -> List[str]:
+        return list(self._workers)
+
+    def _all(self) -> List[_Worker]:
+        return [w for workers in self._workers.values() for w in workers]
+
+    # ---------------------------------------------------------- ciclo de vida
+
+    def start(self) -> "WorkerPool":
+        with self._lock:
+            if self.started:
+                return self
+            for worker in self._all():
+                self._spawn(worker)
+            self.started = True
+        for target, name in ((self._collect, "worker-results"), (self._monitor, "worker-health")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info("🧵 Pool de workers: " + ", ".join(
+            f"{stage}×{len(workers)}" for stage, workers in self._workers.items())
+            + (" (stubs)" if self.stub else ""))
+        return self
+
+    def _spawn(self, worker: _Worker):
+        receiver, sender = self._ctx.Pipe(duplex=False)
+        worker.jobs = self._ctx.Queue()
+        worker.control = self._ctx.Queue()
+        worker.heartbeat = self._ctx.Value("d", time.time(), lock=False)
+        worker.ready.clear()
+        worker.pid = None
+        worker.running = None
+        worker.process = self._ctx.Process(
+            target=_worker_main, name=f"aurora-{worker.label}", daemon=True,
+            args=(worker.stage, worker.index, STAGE_FACTORIES[worker.stage], self.stub,
+                  self.config_overrides, worker.jobs, worker.control, sender, worker.heartbeat))
+        worker.process.start()
+        sender.close()
+        worker.results = receiver
+        worker.started_at = time.time()
+
+    def wait_ready(self, timeout: float = config.WORKER_READY_TIMEOUT_S) -> bool:
+        """Espera todos os workers carregarem o estágio."""
+        deadline = time.monotonic() + timeout
+        return all(w.ready.wait(max(deadline - time.monotonic(), 0)) for w in self._all())
+
+    def shutdown(self, timeout: float = 10.0):
+        """Pede a cada worker que termine; força quem não sair a tempo."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        for worker in self._all():
+            if worker.alive():
+                worker.jobs.put(None)
+                worker.control.put(None)
+        deadline = time.monotonic() + timeout
+        for worker in self._all():
+            if worker.process is not None:
+                worker.process.join(max(deadline - time.monotonic(), 0.1))
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join(1.0)
+            self._fail_inflight(worker, WorkerCrashedError("Pool encerrado"))
+        for thread in self._threads:
+            thread.join(2.0)
+        for worker in self._all():
+            self._discard_channels(worker)
+
+    # ---------------------------------------------------------- despacho
+
+    def submit(self, stage: str, method: str, *args, worker: Optional[int] = None,
+               **kwargs) -> WorkerJob:
+        """
+        Enfileira ``method(*args, **kwargs)`` no estágio. Sem ``worker``,
+        vai para o de menor fila; com ele, para ``worker % n`` (afinidade).
+        """
+        workers = self._workers.get(stage)
+        if not workers:
+            raise ValueError(f"Estágio sem workers: {stage}")
+        if not self.started:
+            self.start()
+        with self._lock:
+            if worker is not None:
+                target = workers[worker % len(workers)]
+            else:
+                target = min(workers, key=lambda w: (len(w.inflight), not w.ready.is_set()))
+            job = WorkerJob(self, next(self._ids), stage, method, target.index)
+            target.inflight[job.job_id] = job
+            self._jobs[job.job_id] = job
+            channel = target.jobs
+        channel.put((job.job_id, method, share(args), share(kwargs)))
+        return job
+
+    def call(self, stage: str, method: str, *args, timeout: Optional[float] = None, **kwargs):
+        """``submit`` e espera o resultado."""
+        return self.submit(stage, method, *args, **kwargs).result(timeout)
+
+    def workers(self, stage: str) -> int:
+        return len(self._workers.get(stage, ()))
+
+    @staticmethod
+    def affinity(key: str, count: int) -> int:
+        """Worker fixo para uma chave (ex.: ``story_id`` e seu estado KV)."""
+        return zlib.crc32(key.encode("utf-8")) % max(count, 1)
+
+    def _cancel(self, job: WorkerJob):
+        worker = self._workers[job.stage][job.worker]
+        try:
+            worker.control.put(job.job_id)
+        except (OSError, ValueError):
+            pass
+
+    # ---------------------------------------------------------- resultados
+
+    def _collect(self):
+        while not self._closed.is_set():
+            with self._lock:
+                readers = {w.results: w for w in self._all() if w.results is not None}
+            if not readers:
+                time.sleep(0.05)
+                continue
+            try:
+                ready = connection.wait(list(readers), timeout=0.2)
+            except (OSError, ValueError):
+                continue  # um canal foi fechado por um reinício
+            for conn in ready:
+                worker = readers[conn]
+                try:
+                    kind, job_id, payload = conn.recv()
+                except (EOFError, OSError):
+                    # Processo morreu; o monitor reinicia e abre canais novos
+                    with self._lock:
+                        if worker.results is conn:
+                            worker.results = None
+                    continue
+                self._handle(worker, kind, job_id, payload)
+
+    def _handle(self, worker: _Worker, kind: str, job_id: Optional[int], payload: Any):
+        if kind == "ready":
+            worker.pid = payload
+            worker.failures = 0
+            worker.ready.set()
+            return
+        if kind == "failed":
+            worker.failures += 1
+            self._fail_inflight(worker, WorkerCrashedError(
+                f"Worker {worker.label} não iniciou: {payload}"))
+            return
+
+        job = self._jobs.get(job_id)
+        if job is None:
+            unshare(payload)  # job já descartado: só libera a memória compartilhada
+            return
+        if kind == "started":
+            job.started_at = time.perf_counter()
+            worker.running = job
+            return
+        payload = unshare(payload)
+        if kind in ("done", "error"):
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                worker.inflight.pop(job_id, None)
+                if worker.running is job:
+                    worker.running = None
+                if kind == "done":
+                    worker.stats.completed += 1
+                else:
+                    worker.stats.failed += 1
+                if job.started_at is not None:
+                    worker.stats.busy_s += time.perf_counter() - job.started_at
+        job._deliver(kind, payload)
+
+    def _fail_inflight(self, worker: _Worker, error: BaseException):
+        with self._lock:
+            jobs = list(worker.inflight.values())
+            worker.inflight.clear()
+            worker.running = None
+            for job in jobs:
+                self._jobs.pop(job.job_id, None)
+            worker.stats.failed += len(jobs)
+        for job in jobs:
+            job._deliver("error", error)
+
+    # ---------------------------------------------------------- saúde
+
+    def _monitor(self):
+        while not self._closed.wait(self.health_interval_s):
+            self.check_health()
+
+    def _problem(self, worker: _Worker) -> Optional[str]:
+        if not worker.alive():
+            code = worker.process.exitcode if worker.process is not None else None
+            return f"processo terminou (código {code})"
+        silence = time.time() - worker.heartbeat.value
+        if silence > self.heartbeat_timeout_s:
+            return f"sem batimento há {silence:.0f}s"
+        return None
+
+    def check_health(self) -> Dict[str, List[bool]]:
+        """Reinicia workers mortos ou travados; devolve quem está saudável por estágio."""
+        health = {}
+        with self._health_lock:
+            for stage, workers in self._workers.items():
+                health[stage] = []
+                for worker in workers:
+                    problem = None if self._closed.is_set() else self._problem(worker)
+                    if problem and time.monotonic() >= worker.retry_at:
+                        self._restart(worker, problem)
+                    health[stage].append(problem is None)
+        return health
+
+    def _restart(self, worker: _Worker, reason: str):
+        self.logger.warning("⚠️ Worker %s reiniciado: %s", worker.label, reason)
+        if worker.alive():
+            worker.process.kill()
+            worker.process.join(5.0)
+        self._fail_inflight(worker, WorkerCrashedError(f"Worker {worker.label}: {reason}"))
+        with self._lock:
+            self._discard_channels(worker)
+            worker.stats.restarts += 1
+            if worker.failures:
+                # Falha ao iniciar: espera crescente antes da próxima tentativa
+                worker.retry_at = time.monotonic() + min(2.0 ** worker.failures, 60.0)
+            self._spawn(worker)
+
+    @staticmethod
+    def _discard_channels(worker: _Worker):
+        for channel in (worker.jobs, worker.control):
+            if channel is not None:
+                channel.cancel_join_thread()
+                channel.close()
+        if worker.results is not None:
+            worker.results.close()
+            worker.results = None
+
+    # ---------------------------------------------------------- métricas
+
+    def get_stats(self) -> dict:
+        stages = {}
+        for stage, workers in self._workers.items():
+            items = [w.to_dict() for w in workers]
+            stages[stage] = {
+                "workers": items,
+                "queue_depth": sum(w["queue_depth"] for w in items),
+                "healthy": sum(w["alive"] and w["ready"] for w in items),
+            }
+        return {"stub": self.stub, "running": self.started and not self._closed.is_set(),
+                "stages": stages}
+
+    def prometheus(self) -> str:
+        """Fila, jobs e reinícios por worker no formato do Prometheus."""
+        lines = []
+        metrics = (("queue_depth", "gauge", "Jobs enfileirados ou em execução"),
+                   ("completed", "counter", "Jobs concluídos"),
+                   ("failed", "counter", "Jobs com erro"),
+                   ("restarts", "counter", "Reinícios do processo"))
+        stats = self.get_stats()["stages"]
+        for key, kind, help_text in metrics:
+            name = f"aurora_worker_{key}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for stage, data in stats.items():
+                for w in data["workers"]:
+                    lines.append(f'{name}{{stage="{stage}",worker="{w["worker"]}"}} {w[key]}')
+        return "\n".join(lines) + "\n"
+
+
+_worker_pool: Optional[WorkerPool] = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> WorkerPool:
+    """Retorna o pool global (iniciado no primeiro uso)."""
+    global _worker_pool
+    if _worker_pool is None:
+        with _worker_pool_lock:
+            if _worker_pool is None:
+                _worker_pool = WorkerPool().start()
+    return _worker_pool
+
+
+def remote_service(stage: str) -> Optional[Any]:
+    """
+    Cliente do estágio no pool, ou ``None`` para usar a implementação
+    local (pool desligado, estágio sem workers ou já dentro de um worker).
+    """
+    if not config.WORKER_POOL_ENABLED or in_worker() or not config.WORKER_COUNTS.get(stage):
+        return None
+    from backend.core.remote_stages import REMOTE_CLIENTS
+
+    return REMOTE_CLIENTS[stage](get_worker_pool())
@@ -0,0 +1,152 @@
+"""
+Aurora EchoTales - API
+======================
+Aplicação FastAPI servida com ``uvicorn backend.main:app``.
+
+A inicialização não carrega modelos nem bibliotecas de IA: os loaders
+rodam no primeiro uso de cada estágio e a sondagem da GPU acontece na
+thread do amostrador. ``/health`` responde assim que o servidor aceita
+conexões, sem criar o ``ModelManager``.
+
+Com ``WORKER_POOL_ENABLED`` os modelos ficam em processos do pool de
+workers (``backend.core.worker_pool``), iniciados aqui e encerrados ao
+fim; ``/health`` passa a incluir os workers saudáveis por estágio.
+
+Cada requisição recebe um ``request_id`` (o do cabeçalho ``X-Request-ID``
+ou um novo), anexado a todo log emitido durante ela e devolvido no mesmo
+cabeçalho; depois do último bloco do corpo (inclusive em respostas em
+stream, como SSE e TTS em blocos), um registro resume status, duração e
+estágios.
+"""
+
+import re
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+
+from backend import __version__, config
+from backend.api.routes import audio, emotion, media, metrics, music, pipeline, story, tts
+from backend.core import worker_pool
+from backend.core.worker_pool import get_worker_pool
+from backend.utils.logger import get_logger, log_context
+from backend.utils.resource_sampler import get_resource_sampler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.RESOURCE_SAMPLER_ENABLED:
+        # Retorna na hora: a sondagem da GPU (PyTorch/NVML) roda na thread do amostrador
+        get_resource_sampler().start()
+    if config.WORKER_POOL_ENABLED:
+        # Os workers carregam os modelos; a API responde enquanto isso
+        get_worker_pool()
+    app.state.ready_at = time.time()
+    yield
+    get_resource_sampler().stop()
+    if worker_pool._worker_pool is not None:
+        worker_pool._worker_pool.shutdown()
+
+    from backend.utils import audio_store, story_store
+
+    if story_store._story_store is not None:
+        try:
+            story_store._story_store.flush(timeout=10)
+        except story_store.StoryStoreError as e:
+            get_logger().error("❌ %s", e)
+    if audio_store._audio_store is not None:
+        audio_store._audio_store.shutdown(wait=True)
+    # A thread de gravação é encerrada no atexit; aqui só esvazia a fila
+    get_logger().flush(timeout=5)
+
+
+app = FastAPI(title="Aurora EchoTales", version=__version__, lifespan=lifespan)
+app.state.ready_at = None
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["*"],
+)
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestLoggingMiddleware:
+    """
+    Correlaciona os logs da requisição e registra sua duração por estágio.
+
+    Middleware ASGI puro: o registro final só é escrito quando a aplicação
+    termina de enviar o corpo, então um ``StreamingResponse`` é medido até
+    o último bloco (e os estágios gravados durante o stream entram nele).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = Headers(scope=scope).get("x-request-id", "")
+        if not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex[:16]
+        method, path = scope["method"], scope["path"]
+        status = 500  # falha antes de a resposta começar
+        t0 = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        with log_context(request_id=request_id, method=method, path=path, stages={}) as context:
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                elapsed = time.perf_counter() - t0
+                get_logger().info("🌐 %s %s → %d em %.3fs", method, path, status, elapsed,
+                                  status=status, duration_s=round(elapsed, 6),
+                                  stages={k: round(v, 6) for k, v in context["stages"].items()})
+
+
+app.add_middleware(RequestLoggingMiddleware)
+
+
+app.include_router(story.router)
+app.include_router(tts.router)
+app.include_router(music.router)
+app.include_router(emotion.router)
+app.include_router(audio.router)
+app.include_router(pipeline.router)
+app.include_router(metrics.router)
+app.include_router(media.router)
+
+
+@app.get("/health")
+async def health():
+    """Estado do servidor e modelos residentes (não carrega nada)."""
+    from backend.core import model_manager
+
+    manager = model_manager._model_manager
+    pool = worker_pool._worker_pool
+    ready_at = app.state.ready_at
+    data = {
+        "status": "ok",
+        "ready": ready_at is not None,
+        "uptime_s": round(time.time() - ready_at, 3) if ready_at else 0.0,
+        "models_loaded": manager.resident_models() if manager is not None else [],
+    }
+    if pool is not None:
+        # Workers vivos e com o modelo carregado, por estágio
+        data["workers"] = {stage: {"healthy": s["healthy"], "total": len(s["workers"])}
+                           for stage, s in pool.get_stats()["stages"].items()}
+    return data
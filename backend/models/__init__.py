@@ -0,0 +1,5 @@
+"""
+Modelos de IA - Aurora EchoTales
+=================================
+Wrappers dos modelos usados em cada estágio do pipeline.
+"""
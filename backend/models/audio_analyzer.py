@@ -0,0 +1,237 @@
+"""
+Audio Analyzer - Aurora EchoTales
+=================================
+Análise de uploads de voz: transcrição + emoção.
+
+Usado por ``POST /api/analyze-audio``; o retorno segue
+``AudioUploadResponse`` de ``frontend/src/types``.
+
+O áudio passa uma única vez pelo encoder do Whisper: a mesma saída vai
+para o decoder (transcrição) e para a cabeça de emoção acústica, cujo
+resultado é combinado com a emoção do texto transcrito. Cada análise
+reporta latência e pico de memória por segundo de áudio.
+
+Sem os pesos da cabeça (``python -m backend.core.audio_emotion train``)
+a análise segue só com o texto e informa ``audio_emotion_status:
+"disabled"`` com o motivo; a cabeça volta a ser procurada a cada
+``AUDIO_EMOTION_RETRY_S``.
+"""
+
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+from backend import config
+from backend.core.audio_emotion import load_audio_emotion_head
+from backend.core.emotion_analyzer import (
+    EMOTIONS,
+    TextEmotionAnalyzer,
+    aggregate_emotion,
+    get_text_emotion_analyzer,
+)
+from backend.core.model_manager import ModelManager
+from backend.core.worker_pool import remote_service
+from backend.models.speech_to_text import (
+    SpeechTranscriber,
+    TranscriptionResult,
+    get_speech_transcriber,
+)
+from backend.utils.logger import get_logger
+from backend.utils.resource_manager import MemoryPeak, measure_peak_memory
+
+if TYPE_CHECKING:
+    from backend.utils.audio_stream import DecodedAudio
+    from backend.utils.vad import SpeechSegment
+
+
+def fuse_scores(text: Optional[Dict[str, float]], audio: Optional[Dict[str, float]],
+                audio_weight: float = config.AUDIO_EMOTION_WEIGHT) -> Dict[str, float]:
+    """Média ponderada das distribuições de texto e áudio (a que existir)."""
+    if text is None and audio is None:
+        return {"neutral": 1.0}
+    if audio is None:
+        return dict(text)
+    if text is None:
+        return dict(audio)
+    return {e: (1 - audio_weight) * text.get(e, 0.0) + audio_weight * audio.get(e, 0.0)
+            for e in EMOTIONS}
+
+
+class AudioAnalyzer:
+    """Transcreve a fala e estima a emoção do conteúdo."""
+
+    audio_emotion_model = "audio_emotion"
+
+    def __init__(self, transcriber: Optional[SpeechTranscriber] = None,
+                 text_emotion: Optional[TextEmotionAnalyzer] = None,
+                 model_manager: Optional[ModelManager] = None, head_loader=None,
+                 audio_emotion: bool = config.AUDIO_EMOTION_ENABLED,
+                 measure_memory: bool = config.AUDIO_ANALYSIS_MEASURE_MEMORY):
+        self.transcriber = transcriber or get_speech_transcriber()
+        self.text_emotion = text_emotion or get_text_emotion_analyzer()
+        self.mm = model_manager or self.transcriber.mm
+        self.audio_emotion = audio_emotion
+        self.audio_emotion_error: Optional[str] = None
+        self._audio_emotion_retry_at = 0.0
+        self.measure_memory = measure_memory
+        self.logger = get_logger()
+        if audio_emotion and not self.mm.is_registered(self.audio_emotion_model):
+            cfg = config.MODEL_CONFIGS["audio_emotion"]
+            self.mm.register(self.audio_emotion_model, head_loader or load_audio_emotion_head,
+                             vram_gb=cfg["vram_gb"], ram_gb=cfg["ram_gb"])
+
+    @property
+    def audio_emotion_status(self) -> str:
+        """``active``, ``disabled`` (cabeça ausente/incompatível) ou ``off`` (config)."""
+        if not self.audio_emotion:
+            return "off"
+        return "disabled" if self.audio_emotion_error else "active"
+
+    def _wants_audio_emotion(self) -> bool:
+        return self.audio_emotion and (self.audio_emotion_error is None
+                                       or time.monotonic() >= self._audio_emotion_retry_at)
+
+    def _audio_scores(self, transcription: TranscriptionResult) -> Optional[List[Dict[str, float]]]:
+        """Emoção por segmento a partir dos embeddings do encoder."""
+        if transcription.embeddings is None or not self._wants_audio_emotion():
+            return None
+        try:
+            with self.mm.load(self.audio_emotion_model, prefetch_next=False) as head:
+                scores = head.predict(transcription.embeddings)
+        except (FileNotFoundError, ValueError) as e:
+            if self.audio_emotion_error is None:
+                self.logger.error("❌ Emoção acústica desativada, seguindo só com o texto: %s "
+                                  "(treine com: python -m backend.core.audio_emotion train)", e)
+            self.audio_emotion_error = str(e)
+            self._audio_emotion_retry_at = time.monotonic() + config.AUDIO_EMOTION_RETRY_S
+            return None
+        if self.audio_emotion_error is not None:
+            self.logger.info("✅ Emoção acústica reativada")
+            self.audio_emotion_error = None
+        return scores
+
+    def analyze_bytes(self, data: bytes) -> dict:
+        """Decodifica um upload já em memória e analisa."""
+        from backend.utils.audio_stream import decode_stream
+
+        return self.analyze_decoded(decode_stream([data]))
+
+    def analyze_decoded(self, decoded: "DecodedAudio") -> dict:
+        """
+        Analisa um upload decodificado por ``StreamingAudioDecoder``; os
+        tempos de recepção, decodificação e reamostragem entram em
+        ``timings`` ao lado dos da transcrição.
+        """
+        start = time.perf_counter()
+        audio = decoded.resampled(config.STT_SAMPLE_RATE)
+        result = self.analyze(audio)
+        t = decoded.timings
+        result["timings"] = {"upload": t.upload, "decode": t.decode,
+                             "resample": t.resample, **result["timings"]}
+        result["upload_bytes"] = t.bytes
+        result["processing_time"] = t.decode + time.perf_counter() - start
+        return result
+
+    def analyze(self, audio: np.ndarray, speech: Optional[List["SpeechSegment"]] = None) -> dict:
+        """Analisa áudio mono 16 kHz (``speech``: segmentos do VAD já calculados)."""
+        start = time.perf_counter()
+        peak = MemoryPeak()
+        with measure_peak_memory() if self.measure_memory else nullcontext(peak) as peak:
+            transcription = self.transcriber.transcribe(audio,
+                                                        with_embeddings=self._wants_audio_emotion(),
+                                                        speech=speech)
+
+            emotion_start = time.perf_counter()
+            text_emotion = self.text_emotion.analyze(transcription.text) if transcription.text else None
+            text_time = time.perf_counter() - emotion_start
+
+            emotion_start = time.perf_counter()
+            segment_scores = self._audio_scores(transcription)
+            audio_time = time.perf_counter() - emotion_start
+
+        audio_emotion = None
+        if segment_scores:
+            durations = np.array([s.end - s.start for s in transcription.segments])
+            weights = durations / durations.sum()
+            audio_emotion = aggregate_emotion({
+                e: float(sum(w * scores.get(e, 0.0) for w, scores in zip(weights, segment_scores)))
+                for e in EMOTIONS
+            })
+
+        if text_emotion is None and audio_emotion is None:
+            aggregated = {
+                "dominant_emotion": "neutral",
+                "intensity": 0.0,
+                "confidence": 0.0,
+                "emotion_scores": {"neutral": 1.0},
+            }
+        else:
+            aggregated = aggregate_emotion(fuse_scores(
+                text_emotion and text_emotion["emotion_scores"],
+                audio_emotion and audio_emotion["emotion_scores"],
+            ))
+
+        received = datetime.now(timezone.utc)
+        primary = text_emotion or aggregated
+        emotions = [{
+            "emotion": primary["dominant_emotion"],
+            "intensity": primary["intensity"],
+            "timestamp": received.isoformat(),
+            "source": "text",
+        }]
+        for segment, scores in zip(transcription.segments, segment_scores or []):
+            segment_emotion = aggregate_emotion(scores)
+            emotions.append({
+                "emotion": segment_emotion["dominant_emotion"],
+                "intensity": segment_emotion["intensity"],
+                "timestamp": (received + timedelta(seconds=segment.start)).isoformat(),
+                "source": "audio",
+            })
+
+        elapsed = time.perf_counter() - start
+        audio_seconds = transcription.audio_seconds or 1e-9
+        timings = {**transcription.timings, "text_emotion": text_time, "audio_emotion": audio_time}
+        self.logger.info(
+            "🎧 Análise de %.1fs: %.2fs (%.0fms/s de áudio) | pico RAM +%.0fMB, VRAM +%.0fMB",
+            transcription.audio_seconds, elapsed, elapsed / audio_seconds * 1000,
+            peak.ram_mb, peak.vram_mb,
+        )
+        return {
+            "audio_id": uuid.uuid4().hex,
+            "transcript": transcription.text,
+            "emotions": emotions,
+            "aggregated_emotion": aggregated,
+            "dominant_emotion": aggregated["dominant_emotion"],
+            "text_emotion": text_emotion,
+            "audio_emotion": audio_emotion,
+            "audio_emotion_status": self.audio_emotion_status,
+            "audio_emotion_error": self.audio_emotion_error,
+            "processing_time": elapsed,
+            "audio_seconds": transcription.audio_seconds,
+            "speech_seconds": transcription.speech_seconds,
+            "stt_backend": transcription.backend,
+            "timings": timings,
+            "latency_per_audio_s": elapsed / audio_seconds,
+            "peak_memory_mb": peak.to_dict(),
+            "peak_ram_mb_per_audio_s": peak.ram_mb / audio_seconds,
+            "peak_vram_mb_per_audio_s": peak.vram_mb / audio_seconds,
+        }
+
+
+_audio_analyzer: Optional[AudioAnalyzer] = None
+_audio_analyzer_lock = threading.Lock()
+
+
+def get_audio_analyzer() -> AudioAnalyzer:
+    """Retorna o analisador de áudio global (cliente do pool de workers, se ativo)."""
+    global _audio_analyzer
+    if _audio_analyzer is None:
+        with _audio_analyzer_lock:
+            if _audio_analyzer is None:
+                _audio_analyzer = remote_service("analysis") or AudioAnalyzer()
+    return _audio_analyzer
@@ -0,0 +1,182 @@
+"""
+Experience Pipeline - Aurora EchoTales
+======================================
+História + narração + trilha em uma execução do orquestrador.
+
+Grafo (recurso entre parênteses):
+
+    emotion (cpu) ──┬── story (gpu) ── narration (gpu) ──┐
+                    └── music (gpu) ─────────────────────┴── mix (cpu) ── encode (cpu)
+
+A trilha depende só da emoção detectada e pode começar enquanto a
+história é escrita, se a VRAM comportar os dois modelos; mixagem e
+codificação rodam na CPU e liberam a GPU para a próxima execução.
+"""
+
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from backend import config
+from backend.core.emotion_analyzer import TextEmotionAnalyzer, get_text_emotion_analyzer
+from backend.core.pipeline import Orchestrator, PipelineTrace, Stage, get_orchestrator
+from backend.models.music_generator import MusicGenerator, get_music_generator
+from backend.models.story_generator import StoryGenerator, get_story_generator
+from backend.models.tts_narrator import TTSNarrator, get_tts_narrator
+from backend.utils.audio_utils import encode_wav, overlay_bed, resample
+
+NEUTRAL_EMOTION = {
+    "dominant_emotion": "neutral",
+    "intensity": 0.0,
+    "confidence": 1.0,
+    "emotion_scores": {"neutral": 1.0},
+}
+
+EMOTION_TO_MOOD = {
+    "joy": "joyful",
+    "sadness": "melancholic",
+    "anger": "energetic",
+    "fear": "tense",
+    "surprise": "energetic",
+    "disgust": "tense",
+    "neutral": "calm",
+}
+
+EMOTION_TO_VOICE = {
+    "joy": "joyful",
+    "sadness": "sad",
+    "anger": "angry",
+    "fear": "fearful",
+    "surprise": "excited",
+    "disgust": "angry",
+    "neutral": "neutral",
+}
+
+
+def music_params_for(emotion: dict, style: str = "ambient") -> dict:
+    """``MusicParams`` a partir de um ``AggregatedEmotion``."""
+    intensity = float(emotion.get("intensity", 0.5))
+    tempo = "fast" if intensity > 0.66 else "slow" if intensity < 0.33 else "medium"
+    return {
+        "style": style,
+        "mood": EMOTION_TO_MOOD.get(emotion.get("dominant_emotion"), "neutral"),
+        "tempo": tempo,
+        "intensity": 0.3 + 0.5 * intensity,
+    }
+
+
+@dataclass
+class ExperienceResult:
+    run_id: str
+    story_id: str
+    text: str
+    emotion: dict
+    audio_path: Path
+    sample_rate: int
+    audio_seconds: float
+    trace: PipelineTrace
+
+
+class ExperiencePipeline:
+    """Monta e executa o grafo da experiência completa."""
+
+    def __init__(self, orchestrator: Optional[Orchestrator] = None,
+                 story: Optional[StoryGenerator] = None,
+                 music: Optional[MusicGenerator] = None,
+                 narrator: Optional[TTSNarrator] = None,
+                 text_emotion: Optional[TextEmotionAnalyzer] = None,
+                 output_dir: Path = config.OUTPUT_DIR / "experiences"):
+        self.orchestrator = orchestrator or get_orchestrator()
+        self.story = story or get_story_generator()
+        self.music = music or get_music_generator()
+        self.narrator = narrator or get_tts_narrator()
+        self.text_emotion = text_emotion or get_text_emotion_analyzer()
+        self.output_dir = Path(output_dir)
+
+    def stages(self, user_prompt: Optional[str], emotions: Optional[dict],
+               story_params: dict, music_style: str, language: str,
+               output_path: Path) -> List[Stage]:
+        models = config.MODEL_CONFIGS
+
+        def emotion(ctx):
+            if emotions:
+                return emotions
+            if user_prompt:
+                return self.text_emotion.analyze(user_prompt)
+            return NEUTRAL_EMOTION
+
+        def story(ctx):
+            return self.story.create(user_prompt=user_prompt, emotions=ctx["emotion"],
+                                     **story_params)
+
+        def music(ctx):
+            return self.music.generate(**music_params_for(ctx["emotion"], music_style),
+                                       duration=config.EXPERIENCE_MUSIC_DURATION_S, loop=True)
+
+        def narration(ctx):
+            voice = EMOTION_TO_VOICE.get(ctx["emotion"].get("dominant_emotion"), "neutral")
+            audio, sample_rate, _ = self.narrator.synthesize(ctx["story"].text, style=voice,
+                                                             language=language)
+            return audio, sample_rate
+
+        def mix(ctx):
+            voice, sample_rate = ctx["narration"]
+            bed = resample(ctx["music"].audio, ctx["music"].sample_rate, sample_rate)
+            return overlay_bed(voice, bed, gain_db=config.EXPERIENCE_MUSIC_GAIN_DB,
+                               sample_rate=sample_rate, duck_db=config.MIX_DUCK_DB), sample_rate
+
+        def encode(ctx):
+            audio, sample_rate = ctx["mix"]
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_bytes(encode_wav(audio, sample_rate))
+            return output_path
+
+        return [
+            Stage("emotion", emotion, resource="cpu", estimate_s=0.2),
+            Stage("story", story, deps=["emotion"], resource="gpu",
+                  cost=models["story"]["vram_gb"], estimate_s=10.0),
+            Stage("music", music, deps=["emotion"], resource="gpu",
+                  cost=models["music"]["vram_gb"], estimate_s=8.0),
+            Stage("narration", narration, deps=["story", "emotion"], resource="gpu",
+                  cost=models["tts"]["vram_gb"], estimate_s=6.0),
+            Stage("mix", mix, deps=["narration", "music"], resource="cpu", estimate_s=0.5),
+            Stage("encode", encode, deps=["mix"], resource="cpu", estimate_s=0.2),
+        ]
+
+    def run(self, user_prompt: Optional[str] = None, emotions: Optional[dict] = None,
+            story_params: Optional[dict] = None, music_style: str = "ambient",
+            language: str = "pt") -> ExperienceResult:
+        output_id = uuid.uuid4().hex
+        output_path = self.output_dir / f"{output_id}.wav"
+        run = self.orchestrator.run(
+            self.stages(user_prompt, emotions, story_params or {}, music_style, language,
+                        output_path),
+            name="experience", run_id=output_id,
+        )
+        audio, sample_rate = run.results["mix"]
+        return ExperienceResult(
+            run_id=run.trace.run_id,
+            story_id=run.results["story"].story_id,
+            text=run.results["story"].text,
+            emotion=run.results["emotion"],
+            audio_path=run.results["encode"],
+            sample_rate=sample_rate,
+            audio_seconds=len(audio) / sample_rate,
+            trace=run.trace,
+        )
+
+
+_experience_pipeline: Optional[ExperiencePipeline] = None
+_experience_pipeline_lock = threading.Lock()
+
+
+def get_experience_pipeline() -> ExperiencePipeline:
+    """Retorna o pipeline de experiência global."""
+    global _experience_pipeline
+    if _experience_pipeline is None:
+        with _experience_pipeline_lock:
+            if _experience_pipeline is None:
+                _experience_pipeline = ExperiencePipeline()
+    return _experience_pipeline
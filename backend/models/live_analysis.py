@@ -0,0 +1,350 @@
+"""
+Live Analysis - Aurora EchoTales
+================================
+Transcrição e emoção enquanto o usuário ainda fala (``/ws/analyze-audio``).
+
+O cliente envia PCM mono em blocos; a cada ``LIVE_HOP_S`` de áudio novo
+uma passada roda sobre a janela pendente:
+
+    - o VAD separa segmentos já fechados por silêncio dos ainda abertos
+    - segmentos fechados são transcritos e pontuados uma única vez
+      (``AudioAnalyzer.analyze`` com os segmentos prontos) e o áudio até
+      o fim deles é descartado
+    - o segmento aberto gera uma transcrição parcial, refeita na próxima
+      passada; fala contínua é fechada à força em ``LIVE_MAX_WINDOW_S``
+
+A emoção acumulada é a média das distribuições dos segmentos, ponderada
+pela duração da fala. Ao parar, só resta a última janela: o resultado
+final sai com a mesma forma de ``POST /api/analyze-audio``.
+
+Memória por conexão: um buffer de ``LIVE_MAX_BUFFER_S`` alocado na
+abertura; se a análise ficar para trás, o áudio mais antigo é
+descartado (``dropped_s``). ``LIVE_MAX_SESSIONS`` limita as conexões.
+"""
+
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend import config
+from backend.core.emotion_analyzer import aggregate_emotion
+from backend.models.audio_analyzer import AudioAnalyzer, get_audio_analyzer
+from backend.utils.audio_utils import resample
+from backend.utils.logger import get_logger
+from backend.utils.vad import detect_speech, estimate_noise_floor, frame_energy_db
+
+ENCODINGS = {"pcm_f32le": np.dtype("<f4"), "pcm_s16le": np.dtype("<i2")}
+NEUTRAL = {"dominant_emotion": "neutral", "intensity": 0.0, "confidence": 0.0,
+           "emotion_scores": {"neutral": 1.0}}
+
+
+class LiveSessionLimitError(RuntimeError):
+    """Todas as sessões ao vivo estão ocupadas."""
+
+
+@dataclass
+class LiveSessionStats:
+    """Passadas feitas, custo e áudio perdido por falta de vazão."""
+
+    windows: int = 0
+    partials: int = 0
+    segments: int = 0
+    analysis_s: float = 0.0
+    dropped_s: float = 0.0
+    peak_buffer_s: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class LiveAudioSession:
+    """Estado de uma conexão: buffer circular, segmentos e emoção acumulada."""
+
+    def __init__(self, analyzer: AudioAnalyzer, sample_rate: int = config.STT_SAMPLE_RATE,
+                 encoding: str = "pcm_f32le", hop_s: float = config.LIVE_HOP_S,
+                 max_window_s: float = config.LIVE_MAX_WINDOW_S,
+                 max_buffer_s: float = config.LIVE_MAX_BUFFER_S,
+                 partials: bool = config.LIVE_PARTIALS, on_close=None):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Codificação '{encoding}' não suportada "
+                             f"(opções: {', '.join(ENCODINGS)})")
+        if not 8000 <= int(sample_rate) <= 96000:
+            raise ValueError(f"Taxa de amostragem inválida: {sample_rate}")
+        self.session_id = uuid.uuid4().hex
+        self.analyzer = analyzer
+        self.sample_rate = int(sample_rate)
+        self.dtype = ENCODINGS[encoding]
+        self.hop = int(hop_s * self.sample_rate)
+        self.max_window_s = min(max_window_s, max_buffer_s)
+        self.partials = partials
+        self.stats = LiveSessionStats()
+        self.started_at = datetime.now(timezone.utc)
+        self._buffer = np.zeros(int(max_buffer_s * self.sample_rate), dtype=np.float32)
+        self._size = 0
+        self._offset = 0        # amostras já descartadas do início
+        self._received = 0
+        self._unprocessed = 0
+        self._segments: List[dict] = []
+        self._weighted: Dict[str, float] = defaultdict(float)
+        self._weight = 0.0
+        self._noise_floor: Optional[float] = None
+        self._lock = threading.Lock()
+        self._on_close = on_close
+        self._closed = False
+
+    # ---------------------------------------------------------- entrada
+
+    def feed(self, data: bytes):
+        """Acrescenta um bloco PCM; descarta o mais antigo se o buffer encher."""
+        if len(data) % self.dtype.itemsize:
+            raise ValueError("Bloco PCM com tamanho inválido")
+        samples = np.frombuffer(data, dtype=self.dtype)
+        capacity = len(self._buffer)
+        with self._lock:
+            if len(samples) > capacity:
+                self._discard(len(samples) - capacity, lost=True)
+                samples = samples[-capacity:]
+            overflow = self._size + len(samples) - capacity
+            if overflow > 0:
+                self._drop(overflow, lost=True)
+            out = self._buffer[self._size:self._size + len(samples)]
+            if self.dtype.kind == "i":
+                np.multiply(samples, np.float32(1 / 32768), out=out, casting="unsafe")
+            else:
+                out[:] = samples
+            self._size += len(samples)
+            self._received += len(samples)
+            self._unprocessed += len(samples)
+            self.stats.peak_buffer_s = max(self.stats.peak_buffer_s, self._size / self.sample_rate)
+
+    @property
+    def ready(self) -> bool:
+        """Há áudio novo suficiente para outra passada."""
+        return self._unprocessed >= self.hop
+
+    @property
+    def audio_seconds(self) -> float:
+        return self._received / self.sample_rate
+
+    def _discard(self, frames: int, lost: bool):
+        self._offset += frames
+        if lost:
+            self.stats.dropped_s += frames / self.sample_rate
+
+    def _drop(self, frames: int, lost: bool = False):
+        """Remove ``frames`` do início do buffer (chamar com o lock)."""
+        frames = min(frames, self._size)
+        self._buffer[:self._size - frames] = self._buffer[frames:self._size]
+        self._size -= frames
+        self._discard(frames, lost)
+
+    # ---------------------------------------------------------- análise
+
+    def step(self, final: bool = False) -> List[dict]:
+        """
+        Uma passada sobre a janela pendente. Retorna as mensagens para o
+        cliente (``segment`` ao fechar fala, ``partial`` para a aberta).
+        """
+        with self._lock:
+            window = self._buffer[:self._size].copy()
+            base = self._offset
+            self._unprocessed = 0
+        if not len(window):
+            return []
+
+        start = time.perf_counter()
+        rate = config.STT_SAMPLE_RATE
+        window = resample(window, self.sample_rate, rate)
+        # Ruído de fundo da sessão: uma janela pode ser só fala contínua
+        energy = frame_energy_db(window, int(rate * config.VAD_FRAME_MS / 1000))
+        audible = energy[energy > -100.0]
+        if len(audible):
+            floor = estimate_noise_floor(audible)
+            self._noise_floor = floor if self._noise_floor is None else min(self._noise_floor, floor)
+        speech = detect_speech(window, rate, noise_floor_db=self._noise_floor)
+        forced = final or len(window) >= self.max_window_s * rate
+        silence = int(config.VAD_MIN_SILENCE_MS * rate / 1000)
+        closed = speech if forced else [s for s in speech if len(window) - s.end >= silence]
+        still_open = speech[len(closed):]
+        offset_s = base / self.sample_rate
+
+        messages = []
+        if closed:
+            result = self.analyzer.analyze(window, speech=closed)
+            messages.append(self._commit(result, offset_s + closed[0].start / rate,
+                                         offset_s + closed[-1].end / rate))
+            cut = len(window) if forced else closed[-1].end
+        elif not speech or forced:
+            # Só silêncio: guarda um pouco para o VAD estimar o ruído de fundo
+            cut = max(len(window) - int(config.LIVE_CONTEXT_S * rate), 0)
+        else:
+            cut = 0
+        if still_open and self.partials and not final:
+            partial = self.analyzer.analyze(window, speech=still_open)
+            messages.append(self._partial(partial))
+
+        with self._lock:
+            # Blocos recebidos (ou descartados) durante a passada não contam
+            frames = base + int(cut * self.sample_rate / rate) - self._offset
+            if frames > 0:
+                self._drop(frames)
+        self.stats.windows += 1
+        self.stats.analysis_s += time.perf_counter() - start
+        return messages
+
+    def _commit(self, result: dict, start_s: float, end_s: float) -> dict:
+        weight = result["speech_seconds"]
+        for emotion, score in result["aggregated_emotion"]["emotion_scores"].items():
+            self._weighted[emotion] += weight * score
+        self._weight += weight
+        segment = {
+            "start": start_s,
+            "end": end_s,
+            "text": result["transcript"],
+            "emotion": result["dominant_emotion"],
+            "intensity": result["aggregated_emotion"]["intensity"],
+        }
+        self._segments.append(segment)
+        self.stats.segments += 1
+        return {"type": "segment", **segment, "transcript": self.transcript,
+                "aggregated_emotion": self.aggregated(), "audio_seconds": self.audio_seconds}
+
+    def _partial(self, result: dict) -> dict:
+        self.stats.partials += 1
+        extra = (result["speech_seconds"], result["aggregated_emotion"]["emotion_scores"])
+        return {"type": "partial", "text": result["transcript"],
+                "transcript": " ".join(t for t in (self.transcript, result["transcript"]) if t),
+                "aggregated_emotion": self.aggregated(extra),
+                "audio_seconds": self.audio_seconds}
+
+    @property
+    def transcript(self) -> str:
+        return " ".join(s["text"] for s in self._segments if s["text"])
+
+    def aggregated(self, extra: Optional[tuple] = None) -> dict:
+        """Emoção acumulada (``extra``: peso e scores de um trecho ainda aberto)."""
+        weighted, total = dict(self._weighted), self._weight
+        if extra and extra[0] > 0:
+            for emotion, score in extra[1].items():
+                weighted[emotion] = weighted.get(emotion, 0.0) + extra[0] * score
+            total += extra[0]
+        if total <= 0:
+            return dict(NEUTRAL)
+        return aggregate_emotion({e: w / total for e, w in weighted.items()})
+
+    def finish(self) -> dict:
+        """Fecha a última janela e devolve o resultado no formato do upload."""
+        start = time.perf_counter()
+        self.step(final=True)
+        final_s = time.perf_counter() - start
+        aggregated = self.aggregated()
+        emotions = [{
+            "emotion": s["emotion"],
+            "intensity": s["intensity"],
+            "timestamp": (self.started_at + timedelta(seconds=s["start"])).isoformat(),
+            "source": "text",
+        } for s in self._segments] or [{
+            "emotion": aggregated["dominant_emotion"],
+            "intensity": aggregated["intensity"],
+            "timestamp": self.started_at.isoformat(),
+            "source": "text",
+        }]
+        get_logger().info(
+            "🎙️ Sessão ao vivo %s: %.1fs de áudio, %d segmentos, %d passadas | "
+            "%.0fms após o fim da gravação",
+            self.session_id[:8], self.audio_seconds, self.stats.segments,
+            self.stats.windows, final_s * 1000,
+        )
+        return {
+            "audio_id": self.session_id,
+            "transcript": self.transcript,
+            "emotions": emotions,
+            "aggregated_emotion": aggregated,
+            "dominant_emotion": aggregated["dominant_emotion"],
+            "segments": list(self._segments),
+            "audio_seconds": self.audio_seconds,
+            "speech_seconds": self._weight,
+            "processing_time": final_s,
+            "timings": {"final": final_s, "analysis": self.stats.analysis_s},
+            "live": self.stats.to_dict(),
+        }
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._size = 0
+        if self._on_close:
+            self._on_close(self)
+
+
+@dataclass
+class LiveAnalysisStats:
+    opened: int = 0
+    rejected: int = 0
+    audio_s: float = 0.0
+    dropped_s: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class LiveAnalysisService:
+    """Abre sessões ao vivo respeitando ``LIVE_MAX_SESSIONS``."""
+
+    def __init__(self, analyzer: Optional[AudioAnalyzer] = None,
+                 max_sessions: int = config.LIVE_MAX_SESSIONS):
+        self._analyzer = analyzer
+        self.max_sessions = max_sessions
+        self.stats = LiveAnalysisStats()
+        self._active: Dict[str, LiveAudioSession] = {}
+        self._lock = threading.Lock()
+        self.logger = get_logger()
+
+    def open(self, sample_rate: int = config.STT_SAMPLE_RATE,
+             encoding: str = "pcm_f32le") -> LiveAudioSession:
+        """Nova sessão; ``LiveSessionLimitError`` se o limite foi atingido."""
+        with self._lock:
+            if len(self._active) >= self.max_sessions:
+                self.stats.rejected += 1
+                raise LiveSessionLimitError(
+                    f"Limite de {self.max_sessions} sessões ao vivo atingido")
+            session = LiveAudioSession(self._analyzer or get_audio_analyzer(), sample_rate,
+                                       encoding, on_close=self._release)
+            self._active[session.session_id] = session
+            self.stats.opened += 1
+        return session
+
+    def _release(self, session: LiveAudioSession):
+        with self._lock:
+            if self._active.pop(session.session_id, None) is not None:
+                self.stats.audio_s += session.audio_seconds
+                self.stats.dropped_s += session.stats.dropped_s
+
+    @property
+    def active(self) -> int:
+        return len(self._active)
+
+    def get_stats(self) -> dict:
+        return {**self.stats.to_dict(), "active": self.active, "max_sessions": self.max_sessions}
+
+
+_live_analysis: Optional[LiveAnalysisService] = None
+_live_analysis_lock = threading.Lock()
+
+
+def get_live_analysis() -> LiveAnalysisService:
+    """Retorna o serviço de análise ao vivo global."""
+    global _live_analysis
+    if _live_analysis is None:
+        with _live_analysis_lock:
+            if _live_analysis is None:
+                _live_analysis = LiveAnalysisService()
+    return _live_analysis
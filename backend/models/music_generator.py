@@ -0,0 +1,300 @@
+"""
+Music Generator - Aurora EchoTales
+==================================
+Trilhas com Riffusion a partir de ``MusicParams`` (estilo, humor, tempo).
+
+Cada imagem 512x512 do Riffusion rende ~5s de áudio. Para durações
+maiores são geradas janelas sobrepostas, denoisadas juntas em lote pelo
+``BatchedSampler`` (colunas compartilhadas promediadas a cada passo, de
+modo que cada janela continue a anterior). As janelas são então
+costuradas e convertidas por ``SpectrogramConverter.tile``.
+
+Pedidos simultâneos entram no mesmo laço de denoising; ``mode="fast"``
+usa um scheduler de poucos passos. Combinações do grid de ``MusicParams``
+sem prompt livre nem seed saem da biblioteca de stems (``stem_library``)
+quando ela tem a célula.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import Any, List, Optional
+
+import numpy as np
+
+from backend import config
+from backend.core.model_manager import ModelManager, get_model_manager
+from backend.core.worker_pool import remote_service
+from backend.models.riffusion_sampler import (
+    SCHEDULER_MODES,
+    BatchedSampler,
+    MemoryProfile,
+    TrackSpec,
+)
+from backend.utils.logger import get_logger, record_stage
+from backend.utils.micro_batcher import BatchItem, MicroBatcher
+from backend.utils.spectrogram_utils import SpectrogramConverter, SpectrogramParams
+
+STYLE_PROMPTS = {
+    "ambient": "ambient synthesizer pads",
+    "orchestral": "orchestral strings and brass",
+    "piano": "solo piano melody",
+    "electronic": "electronic synthesizer beat",
+    "acoustic": "acoustic guitar",
+    "cinematic": "cinematic film score",
+}
+
+MOOD_PROMPTS = {
+    "calm": "calm, peaceful",
+    "joyful": "upbeat, joyful, major key",
+    "melancholic": "melancholic, sad, minor key",
+    "tense": "dark, tense and mysterious",
+    "energetic": "energetic and driving",
+    "neutral": "soft, gentle",
+}
+
+TEMPO_PROMPTS = {
+    "slow": "slow tempo",
+    "medium": "medium tempo",
+    "fast": "fast tempo",
+}
+
+
+def build_prompt(style: str = "ambient", mood: str = "neutral", tempo: str = "medium") -> str:
+    """Monta o prompt do Riffusion a partir dos parâmetros de música."""
+    return ", ".join([
+        STYLE_PROMPTS.get(style, style),
+        MOOD_PROMPTS.get(mood, mood),
+        TEMPO_PROMPTS.get(tempo, tempo),
+    ])
+
+
+def music_model_id() -> dict:
+    """Tudo que, além dos parâmetros do pedido, altera o áudio gerado."""
+    return {
+        **config.MODEL_CONFIGS["music"],
+        "overlap_frames": config.MUSIC_TILE_OVERLAP_FRAMES,
+        "guidance_scale": config.MUSIC_GUIDANCE_SCALE,
+        "fast_steps": config.MUSIC_FAST_STEPS,
+        "griffin_lim_iters": config.MUSIC_GRIFFIN_LIM_ITERS,
+    }
+
+
+@dataclass
+class RiffusionPipelines:
+    """Pipeline do Riffusion e o amostrador em lote sobre os mesmos pesos."""
+
+    pipe: Any
+    sampler: BatchedSampler
+    device: str = "cpu"
+
+
+def build_pipelines(pipe, device: str) -> RiffusionPipelines:
+    """Envolve um ``StableDiffusionPipeline`` carregado no amostrador em lote."""
+    from backend.models.riffusion_sampler import DiffusersComponents
+
+    return RiffusionPipelines(pipe, BatchedSampler(DiffusersComponents(pipe)), device)
+
+
+def load_riffusion(use_snapshot: bool = True) -> RiffusionPipelines:
+    """Carrega o Riffusion (fatiamento de VAE/atenção fica a cargo do perfil de memória)."""
+    import torch
+    from diffusers import StableDiffusionPipeline
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    if use_snapshot:
+        from backend.core.snapshots import restore_snapshot
+
+        pipes = restore_snapshot("music", device=device)
+        if pipes is not None:
+            return pipes
+    pipe = StableDiffusionPipeline.from_pretrained(
+        config.MODEL_CONFIGS["music"]["name"],
+        torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+        safety_checker=None,
+    ).to(device)
+    return build_pipelines(pipe, device)
+
+
+@dataclass
+class MusicResult:
+    """Áudio gerado e métricas da geração."""
+
+    audio: np.ndarray
+    sample_rate: int
+    prompt: str
+    windows: int
+    generation_time: float
+    conversion_time: float
+    mode: str = "quality"
+    # "live" (Riffusion) ou "library" (stem pré-renderizado)
+    source: str = "live"
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / self.sample_rate
+
+
+@dataclass
+class _TrackRequest:
+    spec: TrackSpec
+    mode: str
+
+
+@dataclass
+class MusicBatchStats:
+    requests: int = 0
+    batches: int = 0
+    queue_s: float = 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["mean_tracks_per_batch"] = self.requests / self.batches if self.batches else 0.0
+        data["queue_ms_mean"] = 1000.0 * self.queue_s / self.requests if self.requests else 0.0
+        return data
+
+
+class MusicGenerator:
+    """
+    Gera trilhas de duração arbitrária com Riffusion.
+
+    Pedidos que chegam juntos (até ``max_batch_tracks`` em ``max_wait_ms``)
+    são amostrados no mesmo laço de denoising por um worker dedicado.
+    """
+
+    model_name = "music"
+
+    def __init__(self, model_manager: Optional[ModelManager] = None, loader=None,
+                 converter: Optional[SpectrogramConverter] = None,
+                 max_batch_tracks: int = config.MUSIC_MAX_BATCH_TRACKS,
+                 max_wait_ms: float = config.MUSIC_BATCH_WAIT_MS,
+                 memory_profile: Optional[MemoryProfile] = None, library=None):
+        self.mm = model_manager or get_model_manager()
+        self.logger = get_logger()
+        self.converter = converter or SpectrogramConverter(
+            SpectrogramParams(num_griffin_lim_iters=config.MUSIC_GRIFFIN_LIM_ITERS))
+        self.max_batch_tracks = max_batch_tracks
+        self.max_wait_s = max_wait_ms / 1000.0
+        # None: escolhido a cada lote pela VRAM livre
+        self.memory_profile = memory_profile
+        if library is None and config.MUSIC_STEM_LIBRARY_ENABLED:
+            from backend.models.stem_library import get_stem_library
+
+            library = get_stem_library()
+        # ``library=False`` desliga a biblioteca (ex.: ao construí-la)
+        self.library = library or None
+        self.stats = MusicBatchStats()
+        self._sampler: Optional[BatchedSampler] = None
+        # Um laço por modo: os passos do scheduler precisam coincidir
+        self._batcher = MicroBatcher(self._process, "music-batch", max_batch_tracks,
+                                     self.max_wait_s, group_by=lambda r: r.mode)
+        if not self.mm.is_registered(self.model_name):
+            cfg = config.MODEL_CONFIGS["music"]
+            self.mm.register(self.model_name, loader or load_riffusion,
+                             vram_gb=cfg["vram_gb"], ram_gb=cfg["ram_gb"])
+
+    def submit(self, spec: TrackSpec, mode: Optional[str] = None) -> Future:
+        """Enfileira uma faixa; o Future resolve para as imagens das janelas."""
+        mode = mode or config.MUSIC_SCHEDULER_MODE
+        if mode not in SCHEDULER_MODES:
+            raise ValueError(f"Modo de scheduler inválido: {mode} (opções: {', '.join(SCHEDULER_MODES)})")
+        return self._batcher.submit(_TrackRequest(spec, mode))
+
+    def generate_windows(self, prompt: str, count: int, overlap_frames: int,
+                         seed: Optional[int] = None, loop: bool = False,
+                         mode: Optional[str] = None) -> List[np.ndarray]:
+        """Gera ``count`` imagens de espectrograma contínuas (com ``loop``, a última emenda na primeira)."""
+        return self.submit(TrackSpec(prompt, count, overlap_frames, loop, seed), mode).result()
+
+    def generate(self, style: str = "ambient", mood: str = "neutral", tempo: str = "medium",
+                 intensity: float = 0.5, duration: float = 30.0, loop: bool = True,
+                 seed: Optional[int] = None, prompt: Optional[str] = None,
+                 mode: Optional[str] = None) -> MusicResult:
+        """
+        Gera uma trilha com a duração pedida.
+
+        Args:
+            intensity: 0..1, aplicado como ganho (0.5 → -6 dB, 1 → 0 dB).
+            loop: Produz uma faixa que repete sem emenda.
+            mode: "quality" ou "fast" (padrão: ``MUSIC_SCHEDULER_MODE``).
+            prompt: Prompt livre no lugar de estilo/humor/tempo (sempre ao vivo).
+        """
+        if self.library is not None:
+            served = self.library.serve(style=style, mood=mood, tempo=tempo, intensity=intensity,
+                                        duration=duration, loop=loop, seed=seed, prompt=prompt)
+            if served is not None:
+                return served
+        duration = float(min(max(duration, 1.0), config.MUSIC_MAX_DURATION_S))
+        prompt = prompt or build_prompt(style, mood, tempo)
+        mode = mode or config.MUSIC_SCHEDULER_MODE
+        width = config.MODEL_CONFIGS["music"]["width"]
+        overlap = config.MUSIC_TILE_OVERLAP_FRAMES
+        count = self.converter.windows_needed(duration, width, overlap, loop=loop)
+
+        start = time.perf_counter()
+        images = self.generate_windows(prompt, count, overlap, seed=seed, loop=loop, mode=mode)
+        generation_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        audio = self.converter.tile(images, overlap, duration_s=duration, loop=loop)
+        conversion_time = time.perf_counter() - start
+
+        audio = (audio * float(np.clip(intensity, 0.0, 1.0) * 0.5 + 0.5)).astype(np.float32)
+        result = MusicResult(audio, self.converter.params.sample_rate, prompt, count,
+                             generation_time, conversion_time, mode)
+        self.logger.info(
+            "🎵 Música: %.1fs em %d janelas | Riffusion %.2fs (%s) | conversão %.2fs "
+            "(%.2fs por segundo de áudio)",
+            result.duration, count, generation_time, mode, conversion_time,
+            conversion_time / max(result.duration, 1e-9),
+            stage="music", duration_s=generation_time + conversion_time, audio_s=result.duration,
+            timings={"generation": generation_time, "conversion": conversion_time},
+        )
+        record_stage("music", generation_time + conversion_time)
+        return result
+
+    def get_stats(self) -> dict:
+        data = self.stats.to_dict()
+        data.update({"max_batch_tracks": self.max_batch_tracks,
+                     "max_wait_ms": self.max_wait_s * 1000.0,
+                     "queue_depth": self._batcher.qsize(),
+                     "sampler": self._sampler.get_stats() if self._sampler is not None else None,
+                     "library": self.library.get_stats() if self.library is not None else None})
+        return data
+
+    def shutdown(self):
+        """Encerra o worker após esvaziar a fila."""
+        self._batcher.shutdown()
+
+    # ------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------
+
+    def _process(self, requests: List[BatchItem]):
+        """Amostra as faixas de um lote (todas do mesmo modo) num só laço."""
+        started = time.perf_counter()
+        mode = requests[0].payload.mode
+        with self.mm.load(self.model_name) as pipes:
+            self._sampler = pipes.sampler
+            images = pipes.sampler.sample([r.payload.spec for r in requests], mode,
+                                          profile=self.memory_profile)
+        self.stats.requests += len(requests)
+        self.stats.batches += 1
+        self.stats.queue_s += sum(started - r.enqueued_at for r in requests)
+        for request, windows in zip(requests, images):
+            request.future.set_result(windows)
+
+
+_music_generator: Optional[MusicGenerator] = None
+_music_generator_lock = threading.Lock()
+
+
+def get_music_generator() -> MusicGenerator:
+    """Retorna o gerador de música global (cliente do pool de workers, se ativo)."""
+    global _music_generator
+    if _music_generator is None:
+        with _music_generator_lock:
+            if _music_generator is None:
+                _music_generator = remote_service("music") or MusicGenerator()
+    return _music_generator
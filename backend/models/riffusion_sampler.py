@@ -0,0 +1,366 @@
+"""
+Riffusion Sampler - Aurora EchoTales
+====================================
+Laço de denoising do Riffusion em lote, sobre os componentes do pipeline.
+
+Uma faixa longa é um único latente "panorâmico"; as janelas de 512
+colunas que a cobrem (sobrepostas em ``overlap_frames``) passam juntas
+pela UNet e, a cada passo, as previsões de ruído das colunas
+compartilhadas são promediadas antes do passo do scheduler. As janelas
+saem contínuas por construção e, com ``loop``, a última dá a volta e
+compartilha colunas com a primeira.
+
+Vários pedidos (outros prompts, outras durações) podem ser amostrados
+no mesmo laço: as janelas de todos formam os lotes da UNet.
+
+- Embeddings de texto ficam em cache por prompt (o CLIP roda uma vez
+  por estilo/humor/tempo), inclusive o incondicional do guidance.
+- Modo ``fast``: DPM-Solver++ com ``MUSIC_FAST_STEPS`` passos.
+- Perfil de memória (janelas por lote, fatiamento da VAE e da atenção)
+  escolhido pela VRAM livre informada pelo ``ResourceManager``.
+
+Os componentes seguem uma interface mínima (``DiffusersComponents`` para
+o pipeline real, ``TinyUNetComponents`` de ``stubs`` para testes em CPU).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+from backend import config
+from backend.utils.logger import get_logger
+
+SCHEDULER_MODES = ("quality", "fast")
+
+
+# ============================================================
+# Perfil de memória
+# ============================================================
+
+@dataclass(frozen=True)
+class MemoryProfile:
+    """Quanto da VRAM o amostrador pode usar de uma vez."""
+
+    name: str
+    batch_size: int
+    vae_slicing: bool = False
+    attention_slicing: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def choose_memory_profile(free_vram_gb: Optional[float],
+                          profiles: Sequence[dict] = config.MUSIC_MEMORY_PROFILES) -> MemoryProfile:
+    """Primeiro perfil cujo mínimo cabe na VRAM livre (``None`` = sem GPU)."""
+    if free_vram_gb is None:
+        return MemoryProfile("cpu", batch_size=config.MUSIC_CPU_BATCH_SIZE)
+    # O último perfil é o mais econômico: usado mesmo sem folga nenhuma
+    profile = next((p for p in profiles if free_vram_gb >= p["min_free_gb"]), profiles[-1])
+    return MemoryProfile(profile["name"], profile["batch_size"],
+                         profile["vae_slicing"], profile["attention_slicing"])
+
+
+def current_memory_profile(resource_manager=None) -> MemoryProfile:
+    """Perfil para o orçamento atual (``VRAM_LIMIT_GB`` menos o que já está em uso)."""
+    from backend.utils.resource_manager import get_resource_manager
+
+    manager = resource_manager or get_resource_manager()
+    snapshot = manager.latest()
+    if not snapshot.gpu_available:
+        return choose_memory_profile(None)
+    budget = min(manager.vram_limit_gb, snapshot.vram_total_gb or manager.vram_limit_gb)
+    return choose_memory_profile(budget - snapshot.vram_used_gb)
+
+
+# ============================================================
+# Cache de embeddings
+# ============================================================
+
+class PromptEmbeddingCache:
+    """LRU de embeddings de texto por prompt; misses de um lote em uma só passada."""
+
+    def __init__(self, components, max_entries: int = config.MUSIC_PROMPT_CACHE_SIZE):
+        self.components = components
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, prompts: Sequence[str]) -> List[Any]:
+        with self._lock:
+            found = {p: self._entries[p] for p in prompts if p in self._entries}
+        missing = [p for p in dict.fromkeys(prompts) if p not in found]
+        if missing:
+            encoded = self.components.encode_prompt(missing)
+            found.update({p: encoded[i:i + 1] for i, p in enumerate(missing)})
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(prompts) - len(missing)
+            for prompt in prompts:
+                self._entries[prompt] = found[prompt]
+                self._entries.move_to_end(prompt)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return [found[p] for p in prompts]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "hit_ratio": self.hits / total if total else 0.0}
+
+
+# ============================================================
+# Amostrador
+# ============================================================
+
+@dataclass
+class TrackSpec:
+    """Uma faixa a amostrar: ``windows`` janelas encadeadas do mesmo prompt."""
+
+    prompt: str
+    windows: int
+    overlap_frames: int = config.MUSIC_TILE_OVERLAP_FRAMES
+    loop: bool = False
+    seed: Optional[int] = None
+
+
+@dataclass
+class SamplerStats:
+    samples: int = 0
+    tracks: int = 0
+    windows: int = 0
+    steps: int = 0
+    unet_batches: int = 0
+    unet_windows: int = 0
+    decode_batches: int = 0
+    denoise_s: float = 0.0
+    decode_s: float = 0.0
+    profile: Optional[dict] = None
+
+    @property
+    def mean_batch(self) -> float:
+        return self.unet_windows / self.unet_batches if self.unet_batches else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["mean_batch"] = self.mean_batch
+        return data
+
+
+class _Panorama:
+    """Latente de uma faixa inteira e o recorte de cada janela (com volta, se em loop)."""
+
+    def __init__(self, spec: TrackSpec, components, window_cols: int, overlap_cols: int):
+        self.spec = spec
+        self.ops = components
+        self.window_cols = window_cols
+        self.stride = window_cols - overlap_cols
+        self.width = self.stride * spec.windows + (0 if spec.loop else overlap_cols)
+        self.scheduler = None
+        self.latents = None
+
+    def span(self, index: int):
+        start = index * self.stride
+        return start, start + self.window_cols
+
+    def window(self, x, index: int):
+        start, end = self.span(index)
+        if end <= self.width:
+            return x[..., start:end]
+        return self.ops.cat([x[..., start:], x[..., :end - self.width]], axis=-1)
+
+    def add(self, total, index: int, value):
+        start, end = self.span(index)
+        if end <= self.width:
+            total[..., start:end] += value
+        else:
+            head = self.width - start
+            total[..., start:] += value[..., :head]
+            total[..., :end - self.width] += value[..., head:]
+
+    def coverage(self) -> np.ndarray:
+        """Quantas janelas cobrem cada coluna."""
+        counts = np.zeros(self.width, dtype=np.float32)
+        for index in range(self.spec.windows):
+            start, end = self.span(index)
+            np.add.at(counts, np.arange(start, end) % self.width, 1.0)
+        return counts
+
+
+class BatchedSampler:
+    """Denoising em lote de janelas de uma ou mais faixas."""
+
+    def __init__(self, components, guidance_scale: float = config.MUSIC_GUIDANCE_SCALE,
+                 quality_steps: int = config.MODEL_CONFIGS["music"]["num_inference_steps"],
+                 fast_steps: int = config.MUSIC_FAST_STEPS,
+                 cache_size: int = config.MUSIC_PROMPT_CACHE_SIZE):
+        self.components = components
+        self.guidance_scale = guidance_scale
+        self.steps = {"quality": quality_steps, "fast": fast_steps}
+        self.embeddings = PromptEmbeddingCache(components, cache_size)
+        self.stats = SamplerStats()
+        self.logger = get_logger()
+        self._profile: Optional[MemoryProfile] = None
+
+    def _apply(self, profile: MemoryProfile):
+        if profile != self._profile:
+            self.components.apply_profile(profile)
+            self._profile = profile
+            self.stats.profile = profile.to_dict()
+
+    def sample(self, specs: Sequence[TrackSpec], mode: str = "quality",
+               profile: Optional[MemoryProfile] = None,
+               height: int = config.MODEL_CONFIGS["music"]["height"],
+               width: int = config.MODEL_CONFIGS["music"]["width"]) -> List[List[np.ndarray]]:
+        """
+        Amostra as faixas juntas.
+
+        Returns:
+            list: por faixa, as imagens uint8 (altura x largura x 3) de cada janela.
+        """
+        if mode not in SCHEDULER_MODES:
+            raise ValueError(f"Modo de scheduler inválido: {mode} (opções: {', '.join(SCHEDULER_MODES)})")
+        ops = self.components
+        scale = ops.scale_factor
+        for spec in specs:
+            if spec.overlap_frames % scale or not 0 <= spec.overlap_frames < width // 2:
+                raise ValueError(f"overlap_frames deve ser múltiplo de {scale} e menor que "
+                                 f"{width // 2}: {spec.overlap_frames}")
+        profile = profile or current_memory_profile()
+        self._apply(profile)
+        steps = self.steps[mode]
+
+        tracks = [_Panorama(spec, ops, width // scale, spec.overlap_frames // scale)
+                  for spec in specs]
+        cond = self.embeddings.get_many([spec.prompt for spec in specs])
+        uncond = self.embeddings.get_many([""])[0]
+        for track in tracks:
+            track.scheduler = ops.scheduler(mode)
+            track.scheduler.set_timesteps(steps, device=ops.device)
+            shape = (1, ops.latent_channels, height // scale, track.width)
+            track.latents = ops.noise(shape, track.spec.seed) * track.scheduler.init_noise_sigma
+        weights = [ops.asarray(1.0 / track.coverage()) for track in tracks]
+        jobs = [(k, index) for k, track in enumerate(tracks) for index in range(track.spec.windows)]
+
+        start = time.perf_counter()
+        for step in range(steps):
+            t = tracks[0].scheduler.timesteps[step]
+            inputs = [track.scheduler.scale_model_input(track.latents, t) for track in tracks]
+            totals = [ops.zeros_like(track.latents) for track in tracks]
+            for first in range(0, len(jobs), profile.batch_size):
+                batch = jobs[first:first + profile.batch_size]
+                latents = ops.cat([tracks[k].window(inputs[k], i) for k, i in batch], axis=0)
+                context = ops.cat([cond[k] for k, _ in batch], axis=0)
+                noise = ops.denoise(latents, t, context, ops.cat([uncond] * len(batch), axis=0),
+                                    self.guidance_scale)
+                for j, (k, i) in enumerate(batch):
+                    tracks[k].add(totals[k], i, noise[j:j + 1])
+                self.stats.unet_batches += 1
+                self.stats.unet_windows += len(batch)
+            for track, total, weight in zip(tracks, totals, weights):
+                track.latents = track.scheduler.step(total * weight, t, track.latents).prev_sample
+        self.stats.denoise_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        images: List[List[np.ndarray]] = [[] for _ in tracks]
+        for first in range(0, len(jobs), profile.batch_size):
+            batch = jobs[first:first + profile.batch_size]
+            decoded = ops.decode(ops.cat([tracks[k].window(tracks[k].latents, i)
+                                          for k, i in batch], axis=0))
+            for j, (k, _) in enumerate(batch):
+                images[k].append(decoded[j])
+            self.stats.decode_batches += 1
+        self.stats.decode_s += time.perf_counter() - start
+
+        self.stats.samples += 1
+        self.stats.tracks += len(tracks)
+        self.stats.windows += len(jobs)
+        self.stats.steps += steps
+        return images
+
+    def get_stats(self) -> dict:
+        data = self.stats.to_dict()
+        data["prompt_cache"] = self.embeddings.get_stats()
+        data["steps_by_mode"] = dict(self.steps)
+        return data
+
+
+# ============================================================
+# Componentes do diffusers
+# ============================================================
+
+class DiffusersComponents:
+    """Adapta um ``StableDiffusionPipeline`` (torch) ao ``BatchedSampler``."""
+
+    def __init__(self, pipe):
+        import torch
+
+        self.torch = torch
+        self.pipe = pipe
+        self.device = pipe.device
+        self.dtype = pipe.unet.dtype
+        self.latent_channels = pipe.unet.config.in_channels
+        self.scale_factor = pipe.vae_scale_factor
+
+    def encode_prompt(self, prompts: List[str]):
+        tokenizer = self.pipe.tokenizer
+        ids = tokenizer(prompts, padding="max_length", max_length=tokenizer.model_max_length,
+                        truncation=True, return_tensors="pt").input_ids
+        with self.torch.inference_mode():
+            return self.pipe.text_encoder(ids.to(self.device))[0].to(self.dtype)
+
+    def noise(self, shape, seed: Optional[int]):
+        generator = self.torch.Generator().manual_seed(seed) if seed is not None else None
+        return self.torch.randn(shape, generator=generator).to(self.device, self.dtype)
+
+    def scheduler(self, mode: str):
+        """Instância nova por faixa (schedulers multistep guardam estado)."""
+        from diffusers import DPMSolverMultistepScheduler
+
+        base = self.pipe.scheduler
+        if mode == "fast":
+            return DPMSolverMultistepScheduler.from_config(base.config,
+                                                           algorithm_type="dpmsolver++")
+        return type(base).from_config(base.config)
+
+    def denoise(self, latents, t, context, uncond, guidance_scale: float):
+        with self.torch.inference_mode():
+            if guidance_scale <= 1.0:
+                return self.pipe.unet(latents, t, encoder_hidden_states=context).sample
+            noise = self.pipe.unet(self.torch.cat([latents, latents]), t,
+                                   encoder_hidden_states=self.torch.cat([uncond, context])).sample
+            free, guided = noise.chunk(2)
+            return free + guidance_scale * (guided - free)
+
+    def decode(self, latents) -> np.ndarray:
+        vae = self.pipe.vae
+        with self.torch.inference_mode():
+            images = vae.decode(latents / vae.config.scaling_factor).sample
+        images = (images / 2 + 0.5).clamp(0, 1).permute(0, 2, 3, 1).float().cpu().numpy()
+        return (images * 255).round().astype(np.uint8)
+
+    def apply_profile(self, profile: MemoryProfile):
+        if profile.vae_slicing:
+            self.pipe.enable_vae_slicing()
+        else:
+            self.pipe.disable_vae_slicing()
+        if profile.attention_slicing:
+            self.pipe.enable_attention_slicing()
+        else:
+            self.pipe.disable_attention_slicing()
+
+    def cat(self, items: list, axis: int = 0):
+        return self.torch.cat(items, dim=axis)
+
+    def zeros_like(self, x):
+        return self.torch.zeros_like(x)
+
+    def asarray(self, array: np.ndarray):
+        return self.torch.from_numpy(array).to(self.device, self.dtype)
@@ -0,0 +1,273 @@
+"""
+Speaker Latents - Aurora EchoTales
+==================================
+Vozes de referência da narração e o cache dos latentes de
+condicionamento do XTTS.
+
+Com ``speaker_wav``, o XTTS recalcula a cada chamada os latentes da voz
+(``gpt_cond_latent`` e ``speaker_embedding``), passando o áudio de
+referência pelo encoder de condicionamento. Aqui eles são calculados
+uma vez por voz:
+
+- memória: LRU com os tensores já no dispositivo do modelo;
+- disco: ``cache/speaker_latents/<chave>.npz``, onde a chave é o hash
+  do áudio de referência + o modelo, então novas sessões (e outros
+  workers) só leem o arquivo.
+
+Vozes enviadas (``POST /api/voices``) são normalizadas para WAV mono e
+gravadas em ``cache/voices/<voice_id>.wav``; o ``voice_id`` é o hash
+desse WAV, de modo que o mesmo áudio enviado de novo reaproveita tudo.
+
+Os speakers embutidos do XTTS já vêm com latentes prontos no
+``speaker_manager`` e não passam por aqui.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend import config
+from backend.utils.artifact_cache import make_cache_key
+from backend.utils.file_utils import atomic_write, file_sha256
+from backend.utils.logger import get_logger
+
+
+def _to_numpy(x: Any) -> np.ndarray:
+    if hasattr(x, "detach"):
+        x = x.detach().float().cpu().numpy()
+    return np.asarray(x, dtype=np.float32)
+
+
+# ============================================================
+# Vozes de referência
+# ============================================================
+
+@dataclass
+class Voice:
+    voice_id: str
+    path: Path
+    duration: float
+    sample_rate: int
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["path"] = str(self.path)
+        return data
+
+
+class VoiceLibrary:
+    """Áudios de referência enviados, endereçados pelo hash do WAV normalizado."""
+
+    def __init__(self, root: Path = config.TTS_VOICES_DIR):
+        self.root = Path(root)
+        self._hashes: Dict[Path, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, samples: np.ndarray, sample_rate: int) -> Tuple[Voice, bool]:
+        """
+        Grava o áudio (mono, até ``TTS_VOICE_MAX_S``) como WAV.
+
+        Returns:
+            tuple: (Voice, ``True`` se a voz é nova)
+        """
+        from backend.utils.audio_utils import encode_wav
+
+        samples = np.asarray(samples, dtype=np.float32)[:int(config.TTS_VOICE_MAX_S * sample_rate)]
+        if not len(samples):
+            raise ValueError("Áudio de referência vazio")
+        wav = encode_wav(samples, sample_rate)
+        voice_id = hashlib.sha256(wav).hexdigest()[:16]
+        path = self.root / f"{voice_id}.wav"
+        created = not path.exists()
+        if created:
+            atomic_write(path, wav)
+        return Voice(voice_id, path, len(samples) / sample_rate, sample_rate), created
+
+    def path(self, voice_id: str) -> Path:
+        path = self.root / f"{voice_id}.wav"
+        if not voice_id.isalnum() or not path.exists():
+            raise KeyError(voice_id)
+        return path
+
+    def exists(self, voice_id: str) -> bool:
+        try:
+            self.path(voice_id)
+            return True
+        except KeyError:
+            return False
+
+    def list(self) -> List[str]:
+        return sorted(p.stem for p in self.root.glob("*.wav")) if self.root.exists() else []
+
+    def reference_hash(self, path: Path) -> str:
+        """SHA-256 do arquivo, recalculado só se ele mudar (mtime/tamanho)."""
+        path = Path(path)
+        stat = path.stat()
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        digest = file_sha256(path)
+        with self._lock:
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+
+# ============================================================
+# Cache de latentes
+# ============================================================
+
+@dataclass
+class SpeakerLatents:
+    """Condicionamento de uma voz, no formato que o ``Xtts.inference`` recebe."""
+
+    gpt_cond_latent: Any
+    speaker_embedding: Any
+
+
+@dataclass
+class LatentCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    computed: int = 0
+    compute_s: float = 0.0
+    load_s: float = 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        total = self.memory_hits + self.disk_hits + self.computed
+        data["hit_ratio"] = (self.memory_hits + self.disk_hits) / total if total else 0.0
+        return data
+
+
+def latent_key(reference_sha: str) -> str:
+    """Chave dos latentes: hash do áudio de referência + modelo."""
+    return make_cache_key("speaker-latents", text=reference_sha,
+                          model=config.MODEL_CONFIGS["tts"]["name"])
+
+
+class SpeakerLatentCache:
+    """LRU em memória sobre arquivos ``.npz`` em disco."""
+
+    def __init__(self, root: Path = config.TTS_SPEAKER_LATENTS_DIR,
+                 max_entries: int = config.TTS_SPEAKER_CACHE_SIZE):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.stats = LatentCacheStats()
+        self.logger = get_logger()
+        self._entries: "OrderedDict[str, SpeakerLatents]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Cálculos disputam a GPU: um por vez, e quem esperou reaproveita
+        self._compute_lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.npz"
+
+    def _remember(self, key: str, latents: SpeakerLatents):
+        with self._lock:
+            self._entries[key] = latents
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _cached(self, key: str) -> Optional[SpeakerLatents]:
+        with self._lock:
+            latents = self._entries.get(key)
+            if latents is not None:
+                self._entries.move_to_end(key)
+                self.stats.memory_hits += 1
+            return latents
+
+    def get(self, key: str, compute: Callable[[], SpeakerLatents],
+            restore: Optional[Callable[[np.ndarray], Any]] = None) -> SpeakerLatents:
+        """
+        Latentes da voz ``key``: da memória, do disco ou de ``compute``.
+
+        Args:
+            restore: Converte os arrays lidos do disco para o formato do
+                modelo (ex.: tensor no dispositivo); padrão: NumPy.
+        """
+        latents = self._cached(key)
+        if latents is not None:
+            return latents
+        with self._compute_lock:
+            latents = self._cached(key)
+            if latents is not None:
+                return latents
+            latents = self._load(key, restore or (lambda array: array))
+            if latents is None:
+                start = time.perf_counter()
+                latents = compute()
+                elapsed = time.perf_counter() - start
+                self._save(key, latents)
+                with self._lock:
+                    self.stats.computed += 1
+                    self.stats.compute_s += elapsed
+                self.logger.info("🎙️ Latentes da voz %s calculados em %.2fs", key[:12], elapsed)
+            self._remember(key, latents)
+            return latents
+
+    def _load(self, key: str, restore) -> Optional[SpeakerLatents]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        start = time.perf_counter()
+        try:
+            with np.load(path) as data:
+                latents = SpeakerLatents(restore(data["gpt_cond_latent"]),
+                                         restore(data["speaker_embedding"]))
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning("⚠️ Latentes %s ilegíveis (%s); recalculando", path.name, e)
+            return None
+        with self._lock:
+            self.stats.disk_hits += 1
+            self.stats.load_s += time.perf_counter() - start
+        return latents
+
+    def _save(self, key: str, latents: SpeakerLatents):
+        arrays = {"gpt_cond_latent": _to_numpy(latents.gpt_cond_latent),
+                  "speaker_embedding": _to_numpy(latents.speaker_embedding)}
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            atomic_write(self._path(key), lambda f: np.savez(f, **arrays))
+        except OSError as e:
+            self.logger.warning("⚠️ Latentes não gravados em disco: %s", e)
+
+    def get_stats(self) -> dict:
+        data = self.stats.to_dict()
+        with self._lock:
+            data["entries"] = len(self._entries)
+        data["on_disk"] = len(list(self.root.glob("*.npz"))) if self.root.exists() else 0
+        return data
+
+
+_voice_library: Optional[VoiceLibrary] = None
+_latent_cache: Optional[SpeakerLatentCache] = None
+_voice_library_lock = threading.Lock()
+_latent_cache_lock = threading.Lock()
+
+
+def get_voice_library() -> VoiceLibrary:
+    """Retorna a biblioteca de vozes global."""
+    global _voice_library
+    if _voice_library is None:
+        with _voice_library_lock:
+            if _voice_library is None:
+                _voice_library = VoiceLibrary()
+    return _voice_library
+
+
+def get_latent_cache() -> SpeakerLatentCache:
+    """Retorna o cache de latentes global."""
+    global _latent_cache
+    if _latent_cache is None:
+        with _latent_cache_lock:
+            if _latent_cache is None:
+                _latent_cache = SpeakerLatentCache()
+    return _latent_cache
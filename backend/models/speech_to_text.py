@@ -0,0 +1,384 @@
+"""
+Speech-to-Text - Aurora EchoTales
+=================================
+Transcrição com backends plugáveis, VAD e decodificação em lote.
+
+Backends (``config.STT_BACKEND``):
+    - ``faster-whisper``: CTranslate2, int8 em CPU por padrão
+    - ``openai-whisper``: implementação de referência (PyTorch)
+
+Fluxo: o VAD descarta o silêncio e divide a fala em segmentos de até
+~28s; os segmentos são transcritos em lotes de ``STT_BATCH_SIZE`` (uma
+chamada ao decoder por lote) e concatenados em ordem.
+
+Com ``with_embeddings=True`` o encoder roda uma vez por lote e a mesma
+saída alimenta o decoder e o pooling (média + desvio por segmento) que
+a cabeça de emoção acústica consome, sem um segundo modelo de áudio.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend import config
+from backend.core.model_manager import ModelManager, get_model_manager
+from backend.utils.logger import get_logger, record_stage
+from backend.utils.vad import SpeechSegment, detect_speech
+
+
+# O encoder do Whisper produz 1500 quadros por janela de 30s (50 Hz)
+WHISPER_FRAME_SAMPLES = 320
+WHISPER_WINDOW_SAMPLES = 30 * 16000
+
+
+def pool_frames(frames: np.ndarray, lengths: Sequence[int]) -> np.ndarray:
+    """
+    Média e desvio por segmento sobre os quadros válidos do encoder.
+
+    ``frames`` tem forma (lote, quadros, dim); ``lengths`` é o número de
+    amostras de cada segmento (o restante da janela é padding).
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    pooled = np.empty((len(lengths), 2 * frames.shape[-1]), dtype=np.float32)
+    for i, n in enumerate(lengths):
+        valid = frames[i, :max(1, min(frames.shape[1], -(-n // WHISPER_FRAME_SAMPLES)))]
+        pooled[i] = np.concatenate([valid.mean(axis=0), valid.std(axis=0)])
+    return pooled
+
+
+@dataclass
+class EncodedBatch:
+    """Saída do encoder: formato nativo do backend + embeddings agrupados."""
+
+    features: Any
+    embeddings: np.ndarray
+
+
+class STTBackend:
+    """
+    Interface dos backends de transcrição.
+
+    Backends com ``supports_features`` separam encoder e decoder para que
+    a saída do encoder seja reaproveitada (ver ``SpeechTranscriber``).
+    """
+
+    name = "base"
+    supports_features = False
+
+    def transcribe_batch(self, segments: Sequence[np.ndarray],
+                         language: Optional[str] = None) -> List[str]:
+        """Transcreve segmentos de áudio 16 kHz (cada um com até 30s)."""
+        return self.decode_batch(self.encode_batch(segments), language)
+
+    def encode_batch(self, segments: Sequence[np.ndarray]) -> EncodedBatch:
+        """Roda só o encoder acústico sobre o lote."""
+        raise NotImplementedError
+
+    def decode_batch(self, encoded: EncodedBatch, language: Optional[str] = None) -> List[str]:
+        """Decodifica texto a partir da saída do encoder."""
+        raise NotImplementedError
+
+
+class OpenAIWhisperBackend(STTBackend):
+    """Whisper de referência; lotes via ``whisper.decode`` com mel empilhado."""
+
+    name = "openai-whisper"
+    supports_features = True
+
+    def __init__(self, size: str = config.MODEL_CONFIGS["stt"]["size"],
+                 device: Optional[str] = None):
+        import torch
+        import whisper
+
+        self.whisper = whisper
+        self.torch = torch
+        device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        model = None
+        if size == config.MODEL_CONFIGS["stt"]["size"]:
+            from backend.core.snapshots import restore_snapshot
+
+            model = restore_snapshot("stt", device=device)
+        self.model = model if model is not None else whisper.load_model(size, device=device)
+        self.fp16 = device == "cuda"
+
+    def _mels(self, segments):
+        mels = [
+            self.whisper.log_mel_spectrogram(
+                self.whisper.pad_or_trim(np.asarray(seg, dtype=np.float32)),
+                n_mels=self.model.dims.n_mels,
+            )
+            for seg in segments
+        ]
+        return self.torch.stack(mels).to(self.model.device)
+
+    def transcribe_batch(self, segments, language=None):
+        options = self.whisper.DecodingOptions(language=language, fp16=self.fp16,
+                                               without_timestamps=True)
+        results = self.whisper.decode(self.model, self._mels(segments), options)
+        return [r.text.strip() for r in results]
+
+    def encode_batch(self, segments):
+        mels = self._mels(segments)
+        if self.fp16:
+            mels = mels.half()
+        with self.torch.no_grad():
+            features = self.model.embed_audio(mels)
+        frames = features.float().cpu().numpy()
+        return EncodedBatch(features, pool_frames(frames, [len(s) for s in segments]))
+
+    def decode_batch(self, encoded, language=None):
+        # ``whisper.decode`` reconhece a forma (n_audio_ctx, n_audio_state)
+        # e pula o encoder quando recebe features já codificadas
+        options = self.whisper.DecodingOptions(language=language, fp16=self.fp16,
+                                               without_timestamps=True)
+        results = self.whisper.decode(self.model, encoded.features, options)
+        return [r.text.strip() for r in results]
+
+
+class FasterWhisperBackend(STTBackend):
+    """faster-whisper (CTranslate2) com quantização int8 em CPU."""
+
+    name = "faster-whisper"
+    supports_features = True
+
+    def __init__(self, size: str = config.MODEL_CONFIGS["stt"]["size"],
+                 device: str = config.STT_DEVICE,
+                 compute_type: str = config.STT_COMPUTE_TYPE):
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(size, device=device, compute_type=compute_type)
+        try:
+            from faster_whisper import BatchedInferencePipeline
+            self.batched = BatchedInferencePipeline(model=self.model)
+        except ImportError:
+            self.batched = None
+
+    def transcribe_batch(self, segments, language=None):
+        if self.batched is None or len(segments) == 1:
+            texts = []
+            for seg in segments:
+                parts, _ = self.model.transcribe(np.asarray(seg, dtype=np.float32),
+                                                 language=language, vad_filter=False,
+                                                 without_timestamps=True)
+                texts.append(" ".join(p.text.strip() for p in parts))
+            return texts
+
+        # Concatena os segmentos e informa as fronteiras como clips: o
+        # pipeline em lote decodifica todos os clips em uma passada.
+        sr = config.STT_SAMPLE_RATE
+        audio = np.concatenate([np.asarray(s, dtype=np.float32) for s in segments])
+        bounds = np.cumsum([0] + [len(s) for s in segments]) / sr
+        clips = [{"start": float(a), "end": float(b)} for a, b in zip(bounds[:-1], bounds[1:])]
+        parts, _ = self.batched.transcribe(
+            audio, language=language, batch_size=len(segments),
+            clip_timestamps=clips, vad_filter=False, without_timestamps=True,
+        )
+        texts = [""] * len(segments)
+        for part in parts:
+            index = int(np.searchsorted(bounds[1:], part.start, side="right"))
+            index = min(index, len(segments) - 1)
+            texts[index] = f"{texts[index]} {part.text.strip()}".strip()
+        return texts
+
+    def encode_batch(self, segments):
+        import ctranslate2
+
+        mels = np.stack([
+            self.model.feature_extractor(
+                np.pad(np.asarray(seg, dtype=np.float32)[:WHISPER_WINDOW_SAMPLES],
+                       (0, max(0, WHISPER_WINDOW_SAMPLES - len(seg))))
+            )[:, :WHISPER_WINDOW_SAMPLES // 160]
+            for seg in segments
+        ])
+        features = self.model.encode(mels)
+        host = features if features.device == "cpu" else features.to_device(ctranslate2.Device.cpu)
+        return EncodedBatch(features, pool_frames(np.array(host), [len(s) for s in segments]))
+
+    def decode_batch(self, encoded, language=None):
+        from faster_whisper.tokenizer import Tokenizer
+
+        multilingual = self.model.model.is_multilingual
+        if language is None and multilingual:
+            # Sem idioma fixo, detecta por segmento (mesmo comportamento de
+            # ``transcribe``): o token mais provável vem como "<|pt|>".
+            detected = self.model.model.detect_language(encoded.features)
+            languages = [scores[0][0][2:-2] for scores in detected]
+        else:
+            languages = [language] * len(encoded.embeddings)
+        tokenizers = {
+            lang: Tokenizer(self.model.hf_tokenizer, multilingual, task="transcribe", language=lang)
+            for lang in set(languages)
+        }
+        prompts = [self.model.get_prompt(tokenizers[lang], [], without_timestamps=True)
+                   for lang in languages]
+        results = self.model.model.generate(encoded.features, prompts,
+                                            beam_size=5, max_length=448, suppress_blank=True)
+        return [tokenizers[lang].decode(r.sequences_ids[0]).strip()
+                for lang, r in zip(languages, results)]
+
+
+STT_BACKENDS = {
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+}
+
+
+def create_stt_backend(name: str = config.STT_BACKEND, **kwargs) -> STTBackend:
+    """Instancia o backend configurado."""
+    if name not in STT_BACKENDS:
+        raise ValueError(f"Backend de STT desconhecido: {name} "
+                         f"(opções: {', '.join(STT_BACKENDS)})")
+    return STT_BACKENDS[name](**kwargs)
+
+
+@dataclass
+class TranscriptSegment:
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class TranscriptionResult:
+    """Transcrição e custo."""
+
+    text: str
+    segments: List[TranscriptSegment]
+    audio_seconds: float
+    speech_seconds: float
+    processing_time: float
+    backend: str
+    timings: Dict[str, float] = field(default_factory=dict)
+    embeddings: Optional[np.ndarray] = None
+
+    @property
+    def real_time_factor(self) -> float:
+        return self.processing_time / self.audio_seconds if self.audio_seconds else 0.0
+
+
+class SpeechTranscriber:
+    """Transcrição com VAD e lotes sobre o backend configurado."""
+
+    model_name = "stt"
+
+    def __init__(self, model_manager: Optional[ModelManager] = None, loader=None,
+                 batch_size: int = config.STT_BATCH_SIZE):
+        self.mm = model_manager or get_model_manager()
+        self.logger = get_logger()
+        self.batch_size = batch_size
+        if not self.mm.is_registered(self.model_name):
+            cfg = config.MODEL_CONFIGS["stt"]
+            on_gpu = config.STT_BACKEND == "openai-whisper" or config.STT_DEVICE == "cuda"
+            self.mm.register(self.model_name, loader or create_stt_backend,
+                             vram_gb=cfg["vram_gb"] if on_gpu else 0.0, ram_gb=cfg["ram_gb"])
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = config.STT_LANGUAGE,
+                   sample_rate: int = config.STT_SAMPLE_RATE,
+                   with_embeddings: bool = False,
+                   speech: Optional[List[SpeechSegment]] = None) -> TranscriptionResult:
+        """
+        Transcreve áudio mono 16 kHz.
+
+        Com ``with_embeddings`` (e um backend que o suporte) o resultado
+        traz um embedding por segmento, tirado da mesma passada do encoder.
+        ``speech`` reaproveita segmentos já detectados (análise ao vivo)
+        em vez de rodar o VAD de novo.
+        """
+        start = time.perf_counter()
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        if speech is None:
+            speech = detect_speech(audio, sample_rate)
+        vad_time = time.perf_counter() - start
+
+        texts: List[str] = []
+        embeddings: List[np.ndarray] = []
+        encode_time = 0.0
+        backend_name = ""
+        if speech:
+            with self.mm.load(self.model_name) as backend:
+                backend_name = backend.name
+                shared = with_embeddings and backend.supports_features
+                clips = [audio[s.start:s.end] for s in speech]
+                for i in range(0, len(clips), self.batch_size):
+                    batch = clips[i:i + self.batch_size]
+                    if not shared:
+                        texts.extend(backend.transcribe_batch(batch, language))
+                        continue
+                    encode_start = time.perf_counter()
+                    encoded = backend.encode_batch(batch)
+                    encode_time += time.perf_counter() - encode_start
+                    embeddings.append(encoded.embeddings)
+                    texts.extend(backend.decode_batch(encoded, language))
+
+        segments = [TranscriptSegment(*seg.seconds(sample_rate), text)
+                    for seg, text in zip(speech, texts)]
+        elapsed = time.perf_counter() - start
+        result = TranscriptionResult(
+            text=" ".join(t for t in texts if t),
+            segments=segments,
+            audio_seconds=len(audio) / sample_rate,
+            speech_seconds=sum(s.end - s.start for s in speech) / sample_rate,
+            processing_time=elapsed,
+            backend=backend_name,
+            timings={"vad": vad_time, "encode": encode_time,
+                     "decode": elapsed - vad_time - encode_time},
+            embeddings=np.concatenate(embeddings) if embeddings else None,
+        )
+        self.logger.info(
+            "🎙️ Transcrição (%s): %.1fs de áudio, %.1fs de fala em %d segmentos | %.2fs (RTF %.2f)",
+            backend_name or "sem fala", result.audio_seconds, result.speech_seconds, len(speech),
+            elapsed, result.real_time_factor,
+            stage="stt", duration_s=elapsed, audio_s=result.audio_seconds, timings=result.timings,
+        )
+        record_stage("stt", elapsed)
+        return result
+
+
+def benchmark_backends(audio: np.ndarray, backends: Sequence[str] = tuple(STT_BACKENDS),
+                       language: Optional[str] = config.STT_LANGUAGE,
+                       repeats: int = 2) -> Dict[str, dict]:
+    """
+    Compara o fator de tempo real dos backends disponíveis no mesmo áudio.
+
+    Backends cujas dependências não estão instaladas são reportados com
+    ``error`` em vez de interromper a comparação.
+    """
+    results = {}
+    for name in backends:
+        try:
+            load_start = time.perf_counter()
+            backend = create_stt_backend(name)
+            load_time = time.perf_counter() - load_start
+        except ImportError as e:
+            results[name] = {"error": f"não instalado ({e.name})"}
+            continue
+
+        mm = ModelManager(next_stages={})
+        mm.register("stt", lambda: backend)
+        transcriber = SpeechTranscriber(mm)
+        runs = [transcriber.transcribe(audio, language) for _ in range(repeats)]
+        mm.shutdown()
+        results[name] = {
+            "load_time_s": load_time,
+            "processing_time_s": float(np.mean([r.processing_time for r in runs])),
+            "real_time_factor": float(np.mean([r.real_time_factor for r in runs])),
+            "text": runs[-1].text,
+        }
+    return results
+
+
+_transcriber: Optional[SpeechTranscriber] = None
+_transcriber_lock = threading.Lock()
+
+
+def get_speech_transcriber() -> SpeechTranscriber:
+    """Retorna o transcritor global."""
+    global _transcriber
+    if _transcriber is None:
+        with _transcriber_lock:
+            if _transcriber is None:
+                _transcriber = SpeechTranscriber()
+    return _transcriber
@@ -0,0 +1,368 @@
+"""
+Stem Library - Aurora EchoTales
+===============================
+Loops pré-renderizados para o grid fechado de ``MusicParams``
+(6 estilos x 6 humores x 3 tempos).
+
+Cada célula vira um stem em loop (``MUSIC_STEM_DURATION_S``, renderizado
+uma vez pelo Riffusion com ``MUSIC_STEM_SEED`` e intensidade máxima) sob
+``cache/stems/``:
+
+    <estilo>-<humor>-<tempo>.npy   PCM int16 mono, lido com ``mmap``
+    index.json                     por célula: arquivo, prompt, impressão digital
+
+A impressão digital é a chave de ``make_cache_key`` sobre o prompt da
+célula e a identidade do modelo (``music_model_id``): trocar o modelo, o
+scheduler ou os templates de prompt desatualiza só as células afetadas,
+e ``build`` rerrenderiza apenas essas. Gravações são atômicas e o índice
+é salvo a cada célula, então uma construção interrompida continua de
+onde parou.
+
+Na requisição, ``serve`` repete o stem até a duração pedida e aplica a
+intensidade (ganho igual ao da geração ao vivo + passa-baixa circular,
+que preserva a emenda do loop) em milissegundos. Prompt livre, seed
+explícita ou célula ausente/desatualizada devolvem ``None`` e o chamador
+gera ao vivo.
+
+Uso:
+    python -m backend.models.stem_library list
+    python -m backend.models.stem_library build              # só o que mudou
+    python -m backend.models.stem_library build piano-calm-slow --force
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend import config
+from backend.models.music_generator import (
+    MOOD_PROMPTS,
+    STYLE_PROMPTS,
+    TEMPO_PROMPTS,
+    MusicResult,
+    build_prompt,
+    music_model_id,
+)
+from backend.utils.artifact_cache import make_cache_key
+from backend.utils.file_utils import atomic_write
+from backend.utils.logger import get_logger
+
+INDEX_FILE = "index.json"
+
+# Incrementar desatualiza todos os stems (mudança de formato ou pós-processamento)
+STEM_FORMAT_VERSION = 1
+
+Cell = Tuple[str, str, str]
+
+
+def grid() -> List[Cell]:
+    """Todas as células estilo/humor/tempo."""
+    return list(itertools.product(STYLE_PROMPTS, MOOD_PROMPTS, TEMPO_PROMPTS))
+
+
+def cell_key(style: str, mood: str, tempo: str) -> str:
+    return f"{style}-{mood}-{tempo}"
+
+
+def stem_fingerprint(style: str, mood: str, tempo: str) -> str:
+    """Muda quando o prompt da célula, o modelo ou o formato do stem mudam."""
+    return make_cache_key(
+        "music-stem",
+        params={"duration": config.MUSIC_STEM_DURATION_S, "version": STEM_FORMAT_VERSION},
+        text=build_prompt(style, mood, tempo),
+        seed=config.MUSIC_STEM_SEED,
+        model=music_model_id(),
+    )
+
+
+def shape_intensity(stem: np.ndarray, sample_rate: int, intensity: float) -> np.ndarray:
+    """
+    Ganho da geração ao vivo (0.5 → -6 dB, 1 → 0 dB) e passa-baixa de 2ª
+    ordem cujo corte sobe com a intensidade. O filtro é aplicado no
+    domínio da frequência sobre o período inteiro (convolução circular),
+    então o fim do loop continua emendando no começo.
+    """
+    from scipy import fft
+
+    intensity = float(np.clip(intensity, 0.0, 1.0))
+    low, high = config.MUSIC_STEM_LOWPASS_HZ
+    cutoff = low * (high / low) ** intensity
+    freqs = np.fft.rfftfreq(len(stem), 1.0 / sample_rate)
+    response = 1.0 / np.sqrt(1.0 + (freqs / cutoff) ** 4)
+    filtered = fft.irfft(fft.rfft(stem) * response, n=len(stem))
+    return (filtered * (intensity * 0.5 + 0.5)).astype(np.float32)
+
+
+@dataclass
+class StemEntry:
+    """Um stem gravado."""
+
+    key: str
+    file: str
+    prompt: str
+    fingerprint: str
+    samples: int
+    sample_rate: int
+    peak: float
+    render_s: float
+    built_at: str
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class LibraryStats:
+    hits: int = 0
+    misses: int = 0
+    serve_s: float = 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["serve_ms_mean"] = 1000.0 * self.serve_s / self.hits if self.hits else 0.0
+        return data
+
+
+class StemLibrary:
+    """Índice dos stems em disco, construção incremental e entrega com loop/intensidade."""
+
+    def __init__(self, root: Path = config.MUSIC_STEM_DIR):
+        self.root = Path(root)
+        self.logger = get_logger()
+        self.stats = LibraryStats()
+        self._lock = threading.Lock()
+        self._stems: Dict[Tuple[str, str], np.ndarray] = {}
+        self._entries: Dict[str, StemEntry] = self._read_index()
+
+    # ------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------
+
+    def _read_index(self) -> Dict[str, StemEntry]:
+        try:
+            data = json.loads((self.root / INDEX_FILE).read_text(encoding="utf-8"))
+            return {key: StemEntry(**entry) for key, entry in data["stems"].items()}
+        except FileNotFoundError:
+            return {}
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.warning("⚠️ Índice de stems ilegível (%s); biblioteca vazia", e)
+            return {}
+
+    def _save_index(self):
+        with self._lock:
+            data = {"version": STEM_FORMAT_VERSION,
+                    "stems": {key: entry.to_dict() for key, entry in sorted(self._entries.items())}}
+        payload = json.dumps(data, indent=1, ensure_ascii=False).encode("utf-8")
+        atomic_write(self.root / INDEX_FILE, payload)
+
+    def entries(self) -> Dict[str, StemEntry]:
+        with self._lock:
+            return dict(self._entries)
+
+    def status(self) -> Dict[str, str]:
+        """``current``, ``outdated`` ou ``missing`` por célula do grid."""
+        entries = self.entries()
+        result = {}
+        for cell in grid():
+            entry = entries.get(cell_key(*cell))
+            if entry is None or not (self.root / entry.file).exists():
+                result[cell_key(*cell)] = "missing"
+            else:
+                current = entry.fingerprint == stem_fingerprint(*cell)
+                result[cell_key(*cell)] = "current" if current else "outdated"
+        return result
+
+    def entry_for(self, style: str, mood: str, tempo: str, prompt: Optional[str] = None,
+                  seed: Optional[int] = None) -> Optional[StemEntry]:
+        """O stem que serviria este pedido, ou ``None`` se ele precisa ir ao vivo."""
+        if prompt is not None or seed is not None:
+            return None
+        with self._lock:
+            entry = self._entries.get(cell_key(style, mood, tempo))
+        if entry is None or entry.fingerprint != stem_fingerprint(style, mood, tempo):
+            return None
+        return entry
+
+    def _stem(self, entry: StemEntry) -> np.ndarray:
+        cache_key = (entry.key, entry.fingerprint)
+        stem = self._stems.get(cache_key)
+        if stem is None:
+            stem = np.load(self.root / entry.file, mmap_mode="r")
+            self._stems[cache_key] = stem
+        return stem
+
+    # ------------------------------------------------------------
+    # Entrega
+    # ------------------------------------------------------------
+
+    def serve(self, style: str = "ambient", mood: str = "neutral", tempo: str = "medium",
+              intensity: float = 0.5, duration: float = 30.0, loop: bool = True,
+              seed: Optional[int] = None, prompt: Optional[str] = None,
+              **_ignored) -> Optional[MusicResult]:
+        """Mesma assinatura de ``MusicGenerator.generate``; ``None`` = gerar ao vivo."""
+        entry = self.entry_for(style, mood, tempo, prompt=prompt, seed=seed)
+        if entry is None:
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        start = time.perf_counter()
+        try:
+            stem = self._stem(entry)
+        except (OSError, ValueError) as e:
+            self.logger.warning("⚠️ Stem %s ilegível (%s); gerando ao vivo", entry.key, e)
+            with self._lock:
+                self.stats.misses += 1
+            return None
+
+        sample_rate = entry.sample_rate
+        audio = shape_intensity(stem.astype(np.float32) / 32767.0, sample_rate, intensity)
+        duration = float(min(max(duration, 1.0), config.MUSIC_MAX_DURATION_S))
+        audio = np.resize(audio, int(round(duration * sample_rate)))
+        if not loop:
+            # O começo do loop não é silêncio: entradas e saídas suaves
+            fade_in = min(int(0.01 * sample_rate), len(audio))
+            fade_out = min(int(config.MUSIC_STEM_FADE_S * sample_rate), len(audio) // 4)
+            audio[:fade_in] *= np.linspace(0.0, 1.0, fade_in, dtype=np.float32)
+            if fade_out:
+                audio[-fade_out:] *= np.linspace(1.0, 0.0, fade_out, dtype=np.float32)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.serve_s += elapsed
+        return MusicResult(audio, sample_rate, entry.prompt, 0, 0.0, elapsed, source="library")
+
+    # ------------------------------------------------------------
+    # Construção
+    # ------------------------------------------------------------
+
+    def build(self, generator=None, cells: Optional[Sequence[Cell]] = None,
+              force: bool = False) -> dict:
+        """
+        Renderiza as células ausentes ou desatualizadas (todas, com ``force``).
+
+        As células vão ao gerador em paralelo, até ``max_batch_tracks`` por
+        vez, para caberem no mesmo laço de denoising.
+
+        Returns:
+            dict: ``built`` (chaves renderizadas), ``skipped`` e ``removed``.
+        """
+        from backend.models.music_generator import MusicGenerator
+
+        generator = generator or MusicGenerator(library=False)
+        self.root.mkdir(parents=True, exist_ok=True)
+        status = self.status()
+        todo = [cell for cell in (cells or grid()) if force or status.get(cell_key(*cell)) != "current"]
+        removed = self._prune() if cells is None else []
+
+        def render(cell: Cell) -> MusicResult:
+            style, mood, tempo = cell
+            return generator.generate(style=style, mood=mood, tempo=tempo, intensity=1.0,
+                                      duration=config.MUSIC_STEM_DURATION_S, loop=True,
+                                      seed=config.MUSIC_STEM_SEED)
+
+        self.logger.info("🎼 Biblioteca de stems: %d células a renderizar", len(todo))
+        built = []
+        with ThreadPoolExecutor(max_workers=max(1, generator.max_batch_tracks)) as pool:
+            for cell, result in zip(todo, pool.map(render, todo)):
+                built.append(self._store(cell, result))
+        return {"built": built, "skipped": len(cells or grid()) - len(todo), "removed": removed}
+
+    def _store(self, cell: Cell, result: MusicResult) -> str:
+        key = cell_key(*cell)
+        pcm = (np.clip(result.audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+        atomic_write(self.root / f"{key}.npy", lambda f: np.save(f, pcm))
+        entry = StemEntry(
+            key=key,
+            file=f"{key}.npy",
+            prompt=result.prompt,
+            fingerprint=stem_fingerprint(*cell),
+            samples=len(pcm),
+            sample_rate=result.sample_rate,
+            peak=float(np.abs(result.audio).max(initial=0.0)),
+            render_s=result.generation_time + result.conversion_time,
+            built_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
+        with self._lock:
+            self._entries[key] = entry
+        self._save_index()
+        self.logger.info("🎼 Stem %s: %.1fs em %.1fs", key, entry.duration, entry.render_s)
+        return key
+
+    def _prune(self) -> List[str]:
+        """Remove stems de células que saíram do grid."""
+        valid = {cell_key(*cell) for cell in grid()}
+        with self._lock:
+            stale = [key for key in self._entries if key not in valid]
+            for key in stale:
+                (self.root / self._entries.pop(key).file).unlink(missing_ok=True)
+        if stale:
+            self._save_index()
+        return stale
+
+    def get_stats(self) -> dict:
+        status = self.status()
+        data = self.stats.to_dict()
+        data.update({name: sum(1 for s in status.values() if s == name)
+                     for name in ("current", "outdated", "missing")})
+        return data
+
+
+_stem_library: Optional[StemLibrary] = None
+_stem_library_lock = threading.Lock()
+
+
+def get_stem_library() -> StemLibrary:
+    """Retorna a biblioteca de stems global."""
+    global _stem_library
+    if _stem_library is None:
+        with _stem_library_lock:
+            if _stem_library is None:
+                _stem_library = StemLibrary()
+    return _stem_library
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Biblioteca de stems pré-renderizados")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Estado de cada célula")
+    build = sub.add_parser("build", help="Renderiza células ausentes ou desatualizadas")
+    build.add_argument("cells", nargs="*", help="estilo-humor-tempo (padrão: o grid inteiro)")
+    build.add_argument("--force", action="store_true", help="Rerrenderiza mesmo se atualizadas")
+    args = parser.parse_args(argv)
+
+    library = get_stem_library()
+    if args.command == "list":
+        entries = library.entries()
+        icons = {"current": "✅", "outdated": "⚠️ ", "missing": "❌"}
+        for key, state in library.status().items():
+            entry = entries.get(key)
+            detail = f"{entry.duration:5.1f}s  {entry.built_at}" if entry else ""
+            print(f"{icons[state]} {key:<32} {state:<9} {detail}")
+        return 0
+
+    cells = {cell_key(*cell): cell for cell in grid()}
+    unknown = [c for c in args.cells if c not in cells]
+    if unknown:
+        parser.error(f"células desconhecidas: {', '.join(unknown)}")
+    result = library.build(cells=[cells[c] for c in args.cells] or None, force=args.force)
+    print(f"🎼 {len(result['built'])} renderizadas, {result['skipped']} atualizadas, "
+          f"{len(result['removed'])} removidas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
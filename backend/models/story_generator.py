@@ -0,0 +1,740 @@
+"""
+Story Generator - Aurora EchoTales
+==================================
+Geração e continuação de histórias com Llama 3.1 (llama.cpp).
+
+Cada história mantém a sequência de tokens que já está no cache KV do
+modelo. Após cada turno o estado do llama.cpp é salvo (``save_state``)
+em um cache LRU em memória e em disco; na continuação o estado é
+restaurado e apenas o turno novo do usuário passa pelo prompt eval, em
+vez da história inteira.
+
+Quando o próximo turno não cabe em ``n_ctx``, os turnos mais antigos são
+resumidos pelo próprio modelo e a história continua a partir do resumo
+mais os últimos ``STORY_KEEP_TURNS`` turnos (janela deslizante).
+
+No modo streaming (``stream_create``/``stream_continue``) os tokens são
+entregues à medida que o llama.cpp os produz; fechar o stream interrompe
+a decodificação e libera o modelo.
+
+As histórias são persistidas no ``StoryStore`` (SQLite) a cada turno,
+incluindo os tokens do contexto; as mais recentes ficam também em
+memória para as continuações não relerem o banco.
+"""
+
+import codecs
+import copy
+import pickle
+import queue
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict, replace
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from backend import config
+from backend.core.model_manager import ModelManager, get_model_manager
+from backend.core.worker_pool import remote_service
+from backend.utils.artifact_cache import ArtifactCache, make_cache_key
+from backend.utils.logger import get_logger, record_stage
+from backend.utils.story_store import StoryRecord, StoryStore, get_story_store
+
+SYSTEM_PROMPT = (
+    "Você é um contador de histórias. Escreva em português, com frases "
+    "curtas e imagens vívidas, adequadas para narração em voz alta."
+)
+OPENING_PROMPT = "Conte o começo de uma história original."
+SUMMARY_PROMPT = (
+    "Resuma a história abaixo em um parágrafo, preservando personagens, "
+    "lugares e acontecimentos importantes."
+)
+
+EMOTION_TONES = {
+    "joy": "alegre e luminoso",
+    "sadness": "melancólico e delicado",
+    "anger": "intenso e dramático",
+    "fear": "tenso e misterioso",
+    "surprise": "cheio de reviravoltas",
+    "disgust": "sombrio",
+    "neutral": "sereno",
+}
+
+# Modelo de chat do Llama 3.1; o histórico só cresce no final, o que
+# mantém o prefixo de tokens estável entre turnos.
+BOS = "<|begin_of_text|>"
+EOT = "<|eot_id|>"
+
+
+def _header(role: str) -> str:
+    return f"<|start_header_id|>{role}<|end_header_id|>\n\n"
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def emotion_instruction(emotion: Optional[dict], influence: float = 0.5) -> str:
+    """Orientação de tom a partir de um ``AggregatedEmotion``."""
+    if not emotion or influence <= 0:
+        return ""
+    dominant = emotion.get("dominant_emotion", "neutral")
+    tone = EMOTION_TONES.get(dominant, EMOTION_TONES["neutral"])
+    strength = emotion.get("intensity", 0.5) * influence
+    degree = "fortemente" if strength > 0.5 else "levemente"
+    return f"O ouvinte sente {dominant}; deixe o tom {degree} {tone}."
+
+
+@dataclass
+class StorySession:
+    """Estado de uma história: turnos, resumo e tokens presentes no cache KV."""
+
+    story_id: str
+    system: str
+    turns: List[dict] = field(default_factory=list)
+    summary: str = ""
+    tokens: List[int] = field(default_factory=list)
+    emotion_context: Optional[dict] = None
+    user_input: Optional[str] = None
+    created_at: str = field(default_factory=_now_iso)
+    summarizations: int = 0
+
+    @property
+    def text(self) -> str:
+        """Texto da história (turnos do narrador)."""
+        return "\n\n".join(t["text"] for t in self.turns if t["role"] == "assistant")
+
+    def render(self) -> str:
+        """Histórico no modelo de chat, sem o EOT do último bloco."""
+        system = self.system
+        if self.summary:
+            system += f"\n\nResumo da história até aqui: {self.summary}"
+        parts = [BOS, _header("system"), system]
+        for turn in self.turns:
+            parts += [EOT, _header(turn["role"]), turn["text"]]
+        return "".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.story_id,
+            "text": self.text,
+            "emotion_context": self.emotion_context,
+            "created_at": self.created_at,
+            "user_input": self.user_input,
+        }
+
+    def to_record(self) -> StoryRecord:
+        emotion = self.emotion_context or {}
+        return StoryRecord(
+            id=self.story_id,
+            created_at=self.created_at,
+            text=self.text,
+            state={"system": self.system, "turns": self.turns, "summary": self.summary,
+                   "emotion_context": self.emotion_context,
+                   "summarizations": self.summarizations},
+            emotion=emotion.get("dominant_emotion"),
+            intensity=emotion.get("intensity"),
+            user_input=self.user_input,
+            turns=sum(t["role"] == "assistant" for t in self.turns),
+            tokens=np.asarray(self.tokens, dtype=np.int32).tobytes(),
+        )
+
+    @classmethod
+    def from_record(cls, record: StoryRecord) -> "StorySession":
+        state = record.state
+        return cls(story_id=record.id, system=state["system"], turns=state["turns"],
+                   summary=state.get("summary", ""),
+                   tokens=np.frombuffer(record.tokens, dtype=np.int32).tolist(),
+                   emotion_context=state.get("emotion_context"), user_input=record.user_input,
+                   created_at=record.created_at,
+                   summarizations=state.get("summarizations", 0))
+
+
+def user_turn(text: str) -> str:
+    """Sufixo que fecha o bloco anterior e abre a resposta do narrador."""
+    return f"{EOT}{_header('user')}{text}{EOT}{_header('assistant')}"
+
+
+def common_prefix(a: Sequence[int], b: Sequence[int]) -> int:
+    """Comprimento do maior prefixo comum entre duas sequências de tokens."""
+    n = min(len(a), len(b))
+    if n == 0:
+        return 0
+    diff = np.flatnonzero(np.asarray(a[:n]) != np.asarray(b[:n]))
+    return int(diff[0]) if len(diff) else n
+
+
+# ============================================================
+# Snapshots de estado
+# ============================================================
+
+def pack_state(state: Any) -> bytes:
+    """
+    Serializa um ``LlamaState``.
+
+    A matriz ``scores`` do llama-cpp-python tem ``n_batch × n_vocab``
+    floats (centenas de MB no Llama 3); só a linha do último token é
+    usada na amostragem seguinte, então apenas ela é guardada.
+    """
+    scores = getattr(state, "scores", None)
+    if isinstance(scores, np.ndarray) and scores.ndim == 2 and len(scores) > 1:
+        state = copy.copy(state)
+        row = max(min(state.n_tokens, len(scores)) - 1, 0)
+        state.scores = ("last_row", scores.shape, row, scores[row].copy())
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def unpack_state(data: bytes) -> Any:
+    state = pickle.loads(data)
+    scores = getattr(state, "scores", None)
+    if isinstance(scores, tuple) and scores and scores[0] == "last_row":
+        _, shape, row, values = scores
+        full = np.zeros(shape, dtype=values.dtype)
+        full[row] = values
+        state.scores = full
+    return state
+
+
+@dataclass
+class StateCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    saves: int = 0
+
+
+class StateCache:
+    """Snapshots KV por história: LRU em memória (bytes) sobre o cache em disco."""
+
+    def __init__(self, memory_bytes: int = int(config.STORY_STATE_MEMORY_MB * 1024**2),
+                 disk: Optional[ArtifactCache] = None):
+        self.memory_bytes = memory_bytes
+        self.disk = disk or ArtifactCache(root=config.STORY_STATE_DIR,
+                                          max_bytes=int(config.STORY_STATE_DISK_MB * 1024**2))
+        self.stats = StateCacheStats()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(story_id: str) -> str:
+        return make_cache_key("kv-state", text=story_id, model=config.MODEL_CONFIGS["story"])
+
+    def get(self, story_id: str):
+        """Retorna ``(estado, origem)``; origem é ``memory``, ``disk`` ou ``None``."""
+        key = self._key(story_id)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return unpack_state(data), "memory"
+
+        artifact = self.disk.get(key)
+        if artifact is None:
+            with self._lock:
+                self.stats.misses += 1
+            return None, None
+        self._remember(key, artifact.data)
+        with self._lock:
+            self.stats.disk_hits += 1
+        return unpack_state(artifact.data), "disk"
+
+    def put(self, story_id: str, state: Any):
+        key = self._key(story_id)
+        data = pack_state(state)
+        self._remember(key, data)
+        self.disk.put(key, data, {"n_tokens": int(getattr(state, "n_tokens", 0))}, "kv-state")
+        with self._lock:
+            self.stats.saves += 1
+
+    def discard(self, story_id: str):
+        key = self._key(story_id)
+        with self._lock:
+            data = self._memory.pop(key, None)
+            if data is not None:
+                self._memory_used -= len(data)
+        self.disk.discard(key)
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_used -= len(previous)
+            while self._memory and self._memory_used + len(data) > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+            self._memory[key] = data
+            self._memory_used += len(data)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            data = asdict(self.stats)
+            data.update({"memory_entries": len(self._memory), "memory_bytes": self._memory_used})
+        data["disk"] = self.disk.get_stats()
+        return data
+
+
+# ============================================================
+# Gerador
+# ============================================================
+
+@dataclass
+class TurnResult:
+    """Texto gerado e custo de prompt de um turno."""
+
+    story_id: str
+    text: str
+    prompt_tokens: int
+    prompt_tokens_evaluated: int
+    prompt_tokens_saved: int
+    generated_tokens: int
+    state_source: str
+    summarized: bool
+    generation_time: float
+    first_token_latency_s: Optional[float] = None
+    decode_seconds: float = 0.0
+    cancelled: bool = False
+
+    @property
+    def tokens_per_s(self) -> float:
+        """Velocidade de decodificação após o primeiro token."""
+        return (self.generated_tokens - 1) / self.decode_seconds if self.decode_seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["tokens_per_s"] = self.tokens_per_s
+        return data
+
+
+@dataclass
+class StoryStats:
+    requests: int = 0
+    prompt_tokens: int = 0
+    prompt_tokens_evaluated: int = 0
+    prompt_tokens_saved: int = 0
+    generated_tokens: int = 0
+    summarizations: int = 0
+    summary_tokens: int = 0
+    cancelled: int = 0
+    first_token_latency_total_s: float = 0.0
+    decode_seconds: float = 0.0
+
+    @property
+    def saved_ratio(self) -> float:
+        return self.prompt_tokens_saved / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["saved_ratio"] = self.saved_ratio
+        data["mean_first_token_latency_s"] = (
+            self.first_token_latency_total_s / self.requests if self.requests else 0.0)
+        data["tokens_per_s"] = (
+            self.generated_tokens / self.decode_seconds if self.decode_seconds else 0.0)
+        return data
+
+
+def load_llama():
+    from llama_cpp import Llama
+
+    cfg = config.MODEL_CONFIGS["story"]
+    return Llama(model_path=cfg["path"], n_gpu_layers=cfg["n_gpu_layers"],
+                 n_ctx=cfg["n_ctx"], verbose=False)
+
+
+class StoryGenerator:
+    """Histórias com reaproveitamento do estado KV entre turnos."""
+
+    model_name = "story"
+
+    def __init__(self, model_manager: Optional[ModelManager] = None, loader=None,
+                 state_cache: Optional[StateCache] = None,
+                 store: Optional[StoryStore] = None,
+                 live_sessions: int = config.STORY_LIVE_SESSIONS):
+        self.mm = model_manager or get_model_manager()
+        self.logger = get_logger()
+        self.state_cache = state_cache or StateCache()
+        self.store = store or get_story_store()
+        self.live_sessions = live_sessions
+        # Sessões recentes: turnos seguidos reutilizam o mesmo objeto
+        self._live: "OrderedDict[str, StorySession]" = OrderedDict()
+        self._live_lock = threading.Lock()
+        self.stats = StoryStats()
+        # O contexto do llama.cpp é único: um turno por vez
+        self._lock = threading.Lock()
+        # História cujo estado está no contexto agora (e em qual instância do modelo)
+        self._active_story: Optional[str] = None
+        self._active_model = lambda: None
+
+        if not self.mm.is_registered(self.model_name):
+            cfg = config.MODEL_CONFIGS["story"]
+            self.mm.register(self.model_name, loader or load_llama,
+                             vram_gb=cfg["vram_gb"], ram_gb=cfg["ram_gb"])
+
+    # ------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------
+
+    def _new_session(self, user_prompt: Optional[str], emotions: Optional[dict],
+                     emotion_influence: float, story_id: Optional[str] = None) -> StorySession:
+        system = " ".join(filter(None, [SYSTEM_PROMPT,
+                                        emotion_instruction(emotions, emotion_influence)]))
+        return StorySession(story_id=story_id or uuid.uuid4().hex, system=system,
+                            emotion_context=emotions, user_input=user_prompt)
+
+    def create(self, user_prompt: Optional[str] = None, emotions: Optional[dict] = None,
+               temperature: float = 0.7, creativity: float = 0.5,
+               emotion_influence: float = 0.5, story_id: Optional[str] = None) -> TurnResult:
+        """Inicia uma história nova (``story_id`` escolhido por quem chama, se dado)."""
+        session = self._new_session(user_prompt, emotions, emotion_influence, story_id)
+        result = self._turn(session, user_prompt or OPENING_PROMPT, config.STORY_MAX_TOKENS,
+                            temperature, 0.8 + 0.15 * creativity)
+        self._save(session)
+        return result
+
+    def stream_create(self, user_prompt: Optional[str] = None, emotions: Optional[dict] = None,
+                      temperature: float = 0.7, creativity: float = 0.5,
+                      emotion_influence: float = 0.5,
+                      story_id: Optional[str] = None) -> "StoryStream":
+        """Como ``create``, mas entrega o texto à medida que é gerado."""
+        session = self._new_session(user_prompt, emotions, emotion_influence, story_id)
+        return StoryStream(self, session, user_prompt or OPENING_PROMPT, config.STORY_MAX_TOKENS,
+                           temperature, 0.8 + 0.15 * creativity)
+
+    def adopt(self, text: str, user_prompt: Optional[str] = None,
+              emotions: Optional[dict] = None, emotion_influence: float = 0.5,
+              story_id: Optional[str] = None) -> StorySession:
+        """Registra uma história já gerada (ex.: vinda do cache de artefatos) sem estado KV."""
+        session = self._new_session(user_prompt, emotions, emotion_influence, story_id)
+        session.turns = [{"role": "user", "text": user_prompt or OPENING_PROMPT},
+                         {"role": "assistant", "text": text}]
+        self._save(session)
+        return session
+
+    def _continuation(self, story_id: str, user_input: str,
+                      emotion_context: Optional[dict]):
+        session = self.get(story_id)
+        if session is None:
+            raise KeyError(story_id)
+        if emotion_context:
+            user_input = f"[{emotion_instruction(emotion_context, 1.0)}]\n{user_input}"
+        return session, user_input
+
+    def continue_story(self, story_id: str, user_input: str,
+                       emotion_context: Optional[dict] = None,
+                       temperature: float = 0.7) -> TurnResult:
+        """Continua a história; apenas o turno novo passa pelo prompt eval."""
+        session, text = self._continuation(story_id, user_input, emotion_context)
+        result = self._turn(session, text, config.STORY_CONTINUE_MAX_TOKENS, temperature, 0.9)
+        self._save(session)
+        return result
+
+    def stream_continue(self, story_id: str, user_input: str,
+                        emotion_context: Optional[dict] = None,
+                        temperature: float = 0.7) -> "StoryStream":
+        """Como ``continue_story``, em streaming."""
+        session, text = self._continuation(story_id, user_input, emotion_context)
+        return StoryStream(self, session, text, config.STORY_CONTINUE_MAX_TOKENS,
+                           temperature, 0.9)
+
+    def get(self, story_id: str) -> Optional[StorySession]:
+        with self._live_lock:
+            session = self._live.get(story_id)
+            if session is not None:
+                self._live.move_to_end(story_id)
+                return session
+        record = self.store.get(story_id)
+        if record is None:
+            return None
+        session = StorySession.from_record(record)
+        with self._live_lock:
+            # Outra thread pode ter carregado a mesma história enquanto líamos
+            session = self._live.setdefault(story_id, session)
+            self._remember_live()
+        return session
+
+    def delete(self, story_id: str) -> bool:
+        with self._live_lock:
+            live = self._live.pop(story_id, None)
+        found = live is not None or self.store.exists(story_id)
+        if found:
+            self.store.delete(story_id)
+        self.state_cache.discard(story_id)
+        if self._active_story == story_id:
+            self._active_story = None
+        return found
+
+    def list(self, **filters):
+        """Página de ``StorySummary`` (ver ``StoryStore.list``)."""
+        return self.store.list(**filters)
+
+    def get_stats(self) -> dict:
+        data = self.stats.to_dict()
+        data["state_cache"] = self.state_cache.get_stats()
+        data["store"] = self.store.get_stats()
+        return data
+
+    def _save(self, session: StorySession):
+        """Persiste em segundo plano e mantém a sessão entre as recentes."""
+        with self._live_lock:
+            self._live[session.story_id] = session
+            self._live.move_to_end(session.story_id)
+            self._remember_live()
+        self.store.save(session.to_record())
+
+    def _remember_live(self):
+        """Descarta as sessões menos recentes (chamar com ``_live_lock``)."""
+        while len(self._live) > self.live_sessions:
+            self._live.popitem(last=False)
+
+    # ------------------------------------------------------------
+    # Turnos
+    # ------------------------------------------------------------
+
+    def _tokenize(self, llm, text: str) -> List[int]:
+        return list(llm.tokenize(text.encode("utf-8"), add_bos=False, special=True))
+
+    def _stop_tokens(self, llm) -> set:
+        return {llm.token_eos(), *self._tokenize(llm, EOT)}
+
+    def _prompt(self, llm, session: StorySession, text: str) -> List[int]:
+        history = session.tokens or self._tokenize(llm, session.render())
+        return history + self._tokenize(llm, user_turn(text))
+
+    def _restore(self, llm, session: StorySession) -> str:
+        """Coloca o estado KV da história no modelo; retorna a origem."""
+        if not session.tokens:
+            return "none"
+        if self._active_story == session.story_id and self._active_model() is llm:
+            return "hot"
+        state, source = self.state_cache.get(session.story_id)
+        if state is None:
+            return "none"
+        llm.load_state(state)
+        return source
+
+    def _generate(self, llm, tokens: List[int], max_tokens: int, temperature: float,
+                  top_p: float, cancel: Optional[threading.Event] = None,
+                  on_token: Optional[Callable[[str], None]] = None):
+        """Decodifica até EOT, ``max_tokens`` ou cancelamento; retorna (tokens, instante do 1º)."""
+        stop = self._stop_tokens(llm)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        generated, first_at = [], None
+        for token in llm.generate(tokens, temp=temperature, top_p=top_p,
+                                  repeat_penalty=1.1, reset=True):
+            if token in stop or (cancel is not None and cancel.is_set()):
+                break
+            if first_at is None:
+                first_at = time.perf_counter()
+            generated.append(token)
+            if on_token is not None:
+                # Tokens podem partir caracteres UTF-8 ao meio
+                piece = decoder.decode(llm.detokenize([token]))
+                if piece:
+                    on_token(piece)
+            if len(generated) >= max_tokens:
+                break
+        return generated, first_at
+
+    def _summarize(self, llm, session: StorySession) -> StorySession:
+        """
+        Resume os turnos antigos e mantém só os últimos ``STORY_KEEP_TURNS``.
+
+        Retorna uma cópia resumida; a sessão só é alterada se o turno terminar.
+        """
+        keep = min(config.STORY_KEEP_TURNS, max(len(session.turns) - 1, 0))
+        keep -= keep % 2  # preserva pares usuário/narrador
+        old, recent = session.turns[:len(session.turns) - keep], session.turns[len(session.turns) - keep:]
+        story = "\n\n".join(filter(None, [session.summary] +
+                                   [t["text"] for t in old if t["role"] == "assistant"]))
+
+        budget = llm.n_ctx() - config.STORY_SUMMARY_MAX_TOKENS - 64
+        story_tokens = self._tokenize(llm, story)[-budget:]
+        prompt = (self._tokenize(llm, BOS + _header("system") + SUMMARY_PROMPT
+                                 + EOT + _header("user"))
+                  + story_tokens
+                  + self._tokenize(llm, EOT + _header("assistant")))
+        summary, _ = self._generate(llm, prompt, config.STORY_SUMMARY_MAX_TOKENS, 0.3, 0.9)
+        self.stats.summary_tokens += len(prompt) + len(summary)
+        self.stats.summarizations += 1
+        self._active_story = None
+        return replace(session,
+                       summary=llm.detokenize(summary).decode("utf-8", errors="ignore").strip(),
+                       turns=list(recent), tokens=[], summarizations=session.summarizations + 1)
+
+    def _turn(self, session: StorySession, text: str, max_tokens: int,
+              temperature: float, top_p: float, cancel: Optional[threading.Event] = None,
+              on_token: Optional[Callable[[str], None]] = None) -> TurnResult:
+        start = time.perf_counter()
+        # Histórico lido e atualizado sob o mesmo lock: uma segunda continuação
+        # da mesma história espera e monta o prompt já com este turno
+        with self._lock, self.mm.load(self.model_name) as llm:
+            working = session
+            prompt = self._prompt(llm, working, text)
+            summarized = False
+            if len(prompt) + max_tokens > llm.n_ctx() and working.turns:
+                working = self._summarize(llm, working)
+                prompt = self._prompt(llm, working, text)
+                summarized = True
+            if len(prompt) + max_tokens > llm.n_ctx():
+                raise ValueError(f"Turno de {len(prompt)} tokens não cabe no contexto "
+                                 f"de {llm.n_ctx()} tokens")
+
+            source = self._restore(llm, working)
+            reused = 0
+            if source != "none":
+                # Só os ``n_tokens`` iniciais do buffer estão no contexto; llama.cpp
+                # reavalia sempre ao menos o último token do prompt
+                reused = min(common_prefix(list(llm.input_ids[:llm.n_tokens]), prompt),
+                             len(prompt) - 1)
+
+            generated, first_at = self._generate(llm, prompt, max_tokens, temperature, top_p,
+                                                 cancel, on_token)
+            cancelled = cancel is not None and cancel.is_set()
+            output = llm.detokenize(generated).decode("utf-8", errors="ignore").strip()
+            if not cancelled:
+                self.state_cache.put(session.story_id, llm.save_state())
+                # Turno cancelado deixa a sessão (inclusive o resumo) intacta
+                session.summary, session.summarizations = working.summary, working.summarizations
+                session.turns = working.turns + [{"role": "user", "text": text},
+                                                 {"role": "assistant", "text": output}]
+                session.tokens = prompt + generated
+            # Mesmo cancelado, o contexto começa pelos tokens da sessão: continua "quente"
+            self._active_story, self._active_model = session.story_id, weakref.ref(llm)
+            end = time.perf_counter()
+
+            result = TurnResult(
+                story_id=session.story_id,
+                text=output,
+                prompt_tokens=len(prompt),
+                prompt_tokens_evaluated=len(prompt) - reused,
+                prompt_tokens_saved=reused,
+                generated_tokens=len(generated),
+                state_source=source,
+                summarized=summarized,
+                generation_time=end - start,
+                first_token_latency_s=first_at - start if first_at is not None else None,
+                decode_seconds=end - first_at if first_at is not None else 0.0,
+                cancelled=cancelled,
+            )
+            # Estatísticas sob o lock do turno (como as do resumo)
+            self.stats.requests += 1
+            self.stats.prompt_tokens += result.prompt_tokens
+            self.stats.prompt_tokens_evaluated += result.prompt_tokens_evaluated
+            self.stats.prompt_tokens_saved += result.prompt_tokens_saved
+            self.stats.generated_tokens += result.generated_tokens
+            self.stats.cancelled += int(cancelled)
+            self.stats.first_token_latency_total_s += result.first_token_latency_s or 0.0
+            self.stats.decode_seconds += result.decode_seconds
+        self.logger.info(
+            "📖 Turno %s%s: prompt %d tokens (%d reaproveitados, estado: %s%s) | "
+            "%d gerados em %.2fs | 1º token: %.2fs | %.1f tokens/s",
+            session.story_id[:8], " (cancelado)" if cancelled else "", result.prompt_tokens,
+            result.prompt_tokens_saved, source, ", resumido" if summarized else "",
+            result.generated_tokens, result.generation_time, result.first_token_latency_s or 0,
+            result.tokens_per_s,
+            stage="story", story_id=session.story_id, duration_s=result.generation_time,
+            prompt_tokens=result.prompt_tokens, generated_tokens=result.generated_tokens,
+        )
+        record_stage("story", result.generation_time)
+        return result
+
+
+class StoryStream:
+    """
+    Iterador dos trechos de texto de um turno em geração.
+
+    Trechos que se acumulam enquanto o consumidor está ocupado são
+    agrupados (até ``STORY_STREAM_GROUP_TOKENS``). ``close`` cancela a
+    decodificação; ``result`` fica disponível ao fim da iteração.
+    """
+
+    _DONE = object()
+
+    def __init__(self, generator: StoryGenerator, session: StorySession, text: str,
+                 max_tokens: int, temperature: float, top_p: float,
+                 group_tokens: int = config.STORY_STREAM_GROUP_TOKENS):
+        self.generator = generator
+        self.session = session
+        self.story_id = session.story_id
+        self.text = text
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.top_p = top_p
+        self.group_tokens = group_tokens
+        self.result: Optional[TurnResult] = None
+        self._queue: "queue.Queue" = queue.Queue()
+        self._cancel = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def start(self) -> "StoryStream":
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="story-stream", daemon=True)
+            self._worker.start()
+        return self
+
+    def _run(self):
+        try:
+            self.result = self.generator._turn(self.session, self.text, self.max_tokens,
+                                               self.temperature, self.top_p,
+                                               self._cancel, self._queue.put)
+            if not self.result.cancelled:
+                self.generator._save(self.session)
+        except BaseException as e:
+            self._queue.put(e)
+            return
+        self._queue.put(self._DONE)
+
+    def __iter__(self) -> Iterator[str]:
+        self.start()
+        pending = None
+        try:
+            while True:
+                item = pending if pending is not None else self._queue.get()
+                pending = None
+                if item is self._DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                pieces = [item]
+                while len(pieces) < self.group_tokens:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if not isinstance(item, str):
+                        pending = item
+                        break
+                    pieces.append(item)
+                yield "".join(pieces)
+        except GeneratorExit:
+            self.close()
+            raise
+
+    def close(self):
+        """Interrompe a decodificação no próximo token."""
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None):
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+
+_story_generator: Optional[StoryGenerator] = None
+_story_generator_lock = threading.Lock()
+
+
+def get_story_generator() -> StoryGenerator:
+    """Retorna o gerador de histórias global (cliente do pool de workers, se ativo)."""
+    global _story_generator
+    if _story_generator is None:
+        with _story_generator_lock:
+            if _story_generator is None:
+                _story_generator = remote_service("story") or StoryGenerator()
+    return _story_generator
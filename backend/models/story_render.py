@@ -0,0 +1,424 @@
+"""
+Story Render - Aurora EchoTales
+===============================
+Renderização incremental de uma história em áudio (narração + trilha).
+
+A história é dividida em segmentos (um por parágrafo). Cada segmento é
+renderizado uma vez: emoção do texto, narração na voz correspondente,
+uma deixa musical do tamanho da fala e a mixagem das duas. O WAV fica
+em um ``ArtifactCache`` próprio (``cache/story_segments/segments``, com
+LRU limitado a ``STORY_SEGMENT_CACHE_MAX_MB``), sob a chave do texto
+do parágrafo + idioma, voz, estilo da trilha e modelos.
+
+Ao continuar ou editar a história, só parágrafos novos ou alterados
+têm chave nova e passam pelos modelos; o áudio final é remontado
+copiando o PCM dos segmentos em ordem para um arquivo temporário
+(memória limitada a um segmento), sem reprocessar os demais.
+O mesmo conjunto de segmentos gera o mesmo ``render_id``, e o
+AudioStore reaproveita a versão comprimida já codificada.
+"""
+
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from backend import config
+from backend.core.emotion_analyzer import TextEmotionAnalyzer, get_text_emotion_analyzer
+from backend.models.experience import EMOTION_TO_VOICE, music_params_for
+from backend.models.music_generator import MusicGenerator, get_music_generator, music_model_id
+from backend.models.story_generator import StoryGenerator, get_story_generator
+from backend.models.tts_narrator import TTSNarrator, get_tts_narrator
+from backend.utils.artifact_cache import ArtifactCache, make_cache_key
+from backend.utils.audio_store import AudioStore, get_audio_store
+from backend.utils.audio_utils import encode_wav, overlay_bed, resample
+from backend.utils.file_utils import atomic_write
+from backend.utils.logger import get_logger, record_stage
+
+# Incrementar invalida todos os segmentos (mudança na mixagem)
+SEGMENT_FORMAT_VERSION = 1
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+
+
+def split_segments(text: str) -> List[str]:
+    """Parágrafos não vazios do texto, sem espaços nas bordas."""
+    return [p.strip() for p in _PARAGRAPH.split(text or "") if p.strip()]
+
+
+def segment_key(text: str, language: str = "PT", music_style: str = "ambient",
+                voice: Optional[str] = None) -> str:
+    """Chave de um segmento: texto + tudo que altera o áudio renderizado."""
+    models = config.MODEL_CONFIGS
+    return make_cache_key(
+        "story-segment",
+        params={"language": language.upper(), "music_style": music_style, "voice": voice,
+                "gap_s": config.STORY_SEGMENT_GAP_S, "fade_ms": config.STORY_SEGMENT_FADE_MS,
+                "gain_db": config.EXPERIENCE_MUSIC_GAIN_DB, "duck_db": config.MIX_DUCK_DB},
+        text=text,
+        model={"tts": models["tts"]["name"], "text_emotion": models["text_emotion"]["name"],
+               "music": music_model_id(), "format": SEGMENT_FORMAT_VERSION},
+    )
+
+
+def render_id(keys: List[str]) -> str:
+    """Id do áudio montado: depende só da sequência de segmentos."""
+    return make_cache_key("story-render", text="\n".join(keys))
+
+
+def edge_fade(audio: np.ndarray, sample_rate: int,
+              fade_ms: float = config.STORY_SEGMENT_FADE_MS) -> np.ndarray:
+    """Fade curto nas duas pontas, para emendas sem clique."""
+    n = min(int(fade_ms * sample_rate / 1000), len(audio) // 2)
+    if n:
+        ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+        audio[:n] *= ramp
+        audio[-n:] *= ramp[::-1]
+    return audio
+
+
+@dataclass
+class Segment:
+    """Um parágrafo renderizado."""
+
+    index: int
+    key: str
+    text: str
+    emotion: str
+    voice_style: str
+    mood: str
+    duration: float
+    sample_rate: int
+    reused: bool = False
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["text"] = self.text[:80]
+        return data
+
+
+@dataclass
+class RenderResult:
+    story_id: str
+    render_id: str
+    segments: List[Segment]
+    sample_rate: int
+    duration: float
+    render_s: float
+    assemble_s: float
+    media_url: str = ""
+
+    @property
+    def rendered(self) -> int:
+        return sum(not s.reused for s in self.segments)
+
+    @property
+    def reused(self) -> int:
+        return sum(s.reused for s in self.segments)
+
+    def to_dict(self) -> dict:
+        return {
+            "story_id": self.story_id,
+            "render_id": self.render_id,
+            "media_url": self.media_url,
+            "sample_rate": self.sample_rate,
+            "duration": self.duration,
+            "rendered": self.rendered,
+            "reused": self.reused,
+            "render_s": self.render_s,
+            "assemble_s": self.assemble_s,
+            "segments": [s.to_dict() for s in self.segments],
+        }
+
+
+@dataclass
+class RenderStats:
+    renders: int = 0
+    segments_rendered: int = 0
+    segments_reused: int = 0
+    render_s: float = 0.0
+    assemble_s: float = 0.0
+    audio_s: float = 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        total = self.segments_rendered + self.segments_reused
+        data["reuse_ratio"] = self.segments_reused / total if total else 0.0
+        return data
+
+
+@dataclass
+class _Pending:
+    index: int
+    key: str
+    text: str
+    emotion: dict = field(default_factory=dict)
+
+
+class StoryRenderer:
+    """Renderiza histórias por segmento e remonta o áudio por concatenação."""
+
+    def __init__(self, narrator: Optional[TTSNarrator] = None,
+                 music: Optional[MusicGenerator] = None,
+                 text_emotion: Optional[TextEmotionAnalyzer] = None,
+                 stories: Optional[StoryGenerator] = None,
+                 store: Optional[AudioStore] = None,
+                 root: Path = config.STORY_SEGMENT_DIR,
+                 max_bytes: int = int(config.STORY_SEGMENT_CACHE_MAX_MB * 1024**2)):
+        self._narrator = narrator
+        self._music = music
+        self._text_emotion = text_emotion
+        self._stories = stories
+        self._store = store
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._cache: Optional[ArtifactCache] = None
+        self.stats = RenderStats()
+        self.logger = get_logger()
+        self._lock = threading.Lock()
+
+    # Dependências resolvidas só no primeiro uso (os singletons carregam modelos)
+    @property
+    def narrator(self) -> TTSNarrator:
+        return self._narrator or get_tts_narrator()
+
+    @property
+    def music(self) -> MusicGenerator:
+        return self._music or get_music_generator()
+
+    @property
+    def text_emotion(self) -> TextEmotionAnalyzer:
+        return self._text_emotion or get_text_emotion_analyzer()
+
+    @property
+    def stories(self) -> StoryGenerator:
+        return self._stories or get_story_generator()
+
+    @property
+    def store(self) -> AudioStore:
+        return self._store or get_audio_store()
+
+    @property
+    def cache(self) -> ArtifactCache:
+        """Segmentos renderizados (criado no primeiro uso: lê o índice do disco)."""
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = ArtifactCache(root=self.root / "segments",
+                                                max_bytes=self.max_bytes)
+        return self._cache
+
+    def _manifest_path(self, story_id: str) -> Path:
+        return self.root / "stories" / f"{story_id}.json"
+
+    # ------------------------------------------------------------
+    # Segmentos
+    # ------------------------------------------------------------
+
+    def _cached(self, index: int, key: str, text: str) -> Optional[Segment]:
+        meta = self.cache.get_meta(key)
+        if meta is None:
+            return None
+        return Segment(index=index, key=key, text=text, reused=True, **meta)
+
+    def _render_segment(self, pending: _Pending, language: str, music_style: str,
+                        voice: Optional[str]) -> tuple:
+        """Renderiza e guarda no cache; retorna (Segment, bytes do WAV)."""
+        emotion = pending.emotion
+        dominant = emotion.get("dominant_emotion", "neutral")
+        style = EMOTION_TO_VOICE.get(dominant, "neutral")
+        speech, sample_rate, _ = self.narrator.synthesize(pending.text, style=style,
+                                                          language=language, voice=voice)
+        params = music_params_for(emotion, music_style)
+        cue = self.music.generate(**params, loop=True,
+                                  duration=len(speech) / sample_rate + config.STORY_SEGMENT_GAP_S)
+        bed = resample(cue.audio, cue.sample_rate, sample_rate)
+        mix = overlay_bed(speech, bed, gain_db=config.EXPERIENCE_MUSIC_GAIN_DB,
+                          tail_s=config.STORY_SEGMENT_GAP_S, sample_rate=sample_rate,
+                          duck_db=config.MIX_DUCK_DB)
+        mix = edge_fade(mix, sample_rate)
+
+        segment = Segment(index=pending.index, key=pending.key, text=pending.text,
+                          emotion=dominant, voice_style=style, mood=params["mood"],
+                          duration=len(mix) / sample_rate, sample_rate=sample_rate)
+        meta = {k: v for k, v in asdict(segment).items()
+                if k not in ("index", "key", "text", "reused")}
+        wav = encode_wav(mix, sample_rate)
+        self.cache.put(pending.key, wav, meta, "story-segment")
+        return segment, wav
+
+    def segments(self, text: str, language: str = "PT", music_style: str = "ambient",
+                 voice: Optional[str] = None) -> List[Segment]:
+        """Segmentos do texto; só os ausentes do cache passam pelos modelos."""
+        segments: List[Optional[Segment]] = []
+        pending: List[_Pending] = []
+        for index, paragraph in enumerate(split_segments(text)):
+            key = segment_key(paragraph, language, music_style, voice)
+            cached = self._cached(index, key, paragraph)
+            segments.append(cached)
+            if cached is None:
+                pending.append(_Pending(index, key, paragraph))
+
+        if pending:
+            # Emoções no mesmo ciclo de batching do classificador
+            emotions = self.text_emotion.analyze_many([p.text for p in pending])
+            for item, emotion in zip(pending, emotions):
+                item.emotion = emotion
+            done = {}
+            for item in pending:
+                # Parágrafos repetidos no texto têm a mesma chave: renderiza uma vez
+                if item.key in done:
+                    segments[item.index] = Segment(**{**asdict(done[item.key]),
+                                                      "index": item.index, "reused": True})
+                    continue
+                done[item.key] = segments[item.index] = self._render_segment(
+                    item, language, music_style, voice)[0]
+        return segments
+
+    # ------------------------------------------------------------
+    # Montagem
+    # ------------------------------------------------------------
+
+    def _segment_wav(self, segment: Segment, language: str, music_style: str,
+                     voice: Optional[str]) -> bytes:
+        artifact = self.cache.get(segment.key)
+        if artifact is not None:
+            return artifact.data
+        # Removido pelo LRU depois de renderizado (história maior que o orçamento)
+        self.logger.warning("⚠️ Segmento %s fora do cache; renderizando de novo",
+                            segment.key[:12], key=segment.key)
+        pending = _Pending(segment.index, segment.key, segment.text,
+                           self.text_emotion.analyze_many([segment.text])[0])
+        return self._render_segment(pending, language, music_style, voice)[1]
+
+    def assemble(self, segments: List[Segment], path: Path, language: str = "PT",
+                 music_style: str = "ambient", voice: Optional[str] = None):
+        """
+        Grava em ``path`` o WAV final: o PCM de cada segmento copiado em
+        ordem, com um segmento por vez na memória.
+        """
+        import soundfile as sf
+
+        sample_rate = segments[0].sample_rate
+        with sf.SoundFile(str(path), "w", samplerate=sample_rate, channels=1,
+                          format="WAV", subtype="PCM_16") as out:
+            for segment in segments:
+                data = self._segment_wav(segment, language, music_style, voice)
+                with sf.SoundFile(io.BytesIO(data)) as part:
+                    if part.samplerate != sample_rate:
+                        raise ValueError(f"Segmento {segment.key[:12]} em {part.samplerate} Hz, "
+                                         f"esperado {sample_rate} Hz")
+                    for block in part.blocks(65536, dtype="int16"):
+                        out.write(block)
+
+    def _assemble_to_store(self, asset_id: str, story_id: str, segments: List[Segment],
+                           language: str, music_style: str, voice: Optional[str]):
+        """Monta em arquivo temporário e move para o AudioStore."""
+        store = self.store
+        fd, tmp = tempfile.mkstemp(dir=store.root, prefix=".story-", suffix=".wav")
+        os.close(fd)
+        tmp = Path(tmp)
+        try:
+            self.assemble(segments, tmp, language, music_style, voice)
+            return store.put(asset_id, tmp,
+                             meta={"story_id": story_id, "segments": len(segments)})
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def render_text(self, story_id: str, text: str, language: str = "PT",
+                    music_style: str = "ambient", voice: Optional[str] = None) -> RenderResult:
+        """Renderiza ``text`` e grava o áudio montado no AudioStore."""
+        start = time.perf_counter()
+        segments = self.segments(text, language, music_style, voice)
+        if not segments:
+            raise ValueError("História sem texto para renderizar")
+        render_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        asset_id = render_id([s.key for s in segments])
+        store = self.store
+        asset = store.get(asset_id)
+        if asset is None:
+            asset = self._assemble_to_store(asset_id, story_id, segments, language,
+                                            music_style, voice)
+        assemble_s = time.perf_counter() - start
+
+        result = RenderResult(story_id=story_id, render_id=asset_id, segments=segments,
+                              sample_rate=asset.sample_rate, duration=asset.duration,
+                              render_s=render_s, assemble_s=assemble_s,
+                              media_url=store.url(asset_id))
+        self._save_manifest(result)
+        self._record(result)
+        self.logger.info("🧩 História %s: %d segmento(s) renderizado(s), %d reaproveitado(s) "
+                         "(%.2fs + montagem %.2fs)", story_id[:12], result.rendered, result.reused,
+                         render_s, assemble_s,
+                         stage="render", story_id=story_id, duration_s=render_s + assemble_s)
+        record_stage("render.segments", render_s)
+        record_stage("render.assemble", assemble_s)
+        return result
+
+    def render(self, story_id: str, language: str = "PT", music_style: str = "ambient",
+               voice: Optional[str] = None) -> RenderResult:
+        """Renderiza o texto atual de uma história salva (``KeyError`` se não existir)."""
+        session = self.stories.get(story_id)
+        if session is None:
+            raise KeyError(story_id)
+        return self.render_text(story_id, session.text, language, music_style, voice)
+
+    def manifest(self, story_id: str) -> Optional[dict]:
+        """Última renderização de uma história."""
+        if not story_id.isalnum():
+            return None
+        try:
+            return json.loads(self._manifest_path(story_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _save_manifest(self, result: RenderResult):
+        data = {**result.to_dict(), "updated_at": datetime.now(timezone.utc).isoformat()}
+        try:
+            atomic_write(self._manifest_path(result.story_id),
+                         json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+        except OSError as e:
+            self.logger.warning("⚠️ Manifesto da história %s não gravado: %s",
+                                result.story_id[:12], e)
+
+    def _record(self, result: RenderResult):
+        with self._lock:
+            self.stats.renders += 1
+            self.stats.segments_rendered += result.rendered
+            self.stats.segments_reused += result.reused
+            self.stats.render_s += result.render_s
+            self.stats.assemble_s += result.assemble_s
+            self.stats.audio_s += sum(s.duration for s in result.segments if not s.reused)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            data = self.stats.to_dict()
+        cache = self.cache.get_stats()
+        data["segments_on_disk"] = cache["entries"]
+        data["cache"] = cache
+        return data
+
+
+_story_renderer: Optional[StoryRenderer] = None
+_story_renderer_lock = threading.Lock()
+
+
+def get_story_renderer() -> StoryRenderer:
+    """Retorna o renderizador de histórias global."""
+    global _story_renderer
+    if _story_renderer is None:
+        with _story_renderer_lock:
+            if _story_renderer is None:
+                _story_renderer = StoryRenderer()
+    return _story_renderer
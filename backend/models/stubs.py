@@ -0,0 +1,413 @@
+"""
+Modelos Substitutos - Aurora EchoTales
+======================================
+Modelos minúsculos e determinísticos que rodam em CPU.
+
+Servem para testar o gerenciamento de recursos e o pipeline sem GPU
+nem pesos reais. Cada stub ocupa um buffer de RAM do tamanho pedido,
+de modo que a ocupação de memória seja observável.
+"""
+
+import hashlib
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+import numpy as np
+
+
+class TinyModel:
+    """Modelo fictício que ocupa ``size_mb`` de RAM e responde de forma determinística."""
+
+    def __init__(self, name: str, size_mb: float = 1.0, latency_s: float = 0.0):
+        self.name = name
+        self.size_mb = size_mb
+        self.latency_s = latency_s
+        self.weights = np.zeros(int(size_mb * 1024 * 1024 // 4), dtype=np.float32)
+        self.calls = 0
+
+    def __call__(self, text: str = "") -> str:
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        digest = hashlib.sha1(f"{self.name}:{text}".encode("utf-8")).hexdigest()[:8]
+        return f"{self.name}:{digest}"
+
+    def close(self):
+        """Libera o buffer de pesos."""
+        self.weights = None
+
+
+def make_stub_loader(name: str, size_mb: float = 1.0, load_time_s: float = 0.0,
+                     latency_s: float = 0.0) -> Callable[[], TinyModel]:
+    """Cria uma fábrica de ``TinyModel`` que simula o tempo de carregamento."""
+
+    def loader() -> TinyModel:
+        if load_time_s:
+            time.sleep(load_time_s)
+        return TinyModel(name, size_mb=size_mb, latency_s=latency_s)
+
+    return loader
+
+
+class StubTTS:
+    """Substituto do XTTS: gera um tom determinístico por frase."""
+
+    output_sample_rate = 24000
+
+    def __init__(self, seconds_per_char: float = 0.01, latency_s: float = 0.0):
+        self.seconds_per_char = seconds_per_char
+        self.latency_s = latency_s
+        self.calls = []
+
+    def tts(self, text: str, speaker: str = "", language: str = "pt", speed: float = 1.0,
+            **kwargs) -> np.ndarray:
+        self.calls.append(text)
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        n = int(len(text) * self.seconds_per_char / speed * self.output_sample_rate)
+        freq = 110.0 + (int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:4], 16) % 330)
+        t = np.arange(n, dtype=np.float32) / self.output_sample_rate
+        return 0.3 * np.sin(2 * np.pi * freq * t).astype(np.float32)
+
+
+class StubXtts:
+    """
+    Substituto do ``Xtts`` com a API de latentes: o condicionamento vem do
+    áudio de referência (lido do disco a cada cálculo, como no XTTS) e a
+    frequência do tom gerado, do ``speaker_embedding``. Registra cada
+    cálculo em ``conditioning_calls``.
+    """
+
+    def __init__(self, seconds_per_char: float = 0.01, conditioning_s: float = 0.0):
+        self.seconds_per_char = seconds_per_char
+        self.conditioning_s = conditioning_s
+        self.conditioning_calls = []
+
+    def get_conditioning_latents(self, audio_path, **kwargs) -> tuple:
+        import soundfile as sf
+
+        self.conditioning_calls.append(list(audio_path))
+        if self.conditioning_s:
+            time.sleep(self.conditioning_s)
+        audio, _ = sf.read(audio_path[0], dtype="float32", always_2d=False)
+        seed = int(hashlib.sha1(audio.tobytes()).hexdigest()[:8], 16)
+        gpt_cond_latent = np.random.default_rng(seed).standard_normal((1, 32, 64)).astype(np.float32)
+        speaker_embedding = np.full((1, 64, 1), 110.0 + seed % 330, dtype=np.float32)
+        return gpt_cond_latent, speaker_embedding
+
+    def inference(self, text: str, language: str, gpt_cond_latent, speaker_embedding,
+                  speed: float = 1.0, **kwargs) -> dict:
+        n = int(len(text) * self.seconds_per_char / speed * StubTTS.output_sample_rate)
+        t = np.arange(n, dtype=np.float32) / StubTTS.output_sample_rate
+        freq = float(np.mean(speaker_embedding))
+        return {"wav": 0.3 * np.sin(2 * np.pi * freq * t).astype(np.float32)}
+
+
+class StubXttsTTS(StubTTS):
+    """``StubTTS`` com um ``StubXtts`` em ``synthesizer.tts_model``, como o ``TTS.api``."""
+
+    def __init__(self, seconds_per_char: float = 0.01, latency_s: float = 0.0,
+                 conditioning_s: float = 0.0):
+        super().__init__(seconds_per_char, latency_s)
+        self.xtts = StubXtts(seconds_per_char, conditioning_s)
+        self.synthesizer = SimpleNamespace(tts_model=self.xtts,
+                                           output_sample_rate=self.output_sample_rate)
+
+
+class StubDDIMScheduler:
+    """DDIM determinístico (eta = 0) com a interface dos schedulers do diffusers."""
+
+    init_noise_sigma = 1.0
+
+    def __init__(self, train_steps: int = 1000):
+        self.train_steps = train_steps
+        betas = np.linspace(0.00085 ** 0.5, 0.012 ** 0.5, train_steps, dtype=np.float64) ** 2
+        self.alphas_cumprod = np.cumprod(1.0 - betas)
+        self.timesteps = np.zeros(0, dtype=np.int64)
+        self._ratio = 1
+
+    def set_timesteps(self, steps: int, **kwargs):
+        self._ratio = self.train_steps // steps
+        self.timesteps = (np.arange(steps, dtype=np.int64) * self._ratio)[::-1] + 1
+
+    def scale_model_input(self, sample: np.ndarray, t) -> np.ndarray:
+        return sample
+
+    def step(self, noise: np.ndarray, t, sample: np.ndarray) -> SimpleNamespace:
+        prev = int(t) - self._ratio
+        alpha = self.alphas_cumprod[int(t)]
+        alpha_prev = self.alphas_cumprod[prev] if prev >= 0 else 1.0
+        original = (sample - np.sqrt(1.0 - alpha) * noise) / np.sqrt(alpha)
+        prev_sample = np.sqrt(alpha_prev) * original + np.sqrt(1.0 - alpha_prev) * noise
+        return SimpleNamespace(prev_sample=prev_sample.astype(np.float32))
+
+
+class TinyUNet:
+    """
+    UNet minúscula em numpy: convolução 1x1, um nível de pooling com
+    volta por upsampling e condicionamento pela média do contexto de texto.
+    Registra o tamanho de cada lote recebido.
+    """
+
+    def __init__(self, channels: int = 4, context_dim: int = 16, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.mix = (0.3 * rng.standard_normal((channels, channels))).astype(np.float32)
+        self.down = (0.3 * rng.standard_normal((channels, channels))).astype(np.float32)
+        self.context = (0.3 * rng.standard_normal((context_dim, channels))).astype(np.float32)
+        self.batch_sizes = []
+
+    def __call__(self, latents: np.ndarray, t, context: np.ndarray) -> np.ndarray:
+        self.batch_sizes.append(len(latents))
+        b, c, h, w = latents.shape
+        pooled = latents.reshape(b, c, h // 2, 2, w // 2, 2).mean(axis=(3, 5))
+        up = np.einsum("dc,bchw->bdhw", self.down, pooled).repeat(2, axis=2).repeat(2, axis=3)
+        bias = context.mean(axis=1) @ self.context
+        out = np.einsum("dc,bchw->bdhw", self.mix, latents) + up + bias[:, :, None, None]
+        return np.tanh(out + float(t) / 1000.0).astype(np.float32)
+
+
+class TinyUNetComponents:
+    """
+    Componentes do Riffusion para o ``BatchedSampler`` em CPU: CLIP por
+    hash do prompt, ``TinyUNet``, DDIM e uma "VAE" que amplia o latente
+    8x. ``latency_s`` é esperado a cada lote decodificado.
+    """
+
+    latent_channels = 4
+    scale_factor = 8
+    device = "cpu"
+
+    def __init__(self, latency_s: float = 0.0):
+        self.unet = TinyUNet(self.latent_channels)
+        self.latency_s = latency_s
+        self.encoded = []
+        self.profile = None
+
+    def encode_prompt(self, prompts):
+        self.encoded.append(list(prompts))
+        return np.stack([
+            np.random.default_rng(int(hashlib.sha1(p.encode("utf-8")).hexdigest()[:8], 16))
+            .standard_normal((8, 16)).astype(np.float32)
+            for p in prompts
+        ])
+
+    def noise(self, shape, seed):
+        return np.random.default_rng(seed).standard_normal(shape).astype(np.float32)
+
+    def scheduler(self, mode: str) -> StubDDIMScheduler:
+        return StubDDIMScheduler()
+
+    def denoise(self, latents, t, context, uncond, guidance_scale: float) -> np.ndarray:
+        if guidance_scale <= 1.0:
+            return self.unet(latents, t, context)
+        free, guided = np.split(self.unet(np.concatenate([latents, latents]), t,
+                                          np.concatenate([uncond, context])), 2)
+        return free + guidance_scale * (guided - free)
+
+    def decode(self, latents: np.ndarray) -> np.ndarray:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        gray = 255.0 * (0.5 + 0.5 * np.tanh(latents[:, 0]))
+        gray = gray.repeat(self.scale_factor, axis=1).repeat(self.scale_factor, axis=2)
+        return np.repeat(np.clip(gray, 0, 255).astype(np.uint8)[..., None], 3, axis=-1)
+
+    def apply_profile(self, profile):
+        self.profile = profile
+
+    def cat(self, items, axis: int = 0) -> np.ndarray:
+        return np.concatenate(items, axis=axis)
+
+    def zeros_like(self, x: np.ndarray) -> np.ndarray:
+        return np.zeros_like(x)
+
+    def asarray(self, array: np.ndarray) -> np.ndarray:
+        return np.asarray(array, dtype=np.float32)
+
+
+def make_stub_riffusion_loader(latency_s: float = 0.0):
+    """Fábrica de ``RiffusionPipelines`` com a UNet minúscula."""
+
+    def loader():
+        from backend.models.music_generator import RiffusionPipelines
+        from backend.models.riffusion_sampler import BatchedSampler
+
+        return RiffusionPipelines(pipe=None, sampler=BatchedSampler(TinyUNetComponents(latency_s)))
+
+    return loader
+
+
+class StubEmotionClassifier:
+    """
+    Substituto do DistilRoBERTa de emoções.
+
+    Tokeniza por palavras (ids determinísticos) e pontua por palavras-chave.
+    Registra o tamanho e o comprimento com padding de cada passada.
+    """
+
+    labels = ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"]
+    keywords = {
+        "happy": "joy", "wonderful": "joy", "feliz": "joy",
+        "sad": "sadness", "saddest": "sadness", "triste": "sadness",
+        "furious": "anger", "raiva": "anger",
+        "terrified": "fear", "medo": "fear",
+        "wow": "surprise", "gross": "disgust",
+    }
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.forward_calls = []
+
+    def encode(self, texts):
+        return [[0] + [int(hashlib.sha1(w.encode("utf-8")).hexdigest()[:6], 16)
+                       for w in text.lower().split()] + [2] for text in texts]
+
+    def forward(self, batch_ids):
+        self.forward_calls.append((len(batch_ids), max(len(x) for x in batch_ids)))
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        lookup = {int(hashlib.sha1(k.encode("utf-8")).hexdigest()[:6], 16): v
+                  for k, v in self.keywords.items()}
+        results = []
+        for ids in batch_ids:
+            logits = {label: 0.0 for label in self.labels}
+            logits["neutral"] = 1.0
+            for token in ids:
+                if token in lookup:
+                    logits[lookup[token]] += 3.0
+            exp = {k: float(np.exp(v)) for k, v in logits.items()}
+            total = sum(exp.values())
+            results.append({k: v / total for k, v in exp.items()})
+        return results
+
+
+class StubSTTBackend:
+    """
+    Substituto do Whisper: descreve cada segmento recebido.
+
+    O "encoder" calcula, a 50 quadros/s como o Whisper, energia e taxa de
+    cruzamentos por zero de cada quadro; ``encoder_calls`` conta as passadas.
+    """
+
+    name = "stub"
+    supports_features = True
+    frame = 320
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.batches = []
+        self.encoder_calls = 0
+
+    def transcribe_batch(self, segments, language=None):
+        return self.decode_batch(self.encode_batch(segments), language)
+
+    def encode_batch(self, segments):
+        from backend.models.speech_to_text import EncodedBatch, pool_frames
+
+        self.encoder_calls += 1
+        n_frames = max(len(seg) for seg in segments) // self.frame + 1
+        frames = np.zeros((len(segments), n_frames, 2), dtype=np.float32)
+        for i, seg in enumerate(segments):
+            n = len(seg) // self.frame
+            x = np.asarray(seg[:n * self.frame], dtype=np.float32).reshape(n, self.frame)
+            frames[i, :n, 0] = np.log10(np.mean(x ** 2, axis=1) + 1e-8)
+            frames[i, :n, 1] = np.mean(np.abs(np.diff(np.sign(x), axis=1)) > 0, axis=1)
+        return EncodedBatch([len(seg) for seg in segments],
+                            pool_frames(frames, [len(seg) for seg in segments]))
+
+    def decode_batch(self, encoded, language=None):
+        self.batches.append(len(encoded.features))
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return [f"segmento de {n / 16000:.1f} segundos" for n in encoded.features]
+
+
+class StubLlamaState:
+    """Snapshot do ``StubLlama`` (equivalente ao ``LlamaState``)."""
+
+    def __init__(self, input_ids, n_tokens: int):
+        self.input_ids = input_ids
+        self.n_tokens = n_tokens
+
+
+class StubLlama:
+    """
+    Substituto do ``llama_cpp.Llama``.
+
+    Tokeniza por bytes (tokens especiais do Llama 3 como ids próprios) e
+    reproduz o reaproveitamento de prefixo do llama-cpp-python: só os
+    tokens após o maior prefixo comum com o contexto atual são avaliados
+    (contados em ``evaluated``). Responde sempre ``reply``.
+    """
+
+    special = ["<|begin_of_text|>", "<|eot_id|>", "<|start_header_id|>",
+               "<|end_header_id|>", "<|end_of_text|>"]
+
+    def __init__(self, n_ctx: int = 2048, reply: str = "E a aventura continuou.",
+                 latency_per_token_s: float = 0.0):
+        self._n_ctx = n_ctx
+        self.reply = reply
+        self.latency_per_token_s = latency_per_token_s
+        self._ids = []
+        self.evaluated = 0
+        self.loads = 0
+
+    def n_ctx(self) -> int:
+        return self._n_ctx
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self._ids)
+
+    @property
+    def input_ids(self) -> np.ndarray:
+        return np.array(self._ids, dtype=np.int64)
+
+    def token_eos(self) -> int:
+        return 256 + self.special.index("<|end_of_text|>")
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False):
+        tokens = [256] if add_bos else []
+        rest = text
+        while rest:
+            match = next((s for s in self.special if special and rest.startswith(s.encode())), None)
+            if match:
+                tokens.append(256 + self.special.index(match))
+                rest = rest[len(match.encode()):]
+            else:
+                tokens.append(rest[0])
+                rest = rest[1:]
+        return tokens
+
+    def detokenize(self, tokens) -> bytes:
+        return b"".join(self.special[t - 256].encode() if t >= 256 else bytes([t])
+                        for t in tokens)
+
+    def _eval(self, tokens):
+        self.evaluated += len(tokens)
+        if self.latency_per_token_s:
+            time.sleep(self.latency_per_token_s * len(tokens))
+        self._ids.extend(tokens)
+        if len(self._ids) > self._n_ctx:
+            raise RuntimeError("contexto excedido")
+
+    def generate(self, tokens, reset: bool = True, **kwargs):
+        tokens = list(tokens)
+        prefix = 0
+        for a, b in zip(self._ids, tokens[:-1]):
+            if a != b:
+                break
+            prefix += 1
+        self._ids = self._ids[:prefix] if reset else self._ids
+        tokens = tokens[prefix:]
+        for token in self.tokenize(self.reply.encode("utf-8"), add_bos=False) + [256 + 1]:
+            self._eval(tokens)
+            yield token
+            tokens = [token]
+
+    def save_state(self) -> StubLlamaState:
+        return StubLlamaState(list(self._ids), len(self._ids))
+
+    def load_state(self, state: StubLlamaState):
+        self.loads += 1
+        self._ids = list(state.input_ids)
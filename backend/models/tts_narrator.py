@@ -0,0 +1,425 @@
+"""
+TTS Narrator - Aurora EchoTales
+===============================
+Narração com XTTS v2, inteira ou em streaming frase a frase.
+
+No modo streaming a história é dividida em frases, sintetizadas em
+ordem por um worker em segundo plano. Cada frase pronta é unida à
+anterior com crossfade e emitida imediatamente, de modo que o primeiro
+áudio chega ao cliente após a síntese da primeira frase, e não do texto
+inteiro.
+
+Vozes de referência (``voice`` enviada em ``/api/voices`` ou
+``TTS_SPEAKER_WAV``) usam latentes de condicionamento calculados uma vez
+por voz (``speaker_latents``) e vão direto ao ``Xtts.inference``.
+"""
+
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from functools import partial
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+import numpy as np
+
+from backend import config
+from backend.core.model_manager import ModelManager, get_model_manager
+from backend.core.worker_pool import remote_service
+from backend.models.speaker_latents import (
+    SpeakerLatentCache,
+    SpeakerLatents,
+    VoiceLibrary,
+    get_latent_cache,
+    get_voice_library,
+    latent_key,
+)
+from backend.utils.audio_utils import StreamingCrossfader
+from backend.utils.logger import get_logger
+
+# XTTS não tem presets de emoção; o estilo ajusta a velocidade da fala
+STYLE_SPEED = {
+    "neutral": 1.0,
+    "calm": 0.9,
+    "joyful": 1.05,
+    "sad": 0.85,
+    "angry": 1.1,
+    "fearful": 1.1,
+    "excited": 1.15,
+}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"'»”)]*\s+")
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
+# Serializa a GPU entre streams concorrentes, frase a frase
+_synthesis_lock = threading.Lock()
+
+
+def split_sentences(text: str, max_chars: int = config.TTS_MAX_SENTENCE_CHARS) -> List[str]:
+    """
+    Divide o texto em frases para síntese.
+
+    Frases muito curtas são unidas à seguinte; frases acima de
+    ``max_chars`` são quebradas em vírgulas e, em último caso, em palavras
+    (o XTTS degrada com entradas longas).
+    """
+    text = " ".join(text.split())
+    if not text:
+        return []
+
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        current = ""
+        for clause in _CLAUSE_END.split(sentence):
+            for word in clause.split(" "):
+                candidate = f"{current} {word}".strip()
+                if len(candidate) > max_chars and current:
+                    pieces.append(current)
+                    current = word
+                else:
+                    current = candidate
+            if len(current) >= max_chars // 2:
+                pieces.append(current)
+                current = ""
+        if current:
+            pieces.append(current)
+
+    sentences = []
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        if sentences and len(sentences[-1]) < 20 and len(sentences[-1]) + len(piece) < max_chars:
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    return sentences
+
+
+def to_float_audio(wav: Any) -> np.ndarray:
+    """Normaliza a saída do TTS (lista, tupla, tensor) em float32 1D."""
+    if isinstance(wav, tuple) and len(wav) >= 1:
+        wav = wav[0]
+    if hasattr(wav, "detach"):
+        wav = wav.detach().cpu().numpy()
+    if isinstance(wav, list):
+        wav = np.concatenate([np.atleast_1d(np.asarray(x)) for x in wav]) if wav else np.zeros(0)
+    wav = np.asarray(wav)
+    if np.issubdtype(wav.dtype, np.integer):
+        wav = wav.astype(np.float32) / 32768.0
+    return wav.astype(np.float32, copy=False).reshape(-1)
+
+
+@dataclass
+class StreamMetrics:
+    """Métricas de uma narração em streaming."""
+
+    sentences: int = 0
+    first_chunk_latency_s: Optional[float] = None
+    audio_seconds: float = 0.0
+    synthesis_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    cancelled: bool = False
+
+    @property
+    def real_time_factor(self) -> float:
+        """Tempo de síntese / duração do áudio (< 1 é mais rápido que tempo real)."""
+        return self.synthesis_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["real_time_factor"] = self.real_time_factor
+        return data
+
+
+def xtts_model(model: Any) -> Optional[Any]:
+    """O ``Xtts`` por trás do wrapper (``TTS.api`` ou snapshot), se expõe a API de latentes."""
+    xtts = getattr(getattr(model, "synthesizer", None), "tts_model", None)
+    if hasattr(xtts, "get_conditioning_latents") and hasattr(xtts, "inference"):
+        return xtts
+    return None
+
+
+def _to_model(xtts: Any, array: np.ndarray):
+    """Array lido do disco → tensor no dispositivo do modelo (NumPy se não for torch)."""
+    device = getattr(xtts, "device", None)
+    if device is None:
+        return array
+    import torch
+
+    return torch.from_numpy(array).to(device)
+
+
+def load_xtts(use_snapshot: bool = True):
+    """Carrega o XTTS v2 no dispositivo disponível."""
+    import torch
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    if use_snapshot:
+        from backend.core.snapshots import restore_snapshot
+
+        tts = restore_snapshot("tts", device=device)
+        if tts is not None:
+            return tts
+
+    from TTS.api import TTS
+
+    tts = TTS(model_name=config.MODEL_CONFIGS["tts"]["name"])
+    tts.to(device)
+    return tts
+
+
+class TTSNarrator:
+    """Narrador XTTS integrado ao ModelManager."""
+
+    model_name = "tts"
+
+    def __init__(self, model_manager: Optional[ModelManager] = None, loader=None,
+                 voices: Optional[VoiceLibrary] = None,
+                 latents: Optional[SpeakerLatentCache] = None):
+        self.mm = model_manager or get_model_manager()
+        self.logger = get_logger()
+        self.voices = voices or get_voice_library()
+        self.latents = latents or get_latent_cache()
+        if not self.mm.is_registered(self.model_name):
+            cfg = config.MODEL_CONFIGS["tts"]
+            self.mm.register(self.model_name, loader or load_xtts,
+                             vram_gb=cfg["vram_gb"], ram_gb=cfg["ram_gb"])
+
+    @staticmethod
+    def model_sample_rate(model: Any) -> int:
+        synthesizer = getattr(model, "synthesizer", None)
+        rate = getattr(synthesizer, "output_sample_rate", None)
+        return int(rate or getattr(model, "output_sample_rate", config.TTS_SAMPLE_RATE))
+
+    def _reference(self, voice: Optional[str]) -> Optional[Path]:
+        """Áudio de referência da voz (``None``: speaker embutido do XTTS)."""
+        if voice:
+            return self.voices.path(voice)
+        return Path(config.TTS_SPEAKER_WAV) if config.TTS_SPEAKER_WAV else None
+
+    def speaker_latents(self, xtts: Any, reference: Path) -> SpeakerLatents:
+        """Latentes da voz: cache em memória, em disco ou calculados agora."""
+        def compute() -> SpeakerLatents:
+            cfg = getattr(xtts, "config", None)
+            kwargs = {name: getattr(cfg, attr) for name, attr in (
+                ("gpt_cond_len", "gpt_cond_len"), ("gpt_cond_chunk_len", "gpt_cond_chunk_len"),
+                ("max_ref_length", "max_ref_len"), ("sound_norm_refs", "sound_norm_refs"),
+            ) if hasattr(cfg, attr)}
+            return SpeakerLatents(*xtts.get_conditioning_latents(audio_path=[str(reference)],
+                                                                 **kwargs))
+
+        key = latent_key(self.voices.reference_hash(reference))
+        return self.latents.get(key, compute, restore=partial(_to_model, xtts))
+
+    def _synthesize_sentence(self, model: Any, text: str, style: str, speed: float,
+                             language: str, voice: Optional[str] = None) -> np.ndarray:
+        cfg = config.MODEL_CONFIGS["tts"]
+        speed = speed * STYLE_SPEED.get(style, 1.0)
+        reference = self._reference(voice)
+        xtts = xtts_model(model) if reference is not None else None
+        with _synthesis_lock:
+            if xtts is not None:
+                latents = self.speaker_latents(xtts, reference)
+                wav = xtts.inference(text, language.lower(), latents.gpt_cond_latent,
+                                     latents.speaker_embedding, speed=speed)["wav"]
+            elif reference is not None:
+                # Modelo sem API de latentes: o XTTS recalcula a voz a cada frase
+                wav = model.tts(text=text, speaker_wav=str(reference),
+                                language=language.lower(), speed=speed)
+            else:
+                wav = model.tts(text=text, speaker=cfg["speaker"], language=language.lower(),
+                                speed=speed)
+        return to_float_audio(wav)
+
+    def register_voice(self, samples: np.ndarray, sample_rate: int) -> dict:
+        """Grava uma voz de referência e já calcula seus latentes (uma vez por áudio)."""
+        voice, created = self.voices.add(samples, sample_rate)
+        start = time.perf_counter()
+        with self.mm.load(self.model_name) as model:
+            xtts = xtts_model(model)
+            if xtts is not None:
+                with _synthesis_lock:
+                    self.speaker_latents(xtts, voice.path)
+        data = voice.to_dict()
+        del data["path"]
+        data.update({"created": created, "latents_s": time.perf_counter() - start})
+        self.logger.info("🎙️ Voz %s %s (%.1fs de referência)", voice.voice_id,
+                         "registrada" if created else "já conhecida", voice.duration)
+        return data
+
+    def voice_stats(self) -> dict:
+        return {"voices": self.voices.list(), "latents": self.latents.get_stats()}
+
+    def synthesize(self, text: str, style: str = "neutral", speed: float = 1.0,
+                   language: str = "pt", voice: Optional[str] = None) -> tuple:
+        """
+        Sintetiza o texto inteiro.
+
+        Returns:
+            tuple: (áudio float32, sample_rate, StreamMetrics)
+        """
+        stream = self.stream(text, style=style, speed=speed, language=language, voice=voice)
+        chunks = list(stream)
+        audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        return audio, stream.sample_rate, stream.metrics
+
+    def stream(self, text: str, style: str = "neutral", speed: float = 1.0,
+               language: str = "pt",
+               crossfade_ms: int = config.TTS_STREAM_CROSSFADE_MS,
+               voice: Optional[str] = None) -> "NarrationStream":
+        """Cria um stream de narração frase a frase (``KeyError`` se a voz não existe)."""
+        if voice:
+            self.voices.path(voice)
+        return NarrationStream(self, split_sentences(text), style, speed, language, crossfade_ms,
+                               voice)
+
+
+class NarrationStream:
+    """
+    Iterador de blocos float32 de uma narração.
+
+    ``sample_rate`` fica disponível após o primeiro bloco (ou após
+    ``start``). Fechar o iterador cancela as frases ainda não sintetizadas;
+    ``close`` pode ser chamado de outra thread com um ``next`` em andamento,
+    que retorna ao fim da frase atual.
+    """
+
+    _DONE = object()
+
+    def __init__(self, narrator: TTSNarrator, sentences: List[str], style: str,
+                 speed: float, language: str, crossfade_ms: int, voice: Optional[str] = None):
+        self.narrator = narrator
+        self.sentences = sentences
+        self.style = style
+        self.speed = speed
+        self.language = language
+        self.crossfade_ms = crossfade_ms
+        self.voice = voice
+        self.sample_rate: Optional[int] = None
+        self.metrics = StreamMetrics()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=config.TTS_STREAM_QUEUE_SIZE)
+        self._cancel = threading.Event()
+        self._ready = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._start_time = 0.0
+
+    def start(self) -> "NarrationStream":
+        """Inicia o worker e aguarda o modelo (para conhecer o sample rate)."""
+        if self._worker is None:
+            self._start_time = time.perf_counter()
+            self._worker = threading.Thread(target=self._run, name="tts-stream", daemon=True)
+            self._worker.start()
+            self._ready.wait()
+        return self
+
+    def _put(self, item) -> bool:
+        while not self._cancel.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _put_final(self, item):
+        """Entrega o fim (ou o erro) mesmo após o cancelamento, sem bloquear."""
+        if self._put(item):
+            return
+        # Cancelado: descarta blocos pendentes até o item final caber
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        try:
+            with self.narrator.mm.load(self.narrator.model_name) as model:
+                self.sample_rate = self.narrator.model_sample_rate(model)
+                self._ready.set()
+                for sentence in self.sentences:
+                    if self._cancel.is_set():
+                        break
+                    start = time.perf_counter()
+                    audio = self.narrator._synthesize_sentence(
+                        model, sentence, self.style, self.speed, self.language, self.voice)
+                    self.metrics.synthesis_seconds += time.perf_counter() - start
+                    if not self._put(audio):
+                        break
+        except BaseException as e:
+            self._ready.set()
+            self._put_final(e)
+            return
+        self._put_final(self._DONE)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        self.start()
+        crossfader = StreamingCrossfader(self.sample_rate or config.TTS_SAMPLE_RATE,
+                                         self.crossfade_ms)
+        try:
+            while True:
+                item = self._queue.get()
+                if isinstance(item, BaseException):
+                    raise item
+                if self._cancel.is_set():
+                    # ``close`` chamado de outra thread: encerra sem esperar as frases restantes
+                    self.metrics.cancelled = True
+                    return
+                if item is self._DONE:
+                    break
+                self.metrics.sentences += 1
+                yield from self._emit(crossfader.push(item))
+            yield from self._emit(crossfader.flush())
+        except GeneratorExit:
+            self.metrics.cancelled = True
+            raise
+        finally:
+            self._finish()
+
+    def _emit(self, block: np.ndarray) -> Iterator[np.ndarray]:
+        if not len(block):
+            return
+        if self.metrics.first_chunk_latency_s is None:
+            self.metrics.first_chunk_latency_s = time.perf_counter() - self._start_time
+        self.metrics.audio_seconds += len(block) / self.sample_rate
+        yield block
+
+    def _finish(self):
+        self._cancel.set()
+        self.metrics.wall_seconds = time.perf_counter() - self._start_time
+        m = self.metrics
+        status = "cancelada" if m.cancelled else "concluída"
+        self.narrator.logger.info(
+            "🎤 Narração %s: %d/%d frases | 1º bloco: %.2fs | áudio: %.2fs | RTF: %.2f",
+            status, m.sentences, len(self.sentences), m.first_chunk_latency_s or 0,
+            m.audio_seconds, m.real_time_factor,
+            stage="tts", duration_s=m.wall_seconds, audio_s=m.audio_seconds,
+        )
+
+    def close(self):
+        """Cancela as frases restantes."""
+        self._cancel.set()
+
+
+_narrator: Optional[TTSNarrator] = None
+_narrator_lock = threading.Lock()
+
+
+def get_tts_narrator() -> TTSNarrator:
+    """Retorna o narrador global (cliente do pool de workers, se ativo)."""
+    global _narrator
+    if _narrator is None:
+        with _narrator_lock:
+            if _narrator is None:
+                _narrator = remote_service("tts") or TTSNarrator()
+    return _narrator
@@ -0,0 +1,36 @@
+"""
+Utilitários do Backend - Aurora EchoTales
+==========================================
+Logger, monitoramento de recursos e processamento de áudio.
+
+Os nomes são resolvidos no primeiro acesso (ver ``backend/__init__.py``).
+"""
+
+import importlib
+
+_LAZY = {
+    "AuroraLogger": "backend.utils.logger",
+    "get_logger": "backend.utils.logger",
+    "log_context": "backend.utils.logger",
+    "ResourceManager": "backend.utils.resource_manager",
+    "ResourceSnapshot": "backend.utils.resource_manager",
+    "get_resource_manager": "backend.utils.resource_manager",
+    "ResourceSampler": "backend.utils.resource_sampler",
+    "get_resource_sampler": "backend.utils.resource_sampler",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+__all__ = list(_LAZY)
@@ -0,0 +1,329 @@
+"""
+Artifact Cache - Aurora EchoTales
+=================================
+Cache endereçado por conteúdo para as saídas dos modelos.
+
+A chave é o SHA-256 de (endpoint, parâmetros normalizados, texto, seed,
+modelo/versão). Cada entrada é um par ``<chave>.bin`` (conteúdo) e
+``<chave>.json`` (metadados, ex.: headers da resposta) sob
+``cache/artifacts/<2 primeiros hex>/``. As escritas são atômicas
+(arquivo temporário + ``os.replace``) e a entrada só passa a existir
+quando os metadados são gravados, então uma queda no meio da escrita
+nunca deixa um artefato pela metade visível.
+
+O tamanho total é limitado por LRU (o ``mtime`` dos metadados marca o
+último acesso, preservando a ordem entre reinícios). Requisições
+idênticas simultâneas são agrupadas: só a primeira gera, as demais
+esperam o mesmo resultado.
+
+Uso:
+    cache = get_artifact_cache()
+    key = make_cache_key("music", params=params.model_dump(), seed=seed,
+                         model=config.MODEL_CONFIGS["music"]["name"])
+    artifact = cache.get_or_create(key, lambda: (wav_bytes(), headers))
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend import config
+from backend.utils.file_utils import atomic_write
+from backend.utils.logger import get_logger
+
+Producer = Callable[[], Tuple[bytes, dict]]
+
+
+def _normalize(value: Any) -> Any:
+    """Forma canônica: chaves ordenadas, espaços colapsados, floats arredondados."""
+    if hasattr(value, "model_dump"):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+
+def make_cache_key(endpoint: str, params: Any = None, text: Optional[str] = None,
+                   seed: Optional[int] = None, model: Any = None) -> str:
+    """Hash estável da requisição; ``model`` identifica modelo e configuração."""
+    payload = {
+        "version": config.ARTIFACT_CACHE_VERSION,
+        "endpoint": endpoint,
+        "params": _normalize(params),
+        "text": _normalize(text),
+        "seed": seed,
+        "model": _normalize(model),
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedArtifact:
+    """Conteúdo, metadados e origem (``hit``, ``miss`` ou ``coalesced``)."""
+
+    data: bytes
+    meta: dict
+    status: str
+
+    @property
+    def hit(self) -> bool:
+        return self.status != "miss"
+
+
+@dataclass
+class CacheStats:
+    """Contadores de uso do cache."""
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+    bytes_written: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["hit_ratio"] = self.hit_ratio
+        return data
+
+
+class ArtifactCache:
+    """Cache em disco com LRU por tamanho e agrupamento de requisições."""
+
+    def __init__(self, root: Path = config.ARTIFACT_CACHE_DIR,
+                 max_bytes: int = int(config.ARTIFACT_CACHE_MAX_MB * 1024**2)):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self.logger = get_logger()
+
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    # ------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        directory = self.root / key[:2]
+        return directory / f"{key}.bin", directory / f"{key}.json"
+
+    def _load_index(self):
+        """Reconstrói o LRU a partir do disco e remove restos de escritas interrompidas."""
+        for tmp in self.root.glob("*/*.tmp"):
+            tmp.unlink(missing_ok=True)
+
+        entries = []
+        for meta_path in self.root.glob("*/*.json"):
+            data_path = meta_path.with_suffix(".bin")
+            if not data_path.exists():
+                meta_path.unlink(missing_ok=True)
+                continue
+            entries.append((meta_path.stat().st_mtime, meta_path.stem, data_path.stat().st_size))
+        for data_path in self.root.glob("*/*.bin"):
+            if not data_path.with_suffix(".json").exists():
+                data_path.unlink(missing_ok=True)
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        with self._lock:
+            self._evict_to_fit(0)
+
+    def _evict_to_fit(self, incoming: int):
+        """Remove entradas LRU até caber ``incoming`` bytes (chamar com lock)."""
+        while self._index and self._total_bytes + incoming > self.max_bytes:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.stats.evictions += 1
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[CachedArtifact]:
+        """Lê uma entrada; ``None`` se ausente."""
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+
+        data_path, meta_path = self._paths(key)
+        try:
+            data = data_path.read_bytes()
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            os.utime(meta_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Removida por outro processo ou metadados corrompidos
+            self.discard(key)
+            return None
+
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.bytes_saved += len(data)
+        return CachedArtifact(data, meta.get("meta", {}), "hit")
+
+    def get_meta(self, key: str) -> Optional[dict]:
+        """Só os metadados de uma entrada (conta como acesso no LRU); ``None`` se ausente."""
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        _, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            os.utime(meta_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.discard(key)
+            return None
+        return meta.get("meta", {})
+
+    def put(self, key: str, data: bytes, meta: Optional[dict] = None, endpoint: str = ""):
+        """Grava uma entrada (atomicamente) e aplica o limite de tamanho."""
+        size = len(data)
+        if size > self.max_bytes:
+            self.logger.warning("⚠️ Artefato de %.1fMB excede o cache; não armazenado", size / 1024**2)
+            return
+
+        data_path, meta_path = self._paths(key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        record = {"key": key, "endpoint": endpoint, "size": size,
+                  "created": time.time(), "meta": meta or {}}
+
+        try:
+            atomic_write(data_path, data)
+            atomic_write(meta_path, json.dumps(record, ensure_ascii=False).encode("utf-8"))
+        except OSError as e:
+            self.logger.error("❌ Falha ao gravar artefato %s: %s", key[:12], e)
+            self.discard(key)
+            return
+
+        # Só entra no índice depois de gravada por completo
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._evict_to_fit(size)
+            self._index[key] = size
+            self._total_bytes += size
+            self.stats.bytes_written += size
+
+    def get_or_create(self, key: str, producer: Producer, endpoint: str = "") -> CachedArtifact:
+        """
+        Retorna a entrada ou a gera com ``producer() -> (bytes, meta)``.
+
+        Chamadas simultâneas com a mesma chave executam ``producer`` uma
+        única vez; as demais recebem o mesmo resultado (``coalesced``).
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._pending[key] = future
+
+        if not owner:
+            data, meta = future.result()
+            with self._lock:
+                self.stats.coalesced += 1
+                self.stats.bytes_saved += len(data)
+            return CachedArtifact(data, meta, "coalesced")
+
+        try:
+            # Outra geração pode ter terminado entre o get() e o registro acima
+            cached = self.get(key)
+            if cached is not None:
+                future.set_result((cached.data, cached.meta))
+                return cached
+
+            with self._lock:
+                self.stats.misses += 1
+            data, meta = producer()
+            self.put(key, data, meta, endpoint)
+            future.set_result((data, meta))
+            return CachedArtifact(data, meta, "miss")
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._index
+
+    def clear(self):
+        """Remove todas as entradas."""
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self._total_bytes = 0
+        for key in keys:
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+
+    def discard(self, key: str):
+        """Remove uma entrada, se existir."""
+        with self._lock:
+            size = self._index.pop(key, None)
+            if size is not None:
+                self._total_bytes -= size
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            data = self.stats.to_dict()
+            data.update({"entries": len(self._index), "size_bytes": self._total_bytes,
+                         "max_bytes": self.max_bytes})
+        return data
+
+
+_artifact_cache: Optional[ArtifactCache] = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """Retorna o cache de artefatos global."""
+    global _artifact_cache
+    if _artifact_cache is None:
+        with _artifact_cache_lock:
+            if _artifact_cache is None:
+                _artifact_cache = ArtifactCache()
+    return _artifact_cache
+
+
+def get_artifact_cache_stats() -> Optional[dict]:
+    """Estatísticas do cache global, sem instanciá-lo (``None`` se ainda não usado)."""
+    return _artifact_cache.get_stats() if _artifact_cache is not None else None
@@ -0,0 +1,348 @@
+"""
+Audio Mixer - Aurora EchoTales
+==============================
+Mixagem de narração sobre trilha em buffers NumPy float32 contíguos.
+
+O sinal é processado em blocos de ``MIX_BLOCK_FRAMES`` amostras, sempre
+no mesmo buffer (operações in-place), com:
+
+- trilha em loop sob a voz, com ganho fixo e envelope de ganho opcional;
+- ducking: um seguidor de envelope da narração (sidechain) abaixa a
+  trilha enquanto há fala, com ataque e release;
+- fade-out da cauda da trilha após o fim da narração;
+- normalização: ``clip`` (só evita saturação, como o ``overlay_bed``
+  original), ``peak`` ou ``loudness`` (RMS alvo em dBFS, sem ponderação
+  K, limitado pelo teto de pico).
+
+``overlay`` mixa arrays em memória escrevendo direto no buffer de saída;
+``mix_files`` lê e grava em disco bloco a bloco, então a memória usada
+não depende da duração da história. Normalizações precisam do nível do
+resultado inteiro: nesse caso a primeira passada grava um WAV float
+temporário e a segunda só aplica o ganho.
+"""
+
+import math
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backend import config
+
+NORMALIZE_MODES = (None, "clip", "peak", "loudness")
+
+
+def db_to_gain(db: float) -> float:
+    return 10 ** (db / 20)
+
+
+def gain_to_db(gain: float) -> float:
+    return 20 * math.log10(gain) if gain > 0 else -math.inf
+
+
+class GainEnvelope:
+    """Ganho (dB) interpolado linearmente entre pontos ``(tempo_s, dB)``."""
+
+    def __init__(self, points: List[Tuple[float, float]]):
+        if not points:
+            raise ValueError("Envelope sem pontos")
+        points = sorted(points)
+        self.times = np.array([p[0] for p in points], dtype=np.float64)
+        self.db = np.array([p[1] for p in points], dtype=np.float32)
+
+    def gains(self, start: int, n: int, sample_rate: int) -> np.ndarray:
+        """Ganho linear das amostras ``start .. start + n``."""
+        t = (start + np.arange(n, dtype=np.float64)) / sample_rate
+        db = np.interp(t, self.times, self.db).astype(np.float32)
+        return np.power(np.float32(10.0), db / np.float32(20.0))
+
+
+class Ducker:
+    """
+    Seguidor de envelope da voz que devolve o ganho da trilha.
+
+    O nível é medido em janelas de ``hop_ms``; o ganho alvo é
+    ``depth_db`` quando a voz passa de ``threshold_db`` e 0 dB fora dela,
+    suavizado com ataque/release por janela. Dentro de cada janela o
+    ganho vai em rampa até o valor calculado na janela anterior (uma
+    janela de atraso, para não depender de amostras futuras). O estado
+    atravessa os blocos: o resultado não depende de onde caem as
+    fronteiras.
+    """
+
+    def __init__(self, sample_rate: int, depth_db: float = config.MIX_DUCK_DB,
+                 threshold_db: float = config.MIX_DUCK_THRESHOLD_DB,
+                 attack_ms: float = config.MIX_DUCK_ATTACK_MS,
+                 release_ms: float = config.MIX_DUCK_RELEASE_MS, hop_ms: float = 10.0):
+        self.hop = max(1, int(sample_rate * hop_ms / 1000))
+        hop_s = self.hop / sample_rate
+        self.attack = math.exp(-hop_s / max(attack_ms / 1000, 1e-6))
+        self.release = math.exp(-hop_s / max(release_ms / 1000, 1e-6))
+        self.depth = db_to_gain(depth_db)
+        self.threshold = db_to_gain(threshold_db) ** 2  # em potência
+        self.position = 0  # amostras já processadas
+        self._ramp = np.arange(self.hop, dtype=np.float32) / self.hop
+        self._rest = np.zeros(0, dtype=np.float32)  # janela incompleta
+        # Ganhos após cada janela completa; _gains[0] é o da janela _first
+        self._gains = np.ones(2, dtype=np.float32)
+        self._first = -1
+
+    def _smooth(self, levels: np.ndarray) -> np.ndarray:
+        # Poucos valores (100 por segundo): laço em floats do Python
+        out = []
+        g, depth, attack, release = float(self._gains[-1]), self.depth, self.attack, self.release
+        for active in (levels > self.threshold).tolist():
+            target = depth if active else 1.0
+            g = target + (attack if target < g else release) * (g - target)
+            out.append(g)
+        return np.array(out, dtype=np.float32)
+
+    def process(self, voice: np.ndarray, n: int) -> np.ndarray:
+        """Ganho para as próximas ``n`` amostras (``voice`` mais curta: silêncio depois)."""
+        voice = np.concatenate([self._rest, voice[:n],
+                                np.zeros(max(0, n - len(voice)), dtype=np.float32)])
+        hops = len(voice) // self.hop
+        frames = voice[:hops * self.hop].reshape(hops, self.hop)
+        levels = np.einsum("ij,ij->i", frames, frames) / self.hop
+        self._rest = voice[hops * self.hop:].copy()
+        self._gains = np.concatenate([self._gains, self._smooth(levels)])
+
+        # Amostras da janela j: rampa de G[j-1] a G[j] (G[m]: após m janelas)
+        j0, j1 = self.position // self.hop, (self.position + n - 1) // self.hop
+        g = self._gains[j0 - 1 - self._first:j1 + 1 - self._first]
+        ramps = g[:-1, None] + (g[1:] - g[:-1])[:, None] * self._ramp
+        offset = self.position - j0 * self.hop
+        gains = ramps.reshape(-1)[offset:offset + n]
+
+        self.position += n
+        keep = self.position // self.hop - 1  # primeira janela que o próximo bloco usa
+        self._gains = self._gains[keep - self._first:]
+        self._first = keep
+        return gains
+
+
+@dataclass
+class MixParams:
+    """Parâmetros da mixagem narração + trilha."""
+
+    music_gain_db: float = config.EXPERIENCE_MUSIC_GAIN_DB
+    duck_db: float = config.MIX_DUCK_DB
+    tail_s: float = 2.0
+    normalize: Optional[str] = "clip"
+    target_dbfs: float = config.MIX_TARGET_DBFS
+    ceiling_db: float = config.MIX_PEAK_CEILING_DB
+    envelope: Optional[GainEnvelope] = field(default=None, repr=False)
+
+
+@dataclass
+class MixStats:
+    frames: int = 0
+    blocks: int = 0
+    peak: float = 0.0
+    sum_squares: float = 0.0
+    gain: float = 1.0  # ganho da normalização
+
+    @property
+    def rms(self) -> float:
+        return math.sqrt(self.sum_squares / self.frames) if self.frames else 0.0
+
+    def update(self, block: np.ndarray):
+        self.frames += len(block)
+        self.blocks += 1
+        if len(block):
+            self.peak = max(self.peak, float(np.max(np.abs(block))))
+            self.sum_squares += float(np.dot(block, block))
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["sum_squares"]
+        data["rms_dbfs"] = gain_to_db(self.rms * self.gain)
+        data["peak_dbfs"] = gain_to_db(self.peak * self.gain)
+        data["gain_db"] = gain_to_db(self.gain)
+        return data
+
+
+def normalization_gain(stats: MixStats, params: MixParams) -> float:
+    """Ganho final a partir do pico e do RMS da primeira passada."""
+    mode = params.normalize
+    if mode not in NORMALIZE_MODES:
+        raise ValueError(f"Normalização desconhecida: {mode}")
+    if mode is None or stats.peak == 0.0:
+        return 1.0
+    if mode == "clip":
+        return 1.0 / stats.peak if stats.peak > 1.0 else 1.0
+    ceiling = db_to_gain(params.ceiling_db) / stats.peak
+    if mode == "peak":
+        return ceiling
+    return min(db_to_gain(params.target_dbfs) / stats.rms, ceiling)
+
+
+class _LoopReader:
+    """Lê a trilha em loop para dentro de um buffer, a partir de array ou arquivo."""
+
+    def __init__(self, source: Union[np.ndarray, "object"]):
+        self.source = source
+        self.pos = 0
+
+    def fill(self, out: np.ndarray):
+        n, filled = len(out), 0
+        if isinstance(self.source, np.ndarray):
+            length = len(self.source)
+            while filled < n:
+                take = min(n - filled, length - self.pos)
+                out[filled:filled + take] = self.source[self.pos:self.pos + take]
+                filled += take
+                self.pos = (self.pos + take) % length
+            return
+        while filled < n:
+            got = _read_into(self.source, out[filled:])
+            if got == 0:
+                if self.source.tell() == 0:
+                    raise ValueError("Trilha vazia")
+                self.source.seek(0)
+            filled += got
+
+
+def _read_into(reader, out: np.ndarray) -> int:
+    """Lê até ``len(out)`` quadros mono float32 de um ``SoundFile``."""
+    if reader.channels == 1:
+        return len(reader.read(len(out), dtype="float32", out=out))
+    frames = reader.read(len(out), dtype="float32", always_2d=True)
+    frames.mean(axis=1, out=out[:len(frames)])
+    return len(frames)
+
+
+class MixEngine:
+    """Mixa narração e trilha em blocos de tamanho fixo."""
+
+    def __init__(self, sample_rate: int = config.SAMPLE_RATE,
+                 block_frames: int = config.MIX_BLOCK_FRAMES):
+        self.sample_rate = sample_rate
+        self.block_frames = block_frames
+
+    def _run(self, params: MixParams, total: int, voice_frames: int,
+             read_voice: Callable[[int, int], np.ndarray], bed: Optional[_LoopReader],
+             block_at: Callable[[int, int], np.ndarray],
+             emit: Callable[[np.ndarray], None]) -> MixStats:
+        """
+        Laço comum: ``block_at(start, n)`` devolve o buffer onde o bloco é
+        montado e ``emit`` o consome depois de pronto.
+        """
+        stats = MixStats()
+        music_gain = np.float32(db_to_gain(params.music_gain_db))
+        ducker = Ducker(self.sample_rate, params.duck_db) if params.duck_db else None
+        fade = min(int(params.tail_s * self.sample_rate), total)
+        fade_start = total - fade
+
+        for start in range(0, total, self.block_frames):
+            n = min(self.block_frames, total - start)
+            block = block_at(start, n)
+            voice = read_voice(start, min(n, max(0, voice_frames - start)))
+            if bed is None:
+                block[:] = 0.0
+            else:
+                bed.fill(block)
+                block *= music_gain
+                if params.envelope is not None:
+                    block *= params.envelope.gains(start, n, self.sample_rate)
+                if ducker is not None:
+                    block *= ducker.process(voice, n)
+                if fade and start + n > fade_start:
+                    a = max(start, fade_start)
+                    idx = np.arange(a - fade_start, start + n - fade_start, dtype=np.float32)
+                    block[a - start:] *= 1.0 - idx / max(fade - 1, 1)
+            block[:len(voice)] += voice
+            stats.update(block)
+            emit(block)
+        return stats
+
+    # ------------------------------------------------------------
+    # Em memória
+    # ------------------------------------------------------------
+
+    def overlay(self, voice: np.ndarray, bed: np.ndarray,
+                params: Optional[MixParams] = None) -> Tuple[np.ndarray, MixStats]:
+        """Narração sobre a trilha em loop; um único buffer de saída."""
+        params = params or MixParams()
+        voice = np.ascontiguousarray(voice, dtype=np.float32).reshape(-1)
+        bed = np.ascontiguousarray(bed, dtype=np.float32).reshape(-1)
+        total = len(voice) + int(params.tail_s * self.sample_rate)
+        out = np.empty(total, dtype=np.float32)
+
+        stats = self._run(params, total, len(voice),
+                          read_voice=lambda start, n: voice[start:start + n],
+                          bed=_LoopReader(bed) if len(bed) else None,
+                          block_at=lambda start, n: out[start:start + n],
+                          emit=lambda block: None)
+        stats.gain = normalization_gain(stats, params)
+        if stats.gain != 1.0:
+            for start in range(0, total, self.block_frames):
+                out[start:start + self.block_frames] *= np.float32(stats.gain)
+        return out, stats
+
+    # ------------------------------------------------------------
+    # Em disco
+    # ------------------------------------------------------------
+
+    def mix_files(self, voice_path: Union[str, Path], bed_path: Union[str, Path],
+                  output_path: Union[str, Path], params: Optional[MixParams] = None,
+                  subtype: str = "PCM_16") -> MixStats:
+        """
+        Mixa dois arquivos de áudio em um WAV, lendo e gravando em blocos.
+
+        Os dois arquivos devem ter o sample rate do motor (multicanal vira
+        mono pela média dos canais).
+        """
+        import soundfile as sf
+
+        params = params or MixParams()
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        scratch = np.empty(self.block_frames, dtype=np.float32)
+        voice_buf = np.empty(self.block_frames, dtype=np.float32)
+
+        with sf.SoundFile(str(voice_path)) as voice, sf.SoundFile(str(bed_path)) as bed:
+            for f in (voice, bed):
+                if f.samplerate != self.sample_rate:
+                    raise ValueError(f"{f.name}: {f.samplerate} Hz, esperado {self.sample_rate} Hz")
+            voice_frames = voice.frames
+            total = voice_frames + int(params.tail_s * self.sample_rate)
+
+            def read_voice(start: int, n: int) -> np.ndarray:
+                return voice_buf[:_read_into(voice, voice_buf[:n])] if n else voice_buf[:0]
+
+            def run(writer) -> MixStats:
+                return self._run(params, total, voice_frames, read_voice,
+                                 _LoopReader(bed) if bed.frames else None,
+                                 block_at=lambda start, n: scratch[:n], emit=writer.write)
+
+            if params.normalize is None:
+                with sf.SoundFile(str(output_path), "w", self.sample_rate, 1,
+                                  subtype=subtype, format="WAV") as out:
+                    return run(out)
+
+            # Duas passadas: o ganho depende do resultado inteiro
+            fd, tmp = tempfile.mkstemp(dir=output_path.parent, prefix=".mix-", suffix=".wav")
+            os.close(fd)
+            try:
+                with sf.SoundFile(tmp, "w", self.sample_rate, 1, subtype="FLOAT",
+                                  format="WAV") as first:
+                    stats = run(first)
+                stats.gain = normalization_gain(stats, params)
+                gain = np.float32(stats.gain)
+                with sf.SoundFile(tmp) as first, \
+                        sf.SoundFile(str(output_path), "w", self.sample_rate, 1,
+                                     subtype=subtype, format="WAV") as out:
+                    while True:
+                        got = len(first.read(self.block_frames, dtype="float32", out=scratch))
+                        if not got:
+                            break
+                        block = scratch[:got]
+                        block *= gain
+                        out.write(block)
+            finally:
+                os.unlink(tmp)
+            return stats
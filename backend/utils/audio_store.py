@@ -0,0 +1,445 @@
+"""
+Audio Store - Aurora EchoTales
+==============================
+Áudios gerados (narração, música, experiências) guardados em disco em
+duas variantes: o WAV original e uma versão comprimida para streaming
+(Opus em OGG; MP3 quando a taxa de amostragem não é aceita pelo Opus,
+ex.: 44,1 kHz da música).
+
+Cada áudio tem um id (a chave do cache de artefatos, quando existe) e um
+manifesto ``<id>.json`` com tamanho e SHA-256 de cada variante — o hash
+vira o ETag das respostas. A compressão roda em um pool de threads em
+segundo plano: ``put`` grava o WAV e retorna na hora; o arquivo
+comprimido aparece quando a codificação termina.
+
+Para áudio produzido aos poucos (narração em streaming) há
+``IncrementalEncoder``: cada bloco é anexado ao WAV e ao codificador à
+medida que chega, em uma thread própria, então a versão comprimida fica
+pronta junto com o fim da geração.
+
+Uso:
+    store = get_audio_store()
+    asset = store.put(key, wav_bytes)
+    variant = store.resolve(key, "auto", wait_s=2.0)   # comprimido se pronto, senão WAV
+    path = store.path(variant)
+"""
+
+import io
+import json
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from backend import config
+from backend.utils.audio_utils import float_to_pcm16
+from backend.utils.file_utils import atomic_write, file_sha256
+from backend.utils.logger import get_logger
+
+# formato → (formato libsndfile, subtipo, extensão, content-type)
+FORMATS = {
+    "wav": ("WAV", "PCM_16", "wav", "audio/wav"),
+    "opus": ("OGG", "OPUS", "ogg", "audio/ogg"),
+    "mp3": ("MP3", "MPEG_LAYER_III", "mp3", "audio/mpeg"),
+}
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+BLOCK_FRAMES = 16384
+
+_ID = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+def compressed_format(sample_rate: int, preferred: str = config.AUDIO_COMPRESSED_FORMAT) -> str:
+    """Formato comprimido para a taxa: Opus só aceita 8/12/16/24/48 kHz."""
+    if preferred == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+        return "mp3"
+    return preferred
+
+
+def media_type(fmt: str) -> str:
+    return FORMATS[fmt][3]
+
+
+def _open_writer(path: Path, fmt: str, sample_rate: int):
+    import soundfile as sf
+
+    sf_format, subtype, _, _ = FORMATS[fmt]
+    level = config.AUDIO_COMPRESSION_LEVEL.get(fmt)
+    return sf.SoundFile(str(path), "w", sample_rate, 1, format=sf_format, subtype=subtype,
+                        compression_level=level)
+
+
+def _write_block(writer, fmt: str, block: np.ndarray):
+    """WAV recebe o mesmo PCM de ``encode_wav`` (bytes idênticos aos da resposta)."""
+    if fmt == "wav":
+        block = np.frombuffer(float_to_pcm16(block), dtype="<i2")
+    writer.write(block)
+
+
+@dataclass
+class AudioVariant:
+    """Um arquivo de um áudio: formato, tamanho e SHA-256 (ETag)."""
+
+    format: str
+    file: str
+    size: int
+    sha256: str
+    encode_s: float = 0.0
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256[:32]}"'
+
+
+@dataclass
+class AudioAsset:
+    """Manifesto de um áudio armazenado."""
+
+    id: str
+    sample_rate: int
+    duration: float
+    created_at: str
+    variants: Dict[str, AudioVariant] = field(default_factory=dict)
+    meta: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["variants"] = {k: asdict(v) for k, v in self.variants.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AudioAsset":
+        variants = {k: AudioVariant(**v) for k, v in data.pop("variants", {}).items()}
+        return cls(variants=variants, **data)
+
+
+@dataclass
+class AudioStoreStats:
+    """Codificações concluídas, tempo gasto e bytes antes/depois."""
+
+    encoded: int = 0
+    incremental: int = 0
+    failed: int = 0
+    encode_s: float = 0.0
+    audio_s: float = 0.0
+    wav_bytes: int = 0
+    compressed_bytes: int = 0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["compression_ratio"] = (self.wav_bytes / self.compressed_bytes
+                                     if self.compressed_bytes else 0.0)
+        data["encode_speed_x"] = self.audio_s / self.encode_s if self.encode_s else 0.0
+        return data
+
+
+class AudioStore:
+    """Diretório de áudios com variantes WAV e comprimida."""
+
+    def __init__(self, root: Path = config.AUDIO_STORE_DIR,
+                 workers: int = config.AUDIO_ENCODE_WORKERS):
+        self.root = Path(root)
+        self.stats = AudioStoreStats()
+        self.logger = get_logger()
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="audio-encode")
+        self._jobs: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------
+    # Manifestos
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def valid_id(asset_id: str) -> bool:
+        return bool(_ID.match(asset_id or ""))
+
+    def _manifest_path(self, asset_id: str) -> Path:
+        return self.root / f"{asset_id}.json"
+
+    def get(self, asset_id: str) -> Optional[AudioAsset]:
+        if not self.valid_id(asset_id):
+            return None
+        try:
+            data = json.loads(self._manifest_path(asset_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return AudioAsset.from_dict(data)
+
+    def _save(self, asset: AudioAsset):
+        with self._lock:
+            # Relê para não perder variantes gravadas por outra thread
+            current = self.get(asset.id)
+            if current is not None:
+                asset.variants = {**current.variants, **asset.variants}
+            atomic_write(self._manifest_path(asset.id),
+                         json.dumps(asset.to_dict(), ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def _variant(self, asset_id: str, fmt: str, tmp: Path, encode_s: float = 0.0) -> AudioVariant:
+        """Move ``tmp`` para o nome final e descreve a variante."""
+        name = f"{asset_id}.{FORMATS[fmt][2]}"
+        os.replace(tmp, self.root / name)
+        path = self.root / name
+        return AudioVariant(fmt, name, path.stat().st_size, file_sha256(path), encode_s)
+
+    # ------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------
+
+    def put(self, asset_id: str, audio: Union[bytes, np.ndarray, Path],
+            sample_rate: Optional[int] = None, meta: Optional[dict] = None) -> AudioAsset:
+        """
+        Grava o WAV (bytes de um WAV, amostras float com ``sample_rate`` ou
+        o caminho de um WAV, que é movido para o armazenamento) e agenda a
+        versão comprimida. Ids já armazenados não são regravados.
+        """
+        if not self.valid_id(asset_id):
+            raise ValueError(f"Id de áudio inválido: {asset_id!r}")
+        existing = self.get(asset_id)
+        if existing is not None:
+            self._schedule(existing)
+            return existing
+
+        if isinstance(audio, Path):
+            import soundfile as sf
+
+            info = sf.info(str(audio))
+            sample_rate, frames = info.samplerate, info.frames
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=asset_id, suffix=".tmp")
+            os.close(fd)
+            shutil.move(str(audio), tmp)
+        elif isinstance(audio, (bytes, bytearray)):
+            import soundfile as sf
+
+            info = sf.info(io.BytesIO(audio))
+            sample_rate, frames = info.samplerate, info.frames
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=asset_id, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+        else:
+            if sample_rate is None:
+                raise ValueError("sample_rate é obrigatório para amostras")
+            audio = np.asarray(audio, dtype=np.float32)
+            frames = len(audio)
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=asset_id, suffix=".tmp")
+            os.close(fd)
+            with _open_writer(Path(tmp), "wav", sample_rate) as f:
+                _write_block(f, "wav", audio)
+
+        asset = AudioAsset(asset_id, sample_rate, frames / sample_rate,
+                           datetime.now(timezone.utc).isoformat(), meta=meta or {})
+        asset.variants["wav"] = self._variant(asset_id, "wav", Path(tmp))
+        self._save(asset)
+        self._schedule(asset)
+        return asset
+
+    def _schedule(self, asset: AudioAsset):
+        fmt = compressed_format(asset.sample_rate)
+        if fmt in asset.variants:
+            return
+        with self._lock:
+            job = self._jobs.get(asset.id)
+            if job is None or job.done() and job.exception() is not None:
+                self._jobs[asset.id] = self._executor.submit(self._encode, asset, fmt)
+
+    def _encode(self, asset: AudioAsset, fmt: str):
+        import soundfile as sf
+
+        start = time.perf_counter()
+        source = self.root / asset.variants["wav"].file
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=asset.id, suffix=".tmp")
+        os.close(fd)
+        try:
+            with sf.SoundFile(str(source)) as reader, \
+                    _open_writer(Path(tmp), fmt, asset.sample_rate) as writer:
+                for block in reader.blocks(BLOCK_FRAMES, dtype="float32"):
+                    writer.write(block)
+            elapsed = time.perf_counter() - start
+            variant = self._variant(asset.id, fmt, Path(tmp), elapsed)
+        except Exception as e:
+            Path(tmp).unlink(missing_ok=True)
+            self.stats.failed += 1
+            self.logger.error("❌ Falha ao codificar %s em %s: %s", asset.id[:12], fmt, e,
+                              asset_id=asset.id, format=fmt)
+            raise
+        self._save(AudioAsset(asset.id, asset.sample_rate, asset.duration, asset.created_at,
+                              {fmt: variant}, asset.meta))
+        self._record(asset, variant, elapsed)
+        self.logger.info("🗜️ %s → %s: %.1fs de áudio em %.2fs (%d KB → %d KB)",
+                         asset.id[:12], fmt, asset.duration, elapsed,
+                         asset.variants["wav"].size // 1024, variant.size // 1024,
+                         stage="encode", asset_id=asset.id, format=fmt, duration_s=elapsed)
+        return variant
+
+    def _record(self, asset: AudioAsset, variant: AudioVariant, elapsed: float):
+        with self._lock:
+            self.stats.encoded += 1
+            self.stats.encode_s += elapsed
+            self.stats.audio_s += asset.duration
+            self.stats.wav_bytes += asset.variants["wav"].size
+            self.stats.compressed_bytes += variant.size
+
+    def incremental(self, asset_id: str, sample_rate: int,
+                    meta: Optional[dict] = None) -> "IncrementalEncoder":
+        """Codificador alimentado bloco a bloco durante a geração."""
+        if not self.valid_id(asset_id):
+            raise ValueError(f"Id de áudio inválido: {asset_id!r}")
+        return IncrementalEncoder(self, asset_id, sample_rate, meta or {})
+
+    # ------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------
+
+    def wait(self, asset_id: str, timeout: Optional[float] = None) -> bool:
+        """Espera a codificação pendente do áudio (``True`` se não há nenhuma)."""
+        with self._lock:
+            job = self._jobs.get(asset_id)
+        if job is None:
+            return True
+        try:
+            job.result(timeout)
+        except TimeoutError:
+            return False
+        except Exception:
+            pass
+        return True
+
+    def resolve(self, asset_id: str, fmt: str = "auto",
+                wait_s: float = 0.0) -> Optional[AudioVariant]:
+        """
+        Variante a servir. ``auto`` prefere a comprimida, esperando até
+        ``wait_s`` por uma codificação em andamento, e cai para o WAV.
+        """
+        asset = self.get(asset_id)
+        if asset is None:
+            return None
+        if fmt == "auto":
+            compressed = compressed_format(asset.sample_rate)
+            if compressed not in asset.variants and wait_s > 0 and self.wait(asset_id, wait_s):
+                asset = self.get(asset_id) or asset
+            fmt = compressed if compressed in asset.variants else "wav"
+        return asset.variants.get(fmt)
+
+    def path(self, variant: AudioVariant) -> Path:
+        return self.root / variant.file
+
+    def url(self, asset_id: str) -> str:
+        return f"/api/media/{asset_id}"
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            data = self.stats.to_dict()
+            data["pending"] = sum(not job.done() for job in self._jobs.values())
+        return data
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+class IncrementalEncoder:
+    """
+    Recebe blocos de áudio durante a geração e grava WAV e versão
+    comprimida em paralelo, em uma thread própria (``write`` não bloqueia).
+    ``finish`` publica as duas variantes; ``abort`` descarta tudo.
+    """
+
+    _DONE = object()
+
+    def __init__(self, store: AudioStore, asset_id: str, sample_rate: int, meta: dict):
+        self.store = store
+        self.asset_id = asset_id
+        self.sample_rate = sample_rate
+        self.meta = meta
+        self.format = compressed_format(sample_rate)
+        self.frames = 0
+        self.encode_s = 0.0
+        self.asset: Optional[AudioAsset] = None
+        self._queue: "queue.Queue" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._tmp = {}
+        for fmt in ("wav", self.format):
+            fd, tmp = tempfile.mkstemp(dir=store.root, prefix=asset_id, suffix=".tmp")
+            os.close(fd)
+            self._tmp[fmt] = Path(tmp)
+        self._worker = threading.Thread(target=self._run, name="audio-encode-inc", daemon=True)
+        self._worker.start()
+
+    def write(self, chunk: np.ndarray):
+        self._queue.put(np.asarray(chunk, dtype=np.float32))
+
+    def _run(self):
+        writers = {}
+        try:
+            writers = {fmt: _open_writer(path, fmt, self.sample_rate)
+                       for fmt, path in self._tmp.items()}
+            while True:
+                chunk = self._queue.get()
+                if chunk is self._DONE:
+                    break
+                start = time.perf_counter()
+                for fmt, writer in writers.items():
+                    _write_block(writer, fmt, chunk)
+                self.frames += len(chunk)
+                self.encode_s += time.perf_counter() - start
+        except BaseException as e:
+            self._error = e
+            # Esvazia a fila para ``finish``/``abort`` não ficarem esperando
+            while self._queue.get() is not self._DONE:
+                pass
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    def _stop(self):
+        self._queue.put(self._DONE)
+        self._worker.join()
+
+    def finish(self) -> AudioAsset:
+        """Fecha os arquivos e registra o áudio no armazenamento."""
+        self._stop()
+        if self._error is not None:
+            self.abort()
+            raise self._error
+        store = self.store
+        asset = AudioAsset(self.asset_id, self.sample_rate, self.frames / self.sample_rate,
+                           datetime.now(timezone.utc).isoformat(), meta=self.meta)
+        for fmt, tmp in self._tmp.items():
+            asset.variants[fmt] = store._variant(self.asset_id, fmt, tmp,
+                                                 self.encode_s if fmt != "wav" else 0.0)
+        store._save(asset)
+        store._record(asset, asset.variants[self.format], self.encode_s)
+        with store._lock:
+            store.stats.incremental += 1
+        self.asset = asset
+        return asset
+
+    def abort(self):
+        """Descarta o que foi gravado (ex.: cliente desconectou)."""
+        if self._worker.is_alive():
+            self._stop()
+        for tmp in self._tmp.values():
+            tmp.unlink(missing_ok=True)
+
+
+_audio_store: Optional[AudioStore] = None
+_audio_store_lock = threading.Lock()
+
+
+def get_audio_store() -> AudioStore:
+    """Retorna o armazenamento de áudios global."""
+    global _audio_store
+    if _audio_store is None:
+        with _audio_store_lock:
+            if _audio_store is None:
+                _audio_store = AudioStore()
+    return _audio_store
@@ -0,0 +1,438 @@
+"""
+Audio Stream - Aurora EchoTales
+===============================
+Decodificação de uploads à medida que o corpo da requisição chega.
+
+O corpo nunca é acumulado inteiro: cada bloco recebido vai direto para
+um decodificador que escreve amostras float32 mono em um buffer
+pré-alocado (``PcmBuffer``):
+
+    - WAV (PCM 8/16/24/32 bits ou float): lido aqui mesmo; o tamanho do
+      chunk ``data`` permite alocar o buffer exato de uma vez
+    - demais formatos (webm/opus do MediaRecorder, OGG, FLAC, MP3): o
+      bloco é repassado ao ``ffmpeg`` por um pipe e a saída (WAV float)
+      volta pelo mesmo leitor de WAV, em uma thread
+    - sem ``ffmpeg``: o upload comprimido é acumulado e decodificado no
+      fim com soundfile/pydub (``decode_audio_bytes``)
+
+O formato é detectado pelos primeiros bytes (o MediaRecorder rotula
+webm como ``audio/wav``). Os tempos de recepção, decodificação e
+reamostragem são medidos separadamente em ``DecodeTimings``.
+
+Uso:
+    decoder = StreamingAudioDecoder()
+    for chunk in corpo:
+        decoder.feed(chunk)
+    decoded = decoder.finish()
+    audio = decoded.resampled(16000)      # resampler polifásico em cache
+"""
+
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+import numpy as np
+
+from backend.utils.audio_utils import decode_audio_bytes, resample
+
+_WAVE_PCM = 1
+_WAVE_FLOAT = 3
+_WAVE_EXTENSIBLE = 0xFFFE
+_UNKNOWN_SIZE = 0xFFFFFFFF
+_SNIFF_BYTES = 12
+
+
+class AudioDecodeError(ValueError):
+    """Upload que não pôde ser decodificado."""
+
+
+@dataclass
+class DecodeTimings:
+    """Segundos gastos em cada etapa (a recepção inclui a espera pela rede)."""
+
+    upload: float = 0.0
+    decode: float = 0.0
+    resample: float = 0.0
+    bytes: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class PcmBuffer:
+    """
+    Buffer float32 mono pré-alocado. Com tamanho conhecido não há
+    realocação; sem ele, a capacidade dobra quando necessário.
+    """
+
+    def __init__(self, capacity: int):
+        self.data = np.empty(max(int(capacity), 1), dtype=np.float32)
+        self.size = 0
+
+    def reserve(self, frames: int) -> np.ndarray:
+        """Fatia gravável para os próximos ``frames`` (chamar ``commit`` depois)."""
+        needed = self.size + frames
+        if needed > len(self.data):
+            grown = np.empty(max(needed, 2 * len(self.data)), dtype=np.float32)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        return self.data[self.size:needed]
+
+    def commit(self, frames: int):
+        self.size += frames
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class WavStreamParser:
+    """
+    Leitor incremental de RIFF/WAVE: cabeçalho, depois ``data`` convertido
+    para float32 mono direto no buffer. Aceita tamanho ``0xFFFFFFFF``
+    (WAV em streaming, como o do ``ffmpeg`` em pipe).
+    """
+
+    def __init__(self, default_seconds: float = 60.0):
+        self.default_seconds = default_seconds
+        self.sample_rate: Optional[int] = None
+        self.channels = 0
+        self.buffer: Optional[PcmBuffer] = None
+        self._pending = bytearray()
+        self._in_data = False
+        self._data_left: Optional[int] = None
+        self._skip = 0
+        self._dtype = None
+        self._block_align = 0
+        self._scale = 1.0
+        self._riff_checked = False
+
+    def feed(self, data: bytes):
+        if self._in_data:
+            self._consume(data)
+            return
+        self._pending += data
+        self._parse_header()
+
+    def _parse_header(self):
+        pending = self._pending
+        if not self._riff_checked:
+            if len(pending) < 12:
+                return
+            if pending[:4] not in (b"RIFF", b"RF64") or pending[8:12] != b"WAVE":
+                raise AudioDecodeError("Cabeçalho WAV inválido")
+            del pending[:12]
+            self._riff_checked = True
+        while True:
+            if self._skip:
+                skipped = min(self._skip, len(pending))
+                del pending[:skipped]
+                self._skip -= skipped
+                if self._skip:
+                    return
+            if len(pending) < 8:
+                return
+            chunk_id, size = pending[:4], struct.unpack("<I", pending[4:8])[0]
+            if chunk_id == b"fmt ":
+                if len(pending) < 8 + size:
+                    return
+                self._read_format(bytes(pending[8:8 + size]))
+                del pending[:8 + size + (size & 1)]
+            elif chunk_id == b"data":
+                if self.sample_rate is None:
+                    raise AudioDecodeError("Chunk 'data' antes de 'fmt '")
+                del pending[:8]
+                known = size not in (_UNKNOWN_SIZE, 0)
+                self._data_left = size if known else None
+                frames = (size // self._block_align if known
+                          else int(self.default_seconds * self.sample_rate))
+                self.buffer = PcmBuffer(frames)
+                self._in_data = True
+                rest, self._pending = bytes(pending), bytearray()
+                self._consume(rest)
+                return
+            else:
+                del pending[:8]
+                self._skip = size + (size & 1)
+
+    def _read_format(self, fmt: bytes):
+        if len(fmt) < 16:
+            raise AudioDecodeError("Chunk 'fmt ' truncado")
+        tag, channels, rate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if tag == _WAVE_EXTENSIBLE and len(fmt) >= 26:
+            tag = struct.unpack("<H", fmt[24:26])[0]
+        if tag == _WAVE_FLOAT and bits in (32, 64):
+            self._dtype, self._scale = np.dtype(f"<f{bits // 8}"), 1.0
+        elif tag == _WAVE_PCM and bits in (8, 16, 24, 32):
+            self._dtype = {8: np.dtype("u1"), 16: np.dtype("<i2"), 24: None,
+                           32: np.dtype("<i4")}[bits]
+            self._scale = 1.0 / (1 << (bits - 1))
+        else:
+            raise AudioDecodeError(f"WAV não suportado (formato {tag}, {bits} bits)")
+        if not channels or not rate:
+            raise AudioDecodeError("WAV sem canais ou sem taxa de amostragem")
+        self.channels, self.sample_rate, self._block_align = channels, rate, block_align
+        self._bits = bits
+
+    def _consume(self, data: bytes):
+        if self._data_left is not None:
+            data = data[:self._data_left]
+            self._data_left -= len(data)
+        if self._pending:
+            data = bytes(self._pending) + data
+            self._pending = bytearray()
+        usable = len(data) - len(data) % self._block_align
+        if usable < len(data):
+            self._pending += data[usable:]
+        if not usable:
+            return
+        frames = usable // self._block_align
+        raw = np.frombuffer(data, dtype=np.uint8, count=usable)
+        out = self.buffer.reserve(frames)
+        if self._bits == 24:
+            b = raw.reshape(-1, 3).astype(np.int32)
+            samples = (b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16))
+            samples = np.where(samples >= 1 << 23, samples - (1 << 24), samples)
+        else:
+            samples = raw.view(self._dtype)
+        if self._bits == 8:
+            samples = samples.astype(np.float32) - 128
+        if self.channels > 1:
+            samples = samples.reshape(frames, self.channels)
+            np.mean(samples, axis=1, dtype=np.float32, out=out)
+            if self._scale != 1.0:
+                out *= np.float32(self._scale)
+        else:
+            np.multiply(samples, np.float32(self._scale), out=out, casting="unsafe")
+        self.buffer.commit(frames)
+
+    def finish(self) -> np.ndarray:
+        if self.buffer is None:
+            raise AudioDecodeError("WAV sem chunk 'data'")
+        return self.buffer.view()
+
+
+class FfmpegDecoder:
+    """``ffmpeg`` em pipe: bytes comprimidos entram, WAV float mono sai para o parser."""
+
+    def __init__(self, executable: str):
+        self.parser = WavStreamParser()
+        self.process = subprocess.Popen(
+            [executable, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+             "-vn", "-ac", "1", "-c:a", "pcm_f32le", "-f", "wav", "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._error: Optional[BaseException] = None
+        self._reader = threading.Thread(target=self._read, name="ffmpeg-reader", daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        try:
+            for block in iter(lambda: self.process.stdout.read(1 << 16), b""):
+                self.parser.feed(block)
+        except BaseException as e:
+            self._error = e
+            self.process.kill()
+
+    def feed(self, data: bytes):
+        try:
+            self.process.stdin.write(data)
+        except BrokenPipeError:
+            pass  # o erro real aparece em ``finish``
+
+    @property
+    def sample_rate(self) -> Optional[int]:
+        return self.parser.sample_rate
+
+    def finish(self) -> np.ndarray:
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._reader.join()
+        stderr = self.process.stderr.read().decode("utf-8", errors="replace").strip()
+        code = self.process.wait()
+        if self._error is not None:
+            raise AudioDecodeError(str(self._error)) from self._error
+        if code != 0:
+            raise AudioDecodeError(f"ffmpeg falhou ({code}): {stderr.splitlines()[-1:] or ''}")
+        return self.parser.finish()
+
+    def abort(self):
+        """Encerra o ffmpeg e a thread leitora (idempotente)."""
+        self.process.kill()
+        self._reader.join()
+        for pipe in (self.process.stdin, self.process.stdout, self.process.stderr):
+            try:
+                pipe.close()
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.wait()
+
+
+class BufferedDecoder:
+    """Último recurso: acumula o upload e decodifica com soundfile/pydub."""
+
+    def __init__(self):
+        self._data = bytearray()
+        self.sample_rate: Optional[int] = None
+
+    def feed(self, data: bytes):
+        self._data += data
+
+    def finish(self) -> np.ndarray:
+        try:
+            audio, self.sample_rate = decode_audio_bytes(bytes(self._data))
+        except Exception as e:
+            raise AudioDecodeError(str(e)) from e
+        self._data = bytearray()
+        return audio
+
+
+@dataclass
+class DecodedAudio:
+    """Amostras float32 mono, taxa original e tempos de cada etapa."""
+
+    audio: np.ndarray
+    sample_rate: int
+    timings: DecodeTimings
+    decoder: str
+
+    @property
+    def seconds(self) -> float:
+        return len(self.audio) / self.sample_rate if self.sample_rate else 0.0
+
+    def resampled(self, target_rate: int) -> np.ndarray:
+        """Reamostra com o filtro polifásico em cache e registra o tempo."""
+        start = time.perf_counter()
+        audio = resample(self.audio, self.sample_rate, target_rate)
+        self.timings.resample += time.perf_counter() - start
+        return audio
+
+
+class StreamingAudioDecoder:
+    """Escolhe o decodificador pelos primeiros bytes e o alimenta bloco a bloco."""
+
+    def __init__(self, ffmpeg: Optional[str] = None):
+        self.ffmpeg = ffmpeg if ffmpeg is not None else shutil.which("ffmpeg")
+        self.timings = DecodeTimings()
+        self._head = bytearray()
+        self._decoder = None
+        self.finished = False
+
+    @property
+    def kind(self) -> Optional[str]:
+        return {WavStreamParser: "wav", FfmpegDecoder: "ffmpeg",
+                BufferedDecoder: "buffered"}.get(type(self._decoder))
+
+    def _select(self, head: bytes):
+        if head[:4] in (b"RIFF", b"RF64") and head[8:12] == b"WAVE":
+            return WavStreamParser()
+        if self.ffmpeg:
+            return FfmpegDecoder(self.ffmpeg)
+        return BufferedDecoder()
+
+    def feed(self, data: bytes):
+        if not data:
+            return
+        start = time.perf_counter()
+        self.timings.bytes += len(data)
+        if self._decoder is None:
+            self._head += data
+            if len(self._head) < _SNIFF_BYTES:
+                return
+            data, self._head = bytes(self._head), bytearray()
+            self._decoder = self._select(data)
+        self._decoder.feed(data)
+        self.timings.decode += time.perf_counter() - start
+
+    def finish(self) -> DecodedAudio:
+        start = time.perf_counter()
+        if self._decoder is None:
+            if not self._head:
+                raise AudioDecodeError("Arquivo de áudio vazio")
+            self._decoder = self._select(bytes(self._head))
+            self._decoder.feed(bytes(self._head))
+        audio = self._decoder.finish()
+        self.timings.decode += time.perf_counter() - start
+        if not self._decoder.sample_rate:
+            raise AudioDecodeError("Taxa de amostragem desconhecida")
+        self.finished = True
+        return DecodedAudio(audio, int(self._decoder.sample_rate), self.timings, self.kind)
+
+    def abort(self):
+        """Libera o subprocesso de um upload interrompido (nada a fazer após ``finish``)."""
+        if not self.finished and isinstance(self._decoder, FfmpegDecoder):
+            self._decoder.abort()
+
+
+class MultipartAudioReader:
+    """
+    Extrai um campo de um corpo ``multipart/form-data`` sem acumulá-lo:
+    os bytes do campo vão direto para o ``StreamingAudioDecoder``.
+    """
+
+    def __init__(self, content_type: str, decoder: StreamingAudioDecoder, field: str = "audio"):
+        from python_multipart.multipart import MultipartParser, parse_options_header
+
+        _, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise AudioDecodeError("multipart sem boundary")
+        self.decoder = decoder
+        self.field = field.encode()
+        self.found = False
+        self._header_name = bytearray()
+        self._header_value = bytearray()
+        self._current = False
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda d, a, b: self._header_name.extend(d[a:b]),
+            "on_header_value": lambda d, a, b: self._header_value.extend(d[a:b]),
+            "on_header_end": self._on_header_end,
+            "on_part_data": self._on_part_data,
+        })
+
+    def _on_part_begin(self):
+        self._current = False
+
+    def _on_header_end(self):
+        from python_multipart.multipart import parse_options_header
+
+        if bytes(self._header_name).lower() == b"content-disposition":
+            _, options = parse_options_header(bytes(self._header_value))
+            self._current = options.get(b"name") == self.field
+            self.found |= self._current
+        self._header_name.clear()
+        self._header_value.clear()
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._current:
+            self.decoder.feed(memoryview(data)[start:end])
+
+    def feed(self, chunk: bytes):
+        try:
+            self._parser.write(chunk)
+        except AudioDecodeError:
+            raise
+        except ValueError as e:  # MultipartParseError
+            raise AudioDecodeError(f"multipart inválido: {e}") from e
+
+    def finish(self) -> DecodedAudio:
+        try:
+            self._parser.finalize()
+        except ValueError as e:
+            raise AudioDecodeError(f"multipart inválido: {e}") from e
+        if not self.found:
+            raise AudioDecodeError(f"Campo '{self.field.decode()}' ausente")
+        return self.decoder.finish()
+
+
+def decode_stream(chunks, ffmpeg: Optional[str] = None) -> DecodedAudio:
+    """Decodifica um iterável de blocos de bytes."""
+    decoder = StreamingAudioDecoder(ffmpeg)
+    for chunk in chunks:
+        decoder.feed(chunk)
+    return decoder.finish()
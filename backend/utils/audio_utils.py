@@ -0,0 +1,355 @@
+"""
+Audio Utils - Aurora EchoTales
+==============================
+Utilitários de áudio baseados em pydub (efeitos, mixagem, conversão).
+
+O pydub (e a busca pelo ffmpeg, com o aviso quando não o encontra) só é
+importado quando um ``AudioSegment`` é de fato usado; as funções em
+NumPy (WAV, mixagem, reamostragem) não dependem dele.
+"""
+
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Union
+
+import numpy as np
+
+from backend import config
+
+if TYPE_CHECKING:
+    from pydub import AudioSegment
+
+
+def _audio_segment():
+    from pydub import AudioSegment
+
+    return AudioSegment
+
+
+def create_silence(duration_ms: int, sample_rate: int = config.SAMPLE_RATE) -> "AudioSegment":
+    """Cria um segmento de silêncio com a duração indicada."""
+    return _audio_segment().silent(duration=duration_ms, frame_rate=sample_rate)
+
+
+def numpy_to_segment(samples: np.ndarray, sample_rate: int = config.SAMPLE_RATE) -> "AudioSegment":
+    """Converte um array float (-1..1) mono em ``AudioSegment`` de 16 bits."""
+    samples = np.clip(np.asarray(samples, dtype=np.float32), -1.0, 1.0)
+    pcm = (samples * 32767).astype(np.int16)
+    return _audio_segment()(
+        pcm.tobytes(),
+        frame_rate=sample_rate,
+        sample_width=2,
+        channels=1,
+    )
+
+
+def segment_to_numpy(segment: "AudioSegment") -> np.ndarray:
+    """Converte um ``AudioSegment`` em array float32 mono (-1..1)."""
+    segment = segment.set_channels(1)
+    samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+    return samples / float(1 << (8 * segment.sample_width - 1))
+
+
+class AudioProcessor:
+    """
+    Processamento de áudio (efeitos e mixagem).
+
+    Aceita ``AudioSegment`` do pydub ou arrays float32 mono; arrays
+    seguem o caminho vetorizado (``MixEngine``), sem cópias por efeito.
+    """
+
+    def __init__(self, sample_rate: int = config.SAMPLE_RATE,
+                 block_frames: int = config.MIX_BLOCK_FRAMES):
+        from backend.utils.audio_mixer import MixEngine
+
+        self.sample_rate = sample_rate
+        self.engine = MixEngine(sample_rate, block_frames)
+
+    def load_audio(self, path: Union[str, Path]) -> "AudioSegment":
+        """Carrega um arquivo de áudio e converte para a taxa padrão."""
+        segment = _audio_segment().from_file(str(path))
+        return segment.set_frame_rate(self.sample_rate).set_channels(config.AUDIO_CHANNELS)
+
+    def save_audio(self, segment: "AudioSegment", path: Union[str, Path],
+                   format: str = "wav") -> Path:
+        """Salva o segmento em disco."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        segment.export(str(path), format=format)
+        return path
+
+    def get_duration_seconds(self, segment: Union["AudioSegment", np.ndarray]) -> float:
+        """Duração do segmento em segundos."""
+        if isinstance(segment, np.ndarray):
+            return len(segment) / self.sample_rate
+        return len(segment) / 1000.0
+
+    def apply_effects(self, segment: Union["AudioSegment", np.ndarray], fade_in_ms: int = 0,
+                      fade_out_ms: int = 0, normalize: bool = False,
+                      gain_db: float = 0.0) -> Union["AudioSegment", np.ndarray]:
+        """Aplica fades, ganho e normalização."""
+        if isinstance(segment, np.ndarray):
+            return self._apply_effects_array(segment, fade_in_ms, fade_out_ms, normalize, gain_db)
+        result = segment
+        if gain_db:
+            result = result.apply_gain(gain_db)
+        if fade_in_ms > 0:
+            result = result.fade_in(fade_in_ms)
+        if fade_out_ms > 0:
+            result = result.fade_out(fade_out_ms)
+        if normalize:
+            from pydub import effects
+
+            result = effects.normalize(result)
+        return result
+
+    def _apply_effects_array(self, samples: np.ndarray, fade_in_ms: int, fade_out_ms: int,
+                             normalize: bool, gain_db: float) -> np.ndarray:
+        # Uma cópia (a entrada não é alterada); o resto é in-place
+        out = np.array(samples, dtype=np.float32).reshape(-1)
+        if gain_db:
+            out *= np.float32(10 ** (gain_db / 20))
+        n = min(int(fade_in_ms * self.sample_rate / 1000), len(out))
+        if n > 0:
+            out[:n] *= np.linspace(0.0, 1.0, n, dtype=np.float32)
+        n = min(int(fade_out_ms * self.sample_rate / 1000), len(out))
+        if n > 0:
+            out[len(out) - n:] *= np.linspace(1.0, 0.0, n, dtype=np.float32)
+        if normalize and len(out):
+            # Mesmo alvo do ``pydub.effects.normalize`` (0.1 dB abaixo do máximo)
+            peak = float(np.max(np.abs(out)))
+            if peak > 0:
+                out *= np.float32(10 ** (-0.1 / 20) / peak)
+        return out
+
+    def mix_audio(self, segments: List[Union["AudioSegment", np.ndarray]], mode: str = "sequential",
+                  crossfade_ms: int = 0) -> Union["AudioSegment", np.ndarray]:
+        """
+        Combina vários segmentos.
+
+        Args:
+            segments: Segmentos a combinar (todos ``AudioSegment`` ou todos arrays).
+            mode: "sequential" (concatena) ou "overlay" (sobrepõe ao primeiro).
+            crossfade_ms: Crossfade entre segmentos no modo sequencial.
+        """
+        if segments and all(isinstance(s, np.ndarray) for s in segments):
+            return self._mix_arrays(segments, mode, crossfade_ms)
+        if not segments:
+            return create_silence(0, self.sample_rate)
+
+        if mode == "sequential":
+            result = segments[0]
+            for segment in segments[1:]:
+                fade = min(crossfade_ms, len(result), len(segment))
+                result = result.append(segment, crossfade=fade)
+            return result
+
+        if mode == "overlay":
+            result = segments[0]
+            for segment in segments[1:]:
+                result = result.overlay(segment)
+            return result
+
+        raise ValueError(f"Modo de mixagem desconhecido: {mode}")
+
+    def _mix_arrays(self, segments: List[np.ndarray], mode: str, crossfade_ms: int) -> np.ndarray:
+        segments = [np.asarray(s, dtype=np.float32).reshape(-1) for s in segments]
+        if mode == "overlay":
+            # Como no pydub: duração do primeiro segmento
+            out = segments[0].copy()
+            for segment in segments[1:]:
+                n = min(len(out), len(segment))
+                out[:n] += segment[:n]
+            return out
+        if mode != "sequential":
+            raise ValueError(f"Modo de mixagem desconhecido: {mode}")
+
+        # Saída alocada uma vez; cada segmento é somado na sua posição
+        fades, total = [], len(segments[0])
+        for prev, segment in zip(segments, segments[1:]):
+            fade = min(int(crossfade_ms * self.sample_rate / 1000), len(prev), len(segment))
+            fades.append(fade)
+            total += len(segment) - fade
+        out = np.zeros(total, dtype=np.float32)
+        out[:len(segments[0])] = segments[0]
+        pos = len(segments[0])
+        for fade, segment in zip(fades, segments[1:]):
+            start = pos - fade
+            if fade:
+                ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+                out[start:pos] *= ramp[::-1]
+                out[start:pos] += segment[:fade] * ramp
+            out[pos:start + len(segment)] = segment[fade:]
+            pos = start + len(segment)
+        return out
+
+    def mix_narration(self, voice: np.ndarray, bed: np.ndarray, **params) -> np.ndarray:
+        """Narração sobre a trilha em loop (``params``: campos de ``MixParams``)."""
+        from backend.utils.audio_mixer import MixParams
+
+        return self.engine.overlay(voice, bed, MixParams(**params))[0]
+
+    def mix_files(self, voice_path: Union[str, Path], bed_path: Union[str, Path],
+                  output_path: Union[str, Path], **params) -> dict:
+        """Como ``mix_narration``, de arquivo para arquivo com memória constante."""
+        from backend.utils.audio_mixer import MixParams
+
+        return self.engine.mix_files(voice_path, bed_path, output_path,
+                                     MixParams(**params)).to_dict()
+
+
+# ============================================================
+# 📡 Streaming
+# ============================================================
+
+def float_to_pcm16(samples: np.ndarray) -> bytes:
+    """Converte float (-1..1) em bytes PCM 16 bits little-endian."""
+    samples = np.clip(np.asarray(samples, dtype=np.float32), -1.0, 1.0)
+    return (samples * 32767).astype("<i2").tobytes()
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Codifica áudio float mono como WAV PCM 16 bits completo."""
+    pcm = float_to_pcm16(samples)
+    return wav_header(sample_rate, data_size=len(pcm)) + pcm
+
+
+def wav_header(sample_rate: int, data_size: int, channels: int = 1,
+               bits_per_sample: int = 16) -> bytes:
+    """Cabeçalho WAV PCM para ``data_size`` bytes de amostras."""
+    byte_rate = sample_rate * channels * bits_per_sample // 8
+    block_align = channels * bits_per_sample // 8
+    return (
+        b"RIFF" + struct.pack("<I", min(36 + data_size, 0xFFFFFFFF)) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate,
+                                byte_rate, block_align, bits_per_sample)
+        + b"data" + struct.pack("<I", min(data_size, 0xFFFFFFFF))
+    )
+
+
+def wav_stream_header(sample_rate: int, channels: int = 1, bits_per_sample: int = 16) -> bytes:
+    """
+    Cabeçalho WAV para streaming (tamanho desconhecido).
+
+    Os campos de tamanho recebem o valor máximo, convenção aceita por
+    navegadores e ffmpeg para WAV de comprimento indeterminado.
+    """
+    return wav_header(sample_rate, 0xFFFFFFFF, channels, bits_per_sample)
+
+
+class StreamingCrossfader:
+    """
+    Une blocos de áudio com crossfade equal-power, sem conhecer o total.
+
+    A cauda de cada bloco fica retida até a chegada do próximo, para ser
+    mesclada com o início dele. ``flush`` emite a última cauda.
+    """
+
+    def __init__(self, sample_rate: int, crossfade_ms: int = 40):
+        self.crossfade = int(sample_rate * crossfade_ms / 1000)
+        self._tail = np.zeros(0, dtype=np.float32)
+
+    @staticmethod
+    def _curves(n: int) -> tuple:
+        t = np.linspace(0.0, np.pi / 2, n, dtype=np.float32)
+        return np.sin(t), np.cos(t)
+
+    def push(self, block: np.ndarray) -> np.ndarray:
+        """Recebe um bloco e retorna o trecho já pronto para emissão."""
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        if self.crossfade <= 0:
+            return block
+
+        n = min(self.crossfade, len(self._tail), len(block))
+        if n:
+            fade_in, fade_out = self._curves(n)
+            head = self._tail[:len(self._tail) - n]
+            joint = self._tail[-n:] * fade_out + block[:n] * fade_in
+            body = block[n:]
+        else:
+            head, joint, body = self._tail, np.zeros(0, dtype=np.float32), block
+
+        keep = min(self.crossfade, len(body))
+        self._tail = body[len(body) - keep:].copy()
+        return np.concatenate([head, joint, body[:len(body) - keep]])
+
+    def flush(self) -> np.ndarray:
+        """Retorna a cauda retida (fim do stream)."""
+        tail, self._tail = self._tail, np.zeros(0, dtype=np.float32)
+        return tail
+
+
+def overlay_bed(voice: np.ndarray, bed: np.ndarray, gain_db: float = -14.0,
+                tail_s: float = 2.0, sample_rate: int = config.SAMPLE_RATE,
+                duck_db: float = 0.0) -> np.ndarray:
+    """
+    Coloca uma trilha (em loop) sob a narração, com a cauda em fade out.
+
+    Ambos os sinais devem estar no mesmo sample rate. O resultado é
+    limitado a [-1, 1] por normalização de pico apenas se necessário.
+    ``duck_db`` < 0 abaixa a trilha enquanto há voz (ver ``MixEngine``).
+    """
+    from backend.utils.audio_mixer import MixEngine, MixParams
+
+    params = MixParams(music_gain_db=gain_db, duck_db=duck_db, tail_s=tail_s, normalize="clip")
+    return MixEngine(sample_rate).overlay(voice, bed, params)[0]
+
+
+# ============================================================
+# 🎙️ Entrada
+# ============================================================
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    """Média dos canais (frames, canais) → mono float32."""
+    samples = np.asarray(samples, dtype=np.float32)
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+@lru_cache(maxsize=16)
+def get_resampler(orig_rate: int, target_rate: int) -> tuple:
+    """
+    Fatores (up, down) e filtro FIR do ``resample_poly`` para um par de
+    taxas, calculados uma vez por taxa de origem (o ``firwin`` é a parte
+    cara em áudios curtos). Mesmo filtro padrão do SciPy: Kaiser β=5.
+    """
+    from math import gcd
+
+    from scipy.signal import firwin
+
+    g = gcd(orig_rate, target_rate)
+    up, down = target_rate // g, orig_rate // g
+    max_rate = max(up, down)
+    taps = firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    taps.setflags(write=False)
+    return up, down, taps
+
+
+def resample(samples: np.ndarray, orig_rate: int, target_rate: int) -> np.ndarray:
+    """Reamostragem polifásica (anti-aliasing incluso) com filtro em cache."""
+    if orig_rate == target_rate:
+        return np.asarray(samples, dtype=np.float32)
+    from scipy.signal import resample_poly
+
+    up, down, taps = get_resampler(orig_rate, target_rate)
+    return resample_poly(samples, up, down, window=taps).astype(np.float32, copy=False)
+
+
+def decode_audio_bytes(data: bytes) -> tuple:
+    """
+    Decodifica um upload de áudio (WAV/FLAC/OGG via soundfile; demais
+    formatos, como webm/opus do MediaRecorder, via pydub/ffmpeg).
+
+    Returns:
+        tuple: (áudio float32 mono, sample_rate)
+    """
+    import io
+
+    import soundfile as sf
+
+    try:
+        samples, sample_rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=False)
+        return to_mono(samples), int(sample_rate)
+    except RuntimeError:
+        segment = _audio_segment().from_file(io.BytesIO(data))
+        return segment_to_numpy(segment), segment.frame_rate
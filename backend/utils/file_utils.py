@@ -0,0 +1,56 @@
+"""
+File Utils - Aurora EchoTales
+=============================
+Gravação atômica e hash de arquivos, compartilhados pelos caches e stores.
+
+``atomic_write`` grava num temporário ``<nome>XXXX.tmp`` no mesmo
+diretório do destino e só então faz ``os.replace``: quem lê vê o
+arquivo antigo ou o novo inteiro, nunca um pela metade. Os temporários
+órfãos de uma queda terminam em ``.tmp`` e podem ser varridos por quem
+for dono do diretório.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Union
+
+HASH_CHUNK = 8 * 1024 * 1024
+
+
+def atomic_write(path: Path, data: Union[bytes, Callable[[BinaryIO], object]],
+                 fsync: bool = True):
+    """
+    Grava ``path`` atomicamente.
+
+    Args:
+        path: Destino (o diretório é criado se faltar)
+        data: Bytes, ou uma função que recebe o arquivo aberto e escreve nele
+        fsync: Força os dados ao disco antes da troca de nome
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if callable(data):
+                data(f)
+            else:
+                f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 (hex) do arquivo, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,161 @@
+"""
+Import Profile - Aurora EchoTales
+=================================
+Custo de importação por módulo no início do servidor.
+
+Roda ``python -X importtime -c "import <módulo>"`` em um processo novo
+(o ``sys.modules`` do chamador não interfere) e transforma a saída em
+registros por módulo e totais por pacote de topo:
+
+    python -m backend.utils.import_profile                  # backend.main
+    python -m backend.utils.import_profile backend --top 15
+    python -m backend.utils.import_profile --budget 1.5     # sai com 1 se exceder
+
+As bibliotecas em ``DEFERRED_MODULES`` só devem aparecer quando um
+estágio carrega seu modelo; ``ImportProfile.deferred_violations`` lista
+as que vazaram para a importação.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from backend import config
+
+DEFERRED_MODULES = (
+    "torch",
+    "transformers",
+    "diffusers",
+    "whisper",
+    "faster_whisper",
+    "TTS",
+    "llama_cpp",
+    "scipy",
+    "pydub",
+    "soundfile",
+    "PIL",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+@dataclass
+class ImportRecord:
+    """Um módulo importado: tempo próprio e acumulado (com dependências)."""
+
+    module: str
+    self_s: float
+    cumulative_s: float
+    depth: int
+
+    @property
+    def package(self) -> str:
+        return self.module.split(".", 1)[0]
+
+
+@dataclass
+class ImportProfile:
+    target: str
+    records: List[ImportRecord]
+
+    @property
+    def total_s(self) -> float:
+        """Tempo acumulado do módulo alvo (último registro no topo)."""
+        for record in reversed(self.records):
+            if record.module == self.target:
+                return record.cumulative_s
+        return sum(r.self_s for r in self.records)
+
+    @property
+    def modules(self) -> List[str]:
+        return [r.module for r in self.records]
+
+    def by_package(self) -> Dict[str, float]:
+        """Soma dos tempos próprios por pacote de topo, do mais caro ao mais barato."""
+        totals: Dict[str, float] = {}
+        for record in self.records:
+            totals[record.package] = totals.get(record.package, 0.0) + record.self_s
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def top(self, n: int = 20) -> List[ImportRecord]:
+        """Módulos com maior tempo acumulado."""
+        return sorted(self.records, key=lambda r: r.cumulative_s, reverse=True)[:n]
+
+    def deferred_violations(self, deferred: Sequence[str] = DEFERRED_MODULES) -> List[str]:
+        """Bibliotecas adiadas que foram importadas mesmo assim."""
+        loaded = {r.package for r in self.records}
+        return [name for name in deferred if name in loaded]
+
+    def to_dict(self) -> dict:
+        return {
+            "target": self.target,
+            "total_s": self.total_s,
+            "modules": len(self.records),
+            "by_package": self.by_package(),
+            "deferred_violations": self.deferred_violations(),
+        }
+
+    def render(self, top: int = 20) -> str:
+        lines = [f"⏱️  import {self.target}: {self.total_s * 1000:.0f}ms "
+                 f"({len(self.records)} módulos)", "", "Por pacote (tempo próprio):"]
+        for package, seconds in list(self.by_package().items())[:top]:
+            lines.append(f"   {package:<32} {seconds * 1000:>8.1f}ms")
+        lines += ["", "Por módulo (acumulado):"]
+        for record in self.top(top):
+            lines.append(f"   {record.module:<48} {record.cumulative_s * 1000:>8.1f}ms "
+                         f"(próprio {record.self_s * 1000:.1f}ms)")
+        return "\n".join(lines)
+
+
+def parse_importtime(output: str, target: str) -> ImportProfile:
+    """Interpreta a saída de ``-X importtime`` (stderr)."""
+    records = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us) / 1e6, int(cumulative_us) / 1e6,
+                                        len(indent) // 2))
+    return ImportProfile(target, records)
+
+
+def profile_imports(target: str = "backend.main", python: str = sys.executable,
+                    timeout: float = 120.0) -> ImportProfile:
+    """Importa ``target`` em um processo novo e mede cada módulo."""
+    result = subprocess.run([python, "-X", "importtime", "-c", f"import {target}"],
+                            capture_output=True, text=True, timeout=timeout,
+                            cwd=config.PROJECT_ROOT)
+    if result.returncode != 0:
+        errors = [l for l in result.stderr.splitlines() if not l.startswith("import time:")]
+        raise RuntimeError(f"Falha ao importar {target}:\n" + "\n".join(errors[-10:]))
+    return parse_importtime(result.stderr, target)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Custo de importação por módulo")
+    parser.add_argument("target", nargs="?", default="backend.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=config.STARTUP_IMPORT_BUDGET_S,
+                        help="Orçamento em segundos (padrão: STARTUP_IMPORT_BUDGET_S)")
+    args = parser.parse_args(argv)
+
+    profile = profile_imports(args.target)
+    print(profile.render(args.top))
+    violations = profile.deferred_violations()
+    ok = True
+    if violations:
+        print(f"\n❌ Importadas antes do uso: {', '.join(violations)}")
+        ok = False
+    if profile.total_s > args.budget:
+        print(f"\n❌ {profile.total_s:.2f}s acima do orçamento de {args.budget:.2f}s")
+        ok = False
+    if ok:
+        print(f"\n✅ Dentro do orçamento de {args.budget:.2f}s")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
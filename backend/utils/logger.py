@@ -0,0 +1,296 @@
+"""
+Logger - Aurora EchoTales
+=========================
+Logger central do backend, com saída no console e em ``logs/``.
+
+Quem loga só enfileira o registro (``QueueHandler``); uma thread em
+segundo plano (``QueueListener``) formata e grava no console e em
+``logs/<nome>.jsonl``, uma linha JSON por registro, com rotação por
+tamanho. Com a fila cheia o registro é descartado e contado, nunca
+bloqueia uma requisição.
+
+A formatação é preguiçosa: a mensagem (``"... %.2fs", valor``) só é
+montada na thread de gravação, e nada é montado se o nível estiver
+filtrado. Argumentos nomeados extras viram campos do JSON::
+
+    logger.info("🎵 Música: %.1fs", duration, stage="music", duration_s=elapsed)
+
+``log_context`` associa campos (``request_id``, ``story_id``...) a tudo
+que for logado dentro dele, inclusive em threads que herdam o contexto;
+``record_stage`` acumula a duração de cada estágio na requisição atual.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from backend import config
+
+_PASSTHROUGH = ("exc_info", "stack_info", "stacklevel", "extra")
+
+_context: ContextVar[dict] = ContextVar("aurora_log_context", default={})
+
+
+@contextmanager
+def log_context(**fields):
+    """Campos anexados a todos os registros emitidos dentro do bloco."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield _context.get()
+    finally:
+        _context.reset(token)
+
+
+def current_context() -> dict:
+    return _context.get()
+
+
+def record_stage(name: str, seconds: float):
+    """Soma a duração de um estágio na requisição atual (se houver uma)."""
+    stages = _context.get().get("stages")
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro: mensagem, contexto e campos."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        # RotatingFileHandler formata duas vezes (tamanho para a rotação e gravação)
+        line = getattr(record, "_json_line", None)
+        if line is not None:
+            return line
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+            "where": f"{record.module}:{record.lineno}",
+        }
+        data.update(getattr(record, "context", None) or {})
+        data.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        record._json_line = json.dumps(data, ensure_ascii=False, default=str)
+        return record._json_line
+
+
+class _ContextFilter(logging.Filter):
+    """Copia o contexto da thread que loga (o listener roda em outra)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        if context:
+            record.context = {k: v for k, v in context.items() if k != "stages"}
+        return True
+
+
+@dataclass
+class LoggerStats:
+    enqueued: int = 0
+    dropped: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Enfileira o registro sem formatá-lo (o ``QueueHandler`` padrão monta
+    a mensagem na thread de quem loga) e descarta com a fila cheia.
+    """
+
+    def __init__(self, q: queue.Queue, stats: LoggerStats):
+        super().__init__(q)
+        self.stats = stats
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.stats.enqueued += 1
+        except queue.Full:
+            self.stats.dropped += 1
+
+
+def _log_file(name: str, logs_dir: Path) -> Path:
+    # Workers do pool gravam em arquivos próprios (rotação não é segura entre processos)
+    if multiprocessing.parent_process() is not None:
+        return logs_dir / f"{name}-{multiprocessing.current_process().pid}.jsonl"
+    return logs_dir / f"{name}.jsonl"
+
+
+class AuroraLogger:
+    """Wrapper sobre ``logging.Logger`` com helpers do projeto."""
+
+    def __init__(self, name: str = "aurora", level=config.LOG_LEVEL,
+                 log_to_file: bool = True, console: bool = config.LOG_CONSOLE,
+                 logs_dir: Path = config.LOGS_DIR, queue_size: int = config.LOG_QUEUE_SIZE):
+        self.name = name
+        self.stats = LoggerStats()
+        self.queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+        self.path: Optional[Path] = None
+        self._logger = logging.getLogger(name)
+        self._logger.setLevel(level)
+        self._logger.propagate = False
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+
+        handlers = []
+        if console:
+            text = logging.StreamHandler(sys.stdout)
+            text.setFormatter(logging.Formatter("%(asctime)s | %(levelname)-8s | %(message)s",
+                                                datefmt="%H:%M:%S"))
+            handlers.append(text)
+        if log_to_file:
+            logs_dir = Path(logs_dir)
+            logs_dir.mkdir(parents=True, exist_ok=True)
+            self.path = _log_file(name, logs_dir)
+            file_handler = logging.handlers.RotatingFileHandler(
+                self.path, maxBytes=int(config.LOG_FILE_MAX_MB * 1024**2),
+                backupCount=config.LOG_FILE_BACKUPS, encoding="utf-8")
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        handler = _QueueHandler(self.queue, self.stats)
+        handler.addFilter(_ContextFilter())
+        self._logger.addHandler(handler)
+        self._listener = logging.handlers.QueueListener(self.queue, *handlers,
+                                                        respect_handler_level=True)
+        self._listener.start()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Níveis básicos
+    # ------------------------------------------------------------
+
+    def _log(self, level: int, message: str, args: tuple, kwargs: dict):
+        if not self._logger.isEnabledFor(level):
+            return
+        options = {k: kwargs.pop(k) for k in _PASSTHROUGH if k in kwargs}
+        if kwargs:
+            options["extra"] = {**options.get("extra", {}), "fields": kwargs}
+        # Registro aponta para quem chamou, não para este módulo
+        options["stacklevel"] = options.get("stacklevel", 1) + 2
+        self._logger.log(level, message, *args, **options)
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def debug(self, message: str, *args, **kwargs):
+        self._log(logging.DEBUG, message, args, kwargs)
+
+    def info(self, message: str, *args, **kwargs):
+        self._log(logging.INFO, message, args, kwargs)
+
+    def warning(self, message: str, *args, **kwargs):
+        self._log(logging.WARNING, message, args, kwargs)
+
+    def error(self, message: str, *args, **kwargs):
+        self._log(logging.ERROR, message, args, kwargs)
+
+    def exception(self, message: str, *args, **kwargs):
+        kwargs.setdefault("exc_info", True)
+        self._log(logging.ERROR, message, args, kwargs)
+
+    # ------------------------------------------------------------
+    # Helpers do projeto
+    # ------------------------------------------------------------
+
+    def log_section(self, title: str):
+        """Registra um cabeçalho de seção."""
+        if not self._logger.isEnabledFor(logging.INFO):
+            return
+        self._logger.info("=" * 60)
+        self._logger.info("📌 %s", title)
+        self._logger.info("=" * 60)
+
+    def log_resource_usage(self, vram_gb: float, cpu_percent: float, ram_gb: float):
+        """Registra uso atual de recursos."""
+        self._log(logging.INFO, "📊 Recursos | VRAM: %.2fGB | CPU: %.1f%% | RAM: %.2fGB",
+                  (vram_gb, cpu_percent, ram_gb),
+                  {"vram_gb": vram_gb, "cpu_percent": cpu_percent, "ram_gb": ram_gb})
+
+    def log_model_load(self, model_name: str, load_time: float, vram_gb: Optional[float] = None):
+        """Registra o carregamento de um modelo."""
+        if vram_gb is None:
+            self._log(logging.INFO, "🤖 Modelo '%s' carregado em %.2fs", (model_name, load_time),
+                      {"model": model_name, "duration_s": load_time})
+        else:
+            self._log(logging.INFO, "🤖 Modelo '%s' carregado em %.2fs | VRAM: %.2fGB",
+                      (model_name, load_time, vram_gb),
+                      {"model": model_name, "duration_s": load_time, "vram_gb": vram_gb})
+
+    def log_timing(self, label: str, seconds: float):
+        """Registra a duração de uma etapa."""
+        self._log(logging.INFO, "⏱️  %s: %.2fs", (label, seconds),
+                  {"stage": label, "duration_s": seconds})
+
+    # ------------------------------------------------------------
+    # Fila
+    # ------------------------------------------------------------
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera a thread de gravação esvaziar a fila."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.002)
+        for handler in self._listener.handlers:
+            handler.flush()
+        return True
+
+    def close(self):
+        """Grava o que estiver na fila e encerra a thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+    def get_stats(self) -> dict:
+        data = self.stats.to_dict()
+        data["queued"] = self.queue.qsize()
+        data["file"] = str(self.path) if self.path else None
+        return data
+
+
+_loggers = {}
+_loggers_lock = threading.Lock()
+
+
+def get_logger(name: str = "aurora") -> AuroraLogger:
+    """Retorna (e cria, se necessário) o logger nomeado."""
+    logger = _loggers.get(name)
+    if logger is None:
+        with _loggers_lock:
+            logger = _loggers.get(name)
+            if logger is None:
+                logger = _loggers[name] = AuroraLogger(name)
+    return logger
+
+
+@atexit.register
+def shutdown_logging():
+    """Esvazia as filas de todos os loggers (fim do processo)."""
+    for logger in list(_loggers.values()):
+        logger.close()
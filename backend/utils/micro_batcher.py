@@ -0,0 +1,113 @@
+"""
+Micro Batcher - Aurora EchoTales
+================================
+Fila com um worker dedicado que agrupa pedidos concorrentes.
+
+O worker bloqueia pelo primeiro pedido, junta os que chegarem em até
+``max_wait_s`` (no máximo ``max_batch_size``) e entrega o lote a
+``process``; cada pedido tem um ``Future`` que ``process`` resolve. Se
+``process`` falhar, os pedidos ainda pendentes do lote recebem a exceção.
+Com ``group_by``, o lote é dividido por chave e ``process`` roda uma vez
+por grupo (ex.: um laço de denoising por modo de scheduler).
+
+Usado pelo analisador de emoção de texto e pelo gerador de música::
+
+    batcher = MicroBatcher(self._process, "text-emotion", max_batch_size=32, max_wait_s=0.005)
+    emotion = batcher.submit(text).result()
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from backend.utils.logger import get_logger
+
+
+@dataclass
+class BatchItem:
+    """Um pedido na fila: o que processar, onde entregar e desde quando espera."""
+
+    payload: Any
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """Worker de micro-batching (iniciado no primeiro pedido)."""
+
+    def __init__(self, process: Callable[[List[BatchItem]], None], name: str,
+                 max_batch_size: int, max_wait_s: float,
+                 group_by: Optional[Callable[[Any], Hashable]] = None):
+        self.process = process
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self.group_by = group_by
+        self.logger = get_logger()
+        self._queue: "queue.Queue[Optional[BatchItem]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, payload: Any) -> Future:
+        """Enfileira um pedido; o Future resolve com o que ``process`` entregar."""
+        self._ensure_worker()
+        item = BatchItem(payload)
+        self._queue.put(item)
+        return item.future
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def shutdown(self):
+        """Encerra o worker após esvaziar a fila."""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._worker.start()
+
+    def _collect(self) -> Optional[List[BatchItem]]:
+        """Bloqueia pelo primeiro pedido e junta os que chegarem em ``max_wait``."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            groups: Dict[Hashable, List[BatchItem]] = {}
+            for item in batch:
+                key = self.group_by(item.payload) if self.group_by is not None else None
+                groups.setdefault(key, []).append(item)
+            for items in groups.values():
+                try:
+                    self.process(items)
+                except Exception as e:
+                    self.logger.error("❌ Erro no lote de %s: %s", self.name, e)
+                    for item in items:
+                        if not item.future.done():
+                            item.future.set_exception(e)
@@ -0,0 +1,227 @@
+"""
+Resource Manager - Aurora EchoTales
+===================================
+Monitoramento de CPU, RAM e VRAM e limpeza de memória entre estágios.
+
+Em máquinas sem GPU (ou sem PyTorch instalado) as métricas de VRAM
+ficam zeradas e o restante continua funcionando normalmente.
+"""
+
+import functools
+import gc
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Iterator, Optional
+
+import psutil
+
+from backend import config
+from backend.utils.logger import get_logger
+
+
+@functools.lru_cache(maxsize=None)
+def _get_torch():
+    """Importa o PyTorch sob demanda; retorna ``None`` se indisponível."""
+    try:
+        import torch
+        return torch
+    except ImportError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def cuda_available() -> bool:
+    """Indica se há GPU CUDA utilizável (detectado uma vez por processo)."""
+    torch = _get_torch()
+    return bool(torch is not None and torch.cuda.is_available())
+
+
+@dataclass
+class ResourceSnapshot:
+    """Fotografia do uso de recursos em um instante."""
+
+    timestamp: float
+    cpu_percent: float
+    ram_used_gb: float
+    ram_total_gb: float
+    process_rss_gb: float
+    vram_used_gb: float = 0.0
+    vram_total_gb: float = 0.0
+    gpu_available: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class MemoryPeak:
+    """Pico de memória acima da linha de base durante um trecho de código."""
+
+    ram_mb: float = 0.0
+    vram_mb: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@contextmanager
+def measure_peak_memory(interval_s: float = 0.005) -> Iterator[MemoryPeak]:
+    """
+    Mede o pico de RSS do processo (amostrado em thread) e de VRAM alocada.
+
+    O RSS cobre alocações nativas (NumPy, PyTorch em CPU, CTranslate2) que
+    o ``tracemalloc`` não enxerga; a VRAM usa o contador de pico do PyTorch.
+    """
+    peak = MemoryPeak()
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    highest = baseline
+    stop = threading.Event()
+
+    def sample():
+        nonlocal highest
+        while not stop.wait(interval_s):
+            highest = max(highest, process.memory_info().rss)
+
+    gpu = cuda_available()
+    if gpu:
+        torch = _get_torch()
+        torch.cuda.reset_peak_memory_stats()
+        vram_baseline = torch.cuda.memory_allocated()
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield peak
+    finally:
+        stop.set()
+        sampler.join()
+        highest = max(highest, process.memory_info().rss)
+        peak.ram_mb = (highest - baseline) / 1024**2
+        if gpu:
+            peak.vram_mb = (torch.cuda.max_memory_allocated() - vram_baseline) / 1024**2
+
+
+class ResourceManager:
+    """Coleta snapshots de recursos e libera memória entre estágios."""
+
+    def __init__(self, vram_limit_gb: float = config.VRAM_LIMIT_GB, history_size: int = 100):
+        self.vram_limit_gb = vram_limit_gb
+        self.history = deque(maxlen=history_size)
+        self.logger = get_logger()
+        self._process = psutil.Process()
+
+    def get_snapshot(self) -> ResourceSnapshot:
+        """Captura o uso atual de CPU, RAM e VRAM."""
+        memory = psutil.virtual_memory()
+        snapshot = ResourceSnapshot(
+            timestamp=time.time(),
+            cpu_percent=psutil.cpu_percent(interval=None),
+            ram_used_gb=memory.used / 1024**3,
+            ram_total_gb=memory.total / 1024**3,
+            process_rss_gb=self._process.memory_info().rss / 1024**3,
+        )
+
+        if cuda_available():
+            torch = _get_torch()
+            snapshot.gpu_available = True
+            snapshot.vram_used_gb = torch.cuda.memory_allocated(0) / 1024**3
+            snapshot.vram_total_gb = torch.cuda.get_device_properties(0).total_memory / 1024**3
+
+        self.history.append(snapshot)
+        return snapshot
+
+    def latest(self) -> ResourceSnapshot:
+        """Última amostra do amostrador em segundo plano, sem consultar o sistema."""
+        from backend.utils.resource_sampler import get_resource_sampler
+        sampler = get_resource_sampler()
+        snapshot = sampler.latest() if sampler.running else None
+        return snapshot if snapshot is not None else self.get_snapshot()
+
+    def clear_memory(self):
+        """Força garbage collection e esvazia o cache da GPU."""
+        gc.collect()
+        if cuda_available():
+            torch = _get_torch()
+            torch.cuda.empty_cache()
+            torch.cuda.ipc_collect()
+
+    def check_vram_limit(self, required_gb: float = 0.0,
+                         limit_gb: Optional[float] = None) -> bool:
+        """
+        Verifica se o uso de VRAM (mais ``required_gb``) cabe no limite.
+
+        Returns:
+            bool: True se estiver dentro do limite.
+        """
+        limit = limit_gb if limit_gb is not None else self.vram_limit_gb
+        snapshot = self.get_snapshot()
+        projected = snapshot.vram_used_gb + required_gb
+
+        if projected > limit:
+            self.logger.warning("⚠️ VRAM projetada %.2fGB excede o limite de %.2fGB",
+                                projected, limit)
+            return False
+        if projected > limit * config.VRAM_WARNING_RATIO:
+            self.logger.warning("⚠️ VRAM próxima do limite: %.2f/%.2fGB", projected, limit)
+        return True
+
+    def get_peak_usage(self) -> dict:
+        """Retorna os picos observados no histórico."""
+        if not self.history:
+            return {"vram_gb": 0.0, "ram_gb": 0.0, "cpu_percent": 0.0}
+        return {
+            "vram_gb": max(s.vram_used_gb for s in self.history),
+            "ram_gb": max(s.ram_used_gb for s in self.history),
+            "cpu_percent": max(s.cpu_percent for s in self.history),
+        }
+
+    def print_summary(self):
+        """Imprime o estado atual e os picos de uso."""
+        snapshot = self.get_snapshot()
+        peak = self.get_peak_usage()
+
+        print("\n" + "=" * 60)
+        print("📊 RESUMO DE RECURSOS")
+        print("=" * 60)
+        print(f"🖥️  CPU:  {snapshot.cpu_percent:.1f}%")
+        print(f"💾 RAM:  {snapshot.ram_used_gb:.2f}/{snapshot.ram_total_gb:.2f} GB "
+              f"(processo: {snapshot.process_rss_gb:.2f} GB)")
+        if snapshot.gpu_available:
+            print(f"🎮 VRAM: {snapshot.vram_used_gb:.2f}/{snapshot.vram_total_gb:.2f} GB "
+                  f"(limite: {self.vram_limit_gb:.1f} GB)")
+        else:
+            print("🎮 VRAM: GPU não disponível")
+        print(f"\n📈 Picos | VRAM: {peak['vram_gb']:.2f}GB | RAM: {peak['ram_gb']:.2f}GB "
+              f"| CPU: {peak['cpu_percent']:.1f}%")
+
+        # Import tardio: o cache depende do logger, não do ResourceManager
+        from backend.utils.artifact_cache import get_artifact_cache_stats
+        cache = get_artifact_cache_stats()
+        if cache is not None:
+            print(f"🗃️  Cache | acertos: {cache['hit_ratio']:.0%} "
+                  f"({cache['hits']} + {cache['coalesced']} agrupados / {cache['misses']} gerados) "
+                  f"| economizado: {cache['bytes_saved'] / 1024**2:.1f}MB "
+                  f"| ocupado: {cache['size_bytes'] / 1024**2:.1f}/{cache['max_bytes'] / 1024**2:.0f}MB")
+        from backend.utils.resource_sampler import get_resource_sampler
+        for name, span in get_resource_sampler().span_stats().items():
+            print(f"📍 {name:<16} {span['count']:>4}x | {span['total_s']:7.1f}s | pico VRAM "
+                  f"{span['peak_vram_used_gb']:.2f}GB | pico RSS {span['peak_process_rss_gb']:.2f}GB")
+        print("=" * 60 + "\n")
+
+
+_resource_manager: Optional[ResourceManager] = None
+_resource_manager_lock = threading.Lock()
+
+
+def get_resource_manager() -> ResourceManager:
+    """Retorna a instância global do ResourceManager."""
+    global _resource_manager
+    if _resource_manager is None:
+        with _resource_manager_lock:
+            if _resource_manager is None:
+                _resource_manager = ResourceManager()
+    return _resource_manager
@@ -0,0 +1,327 @@
+"""
+Resource Sampler - Aurora EchoTales
+===================================
+Amostragem de CPU/RAM/VRAM em segundo plano.
+
+Uma thread registra, a cada ``RESOURCE_SAMPLE_INTERVAL_S``, CPU, RAM do
+sistema, RSS do processo e VRAM em um buffer circular de tamanho fixo.
+O código das requisições só lê o último valor em cache (``latest()``,
+``None`` antes da primeira amostra) e nunca consulta o sistema nem chama
+``nvidia-smi``.
+
+A VRAM vem do NVML (``pynvml``) quando disponível, que enxerga também o
+que o llama.cpp aloca; senão, do contador do PyTorch; sem GPU, as
+métricas de VRAM são omitidas.
+
+Spans marcam trechos (ex.: o uso de um modelo) e recebem o pico dos
+recursos observado enquanto estavam abertos:
+
+    with get_resource_sampler().span("story"):
+        ...
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import psutil
+
+from backend import config
+from backend.utils.logger import get_logger
+from backend.utils.resource_manager import ResourceSnapshot, _get_torch
+
+FIELDS = ("timestamp", "cpu_percent", "ram_used_gb", "process_rss_gb", "vram_used_gb")
+PEAK_FIELDS = FIELDS[1:]
+
+
+class _GPUReader:
+    """Leitura de VRAM sem processos externos: NVML, PyTorch ou nada."""
+
+    def __init__(self):
+        self.source = "none"
+        self.total_gb = 0.0
+        try:
+            import pynvml
+
+            pynvml.nvmlInit()
+            self._nvml = pynvml
+            self._handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+            self.total_gb = pynvml.nvmlDeviceGetMemoryInfo(self._handle).total / 1024**3
+            self.source = "nvml"
+            return
+        except Exception:
+            pass
+        torch = _get_torch()
+        if torch is not None and torch.cuda.is_available():
+            self._torch = torch
+            self.total_gb = torch.cuda.get_device_properties(0).total_memory / 1024**3
+            self.source = "torch"
+
+    @property
+    def available(self) -> bool:
+        return self.source != "none"
+
+    def used_gb(self) -> float:
+        if self.source == "nvml":
+            return self._nvml.nvmlDeviceGetMemoryInfo(self._handle).used / 1024**3
+        if self.source == "torch":
+            return self._torch.cuda.memory_allocated(0) / 1024**3
+        return 0.0
+
+
+def system_sample(gpu: _GPUReader, process: psutil.Process) -> ResourceSnapshot:
+    """Uma leitura completa (usada pela thread de amostragem)."""
+    memory = psutil.virtual_memory()
+    return ResourceSnapshot(
+        timestamp=time.time(),
+        cpu_percent=psutil.cpu_percent(interval=None),
+        ram_used_gb=memory.used / 1024**3,
+        ram_total_gb=memory.total / 1024**3,
+        process_rss_gb=process.memory_info().rss / 1024**3,
+        vram_used_gb=gpu.used_gb(),
+        vram_total_gb=gpu.total_gb,
+        gpu_available=gpu.available,
+    )
+
+
+@dataclass
+class SpanStats:
+    """Picos atribuídos a um nome de span (acumulado entre ocorrências)."""
+
+    count: int = 0
+    total_s: float = 0.0
+    peak_cpu_percent: float = 0.0
+    peak_ram_used_gb: float = 0.0
+    peak_process_rss_gb: float = 0.0
+    peak_vram_used_gb: float = 0.0
+    last_peak_vram_used_gb: float = 0.0
+    last_peak_process_rss_gb: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ResourceSampler:
+    """Thread de amostragem com buffer circular e atribuição por span."""
+
+    def __init__(self, interval_s: float = config.RESOURCE_SAMPLE_INTERVAL_S,
+                 capacity: int = config.RESOURCE_HISTORY_SIZE,
+                 source: Optional[Callable[[], ResourceSnapshot]] = None):
+        self.interval_s = interval_s
+        self.capacity = capacity
+        self.logger = get_logger()
+
+        # A fonte padrão é montada na thread: a sondagem da GPU pode
+        # importar o PyTorch (segundos) e não deve atrasar a subida do
+        # servidor nem cair numa requisição
+        self._source = source
+        self._source_lock = threading.Lock()
+
+        self._buffer = np.zeros((capacity, len(FIELDS)), dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._total_samples = 0
+        self._latest: Optional[ResourceSnapshot] = None
+        self._spans: Dict[str, SpanStats] = {}
+        self._recent_spans: "deque[dict]" = deque(maxlen=100)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------
+    # Amostragem
+    # ------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _get_source(self) -> Callable[[], ResourceSnapshot]:
+        if self._source is None:
+            with self._source_lock:
+                if self._source is None:
+                    gpu = _GPUReader()
+                    process = psutil.Process()
+                    self._source = lambda: system_sample(gpu, process)
+        return self._source
+
+    def start(self):
+        """Inicia a thread (idempotente; retorna sem esperar a primeira amostra)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            snapshot = self.sample()
+        except Exception as e:
+            self.logger.warning("⚠️ Falha na amostragem de recursos: %s", e)
+        else:
+            gpu = "com GPU" if snapshot.gpu_available else "sem GPU (só CPU/RAM)"
+            self.logger.info("📈 Amostragem de recursos a cada %.0fms, %s",
+                             self.interval_s * 1000, gpu)
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.sample()
+            except Exception as e:
+                self.logger.warning("⚠️ Falha na amostragem de recursos: %s", e)
+
+    def sample(self) -> ResourceSnapshot:
+        """Lê os recursos e grava no buffer."""
+        snapshot = self._get_source()()
+        row = [getattr(snapshot, f) for f in FIELDS]
+        with self._lock:
+            self._buffer[self._next] = row
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self._total_samples += 1
+            self._latest = snapshot
+        return snapshot
+
+    # ------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------
+
+    def latest(self) -> Optional[ResourceSnapshot]:
+        """Última amostra (``None`` se nada foi amostrado ainda; nunca lê o sistema)."""
+        return self._latest
+
+    def _rows(self, since: Optional[float] = None) -> np.ndarray:
+        with self._lock:
+            if self._count < self.capacity:
+                rows = self._buffer[:self._count].copy()
+            else:
+                rows = np.roll(self._buffer, -self._next, axis=0)
+        if since is not None:
+            rows = rows[rows[:, 0] >= since]
+        return rows
+
+    def history(self, seconds: Optional[float] = None) -> List[dict]:
+        """Amostras em ordem cronológica (opcionalmente só as últimas ``seconds``)."""
+        since = time.time() - seconds if seconds else None
+        return [dict(zip(FIELDS, map(float, row))) for row in self._rows(since)]
+
+    # ------------------------------------------------------------
+    # Spans
+    # ------------------------------------------------------------
+
+    @contextmanager
+    def span(self, name: str):
+        """Atribui a ``name`` o pico observado enquanto o bloco executa."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self._close_span(name, start, time.time())
+
+    def _close_span(self, name: str, start: float, end: float):
+        rows = self._rows(start)
+        rows = rows[rows[:, 0] <= end]
+        peak: Optional[dict] = None
+        if len(rows):
+            peak = dict(zip(PEAK_FIELDS, map(float, rows[:, 1:].max(axis=0))))
+        elif self.running:
+            # Trecho mais curto que o intervalo: a última amostra tem no máximo um intervalo
+            latest = self.latest()
+            if latest is not None:
+                peak = {f: float(getattr(latest, f)) for f in PEAK_FIELDS}
+        elif self._source is not None:
+            # Sem a thread a última amostra pode ser antiga: lê agora
+            latest = self.sample()
+            peak = {f: float(getattr(latest, f)) for f in PEAK_FIELDS}
+        # Sem amostra recente nem fonte montada o pico não é registrado
+        # (sondar a GPU aqui importaria o PyTorch dentro da requisição)
+
+        with self._lock:
+            stats = self._spans.setdefault(name, SpanStats())
+            stats.count += 1
+            stats.total_s += end - start
+            if peak is not None:
+                for field in PEAK_FIELDS:
+                    attr = f"peak_{field}"
+                    setattr(stats, attr, max(getattr(stats, attr), peak[field]))
+                stats.last_peak_vram_used_gb = peak["vram_used_gb"]
+                stats.last_peak_process_rss_gb = peak["process_rss_gb"]
+            self._recent_spans.append({"name": name, "start": start, "end": end,
+                                       "samples": int(len(rows)), **(peak or {})})
+
+    def span_stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._spans.items()}
+
+    def recent_spans(self) -> List[dict]:
+        with self._lock:
+            return list(self._recent_spans)
+
+    # ------------------------------------------------------------
+    # Exportação
+    # ------------------------------------------------------------
+
+    def prometheus(self) -> str:
+        """Formato de exposição de texto do Prometheus (sem amostra, só spans e contadores)."""
+        latest = self.latest()
+        gpu = latest is not None and latest.gpu_available
+        gb = 1024**3
+        lines = []
+
+        def gauge(metric: str, help_text: str, values: List[tuple], kind: str = "gauge"):
+            lines.append(f"# HELP aurora_{metric} {help_text}")
+            lines.append(f"# TYPE aurora_{metric} {kind}")
+            for labels, value in values:
+                label = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else ""
+                lines.append(f"aurora_{metric}{label} {value:.6g}")
+
+        if latest is not None:
+            gauge("cpu_percent", "Uso de CPU do sistema (%).", [({}, latest.cpu_percent)])
+            gauge("ram_used_bytes", "RAM usada no sistema.", [({}, latest.ram_used_gb * gb)])
+            gauge("ram_total_bytes", "RAM total do sistema.", [({}, latest.ram_total_gb * gb)])
+            gauge("process_rss_bytes", "RSS do processo do servidor.",
+                  [({}, latest.process_rss_gb * gb)])
+            gauge("gpu_available", "1 se há GPU monitorada.", [({}, float(gpu))])
+        if gpu:
+            gauge("vram_used_bytes", "VRAM em uso.", [({}, latest.vram_used_gb * gb)])
+            gauge("vram_total_bytes", "VRAM total.", [({}, latest.vram_total_gb * gb)])
+        with self._lock:
+            total = self._total_samples
+            spans = {name: stats.to_dict() for name, stats in self._spans.items()}
+        gauge("resource_samples_total", "Amostras coletadas.", [({}, total)], kind="counter")
+
+        if spans:
+            gauge("span_count_total", "Execuções por span.",
+                  [({"span": n}, s["count"]) for n, s in spans.items()], kind="counter")
+            gauge("span_seconds_total", "Tempo acumulado por span.",
+                  [({"span": n}, s["total_s"]) for n, s in spans.items()], kind="counter")
+            gauge("span_peak_process_rss_bytes", "Pico de RSS durante o span.",
+                  [({"span": n}, s["peak_process_rss_gb"] * gb) for n, s in spans.items()])
+            gauge("span_peak_cpu_percent", "Pico de CPU durante o span.",
+                  [({"span": n}, s["peak_cpu_percent"]) for n, s in spans.items()])
+            if gpu:
+                gauge("span_peak_vram_used_bytes", "Pico de VRAM durante o span.",
+                      [({"span": n}, s["peak_vram_used_gb"] * gb) for n, s in spans.items()])
+        return "\n".join(lines) + "\n"
+
+
+_resource_sampler: Optional[ResourceSampler] = None
+_resource_sampler_lock = threading.Lock()
+
+
+def get_resource_sampler() -> ResourceSampler:
+    """Retorna o amostrador global (não inicia a thread)."""
+    global _resource_sampler
+    if _resource_sampler is None:
+        with _resource_sampler_lock:
+            if _resource_sampler is None:
+                _resource_sampler = ResourceSampler()
+    return _resource_sampler
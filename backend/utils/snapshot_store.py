@@ -0,0 +1,436 @@
+"""
+Snapshot Store - Aurora EchoTales
+=================================
+Pesos de modelos pré-convertidos e mapeados em memória.
+
+Cada modelo é convertido uma vez (já no dtype de destino) para
+``cache/snapshots/<nome>/``:
+
+    model.safetensors   tensores no layout safetensors
+    manifest.json       origem, dtype, tamanho e SHA-256 dos arquivos
+    <auxiliares>        config, vocabulário/tokenizer etc.
+
+O layout é o do safetensors (8 bytes com o tamanho do cabeçalho, JSON
+com ``dtype``/``shape``/``data_offsets`` por tensor e os bytes em
+sequência), gravado e lido só com NumPy. Carregar não desserializa
+nada: o arquivo é mapeado com ``mmap`` e cada tensor é uma visão sobre
+o mapeamento, então as páginas vêm sob demanda do cache de páginas do
+sistema e são compartilhadas entre processos que mapeiam o mesmo
+arquivo (``writable=True`` usa cópia-na-escrita: as páginas só se
+separam se alguém escrever nelas).
+
+Integridade: a verificação ``quick`` (padrão no carregamento) confere
+tamanho, cabeçalho e limites dos tensores; ``full`` recalcula o
+SHA-256. Gravações são atômicas (temporário + ``os.replace``) e o
+manifesto é escrito por último, então uma conversão interrompida nunca
+fica visível.
+
+Uso:
+    store = get_snapshot_store()
+    store.build("text_emotion", tensors, source=name, dtype="float32")
+    snapshot = store.load("text_emotion")      # None se não houver
+    snapshot.tensors["classifier.weight"]      # np.ndarray mapeado
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from backend import config
+from backend.utils.file_utils import HASH_CHUNK, atomic_write, file_sha256
+from backend.utils.logger import get_logger
+
+WEIGHTS_FILE = "model.safetensors"
+MANIFEST_FILE = "manifest.json"
+
+# Códigos do safetensors ↔ NumPy. BF16 não existe no NumPy: fica como
+# uint16 bruto e os adaptadores PyTorch reinterpretam (``view``).
+_DTYPES = {
+    "F64": np.float64, "F32": np.float32, "F16": np.float16, "BF16": np.uint16,
+    "I64": np.int64, "I32": np.int32, "I16": np.int16, "I8": np.int8,
+    "U8": np.uint8, "BOOL": np.bool_,
+}
+_CODES = {np.dtype(v): k for k, v in _DTYPES.items() if k != "BF16"}
+_CODES[np.dtype(np.uint16)] = "U16"
+_DTYPES["U16"] = np.uint16
+
+
+class SnapshotError(ValueError):
+    """Snapshot ausente, corrompido ou incompatível com a configuração."""
+
+
+# ============================================================
+# 📦 Formato
+# ============================================================
+
+def write_tensors(path: Path, tensors: Mapping[str, np.ndarray],
+                  metadata: Optional[Mapping[str, str]] = None,
+                  dtype_codes: Optional[Mapping[str, str]] = None) -> str:
+    """
+    Grava os tensores no layout safetensors e retorna o SHA-256 do arquivo.
+
+    ``dtype_codes`` força o código de um tensor (ex.: ``"BF16"`` para
+    dados bf16 passados como uint16).
+    """
+    dtype_codes = dtype_codes or {}
+    # Maiores itens primeiro: cada tensor fica alinhado ao próprio dtype
+    names = sorted(tensors, key=lambda n: (-np.dtype(tensors[n].dtype).itemsize, n))
+    header: Dict[str, dict] = {}
+    offset = 0
+    for name in names:
+        array = tensors[name]
+        code = dtype_codes.get(name) or _CODES.get(np.dtype(array.dtype))
+        if code is None:
+            raise SnapshotError(f"dtype sem suporte no snapshot: {array.dtype} ({name})")
+        header[name] = {"dtype": code, "shape": list(array.shape),
+                        "data_offsets": [offset, offset + array.nbytes]}
+        offset += array.nbytes
+    if metadata:
+        header["__metadata__"] = {str(k): str(v) for k, v in metadata.items()}
+
+    blob = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    blob += b" " * (-len(blob) % 8)  # dados começam alinhados a 8 bytes
+
+    digest = hashlib.sha256()
+
+    def write(f):
+        for chunk in (struct.pack("<Q", len(blob)), blob):
+            f.write(chunk)
+            digest.update(chunk)
+        for name in (n for n in names if tensors[n].size):
+            data = memoryview(np.ascontiguousarray(tensors[name])).cast("B")
+            for start in range(0, len(data), HASH_CHUNK):
+                chunk = data[start:start + HASH_CHUNK]
+                f.write(chunk)
+                digest.update(chunk)
+
+    atomic_write(path, write)
+    return digest.hexdigest()
+
+
+def read_header(path: Path) -> tuple:
+    """
+    Lê e valida o cabeçalho.
+
+    Returns:
+        tuple: (cabeçalho sem ``__metadata__``, metadados, início dos dados)
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        raw = f.read(8)
+        if len(raw) < 8:
+            raise SnapshotError(f"{path}: arquivo truncado")
+        (length,) = struct.unpack("<Q", raw)
+        if length > size - 8:
+            raise SnapshotError(f"{path}: cabeçalho de {length} bytes excede o arquivo")
+        try:
+            header = json.loads(f.read(length))
+        except ValueError as e:
+            raise SnapshotError(f"{path}: cabeçalho inválido ({e})") from e
+    metadata = header.pop("__metadata__", {})
+    start = 8 + length
+    end = 0
+    for name, info in header.items():
+        if info.get("dtype") not in _DTYPES:
+            raise SnapshotError(f"{path}: dtype desconhecido em {name}: {info.get('dtype')}")
+        begin, stop = info["data_offsets"]
+        itemsize = np.dtype(_DTYPES[info["dtype"]]).itemsize
+        if stop - begin != int(np.prod(info["shape"], dtype=np.int64)) * itemsize or begin < 0:
+            raise SnapshotError(f"{path}: tamanho inconsistente em {name}")
+        end = max(end, stop)
+    if start + end != size:
+        raise SnapshotError(f"{path}: {size} bytes no arquivo, {start + end} esperados")
+    return header, metadata, start
+
+
+def map_tensors(path: Path, writable: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Mapeia o arquivo e retorna uma visão NumPy por tensor (sem cópia).
+
+    ``writable=False`` usa um mapeamento somente leitura compartilhado;
+    ``True`` usa cópia-na-escrita (o PyTorch exige buffers graváveis).
+    """
+    header, _, start = read_header(path)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == start:
+            buffer = b""  # sem tensores: mmap não aceita tamanho zero
+        else:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY if writable
+                               else mmap.ACCESS_READ)
+    tensors = {}
+    for name, info in header.items():
+        begin, stop = info["data_offsets"]
+        dtype = np.dtype(_DTYPES[info["dtype"]])
+        if stop == begin:
+            tensors[name] = np.empty(info["shape"], dtype=dtype)
+            continue
+        array = np.frombuffer(buffer, dtype=dtype, count=(stop - begin) // dtype.itemsize,
+                              offset=start + begin)
+        tensors[name] = array.reshape(info["shape"])
+    return tensors
+
+
+def drop_page_cache(path: Path) -> bool:
+    """Pede ao sistema para descartar as páginas do arquivo (leitura fria)."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    with open(path, "rb") as f:
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return True
+
+
+# ============================================================
+# 🗄️ Armazenamento
+# ============================================================
+
+@dataclass
+class SnapshotManifest:
+    """Descrição de um snapshot gravado."""
+
+    name: str
+    source: str
+    dtype: str
+    files: Dict[str, dict]
+    tensors: int
+    created: str
+    build_s: float
+    format_version: int = config.SNAPSHOT_FORMAT_VERSION
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(f["size"] for f in self.files.values())
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Snapshot:
+    """Tensores mapeados, manifesto e tempo de carregamento."""
+
+    manifest: SnapshotManifest
+    directory: Path
+    tensors: Dict[str, np.ndarray]
+    dtypes: Dict[str, str]  # código safetensors por tensor (distingue BF16 de U16)
+    load_s: float
+    cold: bool
+
+    def file(self, name: str) -> Path:
+        """Caminho de um arquivo auxiliar do snapshot."""
+        return self.directory / name
+
+
+@dataclass
+class LoadRecord:
+    name: str
+    load_s: float
+    cold: bool
+    verify: str
+    timestamp: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class SnapshotStore:
+    """Snapshots de modelos em ``config.SNAPSHOT_DIR``."""
+
+    def __init__(self, root: Path = config.SNAPSHOT_DIR):
+        self.root = Path(root)
+        self.logger = get_logger()
+        self._lock = threading.Lock()
+        self._loaded: set = set()
+        self._history: List[LoadRecord] = []
+
+    def directory(self, name: str) -> Path:
+        return self.root / name
+
+    def manifest(self, name: str) -> Optional[SnapshotManifest]:
+        path = self.directory(name) / MANIFEST_FILE
+        if not path.exists():
+            return None
+        return SnapshotManifest(**json.loads(path.read_text(encoding="utf-8")))
+
+    def names(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / MANIFEST_FILE).exists())
+
+    def is_current(self, name: str, source: str, dtype: Optional[str] = None) -> bool:
+        """Existe snapshot da mesma origem, dtype e versão de formato."""
+        manifest = self.manifest(name)
+        return (manifest is not None and manifest.source == source
+                and manifest.format_version == config.SNAPSHOT_FORMAT_VERSION
+                and (dtype is None or manifest.dtype == dtype))
+
+    def build(self, name: str, tensors: Mapping[str, np.ndarray], source: str, dtype: str,
+              files: Optional[Mapping[str, Path]] = None, extra: Optional[dict] = None,
+              dtype_codes: Optional[Mapping[str, str]] = None) -> SnapshotManifest:
+        """
+        Grava (ou substitui) o snapshot ``name``.
+
+        ``files`` copia auxiliares (arquivo ou diretório) para o snapshot,
+        com o nome da chave.
+        """
+        start = time.perf_counter()
+        directory = self.directory(name)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / MANIFEST_FILE).unlink(missing_ok=True)  # inválido até terminar
+
+        weights = directory / WEIGHTS_FILE
+        entries = {WEIGHTS_FILE: {
+            "size": 0,
+            "sha256": write_tensors(weights, tensors, {"source": source, "dtype": dtype},
+                                    dtype_codes),
+        }}
+        entries[WEIGHTS_FILE]["size"] = weights.stat().st_size
+        for target, src in (files or {}).items():
+            src, dst = Path(src), directory / target
+            if src.is_dir():
+                shutil.rmtree(dst, ignore_errors=True)
+                shutil.copytree(src, dst)
+                paths = [p for p in sorted(dst.rglob("*")) if p.is_file()]
+            else:
+                shutil.copyfile(src, dst)
+                paths = [dst]
+            for path in paths:
+                entries[path.relative_to(directory).as_posix()] = {
+                    "size": path.stat().st_size, "sha256": file_sha256(path)}
+
+        manifest = SnapshotManifest(
+            name=name, source=source, dtype=dtype, files=entries, tensors=len(tensors),
+            created=datetime.now(timezone.utc).isoformat(),
+            build_s=time.perf_counter() - start, extra=dict(extra or {}))
+        path = directory / MANIFEST_FILE
+        atomic_write(path, json.dumps(manifest.to_dict(), indent=2,
+                                      ensure_ascii=False).encode("utf-8"))
+        self.logger.info("🧊 Snapshot %s: %d tensores, %.1f MB (%s) em %.1fs", name, len(tensors),
+                         manifest.size_bytes / 1024**2, dtype, manifest.build_s)
+        return manifest
+
+    def verify(self, name: str, full: bool = True) -> List[str]:
+        """Lista de problemas (vazia se íntegro); ``full`` recalcula os hashes."""
+        manifest = self.manifest(name)
+        if manifest is None:
+            return [f"{name}: sem manifesto"]
+        problems = []
+        directory = self.directory(name)
+        for rel, info in manifest.files.items():
+            path = directory / rel
+            if not path.exists():
+                problems.append(f"{rel}: ausente")
+            elif path.stat().st_size != info["size"]:
+                problems.append(f"{rel}: {path.stat().st_size} bytes, {info['size']} esperados")
+            elif full and file_sha256(path) != info["sha256"]:
+                problems.append(f"{rel}: SHA-256 diferente do manifesto")
+        if not problems:
+            try:
+                header, _, _ = read_header(directory / WEIGHTS_FILE)
+                if len(header) != manifest.tensors:
+                    problems.append(f"{WEIGHTS_FILE}: {len(header)} tensores, "
+                                    f"{manifest.tensors} esperados")
+            except SnapshotError as e:
+                problems.append(str(e))
+        return problems
+
+    def load(self, name: str, source: Optional[str] = None, verify: str = config.SNAPSHOT_VERIFY,
+             writable: bool = False) -> Optional[Snapshot]:
+        """
+        Mapeia o snapshot ``name``.
+
+        Retorna ``None`` se não existir ou se ``source`` (o modelo
+        configurado) for outro; levanta ``SnapshotError`` se estiver
+        corrompido.
+        """
+        manifest = self.manifest(name)
+        if manifest is None:
+            return None
+        if source is not None and not self.is_current(name, source):
+            self.logger.warning("⚠️ Snapshot %s é de %s (formato %s); ignorado", name,
+                                manifest.source, manifest.format_version)
+            return None
+
+        start = time.perf_counter()
+        if verify != "none":
+            problems = self.verify(name, full=verify == "full")
+            if problems:
+                raise SnapshotError(f"Snapshot {name} corrompido: " + "; ".join(problems)
+                                    + f" (reconstrua com python -m backend.core.snapshots "
+                                      f"build {name})")
+        weights = self.directory(name) / WEIGHTS_FILE
+        tensors = map_tensors(weights, writable=writable)
+        dtypes = {n: info["dtype"] for n, info in read_header(weights)[0].items()}
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            cold = name not in self._loaded
+            self._loaded.add(name)
+            self._history.append(LoadRecord(name, elapsed, cold, verify, time.time()))
+        self.logger.info("🧊 Snapshot %s mapeado em %.1fms (%s)", name, elapsed * 1000,
+                         "frio" if cold else "quente")
+        return Snapshot(manifest, self.directory(name), tensors, dtypes, elapsed, cold)
+
+    def remove(self, name: str):
+        shutil.rmtree(self.directory(name), ignore_errors=True)
+
+    def load_history(self) -> List[dict]:
+        with self._lock:
+            return [record.to_dict() for record in self._history]
+
+    def get_stats(self) -> dict:
+        """Snapshots gravados e tempos de carregamento frio/quente por modelo."""
+        history = self.load_history()
+        stats = {}
+        for name in self.names():
+            manifest = self.manifest(name)
+            loads = [r for r in history if r["name"] == name]
+            cold = [r["load_s"] for r in loads if r["cold"]]
+            warm = [r["load_s"] for r in loads if not r["cold"]]
+            stats[name] = {
+                "source": manifest.source,
+                "dtype": manifest.dtype,
+                "size_mb": manifest.size_bytes / 1024**2,
+                "build_s": manifest.build_s,
+                "loads": len(loads),
+                "cold_load_s": cold[-1] if cold else None,
+                "warm_load_s": min(warm) if warm else None,
+            }
+        return stats
+
+
+def touch_pages(tensors: Mapping[str, np.ndarray]) -> int:
+    """Lê uma posição por página de cada tensor (força as páginas para a RAM)."""
+    total = 0
+    step = max(1, mmap.PAGESIZE)
+    for array in tensors.values():
+        flat = array.reshape(-1).view(np.uint8) if array.size else array
+        if flat.size:
+            total += int(flat[::step].sum(dtype=np.uint64))
+    return total
+
+
+_snapshot_store: Optional[SnapshotStore] = None
+_snapshot_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> SnapshotStore:
+    """Retorna o armazenamento de snapshots global."""
+    global _snapshot_store
+    if _snapshot_store is None:
+        with _snapshot_store_lock:
+            if _snapshot_store is None:
+                _snapshot_store = SnapshotStore()
+    return _snapshot_store
@@ -0,0 +1,592 @@
+"""
+Story Store - Aurora EchoTales
+==============================
+Armazenamento das histórias em SQLite, com consultas paginadas para a galeria.
+
+A tabela ``stories`` guarda as colunas pequenas usadas na listagem
+(emoção, datas, título, prévia, caminhos de áudio) antes das grandes
+(texto, estado da sessão, tokens do cache KV), de modo que as projeções
+de ``StorySummary`` não leem as páginas de overflow do texto. Índices:
+
+    - ``(created_at DESC, id DESC)``: galeria em ordem cronológica
+    - ``(emotion, created_at DESC, id DESC)``: filtro por emoção
+
+A busca usa FTS5 (tabela de conteúdo externo mantida por triggers) sobre
+o texto e o pedido do usuário; sem FTS5 na build do SQLite, cai para
+``LIKE``.
+
+A paginação é por cursor (keyset): o cursor codifica ``(created_at, id)``
+da última linha entregue e a próxima página começa estritamente depois
+dele — o custo não cresce com a profundidade e inserções novas não
+deslocam as páginas seguintes.
+
+As escritas não bloqueiam a requisição: ``save``/``delete`` enfileiram a
+operação e uma thread de escrita agrupa o que chegar em até
+``STORY_DB_FLUSH_S`` (ou ``STORY_DB_BATCH_SIZE`` operações) em uma única
+transação. Leituras por id enxergam as escritas pendentes; listagens
+esperam a fila esvaziar (``flush``) antes de consultar. Um lote que falha
+continua pendente e é refeito até ``STORY_DB_WRITE_RETRIES`` vezes; depois
+disso as operações são gravadas uma a uma, só as que ainda falham são
+descartadas e o ``flush`` seguinte levanta ``StoryStoreError``.
+
+Uso:
+    store = get_story_store()
+    store.save(StoryRecord(id=..., created_at=..., text=..., state={...}))
+    page = store.list(emotion="joy", q="dragão", limit=20)
+    more = store.list(emotion="joy", q="dragão", cursor=page.next_cursor)
+"""
+
+import base64
+import json
+import queue
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from backend import config
+from backend.utils.logger import get_logger
+
+SUMMARY_COLUMNS = ("id", "title", "preview", "emotion", "intensity", "created_at",
+                   "updated_at", "user_input", "turns", "duration", "audio_path",
+                   "narration_path", "music_path")
+RECORD_COLUMNS = SUMMARY_COLUMNS + ("text", "state", "tokens")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    preview TEXT NOT NULL,
+    emotion TEXT,
+    intensity REAL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    user_input TEXT,
+    turns INTEGER NOT NULL DEFAULT 0,
+    duration REAL,
+    audio_path TEXT,
+    narration_path TEXT,
+    music_path TEXT,
+    text TEXT NOT NULL,
+    state TEXT NOT NULL,
+    tokens BLOB
+);
+CREATE INDEX IF NOT EXISTS stories_created ON stories (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS stories_emotion ON stories (emotion, created_at DESC, id DESC);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS stories_fts USING fts5(
+    text, user_input, content='stories', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS stories_fts_insert AFTER INSERT ON stories BEGIN
+    INSERT INTO stories_fts(rowid, text, user_input) VALUES (new.rowid, new.text, new.user_input);
+END;
+CREATE TRIGGER IF NOT EXISTS stories_fts_delete AFTER DELETE ON stories BEGIN
+    INSERT INTO stories_fts(stories_fts, rowid, text, user_input)
+    VALUES ('delete', old.rowid, old.text, old.user_input);
+END;
+CREATE TRIGGER IF NOT EXISTS stories_fts_update AFTER UPDATE OF text, user_input ON stories BEGIN
+    INSERT INTO stories_fts(stories_fts, rowid, text, user_input)
+    VALUES ('delete', old.rowid, old.text, old.user_input);
+    INSERT INTO stories_fts(rowid, text, user_input) VALUES (new.rowid, new.text, new.user_input);
+END;
+"""
+
+_UPSERT = (
+    f"INSERT INTO stories ({', '.join(RECORD_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in RECORD_COLUMNS)}) "
+    f"ON CONFLICT(id) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in RECORD_COLUMNS if c not in ("id", "created_at"))
+)
+
+_DELETED = object()
+
+
+class StoryStoreError(RuntimeError):
+    """Escritas descartadas depois de esgotar as tentativas."""
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class StoryRecord:
+    """Linha completa de uma história; ``state`` é a sessão serializada."""
+
+    id: str
+    created_at: str
+    text: str
+    state: dict = field(default_factory=dict)
+    emotion: Optional[str] = None
+    intensity: Optional[float] = None
+    user_input: Optional[str] = None
+    turns: int = 0
+    duration: Optional[float] = None
+    audio_path: Optional[str] = None
+    narration_path: Optional[str] = None
+    music_path: Optional[str] = None
+    tokens: bytes = b""
+    title: str = ""
+    preview: str = ""
+    updated_at: str = field(default_factory=_now_iso)
+
+    def row(self) -> tuple:
+        """Valores na ordem de ``RECORD_COLUMNS``; título e prévia derivados se vazios."""
+        title = self.title or make_title(self.user_input or self.text)
+        preview = self.preview or make_preview(self.text)
+        values = {**asdict(self), "title": title, "preview": preview,
+                  "state": json.dumps(self.state, ensure_ascii=False),
+                  "tokens": sqlite3.Binary(self.tokens) if self.tokens else None}
+        return tuple(values[c] for c in RECORD_COLUMNS)
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "StoryRecord":
+        values = dict(zip(RECORD_COLUMNS, row))
+        values["state"] = json.loads(values["state"])
+        values["tokens"] = bytes(values["tokens"] or b"")
+        return cls(**values)
+
+
+@dataclass
+class StorySummary:
+    """Projeção leve usada na galeria (sem o texto completo)."""
+
+    id: str
+    title: str
+    preview: str
+    emotion: Optional[str]
+    intensity: Optional[float]
+    created_at: str
+    updated_at: str
+    user_input: Optional[str]
+    turns: int
+    duration: Optional[float] = None
+    audio_path: Optional[str] = None
+    narration_path: Optional[str] = None
+    music_path: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class StoryPage:
+    """Uma página da galeria e o cursor da próxima (``None`` na última)."""
+
+    items: List[StorySummary]
+    next_cursor: Optional[str]
+
+    def to_dict(self) -> dict:
+        return {"items": [s.to_dict() for s in self.items], "next_cursor": self.next_cursor}
+
+
+@dataclass
+class StoryStoreStats:
+    """Contadores de escrita em lote e de consultas."""
+
+    writes: int = 0
+    batches: int = 0
+    retries: int = 0
+    failed: int = 0
+    max_batch: int = 0
+    write_s: float = 0.0
+    queries: int = 0
+    query_s: float = 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["avg_batch"] = self.writes / self.batches if self.batches else 0.0
+        data["avg_query_ms"] = 1000 * self.query_s / self.queries if self.queries else 0.0
+        return data
+
+
+def make_title(text: str, words: int = 8) -> str:
+    """Primeira linha, cortada em ``words`` palavras."""
+    line = next((l for l in (text or "").splitlines() if l.strip()), "")
+    parts = line.split()
+    return " ".join(parts[:words]) + ("…" if len(parts) > words else "")
+
+
+def make_preview(text: str, chars: int = config.STORY_PREVIEW_CHARS) -> str:
+    """Começo do texto, cortado no último espaço antes de ``chars``."""
+    text = " ".join((text or "").split())
+    if len(text) <= chars:
+        return text
+    cut = text.rfind(" ", 0, chars)
+    return text[:cut if cut > 0 else chars] + "…"
+
+
+def encode_cursor(created_at: str, story_id: str) -> str:
+    raw = json.dumps([created_at, story_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverso de ``encode_cursor``; ``ValueError`` se inválido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, story_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+    if not isinstance(created_at, str) or not isinstance(story_id, str):
+        raise ValueError(f"Cursor inválido: {cursor!r}")
+    return created_at, story_id
+
+
+def _utc(value: Union[str, datetime], end: bool = False) -> str:
+    """
+    Limite de data em ISO UTC (formato de ``created_at``). Datas sem hora
+    valem o dia inteiro: ``end`` aponta para o início do dia seguinte.
+    """
+    if isinstance(value, str):
+        date_only = len(value.strip()) == 10
+        try:
+            value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError as e:
+            raise ValueError(f"Data inválida: {value!r}") from e
+        if date_only and end:
+            value += timedelta(days=1)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Palavras do usuário como prefixos entre aspas (sem sintaxe FTS exposta)."""
+    words = _WORD.findall(text or "")
+    return " ".join(f'"{w}"*' for w in words) or None
+
+
+class StoryStore:
+    """SQLite (WAL) com escrita em lote em segundo plano e leitura por thread."""
+
+    def __init__(self, path: Path = config.STORY_DB_PATH,
+                 batch_size: int = config.STORY_DB_BATCH_SIZE,
+                 flush_interval_s: float = config.STORY_DB_FLUSH_S,
+                 write_retries: int = config.STORY_DB_WRITE_RETRIES):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.write_retries = write_retries
+        self.stats = StoryStoreStats()
+        self.logger = get_logger()
+
+        self._pending: Dict[str, object] = {}
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        self._last_error: Optional[sqlite3.Error] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.logger.warning("⚠️ SQLite sem FTS5: busca da galeria via LIKE")
+            self.fts = False
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                               isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    # ------------------------------------------------------------
+    # Escrita em lote
+    # ------------------------------------------------------------
+
+    def _enqueue(self, story_id: str, op: str, value):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("StoryStore fechado")
+            self._pending[story_id] = value
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="story-store",
+                                                daemon=True)
+                self._writer.start()
+        self._queue.put((op, story_id, value))
+
+    def save(self, record: StoryRecord):
+        """Insere ou atualiza (``created_at`` original é preservado); não bloqueia."""
+        record.updated_at = _now_iso()
+        self._enqueue(record.id, "save", record.row())
+
+    def delete(self, story_id: str):
+        self._enqueue(story_id, "delete", _DELETED)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera as escritas enfileiradas até agora chegarem ao disco.
+
+        Returns:
+            False se ``timeout`` esgotar antes
+
+        Raises:
+            StoryStoreError: Se alguma escrita foi descartada nesse meio tempo
+        """
+        with self._lock:
+            if self._writer is None:
+                return True
+            failed = self.stats.failed
+        done = threading.Event()
+        self._queue.put(("flush", None, done))
+        if not done.wait(timeout):
+            return False
+        with self._lock:
+            lost = self.stats.failed - failed
+        if lost:
+            raise StoryStoreError(f"{lost} escrita(s) de histórias descartada(s): "
+                                  f"{self._last_error}")
+        return True
+
+    def _run(self):
+        conn = self._connect()
+        retry: list = []    # lote que falhou, refeito antes das escritas novas
+        attempts = 0
+        waiting: list = []  # flush/close só liberam quando não há nada a refazer
+        closing = False
+        while True:
+            batch = []
+            try:
+                delay = self.flush_interval_s * 2 ** attempts if retry else None
+                batch.append(self._queue.get(timeout=delay))
+            except queue.Empty:
+                pass
+            deadline = time.monotonic() + self.flush_interval_s
+            while (batch and len(batch) < self.batch_size
+                   and batch[-1][0] not in ("flush", "close")):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            writes = retry + [b for b in batch if b[0] in ("save", "delete")]
+            error = self._write(conn, writes)
+            if error is None:
+                retry, attempts = [], 0
+            elif attempts < self.write_retries:
+                retry, attempts = writes, attempts + 1
+                self.stats.retries += 1
+                self.logger.warning("⚠️ Falha ao gravar %d histórias (tentativa %d/%d): %s",
+                                    len(writes), attempts, self.write_retries, error)
+            else:
+                self._write_each(conn, writes)
+                retry, attempts = [], 0
+
+            waiting += [value for op, _, value in batch if op in ("flush", "close")]
+            closing = closing or any(op == "close" for op, _, _ in batch)
+            if not retry:
+                for event in waiting:
+                    event.set()
+                waiting = []
+                if closing:
+                    conn.close()
+                    return
+
+    def _write(self, conn: sqlite3.Connection, batch: list) -> Optional[sqlite3.Error]:
+        """Grava o lote numa transação; em falha, desfaz tudo e devolve o erro."""
+        if not batch:
+            return None
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op, story_id, value in batch:
+                if op == "save":
+                    conn.execute(_UPSERT, value)
+                else:
+                    conn.execute("DELETE FROM stories WHERE id = ?", (story_id,))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return e
+        finally:
+            self.stats.batches += 1
+            self.stats.write_s += time.perf_counter() - start
+        self._settle(batch)
+        self.stats.writes += len(batch)
+        self.stats.max_batch = max(self.stats.max_batch, len(batch))
+        return None
+
+    def _write_each(self, conn: sqlite3.Connection, batch: list):
+        """Última tentativa, uma operação por vez: só descarta as que falham."""
+        for item in batch:
+            error = self._write(conn, [item])
+            if error is not None:
+                self.logger.error("❌ Escrita da história %s descartada: %s", item[1], error)
+                self._settle([item])
+                with self._lock:
+                    self._last_error = error
+                    self.stats.failed += 1
+
+    def _settle(self, batch: list):
+        """Tira de ``_pending`` as operações do lote (se não houver uma mais nova)."""
+        with self._lock:
+            for _, story_id, value in batch:
+                if self._pending.get(story_id) is value:
+                    del self._pending[story_id]
+
+    def close(self):
+        """Grava o que estiver pendente e encerra a thread de escrita."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            writer = self._writer
+        if writer is not None:
+            done = threading.Event()
+            self._queue.put(("close", None, done))
+            done.wait()
+        with self._lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+
+    # ------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------
+
+    def get(self, story_id: str) -> Optional[StoryRecord]:
+        """Registro completo, incluindo escritas ainda na fila."""
+        with self._lock:
+            pending = self._pending.get(story_id)
+        if pending is _DELETED:
+            return None
+        if pending is not None:
+            return StoryRecord.from_row(pending)
+        row = self._reader().execute(
+            f"SELECT {', '.join(RECORD_COLUMNS)} FROM stories WHERE id = ?", (story_id,)
+        ).fetchone()
+        return StoryRecord.from_row(row) if row else None
+
+    def exists(self, story_id: str) -> bool:
+        with self._lock:
+            pending = self._pending.get(story_id)
+        if pending is not None:
+            return pending is not _DELETED
+        return self._reader().execute("SELECT 1 FROM stories WHERE id = ?",
+                                      (story_id,)).fetchone() is not None
+
+    def list(self, cursor: Optional[str] = None, limit: int = config.STORY_PAGE_SIZE,
+             emotion: Optional[str] = None, date_from: Optional[Union[str, datetime]] = None,
+             date_to: Optional[Union[str, datetime]] = None,
+             q: Optional[str] = None) -> StoryPage:
+        """
+        Página da galeria, mais recentes primeiro.
+
+        ``date_from``/``date_to`` são inclusivos (datas sem hora valem o
+        dia inteiro); ``q`` busca palavras (prefixos) no texto e no pedido.
+        """
+        limit = max(1, min(int(limit), config.STORY_PAGE_MAX))
+        where, params = [], []
+        if emotion:
+            where.append("emotion = ?")
+            params.append(emotion)
+        if date_from:
+            where.append("created_at >= ?")
+            params.append(_utc(date_from))
+        if date_to:
+            end = _utc(date_to, end=True)
+            date_only = isinstance(date_to, str) and len(date_to.strip()) == 10
+            where.append("created_at < ?" if date_only else "created_at <= ?")
+            params.append(end)
+        if cursor:
+            created_at, story_id = decode_cursor(cursor)
+            # Forma expandida de (created_at, id) < (?, ?), que usa o índice como faixa
+            where.append("created_at <= ? AND (created_at < ? OR id < ?)")
+            params += [created_at, created_at, story_id]
+        if q:
+            if self.fts:
+                match = fts_query(q)
+                if match is None:
+                    return StoryPage([], None)
+                where.append("rowid IN (SELECT rowid FROM stories_fts WHERE stories_fts MATCH ?)")
+                params.append(match)
+            else:
+                for word in _WORD.findall(q):
+                    escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                    where.append("(text LIKE ? ESCAPE '\\' OR user_input LIKE ? ESCAPE '\\')")
+                    params += [f"%{escaped}%"] * 2
+
+        sql = (f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM stories"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + " ORDER BY created_at DESC, id DESC LIMIT ?")
+        params.append(limit + 1)
+
+        if self._pending:
+            self.flush()
+        start = time.perf_counter()
+        rows = self._reader().execute(sql, params).fetchall()
+        self.stats.queries += 1
+        self.stats.query_s += time.perf_counter() - start
+
+        items = [StorySummary(*row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+        return StoryPage(items, next_cursor)
+
+    def explain(self, **filters) -> List[str]:
+        """Plano de consulta do SQLite para uma listagem (diagnóstico)."""
+        captured = []
+        conn = self._reader()
+        conn.set_trace_callback(captured.append)
+        try:
+            self.list(**filters)
+        finally:
+            conn.set_trace_callback(None)
+        sql = next(s for s in captured if s.lstrip().upper().startswith("SELECT"))
+        return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+    def count(self) -> int:
+        if self._pending:
+            self.flush()
+        return self._reader().execute("SELECT COUNT(*) FROM stories").fetchone()[0]
+
+    def get_stats(self) -> dict:
+        data = self.stats.to_dict()
+        with self._lock:
+            data["pending"] = len(self._pending)
+        data.update({"path": str(self.path), "fts": self.fts})
+        return data
+
+
+_story_store: Optional[StoryStore] = None
+_story_store_lock = threading.Lock()
+
+
+def get_story_store() -> StoryStore:
+    """Retorna o armazenamento de histórias global."""
+    global _story_store
+    if _story_store is None:
+        with _story_store_lock:
+            if _story_store is None:
+                _story_store = StoryStore()
+    return _story_store
@@ -0,0 +1,115 @@
+"""
+VAD - Aurora EchoTales
+======================
+Detecção de atividade de voz por energia, vetorizada em NumPy.
+
+O limiar se adapta ao ruído de fundo de cada gravação (percentil baixo
+da energia por quadro). Trechos de fala próximos são unidos, trechos
+muito curtos descartados e segmentos longos quebrados no quadro de menor
+energia, respeitando o limite de 30s da janela do Whisper.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from backend import config
+
+
+@dataclass
+class SpeechSegment:
+    """Trecho de fala em amostras [start, end)."""
+
+    start: int
+    end: int
+
+    def seconds(self, sample_rate: int) -> Tuple[float, float]:
+        return self.start / sample_rate, self.end / sample_rate
+
+
+def frame_energy_db(audio: np.ndarray, frame_len: int) -> np.ndarray:
+    """Energia RMS (dB) por quadro sem sobreposição."""
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+
+def estimate_noise_floor(energy: np.ndarray) -> float:
+    """Ruído de fundo (dB): percentil baixo da energia por quadro."""
+    return float(np.percentile(energy, 10))
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Intervalos [início, fim) de valores True consecutivos."""
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def detect_speech(audio: np.ndarray, sample_rate: int = config.STT_SAMPLE_RATE,
+                  frame_ms: int = config.VAD_FRAME_MS,
+                  threshold_db: float = config.VAD_THRESHOLD_DB,
+                  min_speech_ms: int = config.VAD_MIN_SPEECH_MS,
+                  min_silence_ms: int = config.VAD_MIN_SILENCE_MS,
+                  padding_ms: int = config.VAD_PADDING_MS,
+                  max_segment_s: float = config.VAD_MAX_SEGMENT_S,
+                  noise_floor_db: Optional[float] = None) -> List[SpeechSegment]:
+    """
+    Retorna os trechos de fala do áudio.
+
+    Args:
+        threshold_db: Quanto acima do ruído de fundo um quadro precisa
+            estar para contar como fala.
+        min_silence_ms: Silêncios menores que isso não separam segmentos.
+        padding_ms: Margem adicionada antes/depois de cada segmento.
+        max_segment_s: Segmentos maiores são divididos.
+        noise_floor_db: Ruído de fundo já conhecido (janelas ao vivo, que
+            podem conter só fala); por padrão, estimado no próprio áudio.
+    """
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    frame_len = max(int(sample_rate * frame_ms / 1000), 1)
+    energy = frame_energy_db(audio, frame_len)
+    if not len(energy):
+        return []
+
+    noise_floor = estimate_noise_floor(energy) if noise_floor_db is None else noise_floor_db
+    # Áudio sem dinâmica (silêncio digital ou ruído constante) não tem fala
+    if np.percentile(energy, 95) - noise_floor < threshold_db:
+        return []
+    speech = energy > noise_floor + threshold_db
+
+    # Fecha buracos curtos de silêncio e remove rajadas curtas
+    min_gap = max(int(min_silence_ms / frame_ms), 1)
+    for start, end in _runs(~speech):
+        if start > 0 and end < len(speech) and end - start < min_gap:
+            speech[start:end] = True
+    min_len = max(int(min_speech_ms / frame_ms), 1)
+    pad = int(padding_ms / frame_ms)
+    max_frames = max(int(max_segment_s * 1000 / frame_ms), 1)
+
+    segments = []
+    for start, end in _runs(speech):
+        if end - start < min_len:
+            continue
+        start, end = max(start - pad, 0), min(end + pad, len(speech))
+        while end - start > max_frames:
+            # Corta no quadro mais silencioso da segunda metade da janela
+            window = energy[start + max_frames // 2:start + max_frames]
+            cut = start + max_frames // 2 + int(np.argmin(window))
+            segments.append((start, cut))
+            start = cut
+        segments.append((start, end))
+
+    # Margens podem fazer segmentos vizinhos se sobreporem
+    merged: List[List[int]] = []
+    for start, end in segments:
+        if merged and start <= merged[-1][1] and end - merged[-1][0] <= max_frames:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    return [SpeechSegment(s * frame_len, min(e * frame_len, len(audio))) for s, e in merged]
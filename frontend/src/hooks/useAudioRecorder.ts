@@ -1,7 +1,12 @@
 import { useState, useRef, useCallback } from 'react';
 import type { RecordingState } from '../types';
 
-export const useAudioRecorder = () => {
+interface AudioRecorderOptions {
+    // Recebe o stream do microfone (ex.: para a análise ao vivo)
+    onStream?: (stream: MediaStream) => void;
+}
+
+export const useAudioRecorder = ({ onStream }: AudioRecorderOptions = {}) => {
     const [recordingState, setRecordingState] = useState<RecordingState>({
         isRecording: false,
         duration: 0,
@@ -17,6 +22,8 @@ export const useAudioRecorder = () => {
         try {
             const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
 
+            onStream?.(stream);
+
             const mediaRecorder = new MediaRecorder(stream);
             mediaRecorderRef.current = mediaRecorder;
             chunksRef.current = [];
@@ -28,7 +35,8 @@ export const useAudioRecorder = () => {
             };
 
             mediaRecorder.onstop = () => {
-                const audioBlob = new Blob(chunksRef.current, { type: 'audio/wav' });
+                // Tipo real do MediaRecorder (webm/opus, ogg...): o servidor detecta pelo conteúdo
+                const audioBlob = new Blob(chunksRef.current, { type: mediaRecorder.mimeType || 'audio/webm' });
                 const audioURL = URL.createObjectURL(audioBlob);
 
                 setRecordingState(prev => ({
@@ -61,7 +69,7 @@ export const useAudioRecorder = () => {
             console.error('Error starting recording:', error);
             alert('Failed to access microphone');
         }
-    }, []);
+    }, [onStream]);
 
     const stopRecording = useCallback(() => {
         if (mediaRecorderRef.current && recordingState.isRecording) {
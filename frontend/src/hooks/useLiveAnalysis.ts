@@ -0,0 +1,145 @@
+import { useState, useRef, useCallback } from 'react';
+import { apiService } from '../services/api';
+import type { AudioUploadResponse, LiveAnalysisMessage, LiveAnalysisState } from '../types';
+
+// Worklet que repassa o PCM mono do microfone em blocos de ~100ms
+const WORKLET_SOURCE = `
+class PcmForwarder extends AudioWorkletProcessor {
+    constructor() {
+        super();
+        this.block = new Float32Array(Math.round(sampleRate / 10));
+        this.filled = 0;
+    }
+    process(inputs) {
+        const channel = inputs[0] && inputs[0][0];
+        if (channel) {
+            let offset = 0;
+            while (offset < channel.length) {
+                const n = Math.min(channel.length - offset, this.block.length - this.filled);
+                this.block.set(channel.subarray(offset, offset + n), this.filled);
+                this.filled += n;
+                offset += n;
+                if (this.filled === this.block.length) {
+                    const out = this.block.slice();
+                    this.port.postMessage(out.buffer, [out.buffer]);
+                    this.filled = 0;
+                }
+            }
+        }
+        return true;
+    }
+}
+registerProcessor('pcm-forwarder', PcmForwarder);
+`;
+
+const FINAL_TIMEOUT_MS = 15000;
+
+export const useLiveAnalysis = () => {
+    const [liveState, setLiveState] = useState<LiveAnalysisState>({
+        connected: false,
+        transcript: '',
+        emotion: null,
+    });
+
+    const socketRef = useRef<WebSocket | null>(null);
+    const contextRef = useRef<AudioContext | null>(null);
+    const finalRef = useRef<((result: AudioUploadResponse | null) => void) | null>(null);
+
+    const teardown = useCallback(() => {
+        contextRef.current?.close();
+        contextRef.current = null;
+        socketRef.current?.close();
+        socketRef.current = null;
+        setLiveState(prev => ({ ...prev, connected: false }));
+    }, []);
+
+    // Começa a enviar o microfone enquanto a gravação acontece
+    const startLive = useCallback(async (stream: MediaStream) => {
+        try {
+            const context = new AudioContext();
+            const moduleURL = URL.createObjectURL(new Blob([WORKLET_SOURCE], { type: 'application/javascript' }));
+            await context.audioWorklet.addModule(moduleURL);
+            URL.revokeObjectURL(moduleURL);
+            contextRef.current = context;
+
+            const socket = new WebSocket(apiService.getLiveAnalysisURL());
+            socket.binaryType = 'arraybuffer';
+            socketRef.current = socket;
+
+            socket.onopen = () => {
+                socket.send(JSON.stringify({
+                    type: 'start',
+                    sample_rate: context.sampleRate,
+                    encoding: 'pcm_f32le',
+                }));
+            };
+
+            socket.onmessage = (event) => {
+                const message: LiveAnalysisMessage = JSON.parse(event.data);
+                if (message.type === 'ready') {
+                    const source = context.createMediaStreamSource(stream);
+                    const node = new AudioWorkletNode(context, 'pcm-forwarder');
+                    node.port.onmessage = (chunk) => {
+                        if (socket.readyState === WebSocket.OPEN) {
+                            socket.send(chunk.data);
+                        }
+                    };
+                    source.connect(node);
+                    setLiveState({ connected: true, transcript: '', emotion: null });
+                } else if (message.type === 'partial' || message.type === 'segment') {
+                    setLiveState(prev => ({
+                        ...prev,
+                        transcript: message.transcript,
+                        emotion: message.aggregated_emotion,
+                    }));
+                } else if (message.type === 'final') {
+                    finalRef.current?.(message.data);
+                    finalRef.current = null;
+                    teardown();
+                } else if (message.type === 'error') {
+                    console.warn('Análise ao vivo indisponível:', message.error);
+                    finalRef.current?.(null);
+                    finalRef.current = null;
+                    teardown();
+                }
+            };
+
+            socket.onclose = () => {
+                finalRef.current?.(null);
+                finalRef.current = null;
+            };
+        } catch (error) {
+            console.warn('Análise ao vivo indisponível:', error);
+            teardown();
+        }
+    }, [teardown]);
+
+    // Encerra o envio e aguarda o resultado (null → usar o upload)
+    const stopLive = useCallback((): Promise<AudioUploadResponse | null> => {
+        const socket = socketRef.current;
+        contextRef.current?.close();
+        contextRef.current = null;
+        if (!socket || socket.readyState !== WebSocket.OPEN) {
+            teardown();
+            return Promise.resolve(null);
+        }
+        return new Promise(resolve => {
+            const timer = setTimeout(() => {
+                finalRef.current = null;
+                teardown();
+                resolve(null);
+            }, FINAL_TIMEOUT_MS);
+            finalRef.current = (result) => {
+                clearTimeout(timer);
+                resolve(result);
+            };
+            socket.send(JSON.stringify({ type: 'stop' }));
+        });
+    }, [teardown]);
+
+    return {
+        liveState,
+        startLive,
+        stopLive,
+    };
+};
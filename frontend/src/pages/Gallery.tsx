@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { motion } from 'framer-motion';
 import {
   MagnifyingGlassIcon,
@@ -9,67 +9,99 @@ import {
 import { HeartIcon } from '@heroicons/react/24/solid';
 import toast from 'react-hot-toast';
 import { apiService } from '../services/api';
-import type { Story, EmotionType } from '../types';
+import type { StorySummary, EmotionType, GalleryFilters } from '../types';
 import Card from '../components/ui/Card';
 import Button from '../components/ui/Button';
 import EmotionBadge from '../components/ui/EmotionBadge';
 
+const PAGE_SIZE = 24;
+
 const Gallery: React.FC = () => {
-  const [stories, setStories] = useState<Story[]>([]);
-  const [filteredStories, setFilteredStories] = useState<Story[]>([]);
+  const [stories, setStories] = useState<StorySummary[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
+  const [debouncedQuery, setDebouncedQuery] = useState('');
   const [selectedEmotion, setSelectedEmotion] = useState<EmotionType | 'all'>('all');
+  const [dateFrom, setDateFrom] = useState('');
+  const [dateTo, setDateTo] = useState('');
   const [showFilters, setShowFilters] = useState(false);
+  // Descarta respostas de filtros que já mudaram
+  const requestId = useRef(0);
 
   const emotions: EmotionType[] = ['joy', 'sadness', 'anger', 'fear', 'surprise', 'disgust', 'neutral'];
 
+  const filters: GalleryFilters = {
+    emotion: selectedEmotion === 'all' ? undefined : selectedEmotion,
+    dateFrom: dateFrom || undefined,
+    dateTo: dateTo || undefined,
+    searchQuery: debouncedQuery || undefined,
+  };
+  const hasFilters = Boolean(filters.emotion || filters.dateFrom || filters.dateTo || filters.searchQuery);
+
   useEffect(() => {
-    loadStories();
-  }, []);
+    const timer = setTimeout(() => setDebouncedQuery(searchQuery.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
 
   useEffect(() => {
-    filterStories();
+    loadStories();
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [stories, searchQuery, selectedEmotion]);
+  }, [debouncedQuery, selectedEmotion, dateFrom, dateTo]);
+
+  const fetchPage = async (cursor: string | null) => {
+    const response = await apiService.listStories(filters, cursor, PAGE_SIZE);
+    if (!response.success || !response.data) {
+      throw new Error(response.error || 'Falha ao carregar histórias');
+    }
+    return response.data;
+  };
 
   const loadStories = async () => {
+    const id = ++requestId.current;
     setIsLoading(true);
     try {
-      const response = await apiService.listStories();
-      if (response.success && response.data) {
-        setStories(response.data as Story[]);
-      }
+      const page = await fetchPage(null);
+      if (id !== requestId.current) return;
+      setStories(page.items);
+      setNextCursor(page.next_cursor);
     } catch (error) {
+      if (id !== requestId.current) return;
       console.error('Erro ao carregar histórias:', error);
       toast.error('Erro ao carregar galeria');
-      // Dados mock para desenvolvimento
       setStories([]);
+      setNextCursor(null);
     } finally {
-      setIsLoading(false);
+      if (id === requestId.current) setIsLoading(false);
     }
   };
 
-  const filterStories = () => {
-    // Garantir que stories seja sempre um array
-    const safeStories = Array.isArray(stories) ? stories : [];
-    let filtered = [...safeStories];
-
-    // Filtro por busca
-    if (searchQuery) {
-      filtered = filtered.filter(story =>
-        story.text.toLowerCase().includes(searchQuery.toLowerCase())
-      );
+  const loadMore = async () => {
+    if (!nextCursor || isLoadingMore) return;
+    const id = requestId.current;
+    setIsLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      if (id !== requestId.current) return;
+      setStories(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Erro ao carregar mais histórias:', error);
+      toast.error('Erro ao carregar mais histórias');
+    } finally {
+      setIsLoadingMore(false);
     }
+  };
 
-    // Filtro por emoção
-    if (selectedEmotion !== 'all') {
-      filtered = filtered.filter(
-        story => story.emotion_context.dominant_emotion === selectedEmotion
-      );
+  const handleCopy = async (storyId: string) => {
+    const response = await apiService.getStory(storyId);
+    if (response.success && response.data) {
+      await navigator.clipboard.writeText(response.data.text);
+      toast.success('Texto copiado!');
+    } else {
+      toast.error('Erro ao copiar história');
     }
-
-    setFilteredStories(filtered);
   };
 
   const handleDelete = async (storyId: string) => {
@@ -149,31 +181,53 @@ const Gallery: React.FC = () => {
               initial={{ opacity: 0, height: 0 }}
               animate={{ opacity: 1, height: 'auto' }}
               exit={{ opacity: 0, height: 0 }}
-              className="flex flex-wrap gap-2"
+              className="space-y-4"
             >
-              <button
-                onClick={() => setSelectedEmotion('all')}
-                className={`px-4 py-2 rounded-full text-sm font-medium transition-colors ${
-                  selectedEmotion === 'all'
-                    ? 'bg-primary-500 text-white'
-                    : 'bg-gray-200 dark:bg-gray-700 text-gray-700 dark:text-gray-300 hover:bg-gray-300 dark:hover:bg-gray-600'
-                }`}
-              >
-                Todas
-              </button>
-              {emotions.map((emotion) => (
+              <div className="flex flex-wrap gap-2">
                 <button
-                  key={emotion}
-                  onClick={() => setSelectedEmotion(emotion)}
+                  onClick={() => setSelectedEmotion('all')}
                   className={`px-4 py-2 rounded-full text-sm font-medium transition-colors ${
-                    selectedEmotion === emotion
+                    selectedEmotion === 'all'
                       ? 'bg-primary-500 text-white'
                       : 'bg-gray-200 dark:bg-gray-700 text-gray-700 dark:text-gray-300 hover:bg-gray-300 dark:hover:bg-gray-600'
                   }`}
                 >
-                  {emotion.charAt(0).toUpperCase() + emotion.slice(1)}
+                  Todas
                 </button>
-              ))}
+                {emotions.map((emotion) => (
+                  <button
+                    key={emotion}
+                    onClick={() => setSelectedEmotion(emotion)}
+                    className={`px-4 py-2 rounded-full text-sm font-medium transition-colors ${
+                      selectedEmotion === emotion
+                        ? 'bg-primary-500 text-white'
+                        : 'bg-gray-200 dark:bg-gray-700 text-gray-700 dark:text-gray-300 hover:bg-gray-300 dark:hover:bg-gray-600'
+                    }`}
+                  >
+                    {emotion.charAt(0).toUpperCase() + emotion.slice(1)}
+                  </button>
+                ))}
+              </div>
+
+              {/* Date Range */}
+              <div className="flex flex-wrap items-center gap-2 text-sm text-gray-600 dark:text-gray-300">
+                <CalendarIcon className="w-5 h-5" />
+                <input
+                  type="date"
+                  value={dateFrom}
+                  max={dateTo || undefined}
+                  onChange={(e) => setDateFrom(e.target.value)}
+                  className="input"
+                />
+                <span>até</span>
+                <input
+                  type="date"
+                  value={dateTo}
+                  min={dateFrom || undefined}
+                  onChange={(e) => setDateTo(e.target.value)}
+                  className="input"
+                />
+              </div>
             </motion.div>
           )}
         </motion.div>
@@ -186,7 +240,7 @@ const Gallery: React.FC = () => {
             </div>
             <p className="text-gray-600 dark:text-gray-300">Carregando histórias...</p>
           </div>
-        ) : filteredStories.length === 0 ? (
+        ) : stories.length === 0 ? (
           <motion.div
             initial={{ opacity: 0 }}
             animate={{ opacity: 1 }}
@@ -194,14 +248,14 @@ const Gallery: React.FC = () => {
           >
             <HeartIcon className="w-16 h-16 text-gray-400 mx-auto mb-4" />
             <h3 className="text-xl font-semibold text-gray-700 dark:text-gray-300 mb-2">
-              {stories.length === 0 ? 'Nenhuma história ainda' : 'Nenhuma história encontrada'}
+              {hasFilters ? 'Nenhuma história encontrada' : 'Nenhuma história ainda'}
             </h3>
             <p className="text-gray-600 dark:text-gray-400 mb-6">
-              {stories.length === 0
-                ? 'Crie sua primeira história para começar sua jornada!'
-                : 'Tente ajustar os filtros de busca'}
+              {hasFilters
+                ? 'Tente ajustar os filtros de busca'
+                : 'Crie sua primeira história para começar sua jornada!'}
             </p>
-            {stories.length === 0 && (
+            {!hasFilters && (
               <Button
                 variant="primary"
                 size="lg"
@@ -213,26 +267,29 @@ const Gallery: React.FC = () => {
           </motion.div>
         ) : (
           <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-            {filteredStories.map((story, index) => (
+            {stories.map((story, index) => (
               <motion.div
                 key={story.id}
                 initial={{ opacity: 0, y: 20 }}
                 animate={{ opacity: 1, y: 0 }}
-                transition={{ delay: index * 0.1 }}
+                transition={{ delay: (index % PAGE_SIZE) * 0.05 }}
               >
                 <Card className="h-full flex flex-col">
                   {/* Emotion Badge */}
                   <div className="mb-4">
                     <EmotionBadge
-                      emotion={story.emotion_context.dominant_emotion}
-                      intensity={story.emotion_context.intensity}
+                      emotion={story.emotion ?? 'neutral'}
+                      intensity={story.intensity ?? 0.5}
                     />
                   </div>
 
-                  {/* Story Text */}
+                  {/* Story Preview */}
                   <div className="flex-1 mb-4">
+                    <h3 className="font-semibold text-gray-900 dark:text-white mb-2">
+                      {story.title}
+                    </h3>
                     <p className="text-gray-700 dark:text-gray-300 line-clamp-4 leading-relaxed">
-                      {story.text}
+                      {story.preview}
                     </p>
                   </div>
 
@@ -292,10 +349,7 @@ const Gallery: React.FC = () => {
                     <Button
                       variant="secondary"
                       size="sm"
-                      onClick={() => {
-                        navigator.clipboard.writeText(story.text);
-                        toast.success('Texto copiado!');
-                      }}
+                      onClick={() => handleCopy(story.id)}
                       className="flex-1"
                     >
                       Copiar
@@ -315,16 +369,22 @@ const Gallery: React.FC = () => {
           </div>
         )}
 
-        {/* Stats */}
-        {filteredStories.length > 0 && (
+        {/* Pagination */}
+        {!isLoading && stories.length > 0 && (
           <motion.div
             initial={{ opacity: 0 }}
             animate={{ opacity: 1 }}
-            transition={{ delay: 0.5 }}
-            className="mt-12 text-center text-gray-600 dark:text-gray-400"
+            transition={{ delay: 0.2 }}
+            className="mt-12 text-center text-gray-600 dark:text-gray-400 space-y-4"
           >
+            {nextCursor && (
+              <Button variant="secondary" onClick={loadMore} disabled={isLoadingMore}>
+                {isLoadingMore ? 'Carregando...' : 'Carregar mais'}
+              </Button>
+            )}
             <p>
-              Mostrando {filteredStories.length} de {stories.length} histórias
+              Mostrando {stories.length} {stories.length === 1 ? 'história' : 'histórias'}
+              {nextCursor ? ' (há mais)' : ''}
             </p>
           </motion.div>
         )}
@@ -11,6 +11,7 @@ import {
 import { CheckCircleIcon } from '@heroicons/react/24/solid';
 import toast from 'react-hot-toast';
 import { useAudioRecorder } from '../hooks/useAudioRecorder';
+import { useLiveAnalysis } from '../hooks/useLiveAnalysis';
 import { apiService } from '../services/api';
 import type { EmotionState, Story, EmotionType } from '../types';
 import Button from '../components/ui/Button';
@@ -73,12 +74,14 @@ const StoryCreator: React.FC = () => {
     const [useManualInput, setUseManualInput] = useState(false);
     const [manualPrompt, setManualPrompt] = useState<string>('');
 
+    const { liveState, startLive, stopLive } = useLiveAnalysis();
+
     const {
         recordingState,
         startRecording,
         stopRecording,
         resetRecording,
-    } = useAudioRecorder();
+    } = useAudioRecorder({ onStream: startLive });
 
     const { isRecording, duration: recordingTime, audioBlob, audioURL } = recordingState;
 
@@ -107,7 +110,9 @@ const StoryCreator: React.FC = () => {
         setIsProcessing(true);
 
         try {
-            const response = await apiService.analyzeAudio(audioBlob);
+            // Resultado da análise ao vivo, já pronto ao parar; senão, upload
+            const live = await stopLive();
+            const response = live ? { success: true, data: live } : await apiService.analyzeAudio(audioBlob);
 
             // Usar URL do hook se disponível
             if (audioURL) {
@@ -228,12 +233,12 @@ const StoryCreator: React.FC = () => {
                 }, 30),
             ]);
 
-            // Converter blobs para URLs
-            if (narrationResponse.data?.audio) {
-                setNarrationUrl(URL.createObjectURL(narrationResponse.data.audio));
+            // O player busca o áudio sob demanda (Range), sem baixar tudo antes
+            if (narrationResponse.data?.audio_path) {
+                setNarrationUrl(apiService.getAudioURL(narrationResponse.data.audio_path));
             }
-            if (musicResponse.data?.audio) {
-                setMusicUrl(URL.createObjectURL(musicResponse.data.audio));
+            if (musicResponse.data?.music_path) {
+                setMusicUrl(apiService.getAudioURL(musicResponse.data.music_path));
             }
 
             toast.success('Narração e música geradas!');
@@ -258,10 +263,8 @@ const StoryCreator: React.FC = () => {
         setUseManualInput(false);
         setManualPrompt('');
 
-        // Limpar URLs
+        // Limpar URLs (narração e música são endereços do backend, não blobs)
         if (audioUrl) URL.revokeObjectURL(audioUrl);
-        if (narrationUrl) URL.revokeObjectURL(narrationUrl);
-        if (musicUrl) URL.revokeObjectURL(musicUrl);
 
         setAudioUrl(null);
         setNarrationUrl(null);
@@ -347,10 +350,8 @@ const StoryCreator: React.FC = () => {
     useEffect(() => {
         return () => {
             if (audioUrl) URL.revokeObjectURL(audioUrl);
-            if (narrationUrl) URL.revokeObjectURL(narrationUrl);
-            if (musicUrl) URL.revokeObjectURL(musicUrl);
         };
-    }, [audioUrl, narrationUrl, musicUrl]);
+    }, [audioUrl]);
 
     return (
         <div className="min-h-screen bg-gradient-to-br from-primary-50 via-white to-accent-50 dark:from-gray-900 dark:via-gray-800 dark:to-gray-900 py-12">
@@ -543,6 +544,21 @@ const StoryCreator: React.FC = () => {
                                         )}
                                     </div>
 
+                                    {/* Análise ao vivo enquanto grava */}
+                                    {isRecording && liveState.connected && (
+                                        <div className="mb-8 text-center">
+                                            {liveState.emotion && (
+                                                <EmotionBadge
+                                                    emotion={liveState.emotion.dominant_emotion}
+                                                    intensity={liveState.emotion.intensity}
+                                                />
+                                            )}
+                                            <p className="mt-3 text-sm text-gray-600 dark:text-gray-400 italic">
+                                                {liveState.transcript || 'Ouvindo...'}
+                                            </p>
+                                        </div>
+                                    )}
+
                                     {/* Audio Preview */}
                                     {audioUrl && !isRecording && (
                                         <motion.div
@@ -8,6 +8,10 @@ import type {
     StoryParams,
     TTSParams,
     MusicParams,
+    GalleryFilters,
+    StoryPage,
+    StoredAudio,
+    StoryRender,
 } from '../types';
 
 class APIService {
@@ -69,12 +73,10 @@ class APIService {
     // Audio Analysis
     async analyzeAudio(audioBlob: Blob): Promise<ApiResponse<AudioUploadResponse>> {
         try {
-            const formData = new FormData();
-            formData.append('audio', audioBlob, 'recording.wav');
-
-            const response = await this.api.post('/api/analyze-audio', formData, {
+            // Corpo cru: o servidor decodifica enquanto recebe
+            const response = await this.api.post('/api/analyze-audio', audioBlob, {
                 headers: {
-                    'Content-Type': 'multipart/form-data',
+                    'Content-Type': audioBlob.type || 'application/octet-stream',
                 },
             });
 
@@ -135,25 +137,42 @@ class APIService {
         }
     }
 
+    // Áudio da história (só parágrafos novos ou alterados são renderizados)
+    async renderStory(
+        storyId: string,
+        options?: { music_style?: MusicParams['style']; language?: TTSParams['language']; voice_id?: string }
+    ): Promise<ApiResponse<StoryRender>> {
+        try {
+            const response = await this.api.post(`/api/stories/${storyId}/render`, options || {});
+            return response.data;
+        } catch (error: any) {
+            return {
+                success: false,
+                error: error.response?.data?.detail || 'Failed to render story',
+            };
+        }
+    }
+
     // Text-to-Speech Synthesis
     async synthesizeSpeech(
         text: string,
         params?: Partial<TTSParams>
     ): Promise<ApiResponse<TTSResponse>> {
         try {
-            const response = await this.api.post(
-                '/api/synthesize-speech',
-                { text, params: params || {} },
-                { responseType: 'blob' } // Receber como blob
-            );
+            // O backend devolve o endereço do áudio (Opus, com suporte a Range)
+            const response = await this.api.post('/api/synthesize-speech', {
+                text,
+                params: params || {},
+                delivery: 'url',
+            });
+            const data: StoredAudio = response.data.data;
 
-            // Converter blob em resposta estruturada
             return {
                 success: true,
                 data: {
-                    audio: response.data,
-                    audio_path: '',
-                    duration: 0,
+                    audio_path: data.url,
+                    audio_id: data.audio_id,
+                    duration: data.duration,
                     style: params?.style || 'neutral',
                 },
             };
@@ -171,19 +190,19 @@ class APIService {
         duration?: number
     ): Promise<ApiResponse<MusicResponse>> {
         try {
-            const response = await this.api.post(
-                '/api/generate-music',
-                { params, duration: duration || 30 },
-                { responseType: 'blob' } // Receber como blob
-            );
+            const response = await this.api.post('/api/generate-music', {
+                params,
+                duration: duration || 30,
+                delivery: 'url',
+            });
+            const data: StoredAudio = response.data.data;
 
-            // Converter blob em resposta estruturada
             return {
                 success: true,
                 data: {
-                    audio: response.data,
-                    music_path: '',
-                    duration: duration || 30,
+                    music_path: data.url,
+                    audio_id: data.audio_id,
+                    duration: data.duration,
                     params: params as MusicParams,
                 },
             };
@@ -211,16 +230,24 @@ class APIService {
         }
     }
 
-    // List stories
-    async listStories(filters?: any): Promise<ApiResponse<any[]>> {
+    // List stories (cursor pagination, server-side filters)
+    async listStories(
+        filters: GalleryFilters = {},
+        cursor?: string | null,
+        limit?: number
+    ): Promise<ApiResponse<StoryPage>> {
         try {
             const response = await this.api.get('/api/stories', {
-                params: filters,
+                params: {
+                    emotion: filters.emotion,
+                    date_from: filters.dateFrom,
+                    date_to: filters.dateTo,
+                    q: filters.searchQuery || undefined,
+                    cursor: cursor || undefined,
+                    limit,
+                },
             });
-            return {
-                success: true,
-                data: response.data,
-            };
+            return response.data;
         } catch (error: any) {
             return {
                 success: false,
@@ -249,6 +276,11 @@ class APIService {
         return `${this.baseURL}${path}`;
     }
 
+    // WebSocket da análise ao vivo (mesmo host da API)
+    getLiveAnalysisURL(): string {
+        return `${this.baseURL.replace(/^http/, 'ws')}/ws/analyze-audio`;
+    }
+
     // Download audio file
     async downloadAudio(path: string): Promise<Blob | null> {
         try {
@@ -41,11 +41,38 @@ export interface Story {
   music_path?: string;
 }
 
+// Renderização por parágrafo (POST /api/stories/{id}/render)
+export interface StorySegment {
+  index: number;
+  key: string;
+  text: string;
+  emotion: EmotionType;
+  voice_style: string;
+  mood: string;
+  duration: number;
+  sample_rate: number;
+  reused: boolean;
+}
+
+export interface StoryRender {
+  story_id: string;
+  render_id: string;
+  media_url: string; // Opus/MP3 em /api/media; WAV com ?format=wav
+  sample_rate: number;
+  duration: number;
+  rendered: number;
+  reused: number;
+  render_s: number;
+  assemble_s: number;
+  segments: StorySegment[];
+}
+
 // TTS Types
 export interface TTSParams {
   style: 'neutral' | 'calm' | 'joyful' | 'sad' | 'angry' | 'fearful' | 'excited';
   speed: number;
   language: 'EN' | 'PT' | 'ES' | 'FR';
+  voice_id?: string; // voz enviada em POST /api/voices
 }
 
 // Music Types
@@ -75,6 +102,36 @@ export interface AudioUploadResponse {
   aggregated_emotion: AggregatedEmotion;
   audio_id: string;
   dominant_emotion: EmotionType;
+  audio_seconds?: number;
+  upload_bytes?: number;
+  processing_time?: number;
+  timings?: Record<string, number>; // upload, decode, resample, transcrição...
+  audio_emotion_status?: 'active' | 'disabled' | 'off'; // disabled: sem a cabeça de emoção acústica
+  audio_emotion_error?: string | null;
+}
+
+// Análise ao vivo (/ws/analyze-audio)
+export type LiveAnalysisMessage =
+  | { type: 'ready'; session_id: string; hop_s: number }
+  | { type: 'partial'; text: string; transcript: string; aggregated_emotion: AggregatedEmotion; audio_seconds: number }
+  | {
+      type: 'segment';
+      start: number;
+      end: number;
+      text: string;
+      emotion: EmotionType;
+      intensity: number;
+      transcript: string;
+      aggregated_emotion: AggregatedEmotion;
+      audio_seconds: number;
+    }
+  | { type: 'final'; data: AudioUploadResponse }
+  | { type: 'error'; error: string };
+
+export interface LiveAnalysisState {
+  connected: boolean;
+  transcript: string;
+  emotion: AggregatedEmotion | null;
 }
 
 export interface StoryGenerationResponse {
@@ -86,19 +143,30 @@ export interface StoryGenerationResponse {
 }
 
 export interface TTSResponse {
-  audio_path: string;
-  audio: Blob; // Binary audio data
+  audio_path: string; // URL em /api/media (Opus/MP3, com Range)
+  audio_id: string;
+  audio?: Blob;
   duration: number;
   style: string;
 }
 
 export interface MusicResponse {
-  music_path: string;
-  audio: Blob; // Binary audio data
+  music_path: string; // URL em /api/media (Opus/MP3, com Range)
+  audio_id: string;
+  audio?: Blob;
   duration: number;
   params: MusicParams;
 }
 
+// Áudio armazenado no backend (``delivery: 'url'``)
+export interface StoredAudio {
+  audio_id: string;
+  url: string;
+  wav_url: string;
+  duration: number;
+  sample_rate: number;
+}
+
 // UI State Types
 export interface UIState {
   isRecording: boolean;
@@ -138,10 +206,22 @@ export interface StorySummary {
   id: string;
   title: string;
   preview: string;
-  emotion: EmotionType;
+  emotion: EmotionType | null;
+  intensity: number | null;
   created_at: string;
+  updated_at: string;
+  user_input: string | null;
+  turns: number;
   thumbnail?: string;
-  duration?: number;
+  duration?: number | null;
+  audio_path?: string | null;
+  narration_path?: string | null;
+  music_path?: string | null;
+}
+
+export interface StoryPage {
+  items: StorySummary[];
+  next_cursor: string | null;
 }
 
 // Recording Types
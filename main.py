@@ -3,6 +3,12 @@ Aurora EchoTales - Main Entry Point
 ====================================
 Ponto de entrada principal da aplicação.
 Demonstra inicialização e uso básico do backend.
+
+O menu aparece sem importar o backend; cada opção importa só o que usa.
+
+Uso:
+    python main.py
+    python main.py --profile-imports   # custo de importação de backend.main
 """
 
 import sys
@@ -11,7 +17,6 @@ from pathlib import Path
 # Adicionar backend ao path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from backend import initialize_backend, get_resource_manager, get_logger
 from backend.config import print_config_summary
 
 
@@ -24,6 +29,8 @@ def demo_initialization():
     # Imprimir configurações
     print_config_summary()
     
+    from backend import initialize_backend
+
     # Inicializar backend
     print("🚀 Inicializando backend...\n")
     logger, rm = initialize_backend()
@@ -66,6 +73,7 @@ def demo_initialization():
 def demo_audio_utils():
     """Demonstra utilitários de áudio"""
     from backend.utils.audio_utils import AudioProcessor, create_silence
+    from backend.utils.logger import get_logger
     
     logger = get_logger()
     logger.log_section("DEMONSTRAÇÃO DE ÁUDIO")
@@ -91,7 +99,18 @@ def demo_audio_utils():
     logger.info("🎚️ Mixando áudios...")
     mixed = processor.mix_audio([test_audio, test_audio], mode="sequential")
     logger.info(f"   Duração mixada: {processor.get_duration_seconds(mixed):.2f}s")
-    
+
+    # Mesmo fluxo em arrays float32 (motor vetorizado, com ducking)
+    import numpy as np
+
+    logger.info("🎙️ Narração sobre trilha em float32 (ducking + loudness)...")
+    t = np.arange(3 * processor.sample_rate) / processor.sample_rate
+    voice = (0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.5 * t) > 0)).astype(np.float32)
+    bed = processor.apply_effects((0.2 * np.sin(2 * np.pi * 110 * t)).astype(np.float32),
+                                  fade_in_ms=200)
+    narrated = processor.mix_narration(voice, bed, normalize="loudness")
+    logger.info(f"   Duração: {processor.get_duration_seconds(narrated):.2f}s")
+
     logger.info("✅ Demonstração de áudio concluída!")
 
 
@@ -126,13 +145,14 @@ def main():
             
             elif choice == "3":
                 print("\n🔍 Executando verificação de ambiente...\n")
-                import check_environment
+                from tests.validation import check_environment
                 check_environment.main()
             
             elif choice == "4":
                 print_config_summary()
             
             elif choice == "5":
+                from backend.utils.resource_manager import get_resource_manager
                 rm = get_resource_manager()
                 rm.print_summary()
             
@@ -143,7 +163,7 @@ def main():
             else:
                 print("\n❌ Opção inválida. Tente novamente.")
         
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             print("\n\n👋 Encerrando Aurora EchoTales. Até logo!\n")
             break
         except Exception as e:
@@ -153,4 +173,7 @@ def main():
 
 
 if __name__ == "__main__":
+    if "--profile-imports" in sys.argv[1:]:
+        from backend.utils.import_profile import main as profile_main
+        sys.exit(profile_main([]))
     main()
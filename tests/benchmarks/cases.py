@@ -0,0 +1,310 @@
+"""
+Casos de Benchmark - Aurora EchoTales
+=====================================
+Cada estágio do pipeline e a orquestração completa.
+
+Alvos:
+    - ``stub``: modelos substitutos determinísticos de ``backend.models.stubs``,
+      em CPU; mede o código do backend (VAD, lotes, KV, Griffin-Lim, mixagem)
+    - ``real``: loaders configurados (pesos reais, GPU se houver)
+"""
+
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from backend import config
+from backend.core.audio_emotion import AudioEmotionHead
+from backend.core.emotion_analyzer import EMOTIONS, TextEmotionAnalyzer
+from backend.core.model_manager import ModelManager
+from backend.core.pipeline import Orchestrator
+from backend.models import stubs
+from backend.models.audio_analyzer import AudioAnalyzer
+from backend.models.experience import ExperiencePipeline
+from backend.models.music_generator import MusicGenerator
+from backend.models.speech_to_text import SpeechTranscriber
+from backend.models.story_generator import StateCache, StoryGenerator
+from backend.models.tts_narrator import TTSNarrator
+from backend.utils.artifact_cache import ArtifactCache
+from backend.utils.audio_mixer import MixEngine, MixParams
+from backend.utils.audio_utils import (
+    AudioProcessor,
+    encode_wav,
+    numpy_to_segment,
+    overlay_bed,
+    segment_to_numpy,
+    wav_header,
+)
+from backend.utils.logger import AuroraLogger, log_context
+from backend.utils.spectrogram_utils import SpectrogramConverter, SpectrogramParams
+from backend.utils.story_store import StoryStore
+from tests.benchmarks.harness import BenchmarkCase
+
+TARGETS = ("stub", "real")
+
+TEXTS = [
+    "I am so happy today, everything is wonderful",
+    "This is the saddest day of my life",
+    "Estou feliz com a aventura da raposa",
+    "O dragão me deixou com medo",
+    "We walked to the market and bought bread",
+    "I am furious about the delay",
+    "Wow, I did not expect that at all",
+    "A floresta estava silenciosa naquela noite",
+] * 4
+
+STORY_TEXT = (
+    "Era uma vez, em uma floresta mágica, vivia uma pequena raposa corajosa. "
+    "Certa noite, um dragão apareceu no céu e todos os animais correram para se esconder. "
+    "Mas a raposa não teve medo: olhou para o dragão e perguntou por que ele estava triste."
+)
+
+
+def synthetic_speech(seconds: float, sample_rate: int = config.STT_SAMPLE_RATE) -> np.ndarray:
+    """Rajadas moduladas separadas por pausas (fala sintética, determinística)."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    voiced = (np.sin(2 * np.pi * 0.25 * t) > -0.3).astype(np.float32)
+    tone = np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    return (0.3 * voiced * tone + 0.002 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def build(target: str, parts=("story", "tts", "music", "stt", "text_emotion")) -> SimpleNamespace:
+    """Instancia só os componentes pedidos, com loaders do alvo."""
+    if target not in TARGETS:
+        raise ValueError(f"Alvo desconhecido: {target} (opções: {', '.join(TARGETS)})")
+    stub = target == "stub"
+    tmp = tempfile.TemporaryDirectory(prefix="aurora-bench-")
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={}) if stub \
+        else ModelManager()
+    env = SimpleNamespace(mm=mm, tmp=Path(tmp.name), closers=[mm.shutdown, tmp.cleanup])
+
+    if "story" in parts:
+        llm = stubs.StubLlama() if stub else None
+        store = StoryStore(path=env.tmp / "stories.db")
+        env.story = StoryGenerator(mm, loader=(lambda: llm) if stub else None,
+                                   state_cache=StateCache(disk=ArtifactCache(root=env.tmp / "kv")),
+                                   store=store)
+        env.closers.insert(0, store.close)
+    if "tts" in parts:
+        tts = stubs.StubTTS() if stub else None
+        env.tts = TTSNarrator(mm, loader=(lambda: tts) if stub else None)
+    if "music" in parts:
+        converter = SpectrogramConverter(SpectrogramParams(num_griffin_lim_iters=8)) if stub else None
+        env.music = MusicGenerator(mm, loader=stubs.make_stub_riffusion_loader() if stub else None,
+                                   converter=converter)
+    if "stt" in parts:
+        backend = stubs.StubSTTBackend() if stub else None
+        env.stt = SpeechTranscriber(mm, loader=(lambda: backend) if stub else None)
+    if "text_emotion" in parts:
+        env.text_emotion = TextEmotionAnalyzer(mm, loader=stubs.StubEmotionClassifier if stub else None)
+        env.closers.insert(0, env.text_emotion.shutdown)
+    return env
+
+
+def close(env: SimpleNamespace):
+    for closer in env.closers:
+        closer()
+
+
+def _text_emotion(target):
+    env = build(target, ("text_emotion",))
+
+    def run():
+        env.text_emotion.analyze_many(TEXTS)
+        return len(TEXTS)
+    return run, lambda: close(env)
+
+
+def _stt(target):
+    env = build(target, ("stt",))
+    audio = synthetic_speech(20.0)
+
+    def run():
+        return env.stt.transcribe(audio).audio_seconds
+    return run, lambda: close(env)
+
+
+def _audio_analysis(target):
+    env = build(target, ("stt", "text_emotion"))
+    head_loader = None
+    if target == "stub":
+        # Cabeça aleatória fixa sobre os 4 valores agrupados do StubSTTBackend
+        rng = np.random.default_rng(0)
+        head = AudioEmotionHead(rng.standard_normal((4, len(EMOTIONS))).astype(np.float32),
+                                np.zeros(len(EMOTIONS), np.float32), np.zeros(4, np.float32),
+                                np.ones(4, np.float32), encoder="stub")
+        head_loader = lambda: head  # noqa: E731
+    analyzer = AudioAnalyzer(env.stt, env.text_emotion, head_loader=head_loader,
+                             measure_memory=False)
+    audio = synthetic_speech(20.0)
+
+    def run():
+        return analyzer.analyze(audio)["audio_seconds"]
+    return run, lambda: close(env)
+
+
+def _story(target):
+    env = build(target, ("story",))
+
+    def run():
+        first = env.story.create("Uma raposa na floresta")
+        second = env.story.continue_story(first.story_id, "Ela encontra um dragão")
+        return first.generated_tokens + second.generated_tokens
+    return run, lambda: close(env)
+
+
+def _tts(target):
+    env = build(target, ("tts",))
+
+    def run():
+        audio, sample_rate, _ = env.tts.synthesize(STORY_TEXT)
+        return len(audio) / sample_rate
+    return run, lambda: close(env)
+
+
+def _music(target):
+    env = build(target, ("music",))
+
+    def run():
+        return env.music.generate(style="piano", mood="calm", duration=10.0, seed=1).duration
+    return run, lambda: close(env)
+
+
+def _mix(target):
+    sample_rate = config.TTS_SAMPLE_RATE
+    rng = np.random.default_rng(0)
+    voice = (0.3 * rng.standard_normal(60 * sample_rate)).astype(np.float32)
+    bed = (0.3 * rng.standard_normal(30 * sample_rate)).astype(np.float32)
+
+    def run():
+        overlay_bed(voice, bed, sample_rate=sample_rate)
+        return 60.0
+    return run, lambda: None
+
+
+def _mix_signals(seconds: float, sample_rate: int) -> tuple:
+    rng = np.random.default_rng(0)
+    voice = (0.3 * rng.standard_normal(int(seconds * sample_rate))).astype(np.float32)
+    bed = (0.3 * rng.standard_normal(30 * sample_rate)).astype(np.float32)
+    return voice, bed
+
+
+def _mix_pydub(target):
+    """Caminho anterior do AudioProcessor: AudioSegments do pydub."""
+    sample_rate = config.TTS_SAMPLE_RATE
+    voice, bed = _mix_signals(60.0, sample_rate)
+    processor = AudioProcessor(sample_rate)
+
+    def run():
+        music = processor.apply_effects(numpy_to_segment(np.tile(bed, 3)[:len(voice) + 2 * sample_rate],
+                                                         sample_rate),
+                                        fade_out_ms=2000, gain_db=-14.0)
+        mixed = processor.mix_audio([music, numpy_to_segment(voice, sample_rate)], mode="overlay")
+        segment_to_numpy(processor.apply_effects(mixed, normalize=True))
+        return 60.0
+    return run, lambda: None
+
+
+def _mix_engine(target):
+    """Mesma mixagem no MixEngine, com ducking e normalização de loudness."""
+    sample_rate = config.TTS_SAMPLE_RATE
+    voice, bed = _mix_signals(60.0, sample_rate)
+    engine = MixEngine(sample_rate)
+    params = MixParams(music_gain_db=-14.0, normalize="loudness")
+
+    def run():
+        engine.overlay(voice, bed, params)
+        return 60.0
+    return run, lambda: None
+
+
+def _mix_stream(target):
+    """História de 10 min mixada de disco para disco (memória constante)."""
+    sample_rate = config.TTS_SAMPLE_RATE
+    tmp = tempfile.TemporaryDirectory(prefix="aurora-bench-")
+    root = Path(tmp.name)
+    voice, bed = _mix_signals(60.0, sample_rate)
+    with open(root / "voice.wav", "wb") as f:
+        # Cabeçalho de 10 min seguido de 10 cópias do PCM de 1 min
+        pcm = encode_wav(voice, sample_rate)[44:]
+        f.write(wav_header(sample_rate, 10 * len(pcm)))
+        for _ in range(10):
+            f.write(pcm)
+    (root / "bed.wav").write_bytes(encode_wav(bed, sample_rate))
+    engine = MixEngine(sample_rate)
+    params = MixParams(music_gain_db=-14.0, normalize="loudness")
+
+    def run():
+        engine.mix_files(root / "voice.wav", root / "bed.wav", root / "out.wav", params)
+        return 600.0
+    return run, tmp.cleanup
+
+
+def _experience(target):
+    env = build(target)
+    orchestrator = Orchestrator(gpu_capacity=10.0 if target == "stub" else config.PIPELINE_GPU_CAPACITY_GB)
+    env.closers.insert(0, orchestrator.shutdown)
+    pipeline = ExperiencePipeline(orchestrator, env.story, env.music, env.tts, env.text_emotion,
+                                  output_dir=env.tmp / "experiences")
+
+    def run():
+        pipeline.run(user_prompt="Uma raposa feliz encontra um dragão")
+        return 1
+    return run, lambda: close(env)
+
+
+def _logger(name: str):
+    tmp = tempfile.TemporaryDirectory(prefix="aurora-bench-")
+    logger = AuroraLogger(f"bench-{name}", level="INFO", console=False, logs_dir=Path(tmp.name))
+
+    def cleanup():
+        logger.close()
+        tmp.cleanup()
+    return logger, cleanup
+
+
+def _logging(target):
+    """1000 registros com campos e contexto, até a gravação em JSON pela thread do logger."""
+    logger, cleanup = _logger("logging")
+
+    def run():
+        with log_context(request_id="bench", stages={}):
+            for i in range(1000):
+                logger.info("🎵 Música: %.1fs em %d janelas", 30.0, i, stage="music", duration_s=0.5)
+        logger.flush()
+        return 1000
+    return run, cleanup
+
+
+def _logging_filtered(target):
+    """Registros abaixo do nível: nada é formatado nem enfileirado."""
+    logger, cleanup = _logger("logging-filtered")
+
+    def run():
+        for i in range(1000):
+            logger.debug("🔎 Janela %d: %s", i, EMOTIONS, stage="music")
+        return 1000
+    return run, cleanup
+
+
+CASES = {
+    case.name: case
+    for case in (
+        BenchmarkCase("text_emotion", _text_emotion, unit="txt"),
+        BenchmarkCase("stt", _stt, unit="s"),
+        BenchmarkCase("audio_analysis", _audio_analysis, unit="s"),
+        BenchmarkCase("story", _story, unit="tok"),
+        BenchmarkCase("tts", _tts, unit="s"),
+        BenchmarkCase("music", _music, unit="s", iterations=3, warmup=1, rounds=2),
+        BenchmarkCase("mix", _mix, unit="s"),
+        BenchmarkCase("mix_pydub", _mix_pydub, unit="s", iterations=5, warmup=1, rounds=2),
+        BenchmarkCase("mix_engine", _mix_engine, unit="s"),
+        BenchmarkCase("mix_stream", _mix_stream, unit="s", iterations=3, warmup=1, rounds=2),
+        BenchmarkCase("logging", _logging, unit="rec"),
+        BenchmarkCase("logging_filtered", _logging_filtered, unit="rec"),
+        BenchmarkCase("experience", _experience, unit="req", iterations=3, warmup=1, rounds=2),
+    )
+}
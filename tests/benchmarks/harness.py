@@ -0,0 +1,239 @@
+"""
+Harness de Benchmarks - Aurora EchoTales
+========================================
+Mede cada caso (latência p50/p90/p99, vazão e pico de memória) e
+compara com uma baseline JSON versionada.
+
+Cada caso roda em ``rounds`` rodadas; p50 e vazão vêm da melhor rodada
+(o ruído do sistema só piora tempos) e p90/p99 de todas as amostras.
+Depois, uma iteração extra fora da medição de tempo roda sob
+``tracemalloc``: o pico de alocações (NumPy e Python) é determinístico,
+ao contrário do RSS, que depende do que o alocador reaproveita.
+
+Uma regressão é p50 ou pico de alocações acima de
+``baseline * (1 + tolerância)`` ou p90, vazão (média, sensível à cauda),
+RSS e VRAM fora de ``2 * tolerância``. Todas as métricas têm folgas
+absolutas: nos modelos substitutos vários casos levam poucos
+milissegundos e poucos MB, onde agendador e alocador dominam a variação.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from backend.utils.resource_manager import measure_peak_memory
+
+SCHEMA_VERSION = 1
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+@dataclass
+class BenchmarkCase:
+    """
+    Um caso de benchmark.
+
+    ``setup(target)`` prepara os modelos e retorna ``(run, teardown)``;
+    ``run()`` executa uma iteração e retorna quantas unidades (``unit``)
+    processou, para o cálculo de vazão. ``version`` muda quando o caso
+    muda de forma incomparável com baselines antigas.
+    """
+
+    name: str
+    setup: Callable[[str], tuple]
+    unit: str = "req"
+    version: int = 1
+    iterations: int = 20
+    warmup: int = 2
+    rounds: int = 3
+
+
+@dataclass
+class CaseResult:
+    name: str
+    version: int
+    unit: str
+    iterations: int
+    rounds: int
+    p50_s: float
+    p90_s: float
+    p99_s: float
+    mean_s: float
+    throughput: float
+    peak_alloc_mb: float
+    peak_rss_mb: float
+    peak_vram_mb: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Regression:
+    case: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1 if self.baseline else float("inf")
+
+    def __str__(self) -> str:
+        return (f"{self.case}.{self.metric}: {self.baseline:.4g} → {self.current:.4g} "
+                f"({self.change:+.0%})")
+
+
+@dataclass
+class Comparison:
+    regressions: List[Regression] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.regressions
+
+
+def run_case(case: BenchmarkCase, target: str = "stub", iterations: Optional[int] = None,
+             warmup: Optional[int] = None, rounds: Optional[int] = None) -> CaseResult:
+    """Executa aquecimento + rodadas de iterações medidas de um caso."""
+    iterations = iterations or case.iterations
+    rounds = rounds or case.rounds
+    run, teardown = case.setup(target)
+    try:
+        for _ in range(case.warmup if warmup is None else warmup):
+            run()
+        measured = []
+        with measure_peak_memory() as peak:
+            for _ in range(rounds):
+                latencies, units = [], 0.0
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    units += run()
+                    latencies.append(time.perf_counter() - start)
+                measured.append((np.array(latencies), units))
+
+        tracemalloc.start()
+        try:
+            run()
+            _, traced_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        teardown()
+
+    best, best_units = min(measured, key=lambda m: float(np.median(m[0])))
+    every = np.concatenate([latencies for latencies, _ in measured])
+    return CaseResult(
+        name=case.name,
+        version=case.version,
+        unit=case.unit,
+        iterations=iterations,
+        rounds=rounds,
+        p50_s=float(np.median(best)),
+        p90_s=float(np.percentile(every, 90)),
+        p99_s=float(np.percentile(every, 99)),
+        mean_s=float(every.mean()),
+        throughput=best_units / float(best.sum()),
+        peak_alloc_mb=traced_peak / 1024**2,
+        peak_rss_mb=peak.ram_mb,
+        peak_vram_mb=peak.vram_mb,
+    )
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def make_report(results: Sequence[CaseResult], target: str) -> dict:
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "target": target,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "git": _git_revision(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "cases": {r.name: r.to_dict() for r in results},
+    }
+
+
+def baseline_path(target: str, directory: Path = BASELINE_DIR) -> Path:
+    return Path(directory) / f"{target}.json"
+
+
+def save_baseline(report: dict, path: Path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def load_baseline(path: Path) -> Optional[dict]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    report = json.loads(path.read_text(encoding="utf-8"))
+    if report.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"Baseline {path} usa schema {report.get('schema_version')}; "
+                         f"esperado {SCHEMA_VERSION} (regrave com --save)")
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.25,
+            latency_slack_s: float = 0.002, alloc_slack_mb: float = 2.0,
+            rss_slack_mb: float = 64.0) -> Comparison:
+    """Compara um relatório com a baseline do mesmo alvo."""
+    comparison = Comparison()
+    for name, current in report["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None or base["version"] != current["version"]:
+            comparison.skipped.append(name)
+            continue
+
+        def check(metric, factor, slack, higher_is_worse=True):
+            if higher_is_worse:
+                regressed = current[metric] > base[metric] * (1 + factor) + slack
+            else:
+                # Vazão: a folga de latência vale por unidade processada
+                allowed_s = base["mean_s"] * (1 + factor) + slack
+                regressed = current[metric] < base[metric] * base["mean_s"] / allowed_s
+            if regressed:
+                comparison.regressions.append(Regression(name, metric, base[metric], current[metric]))
+
+        check("p50_s", tolerance, latency_slack_s)
+        check("p90_s", 2 * tolerance, latency_slack_s)
+        check("throughput", 2 * tolerance, latency_slack_s, higher_is_worse=False)
+        check("peak_alloc_mb", tolerance, alloc_slack_mb)
+        check("peak_rss_mb", 2 * tolerance, rss_slack_mb)
+        check("peak_vram_mb", 2 * tolerance, rss_slack_mb)
+    return comparison
+
+
+def format_table(results: Sequence[CaseResult], baseline: Optional[dict] = None) -> str:
+    """Tabela em texto com a variação do p50 em relação à baseline."""
+    lines = [f"{'caso':<14} {'p50':>9} {'p90':>9} {'p99':>9} {'vazão':>14} {'alocado':>10} "
+             f"{'pico RSS':>10}  Δp50"]
+    for r in results:
+        delta = ""
+        base = (baseline or {}).get("cases", {}).get(r.name)
+        if base and base["version"] == r.version and base["p50_s"]:
+            delta = f"{r.p50_s / base['p50_s'] - 1:+.0%}"
+        lines.append(f"{r.name:<14} {r.p50_s * 1000:>7.1f}ms {r.p90_s * 1000:>7.1f}ms "
+                     f"{r.p99_s * 1000:>7.1f}ms {r.throughput:>9.1f} {r.unit + '/s':<4} "
+                     f"{r.peak_alloc_mb:>8.1f}MB {r.peak_rss_mb:>8.1f}MB  {delta}")
+    return "\n".join(lines)
@@ -0,0 +1,83 @@
+"""
+⏱️ Benchmarks - Aurora EchoTales
+
+Executa os casos e compara com a baseline do alvo; sai com código 1 se
+algum caso regredir além da tolerância.
+
+Uso:
+    python -m tests.benchmarks.run                      # modelos substitutos, CPU
+    python -m tests.benchmarks.run --save               # regrava a baseline
+    python -m tests.benchmarks.run --cases story,tts --tolerance 0.5
+    python -m tests.benchmarks.run --target real        # pesos reais (GPU)
+"""
+
+import argparse
+import sys
+
+from tests.benchmarks.cases import CASES, TARGETS
+from tests.benchmarks.harness import (
+    baseline_path,
+    compare,
+    format_table,
+    load_baseline,
+    make_report,
+    run_case,
+    save_baseline,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do backend")
+    parser.add_argument("--target", choices=TARGETS, default="stub")
+    parser.add_argument("--cases", help="Casos separados por vírgula (padrão: todos)")
+    parser.add_argument("--iterations", type=int, help="Sobrescreve as iterações de cada caso")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Regressão relativa tolerada (padrão: 0.25)")
+    parser.add_argument("--baseline", help="Arquivo de baseline (padrão: baselines/<alvo>.json)")
+    parser.add_argument("--save", action="store_true", help="Grava o resultado como baseline")
+    args = parser.parse_args(argv)
+
+    names = args.cases.split(",") if args.cases else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        parser.error(f"casos desconhecidos: {', '.join(unknown)}")
+
+    path = baseline_path(args.target) if args.baseline is None else args.baseline
+    baseline = None if args.save else load_baseline(path)
+
+    results = []
+    for name in names:
+        print(f"⏳ {name}...", flush=True)
+        results.append(run_case(CASES[name], args.target, iterations=args.iterations))
+    report = make_report(results, args.target)
+
+    print()
+    print(format_table(results, baseline))
+    if args.save:
+        previous = load_baseline(path) if args.cases else None
+        if previous is not None:
+            # Regravar só alguns casos preserva os demais
+            report["cases"] = {**previous["cases"], **report["cases"]}
+        save_baseline(report, path)
+        print(f"\n💾 Baseline gravada em {path}")
+        return 0
+    if baseline is None:
+        print(f"\n⚠️  Sem baseline em {path}; rode com --save para criar")
+        return 0
+
+    if baseline["machine"] != report["machine"]:
+        print("\n⚠️  Baseline gravada em outra máquina; compare com cautela")
+    comparison = compare(report, baseline, tolerance=args.tolerance)
+    for name in comparison.skipped:
+        print(f"⏭️  {name}: sem baseline compatível")
+    if comparison.ok:
+        print(f"\n✅ Sem regressões (tolerância {args.tolerance:.0%})")
+        return 0
+    print(f"\n❌ {len(comparison.regressions)} regressão(ões):")
+    for regression in comparison.regressions:
+        print(f"   {regression}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
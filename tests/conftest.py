@@ -0,0 +1,70 @@
+"""
+Configuração do pytest - Aurora EchoTales
+==========================================
+Os scripts de ``tests/validation`` exigem GPU e pesos reais e são
+executados manualmente; aqui ficam apenas os testes do backend.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.models import speaker_latents, stem_library, story_render  # noqa: E402
+from backend.utils import artifact_cache, audio_store, story_store  # noqa: E402
+
+collect_ignore = ["validation"]
+
+
+@pytest.fixture(autouse=True)
+def isolated_artifact_cache(tmp_path, monkeypatch):
+    """Cada teste usa um cache de artefatos vazio em diretório temporário."""
+    cache = artifact_cache.ArtifactCache(root=tmp_path / "artifacts")
+    monkeypatch.setattr(artifact_cache, "_artifact_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_story_store(tmp_path, monkeypatch):
+    """Histórias gravadas em um banco SQLite temporário."""
+    store = story_store.StoryStore(path=tmp_path / "stories.db")
+    monkeypatch.setattr(story_store, "_story_store", store)
+    yield store
+    store.close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_audio_store(tmp_path, monkeypatch):
+    """Áudios servidos em /api/media gravados em diretório temporário."""
+    store = audio_store.AudioStore(root=tmp_path / "media")
+    monkeypatch.setattr(audio_store, "_audio_store", store)
+    yield store
+    store.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def isolated_stem_library(tmp_path, monkeypatch):
+    """Biblioteca de stems vazia: música sempre gerada ao vivo, salvo quando o teste constrói uma."""
+    library = stem_library.StemLibrary(root=tmp_path / "stems")
+    monkeypatch.setattr(stem_library, "_stem_library", library)
+    return library
+
+
+@pytest.fixture(autouse=True)
+def isolated_voices(tmp_path, monkeypatch):
+    """Vozes de referência e latentes de condicionamento em diretórios temporários."""
+    voices = speaker_latents.VoiceLibrary(root=tmp_path / "voices")
+    monkeypatch.setattr(speaker_latents, "_voice_library", voices)
+    monkeypatch.setattr(speaker_latents, "_latent_cache",
+                        speaker_latents.SpeakerLatentCache(root=tmp_path / "speaker_latents"))
+    return voices
+
+
+@pytest.fixture(autouse=True)
+def isolated_story_segments(tmp_path, monkeypatch):
+    """Segmentos renderizados de histórias em diretório temporário."""
+    renderer = story_render.StoryRenderer(root=tmp_path / "story_segments")
+    monkeypatch.setattr(story_render, "_story_renderer", renderer)
+    return renderer
@@ -0,0 +1,106 @@
+"""
+Testes do cache de artefatos endereçado por conteúdo.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.models import music_generator
+from backend.utils.artifact_cache import ArtifactCache, make_cache_key
+from tests.test_music_generator import make_generator
+
+
+def test_key_normalizes_params_and_text():
+    a = make_cache_key("tts", params={"speed": 1.0, "style": "calm"}, text="Era  uma\nvez")
+    b = make_cache_key("tts", params={"style": "calm", "speed": 1.0000001}, text=" Era uma vez ")
+    assert a == b
+    assert a != make_cache_key("tts", params={"style": "calm", "speed": 1.0}, text="Era uma vez",
+                               seed=1)
+    assert a != make_cache_key("music", params={"style": "calm", "speed": 1.0}, text="Era uma vez")
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = ArtifactCache(root=tmp_path, max_bytes=250)
+    cache.put("a" * 8, b"x" * 100)
+    cache.put("b" * 8, b"x" * 100)
+    assert cache.get("a" * 8) is not None  # "b" passa a ser o menos usado
+
+    cache.put("c" * 8, b"x" * 100)
+
+    assert cache.contains("a" * 8) and cache.contains("c" * 8)
+    assert not cache.contains("b" * 8)
+    assert not (tmp_path / "bb" / f"{'b' * 8}.bin").exists()
+    assert cache.get_stats()["size_bytes"] == 200
+    assert cache.stats.evictions == 1
+
+
+def test_index_survives_restart_and_drops_partial_writes(tmp_path):
+    cache = ArtifactCache(root=tmp_path)
+    cache.put("ab12", b"audio", {"X-Audio-Duration": "1.000"})
+    (tmp_path / "ab" / "ab34.bin").write_bytes(b"sem metadados")
+    (tmp_path / "ab" / "ab56.bin.tmp").write_bytes(b"escrita interrompida")
+
+    reopened = ArtifactCache(root=tmp_path)
+    artifact = reopened.get("ab12")
+    assert artifact.data == b"audio" and artifact.meta == {"X-Audio-Duration": "1.000"}
+    assert not reopened.contains("ab34")
+    assert sorted(p.name for p in (tmp_path / "ab").iterdir()) == ["ab12.bin", "ab12.json"]
+
+
+def test_concurrent_identical_requests_are_coalesced(tmp_path):
+    cache = ArtifactCache(root=tmp_path)
+    calls = []
+    gate = threading.Event()
+
+    def produce():
+        calls.append(1)
+        gate.wait(timeout=5)
+        return b"wav", {"n": len(calls)}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(cache.get_or_create, "k" * 8, produce) for _ in range(4)]
+        time.sleep(0.1)
+        gate.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert sorted(r.status for r in results) == ["coalesced"] * 3 + ["miss"]
+    assert cache.get_or_create("k" * 8, produce).status == "hit"
+    stats = cache.get_stats()
+    assert stats["hit_ratio"] == pytest.approx(4 / 5)
+    assert stats["bytes_saved"] == 4 * len(b"wav")
+
+
+def test_failed_generation_is_not_cached(tmp_path):
+    cache = ArtifactCache(root=tmp_path)
+
+    def fail():
+        raise RuntimeError("sem VRAM")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_create("f" * 8, fail)
+    assert cache.get_or_create("f" * 8, lambda: (b"ok", {})).status == "miss"
+
+
+def test_generate_music_served_from_cache(monkeypatch):
+    from backend.main import app
+
+    generator = make_generator()
+    calls = []
+    original = generator.generate
+    monkeypatch.setattr(generator, "generate", lambda **kw: calls.append(kw) or original(**kw))
+    monkeypatch.setattr(music_generator, "_music_generator", generator)
+
+    client = TestClient(app)
+    body = {"params": {"style": "piano", "mood": "calm"}, "duration": 4}
+    first = client.post("/api/generate-music", json=body)
+    second = client.post("/api/generate-music", json=body)
+
+    assert first.headers["X-Cache"] == "MISS" and second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert second.headers["X-Audio-Duration"] == first.headers["X-Audio-Duration"]
+    assert len(calls) == 1
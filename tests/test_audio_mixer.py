@@ -0,0 +1,110 @@
+"""
+Testes do motor de mixagem em blocos (overlay, ducking, normalização e disco).
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from backend.utils.audio_mixer import GainEnvelope, MixEngine, MixParams
+from backend.utils.audio_utils import AudioProcessor, encode_wav, overlay_bed
+
+SR = 8000
+
+
+def signals(voice_s=3.0, bed_s=1.3, seed=0):
+    rng = np.random.default_rng(seed)
+    voice = (0.4 * rng.standard_normal(int(voice_s * SR))).astype(np.float32)
+    voice[int(1.0 * SR):int(2.0 * SR)] = 0.0  # pausa no meio da fala
+    bed = (0.5 * rng.standard_normal(int(bed_s * SR))).astype(np.float32)
+    return voice, bed
+
+
+def test_overlay_matches_previous_overlay_bed():
+    voice, bed = signals()
+    voice *= 4  # força a normalização de pico
+    total = len(voice) + 2 * SR
+    music = np.tile(bed, -(-total // len(bed)))[:total] * np.float32(10 ** (-14 / 20))
+    music[total - 2 * SR:] *= np.linspace(1.0, 0.0, 2 * SR, dtype=np.float32)
+    music[:len(voice)] += voice
+    expected = music / np.max(np.abs(music))
+
+    result = overlay_bed(voice, bed, gain_db=-14.0, tail_s=2.0, sample_rate=SR)
+    assert result.dtype == np.float32 and len(result) == total
+    np.testing.assert_allclose(result, expected, atol=1e-6)
+    assert len(overlay_bed(voice[:0], bed[:0], sample_rate=SR)) == 2 * SR
+
+
+def test_ducking_follows_voice_and_ignores_block_size():
+    voice, bed = signals()
+    params = MixParams(music_gain_db=0.0, duck_db=-12.0, tail_s=0.0, normalize=None)
+    ducked, _ = MixEngine(SR, block_frames=4096).overlay(voice, bed, params)
+    for block_frames in (333, 65536):
+        other, stats = MixEngine(SR, block_frames=block_frames).overlay(voice, bed, params)
+        np.testing.assert_allclose(other, ducked, atol=1e-6)
+    assert stats.blocks == 1
+
+    music = ducked - voice
+    plain = MixEngine(SR).overlay(voice, bed, MixParams(music_gain_db=0.0, duck_db=0.0,
+                                                        tail_s=0.0, normalize=None))[0] - voice
+    rms = lambda x: float(np.sqrt(np.mean(x ** 2)))  # noqa: E731
+    talking, pause = slice(int(0.5 * SR), SR), slice(int(1.8 * SR), 2 * SR)
+    assert rms(music[talking]) == pytest.approx(rms(plain[talking]) * 10 ** (-12 / 20), rel=0.05)
+    assert rms(music[pause]) > 0.8 * rms(plain[pause])  # release: a trilha volta na pausa
+
+    # Envelope de ganho: fade-in de -60 dB a 0 dB no primeiro segundo
+    enveloped, _ = MixEngine(SR).overlay(np.zeros(2 * SR, np.float32), bed, MixParams(
+        music_gain_db=0.0, duck_db=0.0, tail_s=0.0, normalize=None,
+        envelope=GainEnvelope([(0.0, -60.0), (1.0, 0.0)])))
+    assert rms(enveloped[:100]) < 0.01 and rms(enveloped[SR:SR + 100]) > 0.3
+
+
+def test_mix_files_streams_with_loudness_normalization(tmp_path):
+    voice, bed = signals(voice_s=5.0)
+    (tmp_path / "voice.wav").write_bytes(encode_wav(voice, SR))
+    (tmp_path / "bed.wav").write_bytes(encode_wav(bed, SR))
+    params = MixParams(normalize="loudness", target_dbfs=-20.0)
+    engine = MixEngine(SR, block_frames=1000)
+
+    stats = engine.mix_files(tmp_path / "voice.wav", tmp_path / "bed.wav", tmp_path / "out.wav",
+                             params)
+    written, rate = sf.read(str(tmp_path / "out.wav"), dtype="float32")
+    assert rate == SR and stats.blocks == -(-len(written) // 1000)
+    assert stats.to_dict()["rms_dbfs"] == pytest.approx(-20.0, abs=0.01)
+    assert 20 * np.log10(np.sqrt(np.mean(written ** 2))) == pytest.approx(-20.0, abs=0.1)
+    assert list(tmp_path.glob(".mix-*")) == []
+
+    # Mesmo resultado que em memória (a menos da quantização em 16 bits)
+    quantized = np.frombuffer(encode_wav(voice, SR)[44:], dtype="<i2") / 32768.0
+    in_memory, _ = engine.overlay(quantized.astype(np.float32),
+                                  np.frombuffer(encode_wav(bed, SR)[44:], dtype="<i2") / 32768.0,
+                                  params)
+    np.testing.assert_allclose(written, in_memory, atol=2e-4)
+
+    peak = MixEngine(SR).overlay(voice, bed, MixParams(normalize="peak", ceiling_db=-3.0))[0]
+    assert float(np.max(np.abs(peak))) == pytest.approx(10 ** (-3 / 20), rel=1e-4)
+    with pytest.raises(ValueError):
+        MixEngine(SR * 2).mix_files(tmp_path / "voice.wav", tmp_path / "bed.wav",
+                                    tmp_path / "x.wav")
+
+
+def test_audio_processor_array_paths():
+    processor = AudioProcessor(SR)
+    tone = np.full(SR, 0.5, dtype=np.float32)
+
+    faded = processor.apply_effects(tone, fade_in_ms=100, fade_out_ms=100, normalize=True)
+    assert faded[0] == 0.0 and faded[-1] == 0.0 and tone[0] == 0.5
+    assert float(faded.max()) == pytest.approx(10 ** (-0.1 / 20), rel=1e-5)
+
+    joined = processor.mix_audio([tone, tone, tone], mode="sequential", crossfade_ms=250)
+    assert len(joined) == 3 * SR - 2 * (SR // 4)
+    np.testing.assert_allclose(joined, 0.5, atol=1e-6)  # crossfade linear de sinais iguais
+    assert processor.get_duration_seconds(joined) == pytest.approx(2.5)
+
+    stacked = processor.mix_audio([tone, tone[:SR // 2]], mode="overlay")
+    assert len(stacked) == SR and stacked[0] == 1.0 and stacked[-1] == 0.5
+    with pytest.raises(ValueError):
+        processor.mix_audio([tone], mode="shuffle")
+
+    narrated = processor.mix_narration(tone, tone, tail_s=0.5, duck_db=0.0)
+    assert len(narrated) == SR + SR // 2
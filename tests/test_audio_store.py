@@ -0,0 +1,131 @@
+"""
+Testes da entrega de áudio comprimido (Opus/MP3) com Range e ETag.
+"""
+
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+
+from backend.core.model_manager import ModelManager
+from backend.models import tts_narrator
+from backend.models.stubs import StubTTS
+from backend.models.tts_narrator import TTSNarrator
+from backend.utils.audio_store import compressed_format
+from backend.utils.audio_utils import encode_wav
+
+STORY = "Era uma vez um farol no fim do mundo. Toda noite ele contava histórias ao mar."
+
+
+def tone(seconds: float, sample_rate: int) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def test_put_encodes_in_background(isolated_audio_store):
+    store = isolated_audio_store
+    asset = store.put("narracao", encode_wav(tone(5.0, 24000), 24000))
+    assert set(asset.variants) == {"wav"} and asset.duration == pytest.approx(5.0)
+    assert store.wait("narracao", timeout=30)
+
+    asset = store.get("narracao")
+    opus = asset.variants["opus"]
+    assert opus.file.endswith(".ogg") and opus.size < asset.variants["wav"].size / 4
+    assert opus.etag != asset.variants["wav"].etag
+    decoded, rate = sf.read(store.path(opus))
+    assert rate == 24000 and abs(len(decoded) - 5 * 24000) < 2400
+
+    # Taxa não aceita pelo Opus (música em 44,1 kHz) vai para MP3
+    assert compressed_format(44100) == "mp3"
+    store.put("musica", tone(2.0, 44100), sample_rate=44100)
+    store.wait("musica", timeout=30)
+    assert store.resolve("musica").format == "mp3"
+    assert store.put("musica", b"ignorado").variants.keys() == {"wav", "mp3"}
+
+    stats = store.get_stats()
+    assert stats["encoded"] == 2 and stats["compression_ratio"] > 4 and stats["pending"] == 0
+    with pytest.raises(ValueError):
+        store.put("../fora", b"")
+
+
+def test_incremental_encoder_finishes_with_generation(isolated_audio_store):
+    store = isolated_audio_store
+    encoder = store.incremental("stream", 24000)
+    audio = tone(3.0, 24000)
+    for block in np.array_split(audio, 12):
+        encoder.write(block)
+    asset = encoder.finish()
+
+    assert set(asset.variants) == {"wav", "opus"}
+    assert asset.duration == pytest.approx(3.0)
+    wav, _ = sf.read(store.path(asset.variants["wav"]), dtype="float32")
+    np.testing.assert_allclose(wav, audio, atol=1e-4)
+    assert store.get_stats()["incremental"] == 1
+
+    aborted = store.incremental("cancelado", 24000)
+    aborted.write(audio)
+    aborted.abort()
+    assert store.get("cancelado") is None
+    assert not list(store.root.glob("cancelado*"))
+
+
+def test_media_endpoint_ranges_and_conditional_requests(isolated_audio_store):
+    from backend.main import app
+
+    store = isolated_audio_store
+    store.put("faixa", encode_wav(tone(4.0, 24000), 24000))
+    store.wait("faixa", timeout=30)
+    client = TestClient(app)
+
+    full = client.get("/api/media/faixa")
+    assert full.status_code == 200 and full.headers["content-type"] == "audio/ogg"
+    assert full.headers["accept-ranges"] == "bytes" and full.headers["cache-control"] == "no-cache"
+    etag = full.headers["etag"]
+    assert etag == store.resolve("faixa").etag
+
+    part = client.get("/api/media/faixa", headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206 and part.content == full.content[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(full.content)}"
+
+    assert client.get("/api/media/faixa", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/media/faixa",
+                      headers={"If-None-Match": f'"outro", W/{etag}'}).status_code == 304
+    stale = client.get("/api/media/faixa", headers={"Range": "bytes=0-9", "If-Range": '"velho"'})
+    assert stale.status_code == 200 and len(stale.content) == len(full.content)
+    tail = client.get("/api/media/faixa", headers={"Range": f"bytes={len(full.content)}-"})
+    assert tail.status_code == 416
+
+    wav = client.get("/api/media/faixa", params={"format": "wav"})
+    assert wav.content[:4] == b"RIFF" and "immutable" in wav.headers["cache-control"]
+    head = client.head("/api/media/faixa")
+    assert head.status_code == 200 and head.content == b""
+    assert int(head.headers["content-length"]) == len(full.content)
+
+    assert client.get("/api/media/faixa/info").json()["data"]["variants"].keys() == {"wav", "opus"}
+    assert client.get("/api/media/ausente").status_code == 404
+    assert client.get("/api/media/faixa", params={"format": "mp3"}).status_code == 404
+
+
+def test_streamed_narration_is_encoded_incrementally(monkeypatch):
+    from backend.main import app
+
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    stub = StubTTS(latency_s=0.01)
+    monkeypatch.setattr(tts_narrator, "_narrator", TTSNarrator(mm, loader=lambda: stub))
+    client = TestClient(app)
+
+    streamed = client.post("/api/synthesize-speech", json={"text": STORY, "stream": True})
+    url = streamed.headers["X-Audio-URL"]
+    # Já codificado durante a síntese: nada a esperar
+    served = client.get(url)
+    assert served.headers["X-Audio-Format"] == "opus"
+    decoded, rate = sf.read(io.BytesIO(served.content))
+    assert abs(len(decoded) / rate - (len(streamed.content) - 44) / 2 / rate) < 0.1
+
+    linked = client.post("/api/synthesize-speech",
+                         json={"text": STORY, "delivery": "url"}).json()["data"]
+    assert linked["url"] == url and linked["duration"] > 0
+    assert client.get(linked["wav_url"]).content[44:] == streamed.content[44:]
+    mm.shutdown()
@@ -0,0 +1,138 @@
+"""
+Testes da decodificação de uploads em streaming para /api/analyze-audio.
+"""
+
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+from scipy.signal import resample_poly
+
+from backend.core.emotion_analyzer import TextEmotionAnalyzer
+from backend.core.model_manager import ModelManager
+from backend.models import audio_analyzer
+from backend.models.audio_analyzer import AudioAnalyzer
+from backend.models.speech_to_text import SpeechTranscriber
+from backend.models.stubs import StubEmotionClassifier, StubSTTBackend
+from backend.utils.audio_stream import AudioDecodeError, StreamingAudioDecoder, decode_stream
+from backend.utils.audio_utils import get_resampler, resample
+
+
+def wav_bytes(audio: np.ndarray, sample_rate: int, subtype: str) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format="WAV", subtype=subtype)
+    return buffer.getvalue()
+
+
+def chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def speech(seconds: float, sample_rate: int) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * 220 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+
+
+@pytest.mark.parametrize("subtype", ["PCM_U8", "PCM_16", "PCM_24", "PCM_32", "FLOAT"])
+def test_wav_chunks_decode_like_soundfile(subtype):
+    rng = np.random.default_rng(0)
+    stereo = (0.5 * rng.standard_normal((4801, 2))).clip(-1, 1).astype(np.float32)
+    data = wav_bytes(stereo, 48000, subtype)
+    expected, _ = sf.read(io.BytesIO(data), dtype="float32")
+
+    # Blocos de tamanho ímpar cortam cabeçalho e quadros no meio
+    decoded = decode_stream(chunks(data, 7 if subtype == "PCM_U8" else 333))
+    assert decoded.decoder == "wav" and decoded.sample_rate == 48000
+    # Buffer alocado de uma vez pelo tamanho do chunk 'data'
+    assert decoded.audio.base is not None and decoded.audio.base.size == len(expected)
+    np.testing.assert_allclose(decoded.audio, expected.mean(axis=1), atol=1e-6)
+    assert decoded.timings.bytes == len(data)
+
+
+def test_non_wav_falls_back_and_errors_are_clear():
+    audio = speech(1.0, 16000)
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, 16000, format="FLAC")
+    decoded = decode_stream(chunks(buffer.getvalue(), 1000), ffmpeg="")
+    assert decoded.decoder == "buffered" and decoded.seconds == pytest.approx(1.0)
+    np.testing.assert_allclose(decoded.audio, audio, atol=1e-4)
+
+    with pytest.raises(AudioDecodeError):
+        StreamingAudioDecoder().finish()
+    with pytest.raises(AudioDecodeError):
+        decode_stream([b"RIFF\x00\x00\x00\x00WAVEdata\x00\x00\x00\x00"])
+
+
+def test_resampler_is_cached_per_rate_pair():
+    get_resampler.cache_clear()
+    audio = speech(0.5, 44100)
+    out = resample(audio, 44100, 16000)
+    np.testing.assert_allclose(out, resample_poly(audio, 160, 441), atol=1e-5)
+    resample(audio[:1000], 44100, 16000)
+    info = get_resampler.cache_info()
+    assert info.misses == 1 and info.hits == 1
+    assert get_resampler(44100, 16000)[2] is get_resampler(44100, 16000)[2]
+
+
+def test_endpoint_streams_multipart_and_raw_bodies(monkeypatch):
+    from backend.main import app
+
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    emotion = TextEmotionAnalyzer(mm, loader=StubEmotionClassifier)
+    transcriber = SpeechTranscriber(mm, loader=StubSTTBackend)
+    monkeypatch.setattr(audio_analyzer, "_audio_analyzer", AudioAnalyzer(transcriber, emotion))
+    client = TestClient(app)
+
+    audio = np.concatenate([np.zeros(24000, np.float32), speech(1.0, 48000), np.zeros(24000, np.float32)])
+    data = wav_bytes(audio, 48000, "PCM_16")
+
+    multipart = client.post("/api/analyze-audio",
+                            files={"audio": ("gravacao.webm", data, "audio/webm")}).json()["data"]
+    raw = client.post("/api/analyze-audio", content=iter(chunks(data, 4096)),
+                      headers={"Content-Type": "audio/wav"}).json()["data"]
+    for result in (multipart, raw):
+        assert result["audio_seconds"] == pytest.approx(2.0, abs=0.01)
+        assert result["upload_bytes"] == len(data)
+        assert {"upload", "decode", "resample"} <= result["timings"].keys()
+        assert result["timings"]["resample"] > 0
+    assert multipart["transcript"] == raw["transcript"]
+
+    assert client.post("/api/analyze-audio", content=b"",
+                       headers={"Content-Type": "audio/wav"}).status_code == 400
+    missing = client.post("/api/analyze-audio", files={"outro": ("x.wav", data, "audio/wav")})
+    assert missing.status_code == 400 and "audio" in missing.json()["detail"]
+    emotion.shutdown()
+    mm.shutdown()
+
+
+def test_interrupted_upload_stops_ffmpeg(tmp_path, monkeypatch):
+    from backend.main import app
+    from backend.utils import audio_stream
+
+    fake = tmp_path / "ffmpeg"
+    fake.write_text("#!/bin/sh\nexec cat > /dev/null\n")  # lê o stdin e nunca responde
+    fake.chmod(0o755)
+    decoder = StreamingAudioDecoder(ffmpeg=str(fake))
+    decoder.feed(b"OggS" + bytes(4096))
+    ffmpeg = decoder._decoder
+    assert decoder.kind == "ffmpeg" and ffmpeg.process.poll() is None
+    decoder.abort()
+    assert ffmpeg.process.poll() is not None and not ffmpeg._reader.is_alive()
+    decoder.abort()  # idempotente
+
+    # Falha que não é do áudio vira 500 (não 400), e o decodificador é liberado do mesmo jeito
+    monkeypatch.setattr(audio_stream.shutil, "which", lambda name: None)
+    class BrokenAnalyzer:
+        def analyze_decoded(self, decoded):
+            raise RuntimeError("modelo")
+
+    monkeypatch.setattr(audio_analyzer, "_audio_analyzer", BrokenAnalyzer())
+    client = TestClient(app, raise_server_exceptions=False)
+    data = wav_bytes(speech(0.5, 16000), 16000, "PCM_16")
+    assert client.post("/api/analyze-audio", content=data,
+                       headers={"Content-Type": "audio/wav"}).status_code == 500
+    bad = client.post("/api/analyze-audio", content=b"--x\r\nlixo",
+                      headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert bad.status_code == 400
@@ -0,0 +1,64 @@
+"""
+Testes do harness de benchmarks (as medições em si rodam via
+``python -m tests.benchmarks.run``).
+"""
+
+import time
+
+import pytest
+
+from tests.benchmarks import harness
+from tests.benchmarks.cases import CASES
+from tests.benchmarks.harness import BenchmarkCase, compare, make_report, run_case
+
+
+def sleeper_case(seconds, units=2.0):
+    def setup(target):
+        def run():
+            time.sleep(seconds)
+            return units
+        return run, lambda: None
+    return BenchmarkCase("sleep", setup, unit="item", iterations=5, warmup=1, rounds=2)
+
+
+def test_run_case_reports_percentiles_and_throughput():
+    result = run_case(sleeper_case(0.01))
+    assert result.iterations == 5 and result.rounds == 2
+    assert 0.01 <= result.p50_s <= result.p90_s <= result.p99_s
+    assert result.throughput == pytest.approx(2.0 / 0.01, rel=0.5)
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = make_report([run_case(sleeper_case(0.01))], "stub")
+    same = make_report([run_case(sleeper_case(0.01))], "stub")
+    slower = make_report([run_case(sleeper_case(0.03))], "stub")
+
+    assert compare(same, baseline, tolerance=0.5).ok
+    result = compare(slower, baseline, tolerance=0.5)
+    assert {r.metric for r in result.regressions} >= {"p50_s", "throughput"}
+
+
+def test_version_mismatch_is_skipped_and_schema_checked(tmp_path):
+    baseline = make_report([run_case(sleeper_case(0.001))], "stub")
+    current = make_report([run_case(sleeper_case(0.001))], "stub")
+    current["cases"]["sleep"]["version"] = 2
+    assert compare(current, baseline).skipped == ["sleep"]
+
+    path = tmp_path / "stub.json"
+    harness.save_baseline(baseline, path)
+    assert harness.load_baseline(path)["cases"]["sleep"]["unit"] == "item"
+    baseline["schema_version"] = 0
+    harness.save_baseline(baseline, path)
+    with pytest.raises(ValueError):
+        harness.load_baseline(path)
+
+
+def test_stub_cases_run_on_cpu():
+    for name in ("text_emotion", "stt", "story", "tts", "mix"):
+        result = run_case(CASES[name], "stub", iterations=1, warmup=0, rounds=1)
+        assert result.throughput > 0
+
+
+def test_committed_baseline_covers_all_cases():
+    baseline = harness.load_baseline(harness.baseline_path("stub"))
+    assert set(baseline["cases"]) == set(CASES)
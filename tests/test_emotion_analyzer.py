@@ -0,0 +1,84 @@
+"""
+Testes do analisador de emoção de texto com micro-batching.
+"""
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.core import emotion_analyzer
+from backend.core.emotion_analyzer import EMOTIONS, TextEmotionAnalyzer, aggregate_emotion
+from backend.core.model_manager import ModelManager
+from backend.models.stubs import StubEmotionClassifier
+
+
+@pytest.fixture
+def stub():
+    return StubEmotionClassifier(latency_s=0.005)
+
+
+@pytest.fixture
+def analyzer(stub):
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    a = TextEmotionAnalyzer(mm, loader=lambda: stub, max_batch_size=16, max_wait_ms=50,
+                            buckets=(8, 64))
+    yield a
+    a.shutdown()
+    mm.shutdown()
+
+
+def test_aggregate_emotion_shape():
+    result = aggregate_emotion({"joy": 0.7, "neutral": 0.2, "sadness": 0.1})
+    assert result["dominant_emotion"] == "joy"
+    assert result["confidence"] == pytest.approx(0.7)
+    assert result["intensity"] == pytest.approx(0.8)
+    assert set(result["emotion_scores"]) == set(EMOTIONS)
+
+
+def test_single_request(analyzer):
+    result = analyzer.analyze("I am so happy today")
+    assert result["dominant_emotion"] == "joy"
+
+
+def test_concurrent_requests_share_forward_passes(analyzer, stub):
+    texts = ["happy"] * 6 + ["this is the saddest moment of my whole long life ever"] * 6
+    results = [None] * len(texts)
+    barrier = threading.Barrier(len(texts))
+
+    def worker(i):
+        barrier.wait()
+        results[i] = analyzer.analyze(texts[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [r["dominant_emotion"] for r in results] == ["joy"] * 6 + ["sadness"] * 6
+    # Muito menos passadas que textos; curtos e longos em faixas separadas
+    assert len(stub.forward_calls) < len(texts)
+    short_passes = [padded for _, padded in stub.forward_calls if padded <= 8]
+    assert short_passes and max(short_passes) == 3
+
+    stats = analyzer.get_stats()
+    assert stats["requests"] == len(texts)
+    assert stats["mean_batch_size"] > 1
+    assert stats["queue_time_ms_p95"] >= 0
+
+
+def test_respects_max_batch_size(analyzer, stub):
+    results = analyzer.analyze_many(["wow"] * 40)
+    assert all(r["dominant_emotion"] == "surprise" for r in results)
+    assert all(size <= 16 for size, _ in stub.forward_calls)
+
+
+def test_analyze_text_endpoint(analyzer, monkeypatch):
+    from backend.main import app
+
+    monkeypatch.setattr(emotion_analyzer, "_text_emotion_analyzer", analyzer)
+    client = TestClient(app)
+    response = client.post("/api/analyze-text", json={"text": "I'm terrified"})
+    assert response.json()["data"]["dominant_emotion"] == "fear"
+    assert client.get("/api/metrics/text-emotion").json()["data"]["requests"] == 1
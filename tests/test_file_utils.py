@@ -0,0 +1,26 @@
+"""
+Testes da gravação atômica e do hash compartilhados pelos stores.
+"""
+
+import hashlib
+
+import pytest
+
+from backend.utils.file_utils import atomic_write, file_sha256
+
+
+def test_atomic_write_replaces_whole_file_or_nothing(tmp_path):
+    path = tmp_path / "sub" / "dados.bin"
+    atomic_write(path, b"primeira")
+    atomic_write(path, lambda f: f.write(b"segunda"), fsync=False)
+    assert path.read_bytes() == b"segunda"
+    assert file_sha256(path) == hashlib.sha256(b"segunda").hexdigest()
+
+    def broken(f):
+        f.write(b"pela metade")
+        raise RuntimeError("queda")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(path, broken)
+    assert path.read_bytes() == b"segunda"
+    assert sorted(p.name for p in path.parent.iterdir()) == ["dados.bin"]
@@ -0,0 +1,140 @@
+"""
+Testes da análise ao vivo (microfone por WebSocket, janela deslizante).
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from backend.core.emotion_analyzer import TextEmotionAnalyzer
+from backend.core.model_manager import ModelManager
+from backend.models import live_analysis
+from backend.models.audio_analyzer import AudioAnalyzer
+from backend.models.live_analysis import LiveAnalysisService, LiveAudioSession, LiveSessionLimitError
+from backend.models.speech_to_text import SpeechTranscriber
+from backend.models.stubs import StubEmotionClassifier, StubSTTBackend
+
+SR = 16000
+
+
+def speech_like(pattern, sample_rate=SR):
+    rng = np.random.default_rng(0)
+    parts = []
+    for kind, seconds in pattern:
+        n = int(seconds * sample_rate)
+        noise = 0.001 * rng.standard_normal(n)
+        if kind == "speech":
+            t = np.arange(n) / sample_rate
+            noise += 0.3 * np.sin(2 * np.pi * 220 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+        parts.append(noise)
+    return np.concatenate(parts).astype(np.float32)
+
+
+@pytest.fixture
+def analyzer():
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    emotion = TextEmotionAnalyzer(mm, loader=StubEmotionClassifier)
+    transcriber = SpeechTranscriber(mm, loader=StubSTTBackend)
+    yield AudioAnalyzer(transcriber, emotion, measure_memory=False)
+    emotion.shutdown()
+    mm.shutdown()
+
+
+def stream(session, audio, block=1600):
+    messages = []
+    for i in range(0, len(audio), block):
+        session.feed(audio[i:i + block].tobytes())
+        if session.ready:
+            messages.extend(session.step())
+    return messages
+
+
+def test_segments_close_while_speaking(analyzer):
+    session = LiveAudioSession(analyzer)
+    audio = speech_like([("silence", 0.6), ("speech", 1.0), ("silence", 0.8),
+                         ("speech", 1.5), ("silence", 0.8), ("speech", 0.6)])
+    messages = stream(session, audio)
+
+    segments = [m for m in messages if m["type"] == "segment"]
+    assert len(segments) >= 2
+    assert segments[0]["text"] == "segmento de 1.3 segundos"
+    assert segments[1]["transcript"].startswith(segments[0]["text"])
+    assert any(m["type"] == "partial" for m in messages)
+    assert segments[-1]["aggregated_emotion"]["dominant_emotion"]
+
+    # Só a fala final resta para depois do stop
+    result = session.finish()
+    assert result["transcript"].count("segmento de") == 3
+    assert result["audio_seconds"] == pytest.approx(len(audio) / SR)
+    assert result["speech_seconds"] == pytest.approx(3.1 + 6 * 0.15, abs=0.3)
+    assert result["live"]["peak_buffer_s"] < 4.0  # nunca a gravação inteira (5.3s)
+    assert len(result["emotions"]) == 3
+
+
+def test_memory_is_bounded(analyzer):
+    # 48 kHz em int16 e fala contínua: fechada à força a cada janela
+    session = LiveAudioSession(analyzer, sample_rate=48000, encoding="pcm_s16le",
+                               max_window_s=3.0, max_buffer_s=4.0)
+    audio = speech_like([("silence", 0.5), ("speech", 9.0)], sample_rate=48000)
+    pcm = (audio * 32767).astype("<i2")
+    messages = stream(session, pcm, block=4800)
+    assert sum(m["type"] == "segment" for m in messages) >= 2
+    assert session.stats.peak_buffer_s <= 4.0 and session.stats.dropped_s == 0
+
+    # Sem passadas (análise atrasada), o mais antigo é descartado
+    lagging = LiveAudioSession(analyzer, max_buffer_s=2.0)
+    for block in np.array_split(speech_like([("speech", 5.0)]), 10):
+        lagging.feed(block.tobytes())
+    assert lagging.stats.dropped_s == pytest.approx(3.0)
+    with pytest.raises(ValueError):
+        lagging.feed(b"\x00\x00\x00")
+    with pytest.raises(ValueError):
+        LiveAudioSession(analyzer, encoding="mp3")
+
+
+def test_session_cap(analyzer):
+    service = LiveAnalysisService(analyzer, max_sessions=1)
+    first = service.open()
+    with pytest.raises(LiveSessionLimitError):
+        service.open()
+    first.feed(np.zeros(SR, dtype=np.float32).tobytes())
+    first.close()
+    second = service.open()
+    stats = service.get_stats()
+    assert stats["active"] == 1 and stats["rejected"] == 1 and stats["audio_s"] == 1.0
+    second.close()
+
+
+def test_websocket_streams_partials_and_final(analyzer, monkeypatch):
+    from backend.main import app
+
+    service = LiveAnalysisService(analyzer, max_sessions=1)
+    monkeypatch.setattr(live_analysis, "_live_analysis", service)
+    client = TestClient(app)
+    audio = speech_like([("silence", 0.6), ("speech", 1.0), ("silence", 0.8), ("speech", 1.0)])
+
+    with client.websocket_connect("/ws/analyze-audio") as ws:
+        ws.send_json({"type": "start", "sample_rate": SR, "encoding": "pcm_f32le"})
+        assert ws.receive_json()["type"] == "ready"
+        # Segunda conexão recusada enquanto a primeira está aberta
+        with client.websocket_connect("/ws/analyze-audio") as other:
+            other.send_json({"type": "start"})
+            assert "Limite" in other.receive_json()["error"]
+            with pytest.raises(WebSocketDisconnect) as closed:
+                other.receive_json()
+            assert closed.value.code == 1013
+
+        for i in range(0, len(audio), 1600):
+            ws.send_bytes(audio[i:i + 1600].tobytes())
+        ws.send_json({"type": "stop"})
+        messages = []
+        while not messages or messages[-1]["type"] not in ("final", "error"):
+            messages.append(ws.receive_json())
+
+    final = messages[-1]["data"]
+    assert final["transcript"] == "segmento de 1.3 segundos segmento de 1.1 segundos"
+    assert final["dominant_emotion"] == final["aggregated_emotion"]["dominant_emotion"]
+    assert final["live"]["windows"] >= 1
+    assert service.active == 0
+    assert client.get("/api/metrics/live-audio").json()["data"]["rejected"] == 1
@@ -0,0 +1,163 @@
+"""
+Testes do logger em fila (JSON estruturado, contexto, descarte e X-Request-ID).
+"""
+
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.core.pipeline import Orchestrator, Stage
+from backend.utils import logger as logger_module
+from backend.utils.logger import AuroraLogger, current_context, log_context, record_stage
+
+
+def read_records(logger: AuroraLogger) -> list:
+    assert logger.flush()
+    return [json.loads(line) for line in logger.path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_json_records_carry_context_and_fields(tmp_path):
+    logger = AuroraLogger("t-json", console=False, logs_dir=tmp_path)
+    try:
+        with log_context(request_id="abc123", stages={}):
+            logger.info("🎵 Música: %.1fs em %d janelas", 12.0, 3, stage="music", duration_s=0.25)
+            with log_context(story_id="s1"):
+                try:
+                    raise ValueError("ruim")
+                except ValueError:
+                    logger.exception("❌ Falhou %s", "aqui")
+        logger.info("fora")
+        first, second, third = read_records(logger)
+    finally:
+        logger.close()
+
+    assert first["msg"] == "🎵 Música: 12.0s em 3 janelas" and first["level"] == "INFO"
+    assert first["request_id"] == "abc123" and first["stage"] == "music"
+    assert first["duration_s"] == 0.25 and "stages" not in first
+    assert first["where"].startswith("test_logger:")  # local de quem chamou
+    assert second["story_id"] == "s1" and "ValueError: ruim" in second["exc"]
+    assert "request_id" not in third and current_context() == {}
+
+
+def test_filtered_records_are_never_formatted(tmp_path):
+    class Expensive:
+        calls = 0
+
+        def __str__(self):
+            Expensive.calls += 1
+            return "caro"
+
+    logger = AuroraLogger("t-lazy", level="INFO", console=False, logs_dir=tmp_path)
+    try:
+        logger.debug("🔎 %s", Expensive(), stage="debug")
+        assert logger.get_stats()["enqueued"] == 0
+        logger.info("📖 %s", Expensive())
+        assert Expensive.calls == 0  # formatado só na thread do logger
+        records = read_records(logger)
+    finally:
+        logger.close()
+    assert [r["msg"] for r in records] == ["📖 caro"] and Expensive.calls == 1
+
+
+def test_full_queue_drops_without_blocking(tmp_path):
+    logger = AuroraLogger("t-full", console=False, logs_dir=tmp_path, queue_size=4)
+    gate = threading.Event()
+    handler = logger._listener.handlers[0]
+    original = handler.handle
+    handler.handle = lambda record: (gate.wait(5), original(record))[1]  # gravação travada
+    try:
+        for i in range(20):
+            logger.warning("⚠️ registro %d", i)
+        stats = logger.get_stats()
+        assert stats["dropped"] >= 15 and stats["enqueued"] + stats["dropped"] == 20
+        gate.set()
+        assert len(read_records(logger)) == stats["enqueued"]
+    finally:
+        gate.set()
+        logger.close()
+
+
+def test_request_id_header_and_stage_durations(tmp_path, monkeypatch):
+    from backend.main import app
+
+    logger = AuroraLogger("t-http", console=False, logs_dir=tmp_path)
+    monkeypatch.setitem(logger_module._loggers, "aurora", logger)
+    client = TestClient(app)
+    try:
+        response = client.get("/health", headers={"X-Request-ID": "req-42"})
+        assert response.headers["X-Request-ID"] == "req-42"
+        generated = client.get("/health", headers={"X-Request-ID": "id com espacos; invalido"})
+        assert len(generated.headers["X-Request-ID"]) == 16
+
+        # Estágios do orquestrador rodam em outras threads e somam na requisição
+        orchestrator = Orchestrator(gpu_capacity=1.0, cpu_slots=2)
+        with log_context(request_id="req-43", stages={}) as context:
+            orchestrator.run([Stage("a", lambda c: 1), Stage("b", lambda c: c["a"] + 1, deps=["a"])])
+            record_stage("render.assemble", 0.5)
+        orchestrator.shutdown()
+        assert set(context["stages"]) == {"pipeline.a", "pipeline.b", "render.assemble"}
+        records = read_records(logger)
+    finally:
+        logger.close()
+
+    done = [r for r in records if r.get("path") == "/health"]
+    assert [r["request_id"] for r in done] == ["req-42", generated.headers["X-Request-ID"]]
+    assert done[0]["status"] == 200 and done[0]["stages"] == {} and done[0]["duration_s"] > 0
+    summary = next(r for r in records if "Pipeline" in r["msg"])
+    assert summary["request_id"] == "req-43" and summary["run_id"]
+
+
+def test_streaming_response_is_logged_after_last_chunk(tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+
+    from backend.main import RequestLoggingMiddleware
+
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware)
+
+    @app.get("/stream")
+    async def stream():
+        def chunks():
+            for i in range(3):
+                time.sleep(0.05)
+                record_stage("tts.chunk", 0.05)
+                yield f"data: {i}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    logger = AuroraLogger("t-stream", console=False, logs_dir=tmp_path)
+    monkeypatch.setitem(logger_module._loggers, "aurora", logger)
+    try:
+        response = TestClient(app).get("/stream", headers={"X-Request-ID": "sse-1"})
+        assert response.text.count("data:") == 3 and response.headers["X-Request-ID"] == "sse-1"
+        records = read_records(logger)
+    finally:
+        logger.close()
+
+    (done,) = [r for r in records if r.get("path") == "/stream"]
+    assert done["request_id"] == "sse-1" and done["status"] == 200
+    assert done["duration_s"] >= 0.15
+    assert done["stages"]["tts.chunk"] == pytest.approx(0.15)
+
+
+def test_concurrent_first_calls_share_one_logger(monkeypatch):
+    created = []
+
+    class SlowLogger:
+        def __init__(self, name):
+            time.sleep(0.05)  # montagem dos handlers
+            created.append(name)
+
+    monkeypatch.setattr(logger_module, "AuroraLogger", SlowLogger)
+    monkeypatch.setattr(logger_module, "_loggers", {})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(logger_module.get_logger("t-race")))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert created == ["t-race"] and len({id(r) for r in results}) == 1
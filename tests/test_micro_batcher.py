@@ -0,0 +1,36 @@
+"""
+Testes do micro-batcher compartilhado (emoção de texto e música).
+"""
+
+import threading
+
+import pytest
+
+from backend.utils.micro_batcher import MicroBatcher
+
+
+def test_groups_concurrent_requests_and_fails_only_the_broken_group():
+    batches = []
+    release = threading.Event()
+
+    def process(items):
+        release.wait(5)
+        batches.append([i.payload for i in items])
+        if items[0].payload[0] == "ruim":
+            raise RuntimeError("lote quebrado")
+        for item in items:
+            item.future.set_result(item.payload[1] * 2)
+
+    batcher = MicroBatcher(process, "t-batch", max_batch_size=8, max_wait_s=0.05,
+                           group_by=lambda p: p[0])
+    futures = [batcher.submit((mode, i)) for i, mode in enumerate(["bom", "ruim", "bom", "ruim"])]
+    release.set()
+
+    assert [futures[0].result(5), futures[2].result(5)] == [0, 4]
+    for future in (futures[1], futures[3]):
+        with pytest.raises(RuntimeError, match="quebrado"):
+            future.result(5)
+    assert sorted(batches) == [[("bom", 0), ("bom", 2)], [("ruim", 1), ("ruim", 3)]]
+
+    batcher.shutdown()
+    assert batcher._worker is None and batcher.qsize() == 0
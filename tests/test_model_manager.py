@@ -0,0 +1,125 @@
+"""
+Testes do ModelManager (residência com orçamento e LRU).
+"""
+
+import threading
+
+import pytest
+
+from backend.core.model_manager import ModelManager
+from backend.models.stubs import TinyModel, make_stub_loader
+
+
+@pytest.fixture
+def manager():
+    mm = ModelManager(vram_budget_gb=10.0, ram_budget_gb=3.0, next_stages={
+        "story": ["tts", "music"],
+        "tts": [],
+        "music": [],
+    })
+    yield mm
+    mm.shutdown()
+
+
+def register_stubs(mm, names, ram_gb=1.0):
+    for name in names:
+        mm.register(name, make_stub_loader(name, size_mb=0.1), ram_gb=ram_gb,
+                    unloader=TinyModel.close)
+
+
+def test_keeps_models_warm_between_uses(manager):
+    register_stubs(manager, ["story"])
+
+    with manager.load("story", prefetch_next=False) as first:
+        first("era uma vez")
+    with manager.load("story", prefetch_next=False) as second:
+        assert second is first
+
+    stats = manager.get_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["evictions"] == 0
+
+
+def test_evicts_least_recently_used(manager):
+    register_stubs(manager, ["story", "tts", "music", "stt"])
+
+    for name in ["story", "tts", "music"]:
+        with manager.load(name, prefetch_next=False):
+            pass
+    # "story" é reutilizado, então "tts" passa a ser o LRU
+    with manager.load("story", prefetch_next=False):
+        pass
+    with manager.load("stt", prefetch_next=False):
+        pass
+
+    assert manager.resident_models() == ["music", "story", "stt"]
+    assert manager.get_stats()["evictions"] == 1
+
+
+def test_models_in_use_are_never_evicted(manager):
+    register_stubs(manager, ["story", "tts", "music", "stt"], ram_gb=1.5)
+
+    with manager.load("story", prefetch_next=False) as story:
+        with manager.load("tts", prefetch_next=False):
+            pass
+        with manager.load("music", prefetch_next=False):
+            assert manager.is_resident("story")
+            assert story.weights is not None
+    assert not manager.is_resident("tts")
+
+
+def test_prefetches_next_stage(manager):
+    register_stubs(manager, ["story", "tts", "music"], ram_gb=0.5)
+
+    with manager.load("story"):
+        manager.wait_for_prefetch(timeout=5)
+        assert manager.is_resident("tts")
+        assert manager.is_resident("music")
+
+    with manager.load("tts", prefetch_next=False):
+        pass
+
+    stats = manager.get_stats()
+    assert stats["prefetches"] == 2
+    assert stats["prefetch_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_prefetch_skipped_when_budget_is_pinned(manager):
+    register_stubs(manager, ["story", "tts", "music"], ram_gb=2.0)
+
+    with manager.load("story"):
+        manager.wait_for_prefetch(timeout=5)
+        assert not manager.is_resident("tts")
+
+    assert manager.get_stats()["prefetch_skipped"] == 2
+
+
+def test_concurrent_acquire_loads_once(manager):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return TinyModel("story", size_mb=0.1, latency_s=0.0)
+
+    manager.register("story", loader, ram_gb=1.0)
+    results = []
+
+    def worker():
+        results.append(manager.acquire("story"))
+        manager.release("story")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_unknown_model_raises(manager):
+    with pytest.raises(KeyError):
+        manager.acquire("inexistente")
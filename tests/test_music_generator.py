@@ -0,0 +1,44 @@
+"""
+Testes do gerador de música com Riffusion substituto.
+"""
+
+from fastapi.testclient import TestClient
+
+from backend.core.model_manager import ModelManager
+from backend.models import music_generator
+from backend.models.music_generator import MusicGenerator, build_prompt
+from backend.models.stubs import make_stub_riffusion_loader
+from backend.utils.spectrogram_utils import SpectrogramConverter, SpectrogramParams
+
+
+def make_generator():
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    converter = SpectrogramConverter(SpectrogramParams(num_griffin_lim_iters=4))
+    return MusicGenerator(mm, loader=make_stub_riffusion_loader(), converter=converter)
+
+
+def test_build_prompt_uses_music_params():
+    prompt = build_prompt("piano", "melancholic", "slow")
+    assert "piano" in prompt and "minor key" in prompt and "slow tempo" in prompt
+
+
+def test_generate_tiles_windows_to_requested_duration():
+    generator = make_generator()
+    result = generator.generate(style="piano", mood="calm", duration=12.0, seed=1)
+
+    assert result.windows == 3
+    assert abs(result.duration - 12.0) < 0.02
+    assert result.sample_rate == 44100
+
+
+def test_generate_music_endpoint(monkeypatch):
+    from backend.main import app
+
+    monkeypatch.setattr(music_generator, "_music_generator", make_generator())
+    response = TestClient(app).post(
+        "/api/generate-music",
+        json={"params": {"style": "ambient", "mood": "tense"}, "duration": 6},
+    )
+    assert response.status_code == 200
+    assert response.content[:4] == b"RIFF"
+    assert float(response.headers["X-Audio-Duration"]) == 6.0
@@ -0,0 +1,183 @@
+"""
+Testes do orquestrador de estágios e do pipeline de experiência.
+"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.core import pipeline as pipeline_module
+from backend.core.emotion_analyzer import TextEmotionAnalyzer
+from backend.core.model_manager import ModelManager
+from backend.core.pipeline import Orchestrator, PipelineError, Stage
+from backend.models import experience
+from backend.models.experience import ExperiencePipeline, music_params_for
+from backend.models.music_generator import MusicGenerator
+from backend.models.story_generator import StateCache, StoryGenerator
+from backend.models.stubs import (
+    StubEmotionClassifier,
+    StubLlama,
+    StubTTS,
+    make_stub_riffusion_loader,
+)
+from backend.models.tts_narrator import TTSNarrator
+from backend.utils.artifact_cache import ArtifactCache
+from backend.utils.spectrogram_utils import SpectrogramConverter, SpectrogramParams
+
+
+def sleeper(seconds, value=None):
+    def fn(ctx):
+        time.sleep(seconds)
+        return value
+    return fn
+
+
+def overlaps(trace, a, b):
+    x, y = trace.spans[a], trace.spans[b]
+    return x.started < y.ended and y.started < x.ended
+
+
+@pytest.fixture
+def orchestrator():
+    o = Orchestrator(gpu_capacity=6.0, cpu_slots=4, max_workers=8)
+    yield o
+    o.shutdown()
+
+
+def test_independent_cpu_stages_overlap(orchestrator):
+    run = orchestrator.run([Stage("a", sleeper(0.1)), Stage("b", sleeper(0.1)),
+                            Stage("c", sleeper(0.1))])
+    assert run.trace.wall_s < 0.25
+    assert run.trace.summary()["parallelism"] > 2.0
+
+
+def test_gpu_stages_share_capacity_by_cost(orchestrator):
+    fits = orchestrator.run([Stage("story", sleeper(0.1), resource="gpu", cost=3.0),
+                             Stage("music", sleeper(0.1), resource="gpu", cost=3.0)])
+    assert overlaps(fits.trace, "story", "music")
+
+    serial = orchestrator.run([Stage("story", sleeper(0.1), resource="gpu", cost=4.9),
+                               Stage("music", sleeper(0.1), resource="gpu", cost=3.0)])
+    assert not overlaps(serial.trace, "story", "music")
+    assert serial.trace.spans["music"].wait_s > 0.05 or serial.trace.spans["story"].wait_s > 0.05
+
+
+def test_default_capacity_overlaps_story_and_music():
+    from backend import config
+
+    story_cost = config.MODEL_CONFIGS["story"]["vram_gb"]
+    music_cost = config.MODEL_CONFIGS["music"]["vram_gb"]
+    o = Orchestrator(cpu_slots=2)
+    try:
+        run = o.run([Stage("story", sleeper(0.1), resource="gpu", cost=story_cost),
+                     Stage("music", sleeper(0.1), resource="gpu", cost=music_cost)])
+    finally:
+        o.shutdown()
+    assert overlaps(run.trace, "story", "music")
+
+
+def test_dependencies_receive_results_in_order(orchestrator):
+    run = orchestrator.run([
+        Stage("double", lambda ctx: ctx["x"] * 2),
+        Stage("inc", lambda ctx: ctx["double"] + 1, deps=["double"]),
+        Stage("both", lambda ctx: (ctx["double"], ctx["inc"]), deps=["double", "inc"]),
+    ], inputs={"x": 5})
+
+    assert run.results == {"double": 10, "inc": 11, "both": (10, 11)}
+    spans = run.trace.spans
+    assert spans["double"].ended <= spans["inc"].started
+    assert run.trace.critical_path() == ["double", "inc", "both"]
+
+
+def test_failure_skips_dependents(orchestrator):
+    def boom(ctx):
+        raise RuntimeError("sem VRAM")
+
+    with pytest.raises(PipelineError) as info:
+        orchestrator.run([Stage("ok", sleeper(0.01)), Stage("bad", boom),
+                          Stage("after", sleeper(0.01), deps=["bad"])])
+
+    error = info.value
+    assert error.stage == "bad" and isinstance(error.error, RuntimeError)
+    assert error.trace.spans["bad"].status == "failed"
+    assert error.trace.spans["after"].status == "skipped"
+    assert orchestrator.get_trace(error.trace.run_id) is error.trace
+
+
+def test_invalid_graphs_rejected(orchestrator):
+    with pytest.raises(ValueError):
+        orchestrator.run([Stage("a", sleeper(0), deps=["b"]), Stage("b", sleeper(0), deps=["a"])])
+    with pytest.raises(ValueError):
+        orchestrator.run([Stage("a", sleeper(0), deps=["missing"])])
+
+
+def test_chrome_trace_and_render(orchestrator):
+    run = orchestrator.run([Stage("a", sleeper(0.02)), Stage("b", sleeper(0.02), deps=["a"])])
+    events = run.trace.to_chrome_trace()["traceEvents"]
+    names = {e["name"] for e in events if e["cat"] != "wait"}
+    assert names == {"a", "b"}
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    assert "#" in run.trace.render()
+
+
+def test_music_params_follow_emotion():
+    params = music_params_for({"dominant_emotion": "sadness", "intensity": 0.2})
+    assert params["mood"] == "melancholic" and params["tempo"] == "slow"
+
+
+@pytest.fixture
+def experience_pipeline(tmp_path):
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    llm = StubLlama(reply="A raposa encontrou o dragão e os dois ficaram amigos.",
+                    latency_per_token_s=0.002)
+    story = StoryGenerator(mm, loader=lambda: llm,
+                           state_cache=StateCache(disk=ArtifactCache(root=tmp_path / "kv")))
+    music = MusicGenerator(mm, loader=make_stub_riffusion_loader(latency_s=0.05),
+                           converter=SpectrogramConverter(SpectrogramParams(num_griffin_lim_iters=4)))
+    tts_stub = StubTTS(latency_s=0.01)
+    narrator = TTSNarrator(mm, loader=lambda: tts_stub)
+    emotion_stub = StubEmotionClassifier()
+    text_emotion = TextEmotionAnalyzer(mm, loader=lambda: emotion_stub)
+    orchestrator = Orchestrator(gpu_capacity=10.0, cpu_slots=2)
+
+    yield ExperiencePipeline(orchestrator, story, music, narrator, text_emotion,
+                             output_dir=tmp_path / "experiences")
+    orchestrator.shutdown()
+    text_emotion.shutdown()
+    mm.shutdown()
+
+
+def test_experience_overlaps_music_with_story(experience_pipeline, monkeypatch):
+    monkeypatch.setattr(experience.config, "EXPERIENCE_MUSIC_DURATION_S", 8.0)
+    result = experience_pipeline.run(user_prompt="Uma raposa feliz na floresta")
+
+    assert result.audio_path.exists() and result.audio_seconds > 0
+    assert result.text
+    trace = result.trace
+    assert overlaps(trace, "story", "music")
+    assert trace.spans["mix"].started >= max(trace.spans["music"].ended,
+                                             trace.spans["narration"].ended)
+    assert trace.critical_path()[-1] == "encode"
+
+
+def test_create_experience_endpoint(experience_pipeline, monkeypatch):
+    from backend.main import app
+
+    monkeypatch.setattr(experience, "_experience_pipeline", experience_pipeline)
+    monkeypatch.setattr(pipeline_module, "_orchestrator", experience_pipeline.orchestrator)
+    monkeypatch.setattr(experience.config, "EXPERIENCE_MUSIC_DURATION_S", 8.0)
+    client = TestClient(app)
+
+    response = client.post("/api/create-experience",
+                           json={"emotions": {"dominant_emotion": "joy", "intensity": 0.8},
+                                 "user_prompt": "Uma aventura"})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["trace"]["critical_path"]
+
+    trace = client.get(f"/api/pipeline/runs/{data['run_id']}/trace", params={"format": "chrome"})
+    assert trace.json()["traceEvents"]
+    audio = client.get(data["audio_url"])
+    assert audio.status_code == 200 and audio.content[:4] == b"RIFF"
+    assert client.get("/api/pipeline/runs/desconhecido/trace").status_code == 404
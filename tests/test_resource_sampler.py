@@ -0,0 +1,136 @@
+"""
+Testes do amostrador de recursos em segundo plano.
+"""
+
+import itertools
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.utils import resource_sampler
+from backend.utils.resource_manager import ResourceSnapshot
+from backend.utils.resource_sampler import ResourceSampler
+
+
+def fake_source(gpu=False, vram=None):
+    """Leituras crescentes e determinísticas; ``vram`` opcional por amostra."""
+    counter = itertools.count()
+    vram = iter(vram or [])
+
+    def read():
+        i = next(counter)
+        return ResourceSnapshot(timestamp=time.time(), cpu_percent=float(i), ram_used_gb=1.0,
+                                ram_total_gb=16.0, process_rss_gb=0.5 + i / 100,
+                                vram_used_gb=next(vram, 0.0) if gpu else 0.0,
+                                vram_total_gb=8.0 if gpu else 0.0, gpu_available=gpu)
+    return read
+
+
+def test_ring_buffer_keeps_last_samples_in_order():
+    sampler = ResourceSampler(capacity=4, source=fake_source())
+    for _ in range(6):
+        sampler.sample()
+
+    history = sampler.history()
+    assert [h["cpu_percent"] for h in history] == [2.0, 3.0, 4.0, 5.0]
+    assert sampler.latest().cpu_percent == 5.0
+
+
+def test_span_gets_peak_of_samples_inside_it():
+    sampler = ResourceSampler(capacity=16, source=fake_source(gpu=True, vram=[1.0, 3.5, 2.0, 0.5, 0.25]))
+    sampler.sample()
+    with sampler.span("story"):
+        sampler.sample()
+        sampler.sample()
+    sampler.sample()
+
+    stats = sampler.span_stats()["story"]
+    assert stats["count"] == 1
+    assert stats["peak_vram_used_gb"] == pytest.approx(3.5)
+
+    # Span sem amostras e sem a thread: lê na hora em vez de reusar a última
+    with sampler.span("mix"):
+        pass
+    assert sampler.span_stats()["mix"]["peak_vram_used_gb"] == pytest.approx(0.25)
+    assert sampler.latest().vram_used_gb == pytest.approx(0.25)
+
+
+def test_gpu_is_probed_only_on_the_sampler_thread(monkeypatch):
+    from backend.main import app
+
+    probes = []
+
+    def slow_reader():
+        time.sleep(0.3)  # import do PyTorch/NVML
+        probes.append(threading.current_thread().name)
+
+    monkeypatch.setattr(resource_sampler, "_GPUReader", slow_reader)
+    sampler = ResourceSampler(interval_s=10.0)
+    monkeypatch.setattr(resource_sampler, "_resource_sampler", sampler)
+
+    # Sem amostras: spans, /metrics e o histórico não sondam a GPU
+    with sampler.span("model.story"):
+        pass
+    stats = sampler.span_stats()["model.story"]
+    assert stats["count"] == 1 and stats["peak_process_rss_gb"] == 0.0
+    client = TestClient(app)
+    assert "aurora_cpu_percent" not in client.get("/metrics").text
+    data = client.get("/api/metrics/resources").json()["data"]
+    assert data["latest"] is None and data["history"] == []
+    assert probes == [] and sampler.latest() is None
+
+    # start() não espera a sondagem: ela roda na thread do amostrador
+    read = fake_source()
+    monkeypatch.setattr(resource_sampler, "system_sample", lambda gpu, process: read())
+    begin = time.perf_counter()
+    sampler.start()
+    try:
+        assert time.perf_counter() - begin < 0.1
+        deadline = time.monotonic() + 5
+        while sampler.latest() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert probes == ["resource-sampler"] and sampler.latest() is not None
+    finally:
+        sampler.stop()
+
+
+def test_background_thread_samples_and_stops():
+    sampler = ResourceSampler(interval_s=0.01, capacity=100, source=fake_source())
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    count = len(sampler.history())
+    assert count >= 3 and not sampler.running
+    time.sleep(0.03)
+    assert len(sampler.history()) == count
+
+
+def test_prometheus_without_gpu_omits_vram():
+    sampler = ResourceSampler(source=fake_source())
+    sampler.sample()
+    with sampler.span("tts"):
+        pass
+    text = sampler.prometheus()
+
+    assert "# TYPE aurora_cpu_percent gauge" in text
+    assert "aurora_gpu_available 0" in text
+    assert 'aurora_span_count_total{span="tts"} 1' in text
+    assert "vram" not in text
+
+
+def test_metrics_endpoints(monkeypatch):
+    from backend.main import app
+
+    sampler = ResourceSampler(source=fake_source(gpu=True, vram=[2.0] * 10))
+    sampler.sample()
+    monkeypatch.setattr(resource_sampler, "_resource_sampler", sampler)
+    client = TestClient(app)
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "aurora_vram_used_bytes" in response.text
+
+    data = client.get("/api/metrics/resources", params={"seconds": 60}).json()["data"]
+    assert data["latest"]["gpu_available"] and len(data["history"]) >= 1
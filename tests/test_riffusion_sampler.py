@@ -0,0 +1,113 @@
+"""
+Testes do amostrador em lote do Riffusion (UNet minúscula em CPU).
+"""
+
+import threading
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import config
+from backend.core.model_manager import ModelManager
+from backend.models import music_generator
+from backend.models.music_generator import MusicGenerator
+from backend.models.riffusion_sampler import (
+    BatchedSampler,
+    MemoryProfile,
+    TrackSpec,
+    choose_memory_profile,
+)
+from backend.models.stubs import TinyUNetComponents, make_stub_riffusion_loader
+from backend.utils.spectrogram_utils import SpectrogramConverter, SpectrogramParams
+
+CPU = MemoryProfile("cpu", batch_size=2)
+OVERLAP = 64
+
+
+def make_sampler(**kwargs):
+    return BatchedSampler(TinyUNetComponents(), quality_steps=6, fast_steps=2, **kwargs)
+
+
+def test_windows_share_overlap_and_unet_runs_in_batches():
+    sampler = make_sampler()
+    tracks = sampler.sample([TrackSpec("piano", 3, OVERLAP, seed=1),
+                             TrackSpec("piano", 2, OVERLAP, loop=True, seed=2)], profile=CPU)
+
+    straight, looped = tracks
+    assert len(straight) == 3 and straight[0].shape == (512, 512, 3)
+    for left, right in zip(straight, straight[1:]):
+        np.testing.assert_array_equal(left[:, -OVERLAP:], right[:, :OVERLAP])
+    # Em loop a última janela emenda na primeira
+    np.testing.assert_array_equal(looped[-1][:, -OVERLAP:], looped[0][:, :OVERLAP])
+
+    # 5 janelas em lotes de 2 (x2 pelo guidance): 2 + 2 + 1 por passo
+    assert sampler.components.unet.batch_sizes[:3] == [4, 4, 2]
+    stats = sampler.get_stats()
+    assert stats["unet_batches"] == 3 * 6 and stats["windows"] == 5
+    assert stats["profile"]["name"] == "cpu" and sampler.components.profile == CPU
+
+    with pytest.raises(ValueError):
+        sampler.sample([TrackSpec("piano", 2, 60)], profile=CPU)
+
+
+def test_prompt_embeddings_are_cached():
+    sampler = make_sampler()
+    sampler.sample([TrackSpec("piano", 1), TrackSpec("strings", 1)], profile=CPU)
+    sampler.sample([TrackSpec("strings", 2), TrackSpec("piano", 1)], profile=CPU)
+
+    # Cada prompt (e o incondicional) passa pelo encoder uma única vez
+    assert sampler.components.encoded == [["piano", "strings"], [""]]
+    cache = sampler.get_stats()["prompt_cache"]
+    assert cache["misses"] == 3 and cache["hits"] == 3
+
+
+def test_fast_mode_and_memory_profiles():
+    sampler = make_sampler()
+    sampler.sample([TrackSpec("piano", 1)], mode="fast", profile=CPU)
+    assert len(sampler.components.unet.batch_sizes) == 2
+    with pytest.raises(ValueError):
+        sampler.sample([TrackSpec("piano", 1)], mode="turbo", profile=CPU)
+
+    assert choose_memory_profile(6.0).name == "full"
+    balanced = choose_memory_profile(2.5)
+    assert balanced.name == "balanced" and balanced.vae_slicing and not balanced.attention_slicing
+    low = choose_memory_profile(0.3)
+    assert low.batch_size == 1 and low.attention_slicing
+    assert choose_memory_profile(None) == MemoryProfile("cpu", config.MUSIC_CPU_BATCH_SIZE)
+
+
+def test_concurrent_requests_share_one_denoising_loop(monkeypatch):
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    converter = SpectrogramConverter(SpectrogramParams(num_griffin_lim_iters=4))
+    generator = MusicGenerator(mm, loader=make_stub_riffusion_loader(), converter=converter,
+                               max_wait_ms=200, memory_profile=CPU)
+    barrier = threading.Barrier(3)
+    results = {}
+
+    def run(style):
+        barrier.wait()
+        results[style] = generator.generate(style=style, duration=6.0, seed=3, mode="fast")
+
+    threads = [threading.Thread(target=run, args=(s,)) for s in ("piano", "acoustic", "ambient")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(abs(r.duration - 6.0) < 0.02 and r.mode == "fast" for r in results.values())
+    stats = generator.get_stats()
+    assert stats["requests"] == 3 and stats["batches"] == 1
+    assert stats["sampler"]["steps_by_mode"]["fast"] == config.MUSIC_FAST_STEPS
+
+    from backend.main import app
+
+    monkeypatch.setattr(config, "ARTIFACT_CACHE_ENABLED", False)
+    monkeypatch.setattr(music_generator, "_music_generator", generator)
+    client = TestClient(app)
+    response = client.post("/api/generate-music",
+                           json={"params": {"style": "piano"}, "duration": 4, "mode": "fast"})
+    assert response.status_code == 200 and response.headers["X-Scheduler-Mode"] == "fast"
+    metrics = client.get("/api/metrics/music").json()["data"]
+    assert metrics["batches"] == 2 and metrics["sampler"]["prompt_cache"]["hits"] >= 1
+    generator.shutdown()
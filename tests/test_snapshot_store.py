@@ -0,0 +1,149 @@
+"""
+Testes do armazenamento de snapshots mapeados em memória.
+"""
+
+import dataclasses
+import json
+import mmap
+import struct
+
+import numpy as np
+import pytest
+
+from backend import config
+from backend.core import snapshots
+from backend.core.audio_emotion import AudioEmotionHead
+from backend.core.emotion_analyzer import EMOTIONS
+from backend.utils import snapshot_store
+from backend.utils.snapshot_store import (
+    SnapshotError,
+    SnapshotStore,
+    map_tensors,
+    write_tensors,
+)
+
+
+def sample_tensors():
+    rng = np.random.default_rng(0)
+    return {
+        "encoder.weight": rng.standard_normal((8, 4)).astype(np.float16),
+        "encoder.bias": rng.standard_normal(4).astype(np.float32),
+        "tokens": np.arange(5, dtype=np.int64),
+        "mask": np.array([True, False, True]),
+        "empty": np.zeros((0, 3), dtype=np.float32),
+    }
+
+
+def mapped_base(array):
+    while isinstance(array, (np.ndarray, memoryview)):
+        array = array.obj if isinstance(array, memoryview) else array.base
+    return array
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SnapshotStore(root=tmp_path / "snapshots")
+    monkeypatch.setattr(snapshot_store, "_snapshot_store", store)
+    return store
+
+
+def test_roundtrip_uses_safetensors_layout_and_maps_without_copy(tmp_path):
+    tensors = sample_tensors()
+    path = tmp_path / "model.safetensors"
+    write_tensors(path, tensors, {"source": "teste"})
+
+    raw = path.read_bytes()
+    (length,) = struct.unpack("<Q", raw[:8])
+    header = json.loads(raw[8:8 + length])
+    assert (8 + length) % 8 == 0
+    assert header["__metadata__"] == {"source": "teste"}
+    assert header["encoder.weight"] == {"dtype": "F16", "shape": [8, 4],
+                                        "data_offsets": header["encoder.weight"]["data_offsets"]}
+    assert header["tokens"]["data_offsets"][0] == 0  # 8 bytes por item vêm primeiro
+
+    mapped = map_tensors(path)
+    for name, array in tensors.items():
+        np.testing.assert_array_equal(mapped[name], array)
+        assert mapped[name].dtype == array.dtype
+    assert isinstance(mapped_base(mapped["encoder.weight"]), mmap.mmap)
+    assert not mapped["encoder.bias"].flags.writeable
+
+    # Cópia-na-escrita: gravável, mas o arquivo não muda
+    private = map_tensors(path, writable=True)
+    private["encoder.bias"][:] = 0
+    np.testing.assert_array_equal(map_tensors(path)["encoder.bias"], tensors["encoder.bias"])
+
+
+def test_integrity_checks(store):
+    store.build("modelo", sample_tensors(), source="origem", dtype="float16")
+    weights = store.directory("modelo") / snapshot_store.WEIGHTS_FILE
+    assert store.verify("modelo") == []
+
+    data = bytearray(weights.read_bytes())
+    data[-20] ^= 0xFF
+    weights.write_bytes(bytes(data))
+    assert store.verify("modelo", full=False) == []
+    assert any("SHA-256" in p for p in store.verify("modelo", full=True))
+    with pytest.raises(SnapshotError):
+        store.load("modelo", verify="full")
+
+    weights.write_bytes(bytes(data[:-8]))
+    assert store.verify("modelo", full=False)
+    with pytest.raises(SnapshotError):
+        store.load("modelo")
+
+
+def test_load_checks_source_and_reports_cold_then_warm(store):
+    store.build("modelo", sample_tensors(), source="origem", dtype="float16",
+                extra={"dims": {"n": 4}})
+    assert store.load("modelo", source="outra") is None
+    assert store.load("ausente") is None
+
+    first = store.load("modelo", source="origem")
+    second = store.load("modelo", source="origem")
+    assert first.cold and not second.cold
+    assert first.manifest.extra == {"dims": {"n": 4}}
+    assert first.dtypes["encoder.weight"] == "F16"
+
+    stats = store.get_stats()["modelo"]
+    assert stats["loads"] == 2 and stats["cold_load_s"] is not None
+    assert stats["warm_load_s"] is not None and stats["dtype"] == "float16"
+
+
+def test_audio_emotion_snapshot_cli_and_fallback(store, tmp_path, monkeypatch, capsys):
+    rng = np.random.default_rng(1)
+    head = AudioEmotionHead(rng.standard_normal((4, len(EMOTIONS))).astype(np.float32),
+                            np.zeros(len(EMOTIONS), np.float32), np.zeros(4, np.float32),
+                            np.ones(4, np.float32), encoder="stub")
+    path = tmp_path / "head.npz"
+    head.save(path)
+    monkeypatch.setattr(config, "AUDIO_EMOTION_HEAD_PATH", path)
+
+    assert snapshots.restore_snapshot("audio_emotion") is None
+    assert snapshots.main(["build", "audio_emotion"]) == 0
+    assert snapshots.main(["verify"]) == 0
+    assert "audio_emotion" in capsys.readouterr().out
+
+    restored = snapshots.restore_snapshot("audio_emotion")
+    x = rng.standard_normal((3, 4)).astype(np.float32)
+    assert restored.predict(x) == head.predict(x)
+    assert restored.encoder == "stub"
+    assert isinstance(mapped_base(restored.weights), mmap.mmap)
+
+    bench = snapshots.bench_snapshot("audio_emotion", repeats=2, source=True)
+    assert bench["cold_s"] > 0 and bench["warm_s"] > 0 and bench["source_s"] > 0
+
+    # Snapshot que não casa com o modelo: volta ao caminho original
+    spec = snapshots.SNAPSHOT_SPECS["audio_emotion"]
+    for error in (KeyError("weights"), ValueError("forma"), RuntimeError("dtype")):
+        def broken(snapshot, device, error=error):
+            raise error
+        monkeypatch.setitem(snapshots.SNAPSHOT_SPECS, "audio_emotion",
+                            dataclasses.replace(spec, restore=broken))
+        assert snapshots.restore_snapshot("audio_emotion") is None
+    monkeypatch.setitem(snapshots.SNAPSHOT_SPECS, "audio_emotion", spec)
+
+    # Cabeça retreinada no mesmo caminho: o snapshot fica desatualizado
+    AudioEmotionHead(head.weights * 2, head.bias, head.mean, head.scale,
+                     encoder="stub").save(path)
+    assert snapshots.restore_snapshot("audio_emotion") is None
@@ -0,0 +1,124 @@
+"""
+Testes das vozes de referência e do cache de latentes de condicionamento.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import config
+from backend.core.model_manager import ModelManager
+from backend.models import tts_narrator
+from backend.models.speaker_latents import SpeakerLatentCache, latent_key
+from backend.models.stubs import StubTTS, StubXttsTTS
+from backend.models.tts_narrator import TTSNarrator
+from backend.utils.audio_utils import encode_wav
+
+STORY = "Era uma vez uma raposa. Ela morava na floresta. Um dia, encontrou um dragão."
+
+
+def voice_audio(freq: float = 180.0, seconds: float = 2.0, sample_rate: int = 22050):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.4 * np.sin(2 * np.pi * freq * t)).astype(np.float32), sample_rate
+
+
+def make_narrator(tts, latents=None):
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    return TTSNarrator(mm, loader=lambda: tts, latents=latents)
+
+
+def test_latents_computed_once_per_voice_and_reused_from_disk(isolated_voices, tmp_path):
+    tts = StubXttsTTS()
+    narrator = make_narrator(tts)
+    voice = narrator.register_voice(*voice_audio())
+    assert voice["created"] and len(tts.xtts.conditioning_calls) == 1
+
+    audio, _, metrics = narrator.synthesize(STORY, voice=voice["voice_id"])
+    narrator.synthesize("Outra frase. E mais uma.", voice=voice["voice_id"])
+    assert metrics.sentences >= 2 and len(audio) > 0
+    assert len(tts.xtts.conditioning_calls) == 1
+    assert narrator.latents.get_stats()["memory_hits"] >= 3
+
+    # Nova sessão (outro processo): latentes lidos do disco, sem recalcular
+    fresh = make_narrator(tts, latents=SpeakerLatentCache(root=narrator.latents.root))
+    fresh.synthesize(STORY, voice=voice["voice_id"])
+    stats = fresh.latents.get_stats()
+    assert len(tts.xtts.conditioning_calls) == 1
+    assert stats["disk_hits"] == 1 and stats["computed"] == 0 and stats["on_disk"] == 1
+
+    # O mesmo áudio enviado de novo é a mesma voz
+    again = narrator.register_voice(*voice_audio())
+    assert again["voice_id"] == voice["voice_id"] and not again["created"]
+    with pytest.raises(KeyError):
+        narrator.stream(STORY, voice="0123456789abcdef")
+
+
+def test_voice_changes_output_and_lru_is_bounded(isolated_voices, tmp_path):
+    tts = StubXttsTTS()
+    narrator = make_narrator(tts, latents=SpeakerLatentCache(root=tmp_path / "lat", max_entries=1))
+    low = narrator.register_voice(*voice_audio(150.0))["voice_id"]
+    high = narrator.register_voice(*voice_audio(300.0))["voice_id"]
+    a, _, _ = narrator.synthesize("Uma frase curta.", voice=low)
+    b, _, _ = narrator.synthesize("Uma frase curta.", voice=high)
+    assert len(a) == len(b) and not np.allclose(a, b)
+
+    # Só uma voz na memória: a outra volta do disco, não do encoder
+    narrator.synthesize("Uma frase curta.", voice=low)
+    stats = narrator.latents.get_stats()
+    assert stats["entries"] == 1 and stats["disk_hits"] >= 1
+    assert len(tts.xtts.conditioning_calls) == 2
+
+
+def test_default_reference_voice_and_model_change(isolated_voices, tmp_path, monkeypatch):
+    path = tmp_path / "narradora.wav"
+    path.write_bytes(encode_wav(*voice_audio(220.0)))
+    monkeypatch.setattr(config, "TTS_SPEAKER_WAV", str(path))
+    tts = StubXttsTTS()
+    narrator = make_narrator(tts)
+    narrator.synthesize(STORY)
+    assert tts.xtts.conditioning_calls == [[str(path)]]
+    key = latent_key(narrator.voices.reference_hash(path))
+
+    # Trocar o modelo muda a chave; um arquivo corrompido é recalculado
+    monkeypatch.setitem(config.MODEL_CONFIGS, "tts", {**config.MODEL_CONFIGS["tts"], "name": "xtts_v3"})
+    new_key = latent_key(narrator.voices.reference_hash(path))
+    assert new_key != key
+    narrator.synthesize("Uma frase.")
+    assert len(tts.xtts.conditioning_calls) == 2
+    (narrator.latents.root / f"{new_key}.npz").write_bytes(b"lixo")
+    fresh = make_narrator(tts, latents=SpeakerLatentCache(root=narrator.latents.root))
+    fresh.synthesize("Uma frase.")
+    assert len(tts.xtts.conditioning_calls) == 3
+
+    # Modelo sem API de latentes: cai no ``speaker_wav`` do TTS
+    plain = make_narrator(StubTTS(), latents=SpeakerLatentCache(root=tmp_path / "plain"))
+    audio, _, _ = plain.synthesize("Uma frase.")
+    assert len(audio) > 0 and plain.latents.get_stats()["computed"] == 0
+
+
+def test_voice_endpoints(monkeypatch):
+    from backend.main import app
+
+    tts = StubXttsTTS()
+    monkeypatch.setattr(tts_narrator, "_narrator", make_narrator(tts))
+    client = TestClient(app)
+    wav = encode_wav(*voice_audio())
+
+    response = client.post("/api/voices", content=wav, headers={"Content-Type": "audio/wav"})
+    assert response.status_code == 200
+    voice = response.json()["data"]
+    again = client.post("/api/voices", files={"audio": ("voz.wav", wav, "audio/wav")}).json()
+    assert again["data"]["voice_id"] == voice["voice_id"] and not again["data"]["created"]
+
+    speech = client.post("/api/synthesize-speech",
+                         json={"text": STORY, "params": {"voice_id": voice["voice_id"]}})
+    assert speech.status_code == 200 and speech.content[:4] == b"RIFF"
+    assert len(tts.xtts.conditioning_calls) == 1
+
+    missing = client.post("/api/synthesize-speech",
+                          json={"text": STORY, "params": {"voice_id": "0123456789abcdef"}})
+    assert missing.status_code == 404
+    listed = client.get("/api/voices").json()["data"]
+    assert listed["voices"] == [voice["voice_id"]] and listed["latents"]["computed"] == 1
+    assert client.post("/api/voices", content=b"nada", headers={"Content-Type": "audio/wav"}) \
+        .status_code == 400
@@ -0,0 +1,210 @@
+"""
+Testes de VAD e transcrição em lote.
+"""
+
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+
+from backend.core.audio_emotion import AudioEmotionHead
+from backend.core.emotion_analyzer import TextEmotionAnalyzer
+from backend.core.model_manager import ModelManager
+from backend.models import audio_analyzer
+from backend.models.audio_analyzer import AudioAnalyzer
+from backend.models.speech_to_text import SpeechTranscriber, create_stt_backend
+from backend.models.stubs import StubEmotionClassifier, StubSTTBackend
+from backend.utils.vad import detect_speech
+
+SR = 16000
+
+
+def speech_like(pattern, pitch=220):
+    """Alterna ruído baixo (silêncio) e tons modulados (fala) por duração em segundos."""
+    rng = np.random.default_rng(0)
+    parts = []
+    for kind, seconds in pattern:
+        n = int(seconds * SR)
+        noise = 0.001 * rng.standard_normal(n)
+        if kind == "speech":
+            t = np.arange(n) / SR
+            noise += 0.3 * np.sin(2 * np.pi * pitch * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+        parts.append(noise)
+    return np.concatenate(parts).astype(np.float32)
+
+
+@pytest.fixture
+def stub_backend():
+    return StubSTTBackend()
+
+
+@pytest.fixture
+def transcriber(stub_backend):
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    yield SpeechTranscriber(mm, loader=lambda: stub_backend, batch_size=2)
+    mm.shutdown()
+
+
+def test_vad_drops_silence_and_splits_segments():
+    audio = speech_like([("silence", 1.0), ("speech", 2.0), ("silence", 1.5),
+                         ("speech", 1.0), ("silence", 1.0)])
+    segments = detect_speech(audio, SR)
+
+    assert len(segments) == 2
+    (s1, e1), (s2, e2) = (seg.seconds(SR) for seg in segments)
+    assert s1 == pytest.approx(1.0, abs=0.2) and e1 == pytest.approx(3.0, abs=0.2)
+    assert s2 == pytest.approx(4.5, abs=0.2) and e2 == pytest.approx(5.5, abs=0.2)
+
+
+def test_vad_ignores_pure_noise():
+    assert detect_speech(speech_like([("silence", 3.0)]), SR) == []
+
+
+def test_vad_limits_segment_length():
+    audio = speech_like([("speech", 10.0)])
+    segments = detect_speech(audio, SR, max_segment_s=4.0)
+    assert len(segments) >= 3
+    assert all((s.end - s.start) / SR <= 4.0 + 1e-6 for s in segments)
+
+
+def test_transcriber_batches_segments(transcriber, stub_backend):
+    audio = speech_like([("silence", 0.5), ("speech", 1.0), ("silence", 1.0), ("speech", 1.0),
+                         ("silence", 1.0), ("speech", 1.0), ("silence", 0.5)])
+    result = transcriber.transcribe(audio)
+
+    assert stub_backend.batches == [2, 1]
+    assert len(result.segments) == 3
+    assert result.speech_seconds < result.audio_seconds
+    assert result.backend == "stub"
+    assert result.real_time_factor > 0
+
+
+def test_silence_skips_model(transcriber, stub_backend):
+    result = transcriber.transcribe(speech_like([("silence", 2.0)]))
+    assert result.text == "" and stub_backend.batches == []
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_stt_backend("inexistente")
+
+
+def test_analyze_audio_endpoint(transcriber, monkeypatch):
+    from backend.main import app
+
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    emotion = TextEmotionAnalyzer(mm, loader=StubEmotionClassifier)
+    monkeypatch.setattr(audio_analyzer, "_audio_analyzer", AudioAnalyzer(transcriber, emotion))
+
+    # Upload a 32 kHz, reamostrado para 16 kHz no servidor
+    buffer = io.BytesIO()
+    audio = speech_like([("silence", 0.5), ("speech", 1.0), ("silence", 0.5)])
+    sf.write(buffer, np.repeat(audio, 2), 32000, format="WAV")
+    response = TestClient(app).post(
+        "/api/analyze-audio", files={"audio": ("recording.wav", buffer.getvalue(), "audio/wav")})
+
+    data = response.json()["data"]
+    assert data["transcript"].startswith("segmento de")
+    assert data["dominant_emotion"] == data["aggregated_emotion"]["dominant_emotion"]
+    assert data["audio_seconds"] == pytest.approx(2.0, abs=0.01)
+    emotion.shutdown()
+    mm.shutdown()
+
+
+def test_encoder_output_shared_between_transcript_and_emotion(transcriber, stub_backend, tmp_path):
+    # Cabeça treinada para separar voz aguda (alegria) de grave (tristeza)
+    embeddings, labels = [], []
+    for pitch, label in ((600, "joy"), (120, "sadness")):
+        for seconds in (0.8, 1.0, 1.2, 1.4):
+            audio = speech_like([("silence", 0.5), ("speech", seconds), ("silence", 0.5)], pitch)
+            embeddings.append(transcriber.transcribe(audio, with_embeddings=True).embeddings)
+            labels.append(label)
+    head = AudioEmotionHead.fit(np.concatenate(embeddings), labels, encoder="stub")
+    head.save(tmp_path / "head.npz")
+    head = AudioEmotionHead.load(tmp_path / "head.npz")
+    stub_backend.encoder_calls = 0
+    stub_backend.batches.clear()
+
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    emotion = TextEmotionAnalyzer(mm, loader=StubEmotionClassifier)
+    analyzer = AudioAnalyzer(transcriber, emotion, head_loader=lambda: head)
+
+    audio = speech_like([("silence", 0.5), ("speech", 1.0), ("silence", 1.0), ("speech", 1.0),
+                         ("silence", 1.0), ("speech", 1.0), ("silence", 0.5)], pitch=600)
+    result = analyzer.analyze(audio)
+
+    # Um encoder por lote (2 + 1 segmentos), nenhuma passada extra para a emoção
+    assert stub_backend.encoder_calls == 2 and stub_backend.batches == [2, 1]
+    assert [e["source"] for e in result["emotions"]] == ["text", "audio", "audio", "audio"]
+    assert result["audio_emotion"]["dominant_emotion"] == "joy"
+    assert result["dominant_emotion"] == "joy"
+    assert result["timings"]["encode"] > 0
+    assert result["latency_per_audio_s"] > 0 and "ram_mb" in result["peak_memory_mb"]
+    emotion.shutdown()
+    mm.shutdown()
+
+
+def test_missing_head_falls_back_to_text_and_is_retried(transcriber, tmp_path, monkeypatch):
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    emotion = TextEmotionAnalyzer(mm, loader=StubEmotionClassifier)
+    path = tmp_path / "head.npz"
+
+    def load():
+        if not path.exists():
+            raise FileNotFoundError(f"Pesos da cabeça de emoção acústica não encontrados: {path}")
+        return AudioEmotionHead.load(path)
+
+    audio = speech_like([("silence", 0.5), ("speech", 1.0), ("silence", 0.5)])
+    analyzer = AudioAnalyzer(transcriber, emotion, head_loader=load, measure_memory=False)
+    result = analyzer.analyze(audio)
+    assert result["audio_emotion"] is None and result["audio_emotion_status"] == "disabled"
+    assert "head.npz" in result["audio_emotion_error"]
+    assert [e["source"] for e in result["emotions"]] == ["text"]
+
+    # Dentro do intervalo nem os embeddings são pedidos ao encoder
+    calls = []
+    transcribe = transcriber.transcribe
+    monkeypatch.setattr(transcriber, "transcribe",
+                        lambda *a, **kw: calls.append(kw["with_embeddings"]) or transcribe(*a, **kw))
+    analyzer.analyze(audio)
+    assert calls == [False]
+
+    # Cabeça treinada depois da subida: volta sem reiniciar o servidor
+    embeddings = transcriber.transcribe(audio, with_embeddings=True).embeddings
+    AudioEmotionHead.fit(np.concatenate([embeddings, -embeddings]), ["joy", "sadness"],
+                         encoder="stub").save(path)
+    monkeypatch.setattr(analyzer, "_audio_emotion_retry_at", 0.0)
+    result = analyzer.analyze(audio)
+    assert result["audio_emotion_status"] == "active" and result["audio_emotion"] is not None
+    assert result["audio_emotion_error"] is None
+    emotion.shutdown()
+    mm.shutdown()
+
+
+def test_train_command_exports_head_from_labelled_folders(transcriber, tmp_path,
+                                                          monkeypatch, capsys):
+    from backend.core import audio_emotion
+
+    for pitch, label in ((600, "joy"), (120, "sadness")):
+        (tmp_path / "data" / label).mkdir(parents=True)
+        for i, seconds in enumerate((0.8, 1.0, 1.2, 1.4, 1.6)):
+            audio = speech_like([("silence", 0.5), ("speech", seconds), ("silence", 0.5)], pitch)
+            sf.write(tmp_path / "data" / label / f"{i}.wav", audio, SR)
+    monkeypatch.setattr(audio_emotion.config, "AUDIO_EMOTION_HEAD_PATH", tmp_path / "head.npz")
+    monkeypatch.setattr("backend.models.speech_to_text.get_speech_transcriber", lambda: transcriber)
+
+    assert audio_emotion.main(["status"]) == 1
+    assert audio_emotion.main(["train", str(tmp_path / "data"), "--out",
+                               str(tmp_path / "head.npz")]) == 0
+    assert "joy: 5, sadness: 5" in capsys.readouterr().out
+    assert audio_emotion.main(["status"]) == 0
+
+    embeddings, targets = audio_emotion.embed_dataset(tmp_path / "data", transcriber)
+    head, accuracy = audio_emotion.train_head(embeddings, targets, holdout=0.4)
+    assert accuracy == 1.0 and set(head.labels) >= {"joy", "sadness"}
+
+    (tmp_path / "data" / "bravo").mkdir()
+    with pytest.raises(ValueError, match="bravo"):
+        audio_emotion.embed_dataset(tmp_path / "data", transcriber)
@@ -0,0 +1,71 @@
+"""
+Testes do custo de inicialização: importações adiadas e orçamento de tempo.
+"""
+
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from backend import config
+from backend.utils.import_profile import DEFERRED_MODULES, parse_importtime, profile_imports
+
+
+def run_python(code: str) -> str:
+    result = subprocess.run([sys.executable, "-c", textwrap.dedent(code)], capture_output=True,
+                            text=True, timeout=120, cwd=config.PROJECT_ROOT)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]  # o logger também escreve no stdout
+
+
+def test_server_import_within_budget_and_defers_heavy_libraries():
+    profile = profile_imports("backend.main")
+    assert "fastapi" in profile.modules
+    assert profile.deferred_violations() == []
+    assert profile.total_s <= config.STARTUP_IMPORT_BUDGET_S, profile.render(10)
+
+
+def test_package_import_is_lazy():
+    loaded = run_python("""
+        import sys
+        import backend
+        before = sorted(m for m in ("numpy", "psutil", "backend.core.model_manager")
+                        if m in sys.modules)
+        backend.get_model_manager
+        print(before, "backend.core.model_manager" in sys.modules)
+    """)
+    assert loaded == "[] True"
+
+
+def test_health_ready_without_loading_models():
+    out = run_python("""
+        import sys
+        from fastapi.testclient import TestClient
+        from backend.core import model_manager
+        from backend.main import app
+
+        with TestClient(app) as client:
+            body = client.get("/health").json()
+        print(body["status"], body["ready"], body["models_loaded"],
+              model_manager._model_manager is None,
+              [m for m in %r if m in sys.modules])
+    """ % (DEFERRED_MODULES,))
+    assert out == "ok True [] True []"
+
+
+def test_parse_importtime_breakdown():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |     numpy._core",
+        "import time:       400 |        500 |   numpy",
+        "import time:       250 |        250 |   backend.config",
+        "import time:        50 |        800 | backend",
+    ])
+    profile = parse_importtime(output, "backend")
+    assert profile.total_s == 800e-6
+    assert profile.by_package() == pytest.approx({"numpy": 500e-6, "backend": 300e-6})
+    assert list(profile.by_package()) == ["numpy", "backend"]
+    assert [r.module for r in profile.top(2)] == ["backend", "numpy"]
+    assert profile.records[0].depth == 2
+    assert profile.deferred_violations() == []
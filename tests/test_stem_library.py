@@ -0,0 +1,113 @@
+"""
+Testes da biblioteca de stems (construção incremental e entrega com loop/intensidade).
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import config
+from backend.core.model_manager import ModelManager
+from backend.models import music_generator, stem_library
+from backend.models.music_generator import MusicGenerator
+from backend.models.riffusion_sampler import MemoryProfile
+from backend.models.stem_library import StemLibrary, cell_key, shape_intensity
+from backend.models.stubs import make_stub_riffusion_loader
+from backend.utils.spectrogram_utils import SpectrogramConverter, SpectrogramParams
+
+CELLS = [("piano", "calm", "slow"), ("piano", "tense", "slow"), ("ambient", "calm", "fast")]
+
+
+def make_generator(library=False):
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    converter = SpectrogramConverter(SpectrogramParams(num_griffin_lim_iters=4))
+    return MusicGenerator(mm, loader=make_stub_riffusion_loader(), converter=converter,
+                          memory_profile=MemoryProfile("cpu", 4), library=library)
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "MUSIC_STEM_DURATION_S", 4.0)
+    library = StemLibrary(root=tmp_path / "library")
+    generator = make_generator()
+    library.build(generator, cells=CELLS)
+    library.generator = generator
+    return library
+
+
+def test_build_is_incremental(library, monkeypatch):
+    status = library.status()
+    assert [status[cell_key(*c)] for c in CELLS] == ["current"] * 3
+    assert status["orchestral-joyful-fast"] == "missing"
+    entry = library.entries()["piano-calm-slow"]
+    assert entry.sample_rate == 44100 and abs(entry.duration - 4.0) < 0.02
+
+    # Índice relido do disco por outra instância
+    assert set(StemLibrary(root=library.root).entries()) == {cell_key(*c) for c in CELLS}
+    assert library.build(library.generator, cells=CELLS)["built"] == []
+
+    # Template de prompt alterado: só as células daquele humor
+    monkeypatch.setitem(music_generator.MOOD_PROMPTS, "calm", "very calm, airy")
+    assert library.status()["piano-tense-slow"] == "current"
+    assert sorted(library.build(library.generator, cells=CELLS)["built"]) == \
+        ["ambient-calm-fast", "piano-calm-slow"]
+
+    # Modelo alterado: tudo desatualiza
+    monkeypatch.setattr(config, "MUSIC_GUIDANCE_SCALE", 5.0)
+    assert library.entry_for("piano", "tense", "slow") is None
+    assert len(library.build(library.generator, cells=CELLS)["built"]) == 3
+
+
+def test_serve_loops_and_scales_intensity(library):
+    stem_samples = library.entries()["piano-calm-slow"].samples
+    loud = library.serve("piano", "calm", "slow", intensity=1.0, duration=10.0)
+    soft = library.serve("piano", "calm", "slow", intensity=0.0, duration=10.0)
+
+    assert loud.source == "library" and loud.duration == pytest.approx(10.0)
+    assert loud.conversion_time < 0.5
+    # Loop estendido: o stem se repete amostra a amostra
+    np.testing.assert_array_equal(loud.audio[stem_samples:2 * stem_samples],
+                                  loud.audio[:stem_samples])
+    assert np.sqrt(np.mean(soft.audio ** 2)) < 0.6 * np.sqrt(np.mean(loud.audio ** 2))
+
+    # Passa-baixa: intensidade baixa corta os agudos
+    noise = np.random.default_rng(0).standard_normal(44100).astype(np.float32)
+    spectrum = np.abs(np.fft.rfft(shape_intensity(noise, 44100, 0.2)))
+    assert spectrum[8000:].mean() < 0.1 * spectrum[:500].mean()
+
+    once = library.serve("piano", "calm", "slow", duration=6.0, loop=False)
+    assert once.audio[-1] == 0.0 and abs(once.audio[0]) < 1e-6
+    assert library.serve("piano", "calm", "slow", seed=7) is None
+    assert library.serve("piano", "calm", "slow", prompt="jazz trio") is None
+    assert library.serve("cinematic", "calm", "slow") is None
+    stats = library.get_stats()
+    assert stats["hits"] == 3 and stats["misses"] == 3 and stats["current"] == 3
+
+
+def test_generator_falls_back_to_live_for_custom_prompts(library):
+    generator = make_generator(library=library)
+    served = generator.generate(style="piano", mood="calm", tempo="slow", duration=8.0)
+    assert served.source == "library" and generator.get_stats()["batches"] == 0
+
+    live = generator.generate(prompt="lo-fi jazz trio", duration=4.0)
+    assert live.source == "live" and live.prompt == "lo-fi jazz trio"
+    assert generator.get_stats()["batches"] == 1
+    generator.shutdown()
+
+
+def test_endpoint_serves_from_library(library, monkeypatch):
+    from backend.main import app
+
+    monkeypatch.setattr(config, "ARTIFACT_CACHE_ENABLED", True)
+    monkeypatch.setattr(stem_library, "_stem_library", library)
+    monkeypatch.setattr(music_generator, "_music_generator", make_generator(library=library))
+    client = TestClient(app)
+
+    body = {"params": {"style": "ambient", "mood": "calm", "tempo": "fast"}, "duration": 6}
+    response = client.post("/api/generate-music", json=body)
+    assert response.status_code == 200 and response.headers["X-Music-Source"] == "library"
+
+    custom = client.post("/api/generate-music", json={**body, "prompt": "harp arpeggios"})
+    assert custom.headers["X-Music-Source"] == "live"
+    metrics = client.get("/api/metrics/music").json()["data"]
+    assert metrics["library"]["hits"] >= 1 and metrics["batches"] == 1
@@ -0,0 +1,215 @@
+"""
+Testes da geração de histórias com reaproveitamento do estado KV.
+"""
+
+import json
+import threading
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend.core.model_manager import ModelManager
+from backend.models import story_generator
+from backend.models.story_generator import (
+    StateCache,
+    StoryGenerator,
+    pack_state,
+    unpack_state,
+)
+from backend.models.stubs import StubLlama, StubLlamaState
+from backend.utils.artifact_cache import ArtifactCache
+from backend.utils.story_store import StoryStore
+
+
+def make_generator(tmp_path, llm=None):
+    llm = llm or StubLlama()
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    cache = StateCache(disk=ArtifactCache(root=tmp_path / "kv"))
+    store = StoryStore(path=tmp_path / "stories.db")
+    return StoryGenerator(mm, loader=lambda: llm, state_cache=cache, store=store), llm
+
+
+def test_continuation_only_evaluates_new_turn(tmp_path):
+    generator, llm = make_generator(tmp_path)
+    first = generator.create("Uma raposa na floresta")
+    assert first.state_source == "none" and first.prompt_tokens_saved == 0
+
+    before = llm.evaluated
+    second = generator.continue_story(first.story_id, "Ela encontra um dragão")
+
+    assert second.state_source == "hot"
+    new_turn = second.prompt_tokens - second.prompt_tokens_saved
+    assert second.prompt_tokens_saved > first.prompt_tokens
+    assert llm.evaluated - before == new_turn + second.generated_tokens
+    assert generator.get_stats()["prompt_tokens_saved"] == second.prompt_tokens_saved
+
+
+def test_state_restored_from_memory_and_disk(tmp_path):
+    generator, llm = make_generator(tmp_path)
+    a = generator.create("História A")
+    generator.create("História B")  # substitui o contexto ativo
+
+    result = generator.continue_story(a.story_id, "E depois?")
+    assert result.state_source == "memory" and llm.loads == 1
+    assert result.prompt_tokens_evaluated < result.prompt_tokens / 2
+
+    # "Reinício": memória vazia; história (com tokens) e snapshots ainda em disco
+    generator.store.close()
+    restarted, _ = make_generator(tmp_path, llm)
+    result = restarted.continue_story(a.story_id, "E no fim?")
+    assert result.state_source == "disk"
+    assert result.prompt_tokens_saved > 0
+
+
+def test_sliding_context_summarizes_old_turns(tmp_path):
+    llm = StubLlama(n_ctx=900)
+    generator, _ = make_generator(tmp_path, llm)
+    story_id = generator.create("Começo").story_id
+
+    results = [generator.continue_story(story_id, f"Turno {i} " + "x" * 60) for i in range(8)]
+
+    assert any(r.summarized for r in results)
+    session = generator.get(story_id)
+    assert session.summary and session.summarizations >= 1
+    assert len(session.tokens) <= 900
+    assert all(r.prompt_tokens + 250 <= 900 for r in results)
+    # Depois do resumo, as continuações voltam a reaproveitar o estado
+    assert results[-1].summarized or results[-1].prompt_tokens_saved > 0
+
+
+def test_concurrent_continuations_and_cancelled_summary_keep_history(tmp_path, monkeypatch):
+    llm = StubLlama(latency_per_token_s=0.001)
+    generator, _ = make_generator(tmp_path, llm)
+    story_id = generator.create("Começo").story_id
+
+    # A segunda continuação espera o lock e monta o prompt já com a primeira
+    threads = [threading.Thread(target=generator.continue_story, args=(story_id, f"Pedido {i}"))
+               for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    session = generator.get(story_id)
+    assert len(session.turns) == 6
+    assert {t["text"] for t in session.turns if t["role"] == "user"} >= {"Pedido 0", "Pedido 1"}
+    assert generator.get_stats()["requests"] == 3
+
+    # Turno cancelado depois de um resumo: a sessão fica como estava
+    monkeypatch.setattr(story_generator.config, "STORY_KEEP_TURNS", 0)
+    llm._n_ctx = len(session.tokens) + 120
+    before = (list(session.turns), session.summary, session.summarizations)
+    cancel = threading.Event()
+    result = generator._turn(session, "x" * 40, 100, 0.7, 0.9, cancel,
+                             on_token=lambda piece: cancel.set())
+    assert result.summarized and result.cancelled
+    assert (session.turns, session.summary, session.summarizations) == before
+
+
+def test_pack_state_keeps_only_last_score_row():
+    state = StubLlamaState([1, 2, 3], 3)
+    state.scores = np.random.default_rng(0).random((512, 1000), dtype=np.float32)
+    data = pack_state(state)
+    restored = unpack_state(data)
+
+    assert restored.scores.shape == (512, 1000)
+    np.testing.assert_array_equal(restored.scores[2], state.scores[2])
+    assert not restored.scores[0].any()
+    assert len(data) < 2 * 1000 * 4
+
+
+def test_story_endpoints(tmp_path, monkeypatch):
+    from backend.main import app
+
+    generator, _ = make_generator(tmp_path)
+    monkeypatch.setattr(story_generator, "_story_generator", generator)
+    client = TestClient(app)
+
+    emotions = {"dominant_emotion": "joy", "intensity": 0.9}
+    created = client.post("/api/generate-story",
+                          json={"emotions": emotions, "user_prompt": "Um gato astronauta"})
+    data = created.json()["data"]
+    assert data["text"] == data["story"] and data["emotion_adapted"]
+
+    continued = client.post(f"/api/stories/{data['story_id']}/continue",
+                            json={"user_input": "O gato pousa na Lua"}).json()
+    assert continued["story_id"] == data["story_id"]
+    assert continued["prompt_tokens_saved"] > 0
+
+    story = client.get(f"/api/stories/{data['story_id']}").json()
+    assert continued["continuation"] in story["text"]
+
+    # Requisição idêntica: texto do cache, história nova
+    again = client.post("/api/generate-story",
+                        json={"emotions": emotions, "user_prompt": "Um gato astronauta"})
+    assert again.json()["data"]["text"] == data["text"]
+    assert again.json()["data"]["story_id"] != data["story_id"]
+
+    assert client.post("/api/stories/nope/continue", json={"user_input": "oi"}).status_code == 404
+    assert client.delete(f"/api/stories/{data['story_id']}").status_code == 200
+
+
+def test_stream_yields_text_and_reports_latency(tmp_path):
+    generator, _ = make_generator(tmp_path, StubLlama(latency_per_token_s=0.002))
+    stream = generator.stream_create("Um farol")
+    pieces = list(stream)
+
+    result = stream.result
+    assert "".join(pieces).strip() == result.text == "E a aventura continuou."
+    assert len(pieces) > 1
+    assert 0 < result.first_token_latency_s < result.generation_time
+    assert result.tokens_per_s > 0
+    assert generator.get(stream.story_id) is not None
+
+
+def test_closing_stream_stops_decoding(tmp_path):
+    llm = StubLlama(reply="palavra " * 200, latency_per_token_s=0.002)
+    generator, _ = make_generator(tmp_path, llm)
+    story_id = generator.create("Começo").story_id
+    turns = list(generator.get(story_id).turns)
+
+    stream = generator.stream_continue(story_id, "Continue")
+    iterator = iter(stream)
+    next(iterator)
+    iterator.close()
+    stream.wait(timeout=5)
+
+    assert stream.result.cancelled
+    assert stream.result.generated_tokens < len("palavra " * 200)
+    assert generator.get(story_id).turns == turns
+    assert generator.get_stats()["cancelled"] == 1
+    # O modelo foi liberado e a história segue normalmente
+    llm.reply = "Fim."
+    assert generator.continue_story(story_id, "Continue").text == "Fim."
+
+
+def test_story_stream_endpoints(tmp_path, monkeypatch):
+    from backend.main import app
+
+    llm = StubLlama(reply="palavra " * 200, latency_per_token_s=0.002)
+    generator, _ = make_generator(tmp_path, llm)
+    monkeypatch.setattr(story_generator, "_story_generator", generator)
+    client = TestClient(app)
+
+    llm.reply = "Era uma vez um farol."
+    response = client.post("/api/generate-story/stream", json={"user_prompt": "Um farol"})
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    names = [e[0].removeprefix("event: ") for e in events]
+    payloads = [json.loads(e[1].removeprefix("data: ")) for e in events]
+    assert names[0] == "start" and names[-1] == "end" and set(names[1:-1]) == {"token"}
+    assert "".join(p["text"] for p in payloads[1:-1]).strip() == payloads[-1]["text"]
+    assert payloads[-1]["first_token_latency_s"] is not None
+
+    story_id = payloads[0]["story_id"]
+    llm.reply = "palavra " * 200
+    with client.websocket_connect("/ws/generate-story") as ws:
+        ws.send_json({"action": "continue", "story_id": story_id, "user_input": "E então?"})
+        assert ws.receive_json()["type"] == "start"
+        assert ws.receive_json()["type"] == "token"
+        ws.send_json({"type": "cancel"})
+        message = ws.receive_json()
+        while message["type"] == "token":
+            message = ws.receive_json()
+        assert message["type"] == "end" and message["metrics"]["cancelled"]
+
+    missing = client.post("/api/stories/nope/continue/stream", json={"user_input": "oi"})
+    assert missing.status_code == 404
@@ -0,0 +1,149 @@
+"""
+Testes da renderização incremental de histórias (segmentos por parágrafo).
+"""
+
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi.testclient import TestClient
+
+from backend.core.emotion_analyzer import TextEmotionAnalyzer
+from backend.core.model_manager import ModelManager
+from backend.models import story_generator, story_render
+from backend.models.music_generator import MusicGenerator
+from backend.models.riffusion_sampler import MemoryProfile
+from backend.models.story_generator import StateCache, StoryGenerator
+from backend.models.story_render import StoryRenderer, split_segments
+from backend.models.stubs import StubEmotionClassifier, StubLlama, StubTTS, make_stub_riffusion_loader
+from backend.models.tts_narrator import TTSNarrator
+from backend.utils.artifact_cache import ArtifactCache
+from backend.utils.spectrogram_utils import SpectrogramConverter, SpectrogramParams
+
+STORY = ("Era uma vez uma raposa.\n\n"
+         "Ela morava na floresta escura.\n\n"
+         "Um dia, encontrou um dragão.")
+
+
+@pytest.fixture
+def renderer(tmp_path, isolated_audio_store):
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    tts = StubTTS()
+    llm = StubLlama(reply="A raposa e o dragão ficaram amigos.")
+    music = MusicGenerator(mm, loader=make_stub_riffusion_loader(),
+                           converter=SpectrogramConverter(SpectrogramParams(num_griffin_lim_iters=4)),
+                           memory_profile=MemoryProfile("cpu", 4), library=False)
+    text_emotion = TextEmotionAnalyzer(mm, loader=lambda: StubEmotionClassifier())
+    stories = StoryGenerator(mm, loader=lambda: llm,
+                             state_cache=StateCache(disk=ArtifactCache(root=tmp_path / "kv")))
+    renderer = StoryRenderer(narrator=TTSNarrator(mm, loader=lambda: tts), music=music,
+                             text_emotion=text_emotion, stories=stories,
+                             store=isolated_audio_store, root=tmp_path / "segments")
+    renderer.tts, renderer.llm = tts, llm
+    yield renderer
+    music.shutdown()
+    text_emotion.shutdown()
+    mm.shutdown()
+
+
+def read_wav(data: bytes) -> np.ndarray:
+    audio, _ = sf.read(io.BytesIO(data), dtype="int16")
+    return audio
+
+
+def test_continuation_renders_only_new_segments(renderer):
+    story = renderer.stories.create(user_prompt="Uma raposa na floresta")
+    first = renderer.render(story.story_id)
+    assert first.rendered == 1 and first.reused == 0
+    calls = len(renderer.tts.calls)
+
+    renderer.llm.reply = "Juntos, voaram sobre o vale."
+    renderer.stories.continue_story(story.story_id, "Ela encontra um dragão")
+    second = renderer.render(story.story_id)
+    assert second.rendered == 1 and second.reused == 1
+    assert second.segments[0].key == first.segments[0].key
+    assert second.render_id != first.render_id
+    # Só o parágrafo novo foi narrado
+    assert renderer.tts.calls[calls:] == ["Juntos, voaram sobre o vale."]
+    assert second.duration == pytest.approx(sum(s.duration for s in second.segments), abs=1e-3)
+
+    assert renderer.manifest(story.story_id)["render_id"] == second.render_id
+    stats = renderer.get_stats()
+    assert stats["segments_rendered"] == 2 and stats["segments_reused"] == 1
+    with pytest.raises(KeyError):
+        renderer.render("0" * 32)
+
+
+def test_edit_rerenders_changed_paragraph_only(renderer):
+    base = renderer.render_text("s1", STORY)
+    assert base.rendered == 3 and split_segments(STORY)[1] == "Ela morava na floresta escura."
+
+    edited = STORY.replace("floresta escura", "floresta clara")
+    result = renderer.render_text("s1", edited)
+    assert [s.reused for s in result.segments] == [True, False, True]
+
+    # Mesmo texto: nada renderizado e o mesmo áudio no AudioStore
+    again = renderer.render_text("s1", edited)
+    assert again.rendered == 0 and again.render_id == result.render_id
+    # Outra voz ou estilo de trilha: todos os segmentos mudam
+    assert renderer.render_text("s1", edited, music_style="piano").rendered == 3
+    with pytest.raises(ValueError):
+        renderer.render_text("s1", "   \n\n  ")
+
+
+def test_final_audio_is_concatenation_of_segments(renderer):
+    result = renderer.render_text("s2", STORY + "\n\n" + "Era uma vez uma raposa.")
+    # Parágrafo repetido: mesma chave, renderizado uma vez
+    assert result.rendered == 3 and result.segments[3].reused
+    assert result.segments[3].key == result.segments[0].key
+
+    store = renderer.store
+    asset = store.get(result.render_id)
+    final = read_wav(store.path(asset.variants["wav"]).read_bytes())
+    parts = [read_wav(renderer.cache.get(s.key).data) for s in result.segments]
+    np.testing.assert_array_equal(final, np.concatenate(parts))
+    # Emendas com fade: cada segmento começa e termina em silêncio
+    assert all(abs(int(p[0])) <= 1 and abs(int(p[-1])) <= 1 for p in parts)
+
+
+def test_segment_cache_is_bounded_and_evicted_segments_are_rerendered(renderer):
+    first = renderer.render_text("s3", STORY)
+    sizes = [len(renderer.cache.get(s.key).data) for s in first.segments]
+
+    # Orçamento para um segmento só: os demais saem pelo LRU ainda durante a renderização
+    renderer.max_bytes, renderer._cache = max(sizes), None
+    renderer.cache.clear()
+    calls = len(renderer.tts.calls)
+    result = renderer.render_text("s4", STORY + "\n\nE viveram felizes.")
+    assert renderer.get_stats()["segments_on_disk"] == 1
+    assert renderer.cache.get_stats()["evictions"] >= 3
+    # Os removidos foram narrados de novo para a montagem, e o áudio está completo
+    assert len(renderer.tts.calls) - calls > 4
+    asset = renderer.store.get(result.render_id)
+    assert asset.duration == pytest.approx(sum(s.duration for s in result.segments), abs=1e-3)
+    assert list(renderer.store.root.glob(".story-*")) == []
+
+
+def test_render_endpoints(renderer, monkeypatch):
+    from backend.main import app
+
+    monkeypatch.setattr(story_render, "_story_renderer", renderer)
+    monkeypatch.setattr(story_generator, "_story_generator", renderer.stories)
+    client = TestClient(app)
+    story_id = renderer.stories.create(user_prompt="Um gato astronauta").story_id
+
+    assert client.get(f"/api/stories/{story_id}/render").status_code == 404
+    response = client.post(f"/api/stories/{story_id}/render", json={"music_style": "piano"})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["rendered"] == 1 and data["media_url"].endswith(data["render_id"])
+    media = client.get(data["media_url"] + "?format=wav")
+    assert media.status_code == 200
+
+    again = client.post(f"/api/stories/{story_id}/render", json={"music_style": "piano"})
+    assert again.json()["data"]["reused"] == 1
+    assert client.get(f"/api/stories/{story_id}/render").json()["data"]["render_id"] == \
+        data["render_id"]
+    assert client.post("/api/stories/nope/render").status_code == 404
+    assert client.get("/api/metrics/story").json()["render"]["renders"] == 2
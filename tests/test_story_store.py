@@ -0,0 +1,190 @@
+"""
+Testes do armazenamento de histórias em SQLite e da galeria paginada.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.models import story_generator
+from backend.utils.story_store import StoryRecord, StoryStore, StoryStoreError, decode_cursor
+
+EMOTIONS = ("joy", "sadness", "fear")
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def record(i: int, text: str = None) -> StoryRecord:
+    return StoryRecord(
+        id=f"s{i:03d}",
+        created_at=(START + timedelta(hours=i)).isoformat(),
+        text=text or f"História número {i}. " + "palavra " * 100,
+        state={"turns": []},
+        emotion=EMOTIONS[i % 3],
+        intensity=0.5,
+        user_input=f"pedido {i}",
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StoryStore(path=tmp_path / "stories.db", flush_interval_s=0.2)
+    yield store
+    store.close()
+
+
+def test_writes_are_batched_and_visible_before_flush(store):
+    for i in range(50):
+        store.save(record(i))
+    # Ainda na fila: a leitura por id já enxerga
+    assert store.get("s007").text.startswith("História número 7.")
+    store.delete("s008")
+    assert store.get("s008") is None and not store.exists("s008")
+
+    assert store.count() == 49
+    stats = store.get_stats()
+    assert stats["pending"] == 0 and stats["writes"] == 51
+    assert stats["batches"] < 10
+
+    # Atualização preserva a data de criação
+    store.save(StoryRecord(id="s001", created_at=_now(), text="Reescrita", state={}))
+    store.flush()
+    assert store.get("s001").created_at == record(1).created_at
+    assert store.get("s001").text == "Reescrita"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def block_writes(path) -> sqlite3.Connection:
+    """Trigger que rejeita ids ``bad*`` e, enquanto ``block`` tiver linha, tudo."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.executescript("""
+        CREATE TABLE block (x);
+        INSERT INTO block VALUES (1);
+        CREATE TRIGGER reject BEFORE INSERT ON stories
+        WHEN NEW.id LIKE 'bad%' OR EXISTS (SELECT 1 FROM block)
+        BEGIN SELECT RAISE(ABORT, 'rejeitado'); END;
+    """)
+    return conn
+
+
+def test_failed_batch_is_retried_until_it_lands(tmp_path):
+    store = StoryStore(path=tmp_path / "stories.db", flush_interval_s=0.05, write_retries=10)
+    conn = block_writes(store.path)
+    try:
+        store.save(record(1))
+        deadline = time.monotonic() + 5
+        while store.stats.retries == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.stats.retries >= 1
+        # Continua pendente (legível) enquanto não grava
+        assert store.get("s001") is not None
+
+        conn.execute("DELETE FROM block")
+        assert store.flush(timeout=5)
+        assert store.count() == 1 and store.get_stats()["failed"] == 0
+    finally:
+        store.close()
+        conn.close()
+
+
+def test_exhausted_retries_drop_only_failing_writes_and_flush_raises(tmp_path):
+    store = StoryStore(path=tmp_path / "stories.db", flush_interval_s=0.01, write_retries=2)
+    conn = block_writes(store.path)
+    conn.execute("DELETE FROM block")
+    try:
+        store.save(record(1))
+        store.save(StoryRecord(id="bad1", created_at=_now(), text="Rejeitada", state={}))
+        store.save(record(2))
+        with pytest.raises(StoryStoreError, match="rejeitado"):
+            store.flush(timeout=5)
+        assert store.get("bad1") is None
+        assert store.count() == 2
+        assert store.get_stats()["failed"] == 1
+        # O erro é entregue uma vez; flushes seguintes voltam ao normal
+        assert store.flush(timeout=5)
+    finally:
+        store.close()
+        conn.close()
+
+
+def test_cursor_pagination_and_filters(store):
+    for i in range(60):
+        store.save(record(i))
+    store.save(record(60, "O dragão dourado dormia na montanha."))
+
+    pages, cursor = [], None
+    while True:
+        page = store.list(cursor=cursor, limit=25)
+        pages.append(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    ids = [s.id for items in pages for s in items]
+    assert [len(p) for p in pages] == [25, 25, 11]
+    assert ids == [f"s{i:03d}" for i in range(60, -1, -1)]
+    assert decode_cursor(store.list(limit=25).next_cursor) == (record(36).created_at, "s036")
+
+    summary = pages[0][1].to_dict()
+    assert "text" not in summary and "state" not in summary
+    assert summary["title"] == "pedido 59" and summary["preview"].endswith("…")
+    assert len(summary["preview"]) <= 241
+
+    joy = store.list(emotion="joy", limit=100).items
+    assert {s.emotion for s in joy} == {"joy"} and len(joy) == 21
+    day = store.list(date_from="2026-01-02", date_to="2026-01-02", limit=100).items
+    assert [s.id for s in day] == [f"s{i:03d}" for i in range(47, 23, -1)]
+
+    # Busca sem acento e por prefixo
+    assert [s.id for s in store.list(q="Dragao").items] == ["s060"]
+    assert [s.id for s in store.list(q="mont").items] == ["s060"]
+    assert store.list(q="dragão", emotion="fear").items == []
+    assert store.list(q="***").items == []
+
+    with pytest.raises(ValueError):
+        store.list(cursor="não-é-um-cursor")
+
+
+def test_gallery_queries_use_indexes(store):
+    store.save(record(1))
+    assert any("stories_created" in step for step in store.explain(cursor=None))
+    assert any("stories_emotion" in step for step in store.explain(emotion="joy"))
+
+
+def test_gallery_endpoint_pages_generated_stories(tmp_path, monkeypatch):
+    from backend.main import app
+    from tests.test_story_generator import make_generator
+
+    generator, _ = make_generator(tmp_path)
+    monkeypatch.setattr(story_generator, "_story_generator", generator)
+    client = TestClient(app)
+
+    ids = []
+    for emotion in ("joy", "sadness", "joy"):
+        data = client.post("/api/generate-story", json={
+            "emotions": {"dominant_emotion": emotion, "intensity": 0.8},
+            "user_prompt": f"Uma história de {emotion}"}).json()["data"]
+        ids.append(data["story_id"])
+
+    first = client.get("/api/stories", params={"emotion": "joy", "limit": 1}).json()["data"]
+    assert [s["id"] for s in first["items"]] == [ids[2]]
+    rest = client.get("/api/stories", params={"emotion": "joy", "limit": 1,
+                                              "cursor": first["next_cursor"]}).json()["data"]
+    assert [s["id"] for s in rest["items"]] == [ids[0]] and rest["next_cursor"] is None
+
+    found = client.get("/api/stories", params={"q": "sadness", "emotion": "all"}).json()["data"]
+    assert [s["id"] for s in found["items"]] == [ids[1]]
+    assert "text" not in found["items"][0]
+
+    assert client.get("/api/stories", params={"cursor": "x"}).status_code == 400
+    assert client.get("/api/stories", params={"limit": 0}).status_code == 422
+
+    assert client.delete(f"/api/stories/{ids[1]}").status_code == 200
+    assert client.get(f"/api/stories/{ids[1]}").status_code == 404
+    assert [s["id"] for s in client.get("/api/stories").json()["data"]["items"]] == \
+        [ids[2], ids[0]]
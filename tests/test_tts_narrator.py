@@ -0,0 +1,130 @@
+"""
+Testes da narração em streaming (frase a frase).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api.routes import close_stream
+from backend.core.model_manager import ModelManager
+from backend.models import tts_narrator
+from backend.models.stubs import StubTTS
+from backend.models.tts_narrator import TTSNarrator, split_sentences
+from backend.utils.audio_utils import StreamingCrossfader
+
+STORY = (
+    "Era uma vez, em uma floresta mágica, vivia uma pequena raposa corajosa. "
+    "Oh não! O dragão está vindo! Precisamos nos esconder! "
+    "Mas a raposa não teve medo... Ela olhou para o céu e sorriu."
+)
+
+
+@pytest.fixture
+def narrator():
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    stub = StubTTS(latency_s=0.01)
+    yield TTSNarrator(mm, loader=lambda: stub)
+    mm.shutdown()
+
+
+def test_split_sentences_keeps_order_and_merges_short():
+    sentences = split_sentences(STORY)
+    assert sentences[0].startswith("Era uma vez")
+    assert "Oh não! O dragão está vindo!" in sentences[1]
+    assert " ".join(sentences) == " ".join(STORY.split())
+
+
+def test_split_sentences_breaks_long_sentences():
+    long_text = ", ".join(["uma frase bem comprida sem ponto final"] * 20) + "."
+    sentences = split_sentences(long_text, max_chars=120)
+    assert len(sentences) > 1
+    assert all(len(s) <= 120 for s in sentences)
+
+
+def test_crossfader_preserves_length_minus_overlaps():
+    fader = StreamingCrossfader(sample_rate=1000, crossfade_ms=10)
+    blocks = [np.ones(100, dtype=np.float32) for _ in range(3)]
+    out = np.concatenate([fader.push(b) for b in blocks] + [fader.flush()])
+    assert len(out) == 300 - 2 * 10
+    # Equal-power: a junção não cria buraco nem pico acima de sqrt(2)
+    assert out.min() > 0.9 and out.max() <= np.sqrt(2) + 1e-5
+
+
+def test_stream_reports_metrics(narrator):
+    stream = narrator.stream(STORY)
+    chunks = list(stream)
+
+    assert stream.sample_rate == StubTTS.output_sample_rate
+    assert stream.metrics.sentences == len(stream.sentences)
+    assert stream.metrics.first_chunk_latency_s is not None
+    assert stream.metrics.first_chunk_latency_s <= stream.metrics.wall_seconds
+    total = sum(len(c) for c in chunks) / stream.sample_rate
+    assert stream.metrics.audio_seconds == pytest.approx(total)
+    assert stream.metrics.real_time_factor > 0
+
+
+def test_closing_stream_cancels_remaining_sentences(narrator):
+    stream = narrator.stream(STORY * 5)
+    iterator = iter(stream)
+    next(iterator)
+    iterator.close()
+
+    assert stream.metrics.cancelled
+    assert stream.metrics.sentences < len(stream.sentences)
+
+
+def test_close_from_another_thread_releases_pending_next():
+    mm = ModelManager(vram_budget_gb=10, ram_budget_gb=10, next_stages={})
+    stream = TTSNarrator(mm, loader=lambda: StubTTS(latency_s=0.3)).stream(STORY * 5)
+    iterator = iter(stream)
+    next(iterator)
+    pending = ThreadPoolExecutor(1).submit(next, iterator, None)  # como no threadpool da rota
+    time.sleep(0.05)
+    close_stream(stream, iterator)  # sem "generator already executing"
+
+    assert pending.result(timeout=2) is None
+    assert stream.metrics.cancelled and stream.metrics.sentences < len(stream.sentences)
+    mm.shutdown()
+
+
+def test_synthesize_speech_endpoints(narrator, monkeypatch):
+    from backend.main import app
+
+    monkeypatch.setattr(tts_narrator, "_narrator", narrator)
+    client = TestClient(app)
+
+    streamed = client.post("/api/synthesize-speech", json={"text": STORY, "stream": True})
+    assert streamed.status_code == 200
+    assert streamed.headers["X-Cache"] == "MISS"
+
+    # A narração transmitida ficou no cache e é servida inteira
+    full = client.post("/api/synthesize-speech", json={"text": STORY})
+    assert full.status_code == 200
+    assert full.headers["X-Cache"] == "HIT"
+    assert full.content[:4] == b"RIFF"
+    assert float(full.headers["X-Audio-Duration"]) > 0
+    # Mesmo áudio, apenas o cabeçalho difere (tamanho indeterminado)
+    assert streamed.content[44:] == full.content[44:]
+
+    other = client.post("/api/synthesize-speech",
+                        json={"text": STORY, "params": {"style": "calm"}})
+    assert other.headers["X-Cache"] == "MISS"
+
+    with client.websocket_connect("/ws/synthesize-speech") as ws:
+        ws.send_json({"text": STORY, "params": {"style": "calm"}})
+        start = ws.receive_json()
+        assert start["type"] == "start"
+        received = 0
+        while True:
+            message = ws.receive()
+            if message.get("bytes") is not None:
+                received += len(message["bytes"])
+                continue
+            break
+        assert received > 0
+
+    assert client.post("/api/synthesize-speech", json={"text": "   "}).status_code == 400
@@ -0,0 +1,144 @@
+"""
+Testes do pool de workers (processos por estágio com modelos substitutos).
+"""
+
+import os
+import signal
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import config
+from backend.core import worker_pool
+from backend.core.remote_stages import RemoteStoryGenerator, RemoteTTSNarrator
+from backend.core.worker_pool import SharedArray, WorkerCrashedError, WorkerPool, share, unshare
+from backend.models.music_generator import MusicResult
+from backend.utils import story_store
+from backend.utils.story_store import StoryStore
+
+SENTENCES = " ".join(f"Frase número {i} da narração." for i in range(12))
+
+
+@pytest.fixture(scope="module")
+def pool(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("pool") / "stories.db"
+    pool = WorkerPool({"story": 2, "tts": 1, "analysis": 1}, stub=True, health_interval_s=60,
+                      config_overrides={"STORY_DB_PATH": db_path}).start()
+    assert pool.wait_ready(60)
+    pool.db_path = db_path
+    yield pool
+    pool.shutdown()
+
+
+def speech(seconds: float, sample_rate: int = 16000) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * 220 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+
+
+def test_share_round_trip_frees_shared_memory():
+    audio = np.arange(48000, dtype=np.float32)
+    result = MusicResult(audio, 44100, "prompt", 2, 0.5, 0.1)
+    shared = share({"music": result, "small": np.ones(4), "labels": np.array(["a"])})
+
+    descriptor = shared["music"].audio
+    assert isinstance(descriptor, SharedArray)
+    assert isinstance(shared["small"], np.ndarray) and isinstance(shared["labels"], np.ndarray)
+
+    restored = unshare(shared)
+    np.testing.assert_array_equal(restored["music"].audio, audio)
+    assert restored["music"].prompt == "prompt"
+    # Quem recebe libera o bloco
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=descriptor.name)
+
+
+def test_stages_run_in_workers(pool):
+    audio, sample_rate, metrics = pool.call("tts", "synthesize", SENTENCES, timeout=30)
+    assert sample_rate == 24000 and metrics.sentences == 12
+    assert len(audio) / sample_rate == pytest.approx(metrics.audio_seconds)
+
+    # Streaming: cabeçalho, blocos e métricas; fechar cedo cancela no worker
+    stream = RemoteTTSNarrator(pool).stream(SENTENCES).start()
+    assert stream.sample_rate == 24000 and len(stream.sentences) == 12
+    blocks = iter(stream)
+    next(blocks)
+    blocks.close()
+    stream.close()
+    assert stream.metrics.cancelled and stream.job.wait(10)
+
+    # Continuações vão para o worker que criou a história
+    stories = RemoteStoryGenerator(pool)
+    stories.store = StoryStore(path=pool.db_path)
+    created = stories.create(user_prompt="Um gato astronauta")
+    owner = stories._owners[created.story_id]
+    follow = stories._submit("continue_story", created.story_id, created.story_id, "E depois?")
+    assert follow.worker == owner and follow.result(30).state_source == "hot"
+    assert stories.get(created.story_id).turns[-1]["text"] == created.text
+
+    streamed = stories.stream_continue(created.story_id, "E no fim?")
+    assert "".join(streamed) == streamed.result.text
+    with pytest.raises(KeyError):
+        stories.stream_continue("inexistente", "oi")
+
+    result = pool.call("analysis", "analyze", speech(2.0), timeout=30)
+    assert result["transcript"].startswith("segmento de")
+    stats = pool.get_stats()["stages"]
+    assert stats["tts"]["workers"][0]["completed"] >= 2
+    assert all(s["queue_depth"] == 0 for s in stats.values())
+    stories.store.close()
+
+
+def test_crashed_worker_is_restarted():
+    pool = WorkerPool({"tts": 1}, stub=True, health_interval_s=60).start()
+    try:
+        assert pool.wait_ready(60)
+        first_pid = pool.get_stats()["stages"]["tts"]["workers"][0]["pid"]
+        os.kill(first_pid, signal.SIGKILL)
+        pool._workers["tts"][0].process.join(10)
+
+        job = pool.submit("tts", "synthesize", "Ninguém vai ler isto.")
+        assert pool.check_health() == {"tts": [False]}
+        with pytest.raises(WorkerCrashedError):
+            job.result(10)
+
+        assert pool.wait_ready(60)
+        audio, _, _ = pool.call("tts", "synthesize", "Agora sim.", timeout=30)
+        assert len(audio) > 0
+        worker = pool.get_stats()["stages"]["tts"]["workers"][0]
+        assert worker["restarts"] == 1 and worker["pid"] != first_pid and worker["failed"] == 1
+        assert 'aurora_worker_restarts{stage="tts",worker="0"} 1' in pool.prometheus()
+    finally:
+        pool.shutdown()
+
+
+def test_endpoints_dispatch_to_pool(pool, monkeypatch):
+    from backend.main import app
+    from backend.models import story_generator, tts_narrator
+
+    monkeypatch.setattr(config, "WORKER_POOL_ENABLED", True)
+    monkeypatch.setattr(config, "ARTIFACT_CACHE_ENABLED", False)
+    monkeypatch.setattr(worker_pool, "_worker_pool", pool)
+    monkeypatch.setattr(story_store, "_story_store", StoryStore(path=pool.db_path))
+    monkeypatch.setattr(story_generator, "_story_generator", None)
+    monkeypatch.setattr(tts_narrator, "_narrator", None)
+    client = TestClient(app)
+
+    story = client.post("/api/generate-story", json={"user_prompt": "Uma baleia"}).json()["data"]
+    assert isinstance(story_generator.get_story_generator(), RemoteStoryGenerator)
+    continued = client.post(f"/api/stories/{story['story_id']}/continue",
+                            json={"user_input": "E então?"}).json()
+    assert continued["state_source"] == "hot"
+    saved = client.get(f"/api/stories/{story['story_id']}").json()
+    assert saved["text"].endswith(continued["continuation"])
+
+    speech_response = client.post("/api/synthesize-speech", json={"text": "Era uma vez."})
+    assert speech_response.status_code == 200
+    assert float(speech_response.headers["X-Audio-Duration"]) > 0
+
+    workers = client.get("/api/metrics/workers").json()["data"]
+    assert workers["enabled"] and workers["stages"]["story"]["healthy"] == 2
+    assert client.get("/health").json()["workers"]["tts"] == {"healthy": 1, "total": 1}
+    assert "aurora_worker_completed" in client.get("/metrics").text
+    story_store._story_store.close()
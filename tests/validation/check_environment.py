@@ -6,27 +6,39 @@ Execute primeiro para garantir que todas as dependências estão instaladas.
 
 Uso:
     python tests/validation/check_environment.py
+    python tests/validation/check_environment.py --skip-cuda   # sem importar o PyTorch
 """
 
 import sys
-import importlib
+import importlib.util
+from importlib import metadata
 from pathlib import Path
 
-def check_package(package_name, display_name=None):
-    """Verifica se um pacote Python está instalado."""
+def check_package(package_name, display_name=None, distribution=None):
+    """
+    Verifica se um pacote Python está instalado.
+
+    Usa só a busca de spec (sem importar): importar torch, transformers
+    ou diffusers para isso custaria vários segundos.
+    """
     if display_name is None:
         display_name = package_name
     
-    try:
-        importlib.import_module(package_name)
-        print(f"✅ {display_name}")
-        return True
-    except ImportError:
+    if importlib.util.find_spec(package_name) is None:
         print(f"❌ {display_name} - NÃO INSTALADO")
         return False
+    try:
+        version = metadata.version(distribution or package_name)
+        print(f"✅ {display_name} ({version})")
+    except metadata.PackageNotFoundError:
+        print(f"✅ {display_name}")
+    return True
 
 def check_cuda():
-    """Verifica disponibilidade de CUDA."""
+    """Verifica disponibilidade de CUDA (único passo que importa o PyTorch)."""
+    if importlib.util.find_spec("torch") is None:
+        print(f"❌ PyTorch não instalado")
+        return False
     try:
         import torch
         if torch.cuda.is_available():
@@ -43,7 +55,7 @@ def check_cuda():
         print(f"❌ PyTorch não instalado")
         return False
 
-def main():
+def main(skip_cuda=False):
     print("="*60)
     print("🔍 Verificação de Ambiente - Aurora EchoTales")
     print("="*60)
@@ -53,19 +65,22 @@ def main():
         ("torch", "PyTorch"),
         ("transformers", "Transformers (Hugging Face)"),
         ("diffusers", "Diffusers (Stable Diffusion)"),
-        ("whisper", "OpenAI Whisper"),
+        ("whisper", "OpenAI Whisper", "openai-whisper"),
         ("scipy", "SciPy"),
-        ("PIL", "Pillow"),
+        ("PIL", "Pillow", "Pillow"),
         ("psutil", "psutil"),
         ("numpy", "NumPy"),
     ]
     
     results = []
-    for pkg, name in packages:
-        results.append(check_package(pkg, name))
+    for pkg, name, *distribution in packages:
+        results.append(check_package(pkg, name, *distribution))
     
-    print("\n🎮 Verificando GPU...")
-    cuda_ok = check_cuda()
+    if skip_cuda:
+        cuda_ok = False
+    else:
+        print("\n🎮 Verificando GPU...")
+        cuda_ok = check_cuda()
     
     print("\n📁 Verificando estrutura de diretórios...")
     required_dirs = [
@@ -83,6 +98,17 @@ def main():
             print(f"⚠️  {dir_path} - Criando...")
             full_path.mkdir(parents=True, exist_ok=True)
     
+    print("\n🎭 Verificando pesos gerados localmente...")
+    sys.path.insert(0, str(project_root))
+    from backend import config
+    head_ok = config.AUDIO_EMOTION_HEAD_PATH.exists()
+    if head_ok:
+        print(f"✅ Cabeça de emoção acústica ({config.AUDIO_EMOTION_HEAD_PATH.name})")
+    else:
+        print(f"⚠️  Cabeça de emoção acústica ausente ({config.AUDIO_EMOTION_HEAD_PATH})")
+        print("   A análise de áudio segue só com o texto. Para treinar:")
+        print("   python -m backend.core.audio_emotion train <dataset>   # <dataset>/<emoção>/*.wav")
+    
     # Resumo
     print("\n" + "="*60)
     print("📊 RESUMO")
@@ -92,9 +118,10 @@ def main():
     passed = sum(results)
     
     print(f"Pacotes: {passed}/{total} instalados")
-    print(f"CUDA: {'✅ OK' if cuda_ok else '❌ Não disponível'}")
+    print(f"CUDA: {'⏭️  Não verificada' if skip_cuda else '✅ OK' if cuda_ok else '❌ Não disponível'}")
+    print(f"Emoção acústica: {'✅ OK' if head_ok else '⚠️  Desativada (sem pesos)'}")
     
-    if passed == total and cuda_ok:
+    if passed == total and (cuda_ok or skip_cuda):
         print("\n🎉 Ambiente pronto para validação!")
         print("\n📝 Próximo passo:")
         print("   python tests/validation/run_all_tests.py")
@@ -107,4 +134,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(main(skip_cuda="--skip-cuda" in sys.argv[1:]))
@@ -40,19 +40,7 @@ def test_emotion2vec():
     print(f"� Transcrição: {transcription}")
     print("\n✅ TESTE CONCLUÍDO")
     print("\n⚠️  Para análise de emoção, é necessário realizar fine-tuning supervisionado com dataset de emoções em português.")
-    # Reconhecimento de fala (transcrição)
-    print("\n🗣️ Transcrevendo áudio...")
-    inputs = processor(audio[0], sampling_rate=sample_rate, return_tensors="pt", padding=True)
-    inputs = {k: v.to("cuda") for k, v in inputs.items()}
-    
-    with torch.no_grad():
-        logits = model(**inputs).logits
-        predicted_ids = torch.argmax(logits, dim=-1)
-        transcription = processor.batch_decode(predicted_ids)[0]
-    
-        print(f"📝 Transcrição: {transcription}")
-        print("\n✅ TESTE CONCLUÍDO")
-        print("\n⚠️  Para análise de emoção, é necessário realizar fine-tuning supervisionado com dataset de emoções em português.")
+    print("ℹ️  O backend usa a cabeça sobre o encoder do Whisper (ver test_shared_encoder.py).")
     return True
 
 if __name__ == "__main__":
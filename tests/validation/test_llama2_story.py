@@ -1,15 +1,7 @@
 import torch
 import time
 from llama_cpp import Llama
-import psutil
-import GPUtil
-
-def get_memory_usage():
-    """Retorna uso de RAM e VRAM"""
-    ram = psutil.Process().memory_info().rss / 1024**3  # GB
-    gpus = GPUtil.getGPUs()
-    vram = gpus[0].memoryUsed / 1024 if gpus else 0  # GB
-    return ram, vram
+from utils import get_memory_usage
 
 def test_llama2():
     print("=" * 60)
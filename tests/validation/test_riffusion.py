@@ -1,3 +1,6 @@
+import sys
+from pathlib import Path
+
 import torch
 from diffusers import StableDiffusionPipeline
 from PIL import Image
@@ -6,11 +9,14 @@ from scipy.io import wavfile
 from test_llama2_story import get_memory_usage
 import time
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from backend.utils.spectrogram_utils import SpectrogramConverter
+
+converter = SpectrogramConverter()
+
 def spectrogram_to_audio(spectrogram_image):
-    """Converte espectrograma para áudio (simplificado)"""
-    # Implementação real requer conversão via Riffusion utils
-    # Aqui é placeholder
-    return np.random.randn(16000 * 5)  # 5s de áudio
+    """Converte espectrograma do Riffusion para áudio (44.1 kHz)"""
+    return converter.image_to_audio(spectrogram_image)
 
 def test_riffusion():
     print("=" * 60)
@@ -61,6 +67,14 @@ def test_riffusion():
         
         # Salvar para inspeção
         image.save(f"test_riffusion_output_{i}.png")
+
+        start = time.time()
+        audio = spectrogram_to_audio(image)
+        conv_time = time.time() - start
+        duration = len(audio) / converter.params.sample_rate
+        wavfile.write(f"test_riffusion_output_{i}.wav", converter.params.sample_rate,
+                      (audio * 32767).astype(np.int16))
+        print(f"🔁 Conversão: {conv_time:.2f}s para {duration:.2f}s de áudio")
         
         if gen_time > 45:
             print("⚠️  AVISO: Tempo alto")
@@ -0,0 +1,59 @@
+"""
+⏱️ Benchmark: Conversor Espectrograma → Áudio (CPU)
+
+Mede o custo do conversor por segundo de áudio, em lote e com tiling.
+Não requer GPU nem pesos do Riffusion.
+
+Uso:
+    python tests/validation/test_spectrogram_converter.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from backend.utils.spectrogram_utils import (
+    SpectrogramConverter,
+    SpectrogramParams,
+    benchmark_converter,
+)
+
+
+def test_spectrogram_converter():
+    print("=" * 60)
+    print("🔁 TESTE: Conversor Espectrograma → Áudio")
+    print("=" * 60)
+
+    for fast in (True, False):
+        label = "FFT da janela" if fast else "FFT acolchoada (400 ms)"
+        params = SpectrogramParams(fast_reconstruction=fast)
+        for batch in (1, 4):
+            result = benchmark_converter(batch=batch, repeats=2, params=params)
+            print(f"\n--- {label} | lote {batch} ---")
+            print(f"⏱️  {result['mean_time_s']:.2f}s para {result['audio_seconds']:.2f}s de áudio")
+            print(f"📊 {result['seconds_per_audio_second']:.3f}s por segundo de áudio")
+            if result["seconds_per_audio_second"] > 1.0:
+                print("⚠️  AVISO: mais lento que tempo real")
+
+    print("\n--- Tiling: 30s a partir de janelas 512x512 ---")
+    converter = SpectrogramConverter()
+    overlap = 64
+    count = converter.windows_needed(30.0, 512, overlap, loop=True)
+    rng = np.random.default_rng(0)
+    windows = [rng.integers(0, 256, size=(512, 512), dtype=np.uint8) for _ in range(count)]
+    start = time.time()
+    audio = converter.tile(windows, overlap, duration_s=30.0, loop=True)
+    elapsed = time.time() - start
+    duration = len(audio) / converter.params.sample_rate
+    print(f"🧩 {count} janelas → {duration:.2f}s em {elapsed:.2f}s "
+          f"({elapsed / duration:.3f}s por segundo de áudio)")
+
+    print("\n✅ TESTE CONCLUÍDO")
+    return True
+
+
+if __name__ == "__main__":
+    test_spectrogram_converter()
@@ -0,0 +1,58 @@
+"""
+⏱️ Benchmark: Backends de Speech-to-Text
+
+Compara o fator de tempo real (RTF) de faster-whisper (int8) e
+openai-whisper no mesmo áudio, com VAD e decodificação em lote.
+
+Uso:
+    python tests/validation/test_stt_backends.py [arquivo.wav]
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from backend import config
+from backend.models.speech_to_text import benchmark_backends
+from backend.utils.audio_utils import decode_audio_bytes, resample
+
+
+def synthetic_speech(seconds: float = 30.0, sample_rate: int = config.STT_SAMPLE_RATE) -> np.ndarray:
+    """Rajadas moduladas separadas por pausas (sem gravação disponível)."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    voiced = (np.sin(2 * np.pi * 0.25 * t) > -0.3).astype(np.float32)
+    tone = np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    return (0.3 * voiced * tone + 0.002 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def test_stt_backends(path: str = None):
+    print("=" * 60)
+    print("🎙️  TESTE: Backends de STT (VAD + lote)")
+    print("=" * 60)
+
+    if path:
+        audio, sr = decode_audio_bytes(Path(path).read_bytes())
+        audio = resample(audio, sr, config.STT_SAMPLE_RATE)
+    else:
+        audio = synthetic_speech()
+    print(f"\n🎵 Áudio: {len(audio) / config.STT_SAMPLE_RATE:.1f}s")
+
+    results = benchmark_backends(audio)
+    for name, result in results.items():
+        print(f"\n--- {name} ---")
+        if "error" in result:
+            print(f"⚠️  {result['error']}")
+            continue
+        print(f"⏳ Carregado em {result['load_time_s']:.2f}s")
+        print(f"⏱️  {result['processing_time_s']:.2f}s | RTF {result['real_time_factor']:.3f}")
+        print(f"📄 Texto: {result['text'][:120]}")
+
+    print("\n✅ TESTE CONCLUÍDO")
+    return True
+
+
+if __name__ == "__main__":
+    test_stt_backends(sys.argv[1] if len(sys.argv) > 1 else None)
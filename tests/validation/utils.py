@@ -1,27 +1,29 @@
 """
 Utilidades compartilhadas para testes de validação.
 """
+import sys
+from pathlib import Path
+
 import psutil
 import torch
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from backend.utils.resource_sampler import _GPUReader
+
+_gpu = _GPUReader()
+
 def get_memory_usage():
     """
-    Retorna uso atual de RAM e VRAM.
-    
+    Retorna uso atual de RAM (RSS do processo) e VRAM.
+
+    A VRAM vem do mesmo leitor do amostrador do backend (NVML, que vê
+    também o llama.cpp, ou PyTorch), sem chamar ``nvidia-smi``.
+
     Returns:
         tuple: (ram_gb, vram_gb)
     """
-    # RAM
-    ram_bytes = psutil.Process().memory_info().rss
-    ram_gb = ram_bytes / (1024 ** 3)
-    
-    # VRAM
-    vram_gb = 0
-    if torch.cuda.is_available():
-        vram_bytes = torch.cuda.memory_allocated(0)
-        vram_gb = vram_bytes / (1024 ** 3)
-    
-    return ram_gb, vram_gb
+    ram_gb = psutil.Process().memory_info().rss / (1024 ** 3)
+    return ram_gb, _gpu.used_gb()
 
 def print_memory_stats(label=""):
     """Imprime estatísticas de memória formatadas."""